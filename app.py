@@ -4,9 +4,11 @@ Main application file for the Excel Template Converter web interface.
 """
 
 import streamlit as st
+import io
 import time
 import threading
-from typing import Dict, Any
+from functools import partial
+from typing import Dict, Any, BinaryIO
 from pathlib import Path
 import logging
 
@@ -21,6 +23,7 @@ from ui_components import (
 from streamlit_pipeline import StreamlitTSSPipeline, ProgressCallback, ResourceManager
 from common.security import SecurityError, validate_path_security, generate_secure_filename
 from common.session_manager import session_manager, ProcessingState, safe_update_session_state, safe_get_session_value
+from common.job_queue import get_job_queue, Job, JobStatus, QueueFullError
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -66,162 +69,129 @@ def initialize_session_state():
         if 'pipeline' not in st.session_state:
             st.session_state.pipeline = StreamlitTSSPipeline()
 
-def process_file_sync(file_data: bytes, filename: str):
-    """Process file synchronously with enhanced security and resource management"""
+def get_conversion_queue():
+    """Get the process-wide conversion job queue sized from the app configuration"""
+    return get_job_queue(
+        max_workers=STREAMLIT_CONFIG.get("max_concurrent_uploads", 3),
+        max_queued=STREAMLIT_CONFIG.get("max_queued_jobs", 10),
+        retention_seconds=STREAMLIT_CONFIG.get("job_retention_minutes", 60) * 60
+    )
+
+def persist_output_file(output_file: Path, job_id: str) -> Path:
+    """Copy a final workbook to the download location before its session is cleaned up"""
+    import shutil
+    persistent_output_dir = Path("temp/downloads")
+    
+    # Security: validate output directory
+    if not validate_path_security(persistent_output_dir, Path.cwd()):
+        raise SecurityError("Output directory path validation failed")
+    
+    persistent_output_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+    
+    # Generate secure output filename with date format; the job ID keeps concurrent jobs apart
+    from datetime import datetime
+    current_date = datetime.now().strftime("%Y%m%d")
+    secure_output_name = f"TSS_Converted_{current_date}_{job_id[:12]}.xlsx"
+    persistent_file_path = persistent_output_dir / secure_output_name
+    
+    # Security: validate final output path
+    if not validate_path_security(persistent_file_path, Path.cwd()):
+        raise SecurityError("Output file path validation failed")
+    
+    shutil.copy2(output_file, persistent_file_path)
+    persistent_file_path.chmod(0o600)  # Secure file permissions
+    
+    logger.info(f"File processed successfully: {persistent_file_path}")
+    return persistent_file_path
+
+def run_conversion_job(job: Job, upload: BinaryIO, filename: str) -> Dict[str, Any]:
+    """
+    Convert an uploaded file on a job queue worker thread
+    
+    Runs outside the Streamlit script thread, where session state is not
+    available, so the pipeline runs with session state disabled and reports
+    through the job (progress and result); the session collects the result
+    in poll_conversion_job().
+    
+    Args:
+        job: Job to report progress to
+        upload: Uploaded file content; closed once it is saved, so the bytes
+            are not held while the pipeline runs
+        filename: Internal upload name
+    
+    Returns:
+        Dictionary with success, output_file_path, processing_stats and message
+    """
     temp_files = []
+    pipeline = StreamlitTSSPipeline(use_session_state=False)
     
     try:
-        # Update processing state securely
-        session_manager.update_processing_state(ProcessingState.UPLOADING)
-        
-        # Initialize pipeline
-        pipeline = StreamlitTSSPipeline()
-        
         # Security: validate file before processing
-        if len(file_data) == 0:
+        if upload.seek(0, io.SEEK_END) == 0:
             raise SecurityError("Empty file uploaded")
-            
+        upload.seek(0)
+        
         # Use secure filename generation
         secure_filename = generate_secure_filename("upload")
         logger.info(f"Processing file with secure name: {secure_filename}")
         
-        # Save uploaded file securely
-        session_manager.update_processing_state(ProcessingState.VALIDATING)
-        input_file_path = pipeline.save_uploaded_file(file_data, secure_filename)
+        # Save uploaded file securely; it is hashed on the way, and from here on only the saved file is used
+        job.update_progress({"message": "Validating file..."})
+        input_file_path = pipeline.save_uploaded_file(upload, secure_filename)
         temp_files.append(input_file_path)
+        upload.close()
+        
+        # Identical upload with the same configuration - serve the cached result
+        cached_result = pipeline.get_cached_result(input_file_path)
+        if cached_result:
+            cached_output, stats = cached_result
+            return {
+                "success": True,
+                "output_file_path": str(persist_output_file(cached_output, job.job_id)),
+                "processing_stats": stats,
+                "message": "Processing completed successfully!"
+            }
         
         # Validate file
         is_valid, error_message = pipeline.validate_input_file(input_file_path)
         if not is_valid:
-            safe_update_session_state({
-                'processing': False,
-                'progress_data': {
-                    "error": True,
-                    "message": f"File validation failed: {error_message}"
-                }
-            })
-            session_manager.update_processing_state(ProcessingState.ERROR)
-            return
+            return {
+                "success": False,
+                "processing_stats": {},
+                "message": f"File validation failed: {error_message}"
+            }
         
-        # Create progress placeholder
-        progress_placeholder = st.empty()
+        # Progress updates go to the job; they also check for cancellation between steps
+        progress_callback = ProgressCallback(job.update_progress)
         
-        def update_ui_progress(progress_data):
-            """Update UI progress synchronously with secure session management"""
-            try:
-                step = progress_data.get("current_step", 0)
-                message = progress_data.get("message", "Processing...")
-                
-                # Update session state securely
-                current_progress = safe_get_session_value('progress_data', {})
-                current_progress.update(progress_data)
-                
-                safe_update_session_state({
-                    'progress_data': current_progress
-                })
-                
-                # Update UI
-                with progress_placeholder.container():
-                    completed_steps = sum(1 for status in progress_data.get("step_status", {}).values() if status == "completed")
-                    progress_percentage = int((completed_steps / 6) * 100)
-                    st.progress(completed_steps / 6, text=f"📊 Progress: {progress_percentage}% ({completed_steps}/6 steps completed)")
-                    
-            except Exception as e:
-                logger.warning(f"Progress update error: {e}")
-            
+        with ResourceManager(pipeline.temp_dir):
+            success, output_file, stats = pipeline.process_pipeline(input_file_path, progress_callback)
         
-        # Create progress callback
-        progress_callback = ProgressCallback(update_ui_progress)
+        # The pipeline reports a cancellation as a failed step
+        job.check_cancelled()
         
-        # Run pipeline with progress updates using resource manager
-        session_manager.update_processing_state(ProcessingState.PROCESSING)
-        
-        with ResourceManager(pipeline.temp_dir) as rm:
-            with st.spinner("🔄 Processing file..."):
-                success, output_file, stats = pipeline.process_pipeline(
-                    input_file_path, progress_callback
-                )
-            
-            if output_file:
-                # DO NOT add output_file to ResourceManager cleanup - we need to keep it!
-                # rm.add_temp_file(output_file)  # ← REMOVED: This was deleting our output file!
-                temp_files.append(output_file)
+        if not success:
+            return {
+                "success": False,
+                "processing_stats": stats,
+                "message": f"Processing failed: {stats.get('error_message', 'Unknown error')}"
+            }
         
-        if success:
-            # Copy file to a persistent location before cleanup with security validation
-            import shutil
-            persistent_output_dir = Path("temp/downloads")
-            
-            # Security: validate output directory
-            if not validate_path_security(persistent_output_dir, Path.cwd()):
-                raise SecurityError("Output directory path validation failed")
-                
-            persistent_output_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
-            
-            # Generate secure output filename with date format
-            from datetime import datetime
-            current_date = datetime.now().strftime("%Y%m%d")
-            secure_output_name = f"TSS_Converted_{current_date}.xlsx"
-            persistent_file_path = persistent_output_dir / secure_output_name
-            
-            # Security: validate final output path
-            if not validate_path_security(persistent_file_path, Path.cwd()):
-                raise SecurityError("Output file path validation failed")
-            
-            shutil.copy2(output_file, persistent_file_path)
-            persistent_file_path.chmod(0o600)  # Secure file permissions
-            
-            # Set session state after successful file copy
-            safe_update_session_state({
-                'processing_complete': True,
-                'output_file_path': str(persistent_file_path),
-                'processing_stats': stats,
-                'progress_data': {
-                    "message": "Processing completed successfully!",
-                    "error": False
-                }
-            })
-            
-            session_manager.update_processing_state(ProcessingState.COMPLETED)
-            logger.info(f"File processed successfully: {persistent_file_path}")
-            
-        else:
-            safe_update_session_state({
-                'progress_data': {
-                    "error": True,
-                    "message": f"Processing failed: {stats.get('error_message', 'Unknown error')}"
-                },
-                'processing_stats': stats
-            })
-            session_manager.update_processing_state(ProcessingState.ERROR)
-            
-        # Cleanup session but keep output file
+        temp_files.append(output_file)
+        return {
+            "success": True,
+            "output_file_path": str(persist_output_file(output_file, job.job_id)),
+            "processing_stats": stats,
+            "message": "Processing completed successfully!"
+        }
+    
+    finally:
+        # Cleanup session but keep the persisted output file
         try:
             pipeline.cleanup_session()
         except Exception as cleanup_error:
             logger.warning(f"Session cleanup error: {cleanup_error}")
-                
-    except SecurityError as se:
-        logger.error(f"Security error during processing: {se}")
-        safe_update_session_state({
-            'progress_data': {
-                "error": True,
-                "message": f"Security error: {str(se)}"
-            }
-        })
-        session_manager.update_processing_state(ProcessingState.ERROR)
-        
-    except Exception as e:
-        logger.error(f"Processing error: {e}")
-        safe_update_session_state({
-            'progress_data': {
-                "error": True,
-                "message": f"Error during processing: {str(e)}"
-            }
-        })
-        session_manager.update_processing_state(ProcessingState.ERROR)
         
-    finally:
         # Secure cleanup of temporary files
         for temp_file in temp_files:
             try:
@@ -230,10 +200,89 @@ def process_file_sync(file_data: bytes, filename: str):
                     temp_path.unlink(missing_ok=True)
             except Exception as cleanup_error:
                 logger.warning(f"Temp file cleanup error for {temp_file}: {cleanup_error}")
+
+def submit_conversion(file_data: bytes, filename: str) -> str:
+    """
+    Queue an uploaded file for background conversion and remember the job in the session
+    
+    Raises:
+        QueueFullError: If the server already has the maximum number of pending conversions
+    """
+    session_manager.update_processing_state(ProcessingState.UPLOADING)
+    job_id = get_conversion_queue().submit(partial(run_conversion_job, upload=io.BytesIO(file_data), filename=filename),
+                                           name=filename)
+    
+    safe_update_session_state({'job_id': job_id})
+    session_manager.update_processing_state(ProcessingState.PROCESSING)
+    return job_id
+
+def poll_conversion_job():
+    """
+    Copy the state of the session's job into session state
+    
+    Called on every rerun while processing; once the job has finished its
+    result is published and processing ends.
+    
+    Returns:
+        True if the job is still queued or running
+    """
+    job_queue = get_conversion_queue()
+    job_id = safe_get_session_value('job_id')
+    job = job_queue.get(job_id) if job_id else None
+    
+    if job is None:
+        # Unknown job (e.g. the server restarted) - nothing left to wait for
+        safe_update_session_state({
+            'processing': False,
+            'job_id': None,
+            'progress_data': {"error": True, "message": "Conversion job was lost, please try again"}
+        })
+        session_manager.update_processing_state(ProcessingState.ERROR)
+        return False
+    
+    status = JobStatus(job["status"])
+    
+    if status in (JobStatus.QUEUED, JobStatus.RUNNING):
+        # Jobs cannot be interrupted, so an overdue job is asked to stop at its next step
+        timeout = STREAMLIT_CONFIG.get("processing_timeout_minutes", 10) * 60
+        if job["started_at"] and time.time() - job["started_at"] > timeout and not job["cancel_requested"]:
+            logger.warning(f"Job {job_id[:8]} exceeded {timeout}s, cancelling")
+            job_queue.cancel(job_id)
         
-        safe_update_session_state({'processing': False})
-        # Force UI refresh to show results (success or error)
-        st.rerun()
+        progress = job["progress"]
+        if status == JobStatus.QUEUED:
+            stats = job_queue.get_stats()
+            progress["message"] = f"Waiting in queue ({stats['queued']} waiting, {stats['running']} running)..."
+        safe_update_session_state({'progress_data': progress})
+        return True
+    
+    result = job["result"] or {}
+    if status == JobStatus.COMPLETED and result.get("success"):
+        safe_update_session_state({
+            'processing_complete': True,
+            'output_file_path': result["output_file_path"],
+            'processing_stats': result["processing_stats"],
+            'progress_data': {
+                "message": result["message"],
+                "error": False
+            }
+        })
+        session_manager.update_processing_state(ProcessingState.COMPLETED)
+    else:
+        message = result.get("message") or job["error_message"] or "Unknown error"
+        if status == JobStatus.FAILED:
+            message = f"Error during processing: {message}"
+        safe_update_session_state({
+            'progress_data': {
+                "error": True,
+                "message": message
+            },
+            'processing_stats': result.get("processing_stats", {})
+        })
+        session_manager.update_processing_state(ProcessingState.ERROR)
+    
+    safe_update_session_state({'processing': False, 'job_id': None})
+    return False
 
 def main():
     """Main application function"""
@@ -291,9 +340,19 @@ def main():
                         }
                     })
                     
-                    # Start synchronous processing
+                    # Queue the conversion; progress is polled on the following reruns
                     logger.info(f"Starting file processing: {filename}")
-                    process_file_sync(file_data, filename)
+                    submit_conversion(file_data, filename)
+                    
+                    # The job owns the upload now; don't keep a second reference in the session
+                    file_info.pop('data', None)
+                    st.rerun()
+                    
+                except QueueFullError as qe:
+                    logger.warning(f"Conversion rejected: {qe}")
+                    st.warning(qe.message)
+                    safe_update_session_state({'processing': False})
+                    session_manager.update_processing_state(ProcessingState.IDLE)
                     
                 except SecurityError as se:
                     logger.error(f"Security error starting conversion: {se}")
@@ -310,6 +369,10 @@ def main():
     else:
         # Processing and results with minimal spacing - use secure session state
         processing = safe_get_session_value('processing', False)
+        if processing and not poll_conversion_job():
+            # Job finished since the last rerun - render the result
+            st.rerun()
+        
         if processing:
             # Compact progress display - prioritize visibility
             progress_data = safe_get_session_value('progress_data', {})
@@ -326,6 +389,16 @@ def main():
                     step_status=progress_data.get("step_status", {}),
                     compact=True
                 )
+                
+                col1, col2, col3 = st.columns([0.5, 2, 0.5])
+                with col2:
+                    job_id = safe_get_session_value('job_id')
+                    if st.button("⏹️ Cancel Conversion", type="secondary") and job_id:
+                        get_conversion_queue().cancel(job_id)
+            
+            # Keep polling the background job; the sleep only holds this session's script thread
+            time.sleep(STREAMLIT_CONFIG.get("job_poll_interval_seconds", 1.0))
+            st.rerun()
         
         # Download section - optimized spacing with secure session state
         processing_complete = safe_get_session_value('processing_complete', False)
@@ -392,8 +465,13 @@ def main():
 if __name__ == "__main__":
     # Set up proper error handling with security considerations
     try:
-        # Ensure session cleanup on app restart
+        # Ensure session cleanup on app restart; idle session locks are also evicted in the background
         try:
+            session_manager.configure_lock_registry(
+                ttl_seconds=STREAMLIT_CONFIG.get("session_timeout_minutes", 30) * 60,
+                max_entries=STREAMLIT_CONFIG.get("max_session_locks", 1000),
+                sweep_interval=STREAMLIT_CONFIG.get("session_lock_sweep_seconds", 60)
+            )
             session_manager.cleanup_old_sessions(max_age_hours=1.0)
         except Exception as cleanup_error:
             logger.warning(f"Old session cleanup error: {cleanup_error}")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Batch Conversion
+Runs the full six-step pipeline over directories or globs of TSS workbooks on a worker pool.
+
+Input: Source Excel files, directories of them, or glob patterns
+Output: One final workbook per input plus a JSON summary with per-file timings and quality scores
+"""
+
+import glob
+import json
+import logging
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+import argparse
+import sys
+
+from common.config import get_config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SUMMARY_FILENAME = "batch_summary.json"
+
+def _init_batch_worker(log_level: int) -> None:
+    """Set up a batch worker process; step logs are noisy with many files in flight"""
+    logging.getLogger().setLevel(log_level)
+
+def _result_record(input_file: Union[str, Path]) -> Dict[str, Any]:
+    """Empty result record for one input file"""
+    return {
+        "input_file": str(input_file),
+        "output_file": None,
+        "success": False,
+        "processing_time": None,
+        "quality_score": None,
+        "warnings_count": None,
+        "errors_count": None,
+        "error_message": None,
+        "step_metrics": None
+    }
+
+def convert_file(input_file: Union[str, Path], output_dir: Union[str, Path],
+                 upload_name: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the six-step pipeline on one file and copy the final workbook to output_dir
+    
+    The file goes through the same path as an upload in the web app: security
+    validation, an isolated session directory, input validation and the
+    pipeline, after which the session is cleaned up.
+    
+    Args:
+        input_file: Source Excel file
+        output_dir: Directory receiving the final workbook
+        upload_name: Filename to process the file under (defaults to its own name)
+    
+    Returns:
+        Result record with input, output, success, timing and quality fields
+    """
+    # Imported here so the pool can start workers before the pipeline modules load
+    from streamlit_pipeline import StreamlitTSSPipeline
+    
+    input_file = Path(input_file)
+    start_time = time.time()
+    record = _result_record(input_file)
+    
+    pipeline = StreamlitTSSPipeline()
+    # Each file is converted once per batch, so the result cache would only add writes
+    pipeline.result_cache = None
+    
+    try:
+        # Streamed to the session directory, so the batch never holds a whole workbook's bytes
+        with input_file.open("rb") as upload:
+            input_path = pipeline.save_uploaded_file(upload, upload_name or input_file.name)
+        
+        is_valid, error_message = pipeline.validate_input_file(input_path)
+        if not is_valid:
+            record["error_message"] = error_message
+            return record
+        
+        success, final_output, stats = pipeline.process_pipeline(input_path)
+        record.update({
+            "success": success,
+            "quality_score": stats.get("quality_score"),
+            "warnings_count": stats.get("warnings_count"),
+            "errors_count": stats.get("errors_count"),
+            "error_message": stats.get("error_message"),
+            "step_metrics": stats.get("step_metrics")
+        })
+        
+        if success:
+            output_file = Path(output_dir) / final_output.name
+            shutil.copy2(str(final_output), str(output_file))
+            record["output_file"] = str(output_file)
+    
+    except Exception as e:
+        record["success"] = False
+        record["error_message"] = str(e)
+    finally:
+        record["processing_time"] = time.time() - start_time
+        pipeline.cleanup_session()
+    
+    return record
+
+class BatchConverter:
+    """
+    Batch converter for many TSS workbooks
+    
+    Each file is converted independently by convert_file on a process pool
+    sized by general.max_workers; results are reported in input order.
+    """
+    
+    def __init__(self, output_dir: Union[str, Path], max_workers: Optional[int] = None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        
+        if max_workers is None:
+            max_workers = get_config().get("general.max_workers", 4)
+        self.max_workers = max(1, int(max_workers))
+    
+    def collect_input_files(self, inputs: List[str]) -> List[Path]:
+        """
+        Resolve files, directories and glob patterns to a list of Excel files
+        
+        Args:
+            inputs: File paths, directories (searched non-recursively) or glob patterns
+        
+        Returns:
+            Unique Excel files in the order given, each directory or pattern sorted
+        """
+        files = []
+        seen = set()
+        for item in inputs:
+            path = Path(item)
+            if path.is_dir():
+                candidates = sorted(path.glob("*.xlsx"))
+            elif glob.has_magic(item):
+                candidates = sorted(Path(match) for match in glob.glob(item, recursive=True))
+            else:
+                candidates = [path]
+            
+            for candidate in candidates:
+                # Excel keeps "~$name.xlsx" lock files next to open workbooks
+                if candidate.name.startswith("~$"):
+                    continue
+                if not candidate.is_file() or candidate.suffix.lower() != ".xlsx":
+                    logger.warning(f"⚠️  Skipped: {candidate} (not found or not Excel file)")
+                    continue
+                if candidate.resolve() not in seen:
+                    seen.add(candidate.resolve())
+                    files.append(candidate)
+        
+        return files
+    
+    def _upload_names(self, input_files: List[Path]) -> List[str]:
+        """Give inputs from different directories with the same name distinct names"""
+        names = []
+        seen = {}
+        for input_file in input_files:
+            count = seen.get(input_file.name.lower(), 0) + 1
+            seen[input_file.name.lower()] = count
+            names.append(input_file.name if count == 1 else f"{input_file.stem} ({count}){input_file.suffix}")
+        return names
+    
+    def run(self, input_files: List[Path], log_level: int = logging.WARNING) -> Dict[str, Any]:
+        """
+        Convert files on the worker pool and build the batch summary
+        
+        Args:
+            input_files: Excel files to convert
+            log_level: Log level inside worker processes
+        
+        Returns:
+            Summary dictionary with totals and per-file result records
+        """
+        start_time = time.time()
+        started_at = datetime.now().isoformat(timespec="seconds")
+        upload_names = self._upload_names(input_files)
+        records: List[Optional[Dict[str, Any]]] = [None] * len(input_files)
+        workers = min(self.max_workers, len(input_files)) or 1
+        
+        logger.info(f"📦 Converting {len(input_files)} files on {workers} worker processes")
+        
+        if workers == 1:
+            for index, input_file in enumerate(input_files):
+                records[index] = convert_file(input_file, self.output_dir, upload_names[index])
+                self._log_record(records[index], index + 1, len(input_files))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                     initargs=(log_level,)) as executor:
+                futures = {
+                    executor.submit(convert_file, str(input_file), str(self.output_dir), upload_names[index]): index
+                    for index, input_file in enumerate(input_files)
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    index = futures[future]
+                    try:
+                        records[index] = future.result()
+                    except BrokenProcessPool as e:
+                        # A worker died (e.g. out of memory); its file cannot be retried safely here
+                        records[index] = _result_record(input_files[index])
+                        records[index]["error_message"] = f"Worker process failed: {e}"
+                    self._log_record(records[index], done, len(input_files))
+        
+        scores = [r["quality_score"] for r in records if r["success"] and r["quality_score"] is not None]
+        succeeded = sum(1 for r in records if r["success"])
+        summary = {
+            "started_at": started_at,
+            "total_time": time.time() - start_time,
+            "max_workers": workers,
+            "files_total": len(records),
+            "files_succeeded": succeeded,
+            "files_failed": len(records) - succeeded,
+            "average_quality_score": sum(scores) / len(scores) if scores else None,
+            "results": records
+        }
+        
+        logger.info(f"✅ Batch completed: {succeeded}/{len(records)} files in {summary['total_time']:.1f}s")
+        return summary
+    
+    def _log_record(self, record: Dict[str, Any], done: int, total: int) -> None:
+        """Log the outcome of one file"""
+        name = Path(record["input_file"]).name
+        if record["success"]:
+            logger.info(f"[{done}/{total}] ✅ {name}: {record['processing_time']:.1f}s, "
+                        f"quality {record['quality_score']:.1f}/100")
+        else:
+            logger.error(f"[{done}/{total}] ❌ {name}: {record['error_message']}")
+    
+    def write_summary(self, summary: Dict[str, Any], summary_file: Optional[Union[str, Path]] = None) -> Path:
+        """
+        Write the batch summary as JSON
+        
+        Args:
+            summary: Summary from run()
+            summary_file: Output path (defaults to batch_summary.json in the output directory)
+        
+        Returns:
+            Path to the summary file
+        """
+        summary_file = Path(summary_file) if summary_file else self.output_dir / SUMMARY_FILENAME
+        with open(summary_file, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        return summary_file
+
+def main():
+    """Command line interface for batch conversion"""
+    parser = argparse.ArgumentParser(description='Batch Converter - Run all six steps over many files')
+    parser.add_argument('inputs', nargs='+', help='Input Excel files, directories or glob patterns')
+    parser.add_argument('-o', '--output-dir', help='Output directory', default='output/batch')
+    parser.add_argument('-w', '--workers', type=int, help='Worker processes (default: general.max_workers)')
+    parser.add_argument('-s', '--summary', help='Summary JSON path (default: <output-dir>/batch_summary.json)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Verbose logging (including worker steps)')
+    
+    args = parser.parse_args()
+    
+    # Configure logging level
+    if args.verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    
+    converter = BatchConverter(args.output_dir, args.workers)
+    input_files = converter.collect_input_files(args.inputs)
+    if not input_files:
+        logger.error("❌ Error: No Excel files found")
+        sys.exit(1)
+    
+    summary = converter.run(input_files, logging.INFO if args.verbose else logging.WARNING)
+    summary_file = converter.write_summary(summary, args.summary)
+    
+    print(f"\n{'✅' if not summary['files_failed'] else '⚠️ '} {summary['files_succeeded']}/{summary['files_total']} files converted")
+    print(f"📁 Output: {converter.output_dir}")
+    print(f"📊 Summary: {summary_file}")
+    
+    if summary['files_failed']:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Times each step class and the full pipeline on the bundled inputs and larger synthetic workbooks.
+
+Input: input/*.xlsx plus synthetic (or scaled) workbooks of the requested requirement row counts
+Output: JSON results with per-step time and peak memory, optionally compared against a baseline
+"""
+
+import argparse
+import json
+import logging
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import openpyxl
+
+from common.step_metrics import StepMetrics, measure_step
+from benchmarks.workbooks import build_scaled_workbook, count_requirement_rows
+from benchmarks import synthetic_workbook
+from benchmarks.synthetic_workbook import SyntheticWorkbookSpec, generate_workbook
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent.parent
+DEFAULT_SIZES = [1000, 10000, 100000]
+WORKBOOK_CACHE_DIR = ROOT_DIR / "temp" / "benchmarks"
+SUITES = ("steps", "pipeline")
+
+def run_step_classes(input_file: Path, work_dir: Path, trace_memory: bool) -> List[StepMetrics]:
+    """
+    Run the six step classes through their file-based entry points
+    
+    Each step reads the previous step's output from work_dir/output, like the
+    command line scripts do.
+    
+    Args:
+        input_file: Source workbook
+        work_dir: Base directory for the step classes
+        trace_memory: Trace Python allocations for peak memory
+    
+    Returns:
+        Metrics of each step in order
+    """
+    from step1_template_creation import TemplateCreator
+    from step2_data_extraction import DataExtractor
+    from step3_pre_mapping_fill import PreMappingFiller
+    from step4_data_mapping import DataMapper
+    from step5_filter_deduplicate import DataFilter
+    from step6_article_crossref import ArticleCrossReference
+    
+    base_dir = str(work_dir)
+    step_calls: List[Callable[[Dict[int, str]], str]] = [
+        lambda out: TemplateCreator(base_dir).create_template(input_file),
+        lambda out: DataExtractor(base_dir).process_file(out[1], input_file),
+        lambda out: PreMappingFiller(base_dir).process_file(input_file),
+        lambda out: DataMapper(base_dir).process_file(out[3]),
+        lambda out: DataFilter(base_dir).process_file(out[4]),
+        lambda out: ArticleCrossReference(base_dir).process_file(out[5])
+    ]
+    step_names = ["Create Template", "Extract Data", "Pre-mapping Fill",
+                  "Data Mapping", "Filter & Deduplicate", "Article Cross-Reference"]
+    
+    outputs: Dict[int, str] = {}
+    results = []
+    for step_num, (call, name) in enumerate(zip(step_calls, step_names), start=1):
+        with measure_step(step_num, name, trace_memory) as metrics:
+            outputs[step_num] = call(outputs)
+        results.append(metrics)
+    return results
+
+def run_pipeline(input_file: Path, work_dir: Path, trace_memory: bool) -> List[StepMetrics]:
+    """
+    Run StreamlitTSSPipeline.process_pipeline as the web app does
+    
+    Args:
+        input_file: Source workbook
+        work_dir: Session base directory
+        trace_memory: Trace Python allocations for peak memory
+    
+    Returns:
+        Metrics of each step in order, taken from processing_stats
+    """
+    from config_streamlit import STREAMLIT_CONFIG
+    from streamlit_pipeline import StreamlitTSSPipeline
+    
+    saved_config = {key: STREAMLIT_CONFIG.get(key) for key in ("collect_step_metrics", "metrics_trace_memory")}
+    STREAMLIT_CONFIG.update({"collect_step_metrics": True, "metrics_trace_memory": trace_memory})
+    
+    pipeline = StreamlitTSSPipeline(temp_dir=work_dir)
+    # Every run must do the full work
+    pipeline.result_cache = None
+    try:
+        with input_file.open("rb") as upload:
+            input_path = pipeline.save_uploaded_file(upload, input_file.name)
+        success, _, stats = pipeline.process_pipeline(input_path)
+        if not success:
+            raise RuntimeError(stats.get("error_message") or "Pipeline failed")
+        return [StepMetrics(**record) for record in stats["step_metrics"]]
+    finally:
+        pipeline.cleanup_session()
+        STREAMLIT_CONFIG.update(saved_config)
+
+SUITE_RUNNERS = {"steps": run_step_classes, "pipeline": run_pipeline}
+
+def benchmark_case(input_file: Path, suite: str, repeat: int, trace_memory: bool) -> Dict[str, Any]:
+    """
+    Benchmark one input with one suite
+    
+    Times are medians over repeat untraced runs; peak memory comes from one
+    extra run with tracemalloc enabled, since tracing distorts the timings.
+    
+    Args:
+        input_file: Source workbook
+        suite: "steps" or "pipeline"
+        repeat: Number of timed runs
+        trace_memory: Add the traced run for peak memory
+    
+    Returns:
+        Result dictionary with total time and per-step measurements
+    """
+    runner = SUITE_RUNNERS[suite]
+    runs = []
+    traced = None
+    for index in range(repeat + (1 if trace_memory else 0)):
+        tracing = trace_memory and index == repeat
+        work_dir = Path(tempfile.mkdtemp(prefix="tss_bench_"))
+        try:
+            metrics = runner(input_file, work_dir, tracing)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        if tracing:
+            traced = metrics
+        else:
+            runs.append(metrics)
+    
+    steps = []
+    for step_index, first in enumerate(runs[0]):
+        samples = [run[step_index] for run in runs]
+        steps.append({
+            "step_num": first.step_num,
+            "name": first.name,
+            "wall_time": statistics.median(m.wall_time for m in samples),
+            "cpu_time": statistics.median(m.cpu_time for m in samples),
+            "traced_peak_kb": traced[step_index].traced_peak_kb if traced else None,
+            "cells_read": first.cells_read,
+            "cells_written": first.cells_written,
+            "rows_in": first.rows_in,
+            "rows_out": first.rows_out
+        })
+    
+    return {
+        "total_time": statistics.median(sum(m.wall_time for m in run) for run in runs),
+        "steps": steps
+    }
+
+def prepare_inputs(inputs: List[str], sizes: List[int], template: Optional[Path] = None) -> Dict[str, Path]:
+    """
+    Resolve the bundled inputs and build (or reuse) the workbooks for each size
+    
+    Sizes are served by synthetic workbooks, or by scaling template when
+    one is given. Generated workbooks are cached under temp/benchmarks, keyed
+    by source and size, and rebuilt when their source changes, so repeated
+    runs measure identical files.
+    
+    Args:
+        inputs: Bundled input files
+        sizes: Requirement row counts of the generated workbooks
+        template: Workbook to scale instead of generating synthetic ones
+    
+    Returns:
+        Dictionary of case name to input file
+    """
+    cases = {Path(item).name: Path(item) for item in inputs}
+    for size in sizes:
+        if template:
+            name, source = f"scaled-{size}", Path(template)
+            output = WORKBOOK_CACHE_DIR / f"{source.stem}-{size}.xlsx"
+        else:
+            name, source = f"synthetic-{size}", Path(synthetic_workbook.__file__)
+            output = WORKBOOK_CACHE_DIR / f"synthetic-{size}.xlsx"
+        
+        if not output.exists() or output.stat().st_mtime < source.stat().st_mtime:
+            logger.info(f"🔧 Building {output.name}...")
+            if template:
+                build_scaled_workbook(template, size, output)
+            else:
+                generate_workbook(output, SyntheticWorkbookSpec.for_total_rows(size))
+        cases[name] = output
+    return cases
+
+def run_benchmarks(cases: Dict[str, Path], suites: List[str], repeat: int = 3,
+                   trace_memory: bool = True) -> Dict[str, Any]:
+    """
+    Run every suite on every case
+    
+    Args:
+        cases: Case name to input file, from prepare_inputs()
+        suites: Suites to run ("steps", "pipeline")
+        repeat: Timed runs per case and suite
+        trace_memory: Measure peak memory with an extra traced run
+    
+    Returns:
+        Results dictionary (see compare_results() for the baseline format)
+    """
+    results = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "openpyxl": openpyxl.__version__
+        },
+        "repeat": repeat,
+        "cases": {}
+    }
+    
+    for case_name, input_file in cases.items():
+        case = {"requirement_rows": sum(count_requirement_rows(input_file).values())}
+        for suite in suites:
+            logger.info(f"⏱️ {case_name} / {suite}...")
+            start_time = time.time()
+            try:
+                case[suite] = benchmark_case(input_file, suite, repeat, trace_memory)
+            except Exception as e:
+                logger.error(f"❌ {case_name} / {suite} failed: {e}")
+                case[suite] = {"error": str(e)}
+                continue
+            logger.info(f"✅ {case_name} / {suite}: {case[suite]['total_time']:.2f}s per run "
+                        f"({time.time() - start_time:.1f}s total)")
+        results["cases"][case_name] = case
+    
+    return results
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.25,
+                    min_time_delta: float = 0.05, min_memory_delta_kb: float = 1024) -> List[Dict[str, Any]]:
+    """
+    Find regressions against a baseline run
+    
+    A measurement regresses when it exceeds the baseline by more than
+    tolerance (relative) and by more than the minimum absolute delta, so
+    noise on very short steps is not reported. Cases, suites or steps missing
+    from either side are skipped.
+    
+    Args:
+        current: Results from run_benchmarks()
+        baseline: Earlier results in the same format
+        tolerance: Allowed relative increase (0.25 = 25%)
+        min_time_delta: Ignore time increases below this many seconds
+        min_memory_delta_kb: Ignore peak memory increases below this many KB
+    
+    Returns:
+        List of regressions with case, suite, step, metric, baseline and current values
+    """
+    regressions = []
+    
+    def check(case_name, suite, step, metric, old, new, min_delta):
+        if old is None or new is None:
+            return
+        if new > old * (1 + tolerance) and new - old > min_delta:
+            regressions.append({
+                "case": case_name, "suite": suite, "step": step, "metric": metric,
+                "baseline": old, "current": new, "ratio": new / old if old else None
+            })
+    
+    for case_name, case in current.get("cases", {}).items():
+        baseline_case = baseline.get("cases", {}).get(case_name, {})
+        for suite in SUITES:
+            new_suite, old_suite = case.get(suite), baseline_case.get(suite)
+            if not new_suite or not old_suite or "error" in new_suite or "error" in old_suite:
+                continue
+            
+            check(case_name, suite, "total", "wall_time",
+                  old_suite["total_time"], new_suite["total_time"], min_time_delta)
+            
+            old_steps = {step["step_num"]: step for step in old_suite["steps"]}
+            for step in new_suite["steps"]:
+                old_step = old_steps.get(step["step_num"])
+                if old_step is None:
+                    continue
+                check(case_name, suite, step["step_num"], "wall_time",
+                      old_step["wall_time"], step["wall_time"], min_time_delta)
+                check(case_name, suite, step["step_num"], "traced_peak_kb",
+                      old_step.get("traced_peak_kb"), step.get("traced_peak_kb"), min_memory_delta_kb)
+    
+    return regressions
+
+def print_results(results: Dict[str, Any]) -> None:
+    """Print a per-step table for every case and suite"""
+    for case_name, case in results["cases"].items():
+        print(f"\n📊 {case_name} ({case['requirement_rows']} requirement rows)")
+        for suite in SUITES:
+            if suite not in case:
+                continue
+            if "error" in case[suite]:
+                print(f"  {suite:<9} ❌ {case[suite]['error']}")
+                continue
+            print(f"  {suite:<9} total {case[suite]['total_time']:8.2f}s")
+            for step in case[suite]["steps"]:
+                peak = f"{step['traced_peak_kb'] / 1024:8.1f} MB" if step["traced_peak_kb"] is not None else "       -"
+                print(f"    Step {step['step_num']} {step['name']:<24} {step['wall_time']:8.2f}s "
+                      f"{step['cpu_time']:8.2f}s CPU {peak} peak")
+
+def main():
+    """Command line interface for the benchmark suite"""
+    parser = argparse.ArgumentParser(description='Benchmark Suite - Time and memory per step on bundled and synthetic inputs')
+    parser.add_argument('--inputs', nargs='*', help='Input Excel files (default: input/*.xlsx)')
+    parser.add_argument('--sizes', type=int, nargs='*', default=DEFAULT_SIZES,
+                        help='Requirement rows of synthetic workbooks (default: 1000 10000 100000)')
+    parser.add_argument('--template', help='Scale this workbook for --sizes instead of generating synthetic ones')
+    parser.add_argument('--suites', nargs='+', choices=SUITES, default=list(SUITES), help='Suites to run')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Timed runs per case (default: 3)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the traced run for peak memory')
+    parser.add_argument('-o', '--output', help='Write results JSON to this path')
+    parser.add_argument('-b', '--baseline', help='Compare against this results JSON; exit 1 on regressions')
+    parser.add_argument('--save-baseline', help='Also write results to this path as the new baseline')
+    parser.add_argument('-t', '--tolerance', type=float, default=0.25, help='Allowed relative slowdown (default: 0.25)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Verbose logging (including step logs)')
+    
+    args = parser.parse_args()
+    
+    # Step logs would drown the benchmark output
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+        logger.setLevel(logging.INFO)
+    
+    inputs = args.inputs if args.inputs is not None else [str(p) for p in sorted((ROOT_DIR / "input").glob("*.xlsx"))]
+    cases = prepare_inputs(inputs, args.sizes, Path(args.template) if args.template else None)
+    results = run_benchmarks(cases, args.suites, max(1, args.repeat), not args.no_memory)
+    print_results(results)
+    
+    for path in filter(None, [args.output, args.save_baseline]):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results: {path}")
+    
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions against {args.baseline}:")
+            for r in regressions:
+                print(f"  {r['case']} / {r['suite']} / step {r['step']}: {r['metric']} "
+                      f"{r['baseline']:.2f} → {r['current']:.2f}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
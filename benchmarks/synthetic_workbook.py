@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Synthetic workbooks for TSS Converter
+Generates TSS workbooks of any size with the sheet layout of real uploads,
+for benchmarks and stress tests beyond the size of the bundled inputs.
+"""
+
+import argparse
+import logging
+import math
+import random
+import sys
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import openpyxl
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+logger = logging.getLogger(__name__)
+
+# Steps 3 and 4 look for the "Product combination" header in the first 49 rows
+MAX_ARTICLES = 38
+
+# Requirement columns per sheet type as (field, sub-header), in column order from A;
+# the step3.*_type_mapping configuration addresses these by column letter
+SHEET_LAYOUTS: Dict[str, List[Tuple[str, str]]] = {
+    'F': [
+        ("no", "No."), ("articles", "ARTICLE NAME "), ("applies_to", "APPLIES TO  "),
+        ("weight", "WEIGHT"), ("size", "SIZE"), ("colour", "COLOUR/ CODE"),
+        ("article_numbers", "ARTICLE NUMBER"), ("supplier", "SUPPLIER"), ("country", "COUNTRY"),
+        ("test_lab", "TEST LAB"), ("spec", "Spec. No."), ("edition", "Edition"),
+        ("section", "Section no."), ("regulation", "Regulation or substances"), ("limit", "Limit"),
+        ("method", "TEST METHOD"), ("frequency", "Test frequency"), ("document", "Document\nTR/SD"),
+        ("cpsia", "Connect to CPSA/CPSIA"), ("type", "Type"), ("remark_internal", "Remark (Vietnamese)"),
+        ("remark", "Remark"), ("warning_limit", "Remark\n(Warning limit)"), ("report_no", "TR/SD no."),
+        ("result", "RESULT"), ("active_date", "Active date"), ("expired_date", "Expired date"),
+        ("connect_id", "Connect ID"), ("reminder_date", "Reminder\ndate")
+    ],
+    'M': [
+        ("no", "No."), ("articles", "ARTICLE NAME "),
+        ("general_type", "GENERAL TYPE COMPONENT(TYPE) PROCESS TYPE"),
+        ("sub_type", "SUB-TYPE  COMPONENT IDENTITY  PROCESS NAME"), ("material", "MATERIAL"),
+        ("composition", "COMPOSITION"), ("weight", "WEIGHT"), ("size", "SIZE"), ("colour", "COLOR/CODE"),
+        ("material_code", "MATEIAL CODE"), ("supplier", "SUPPLIER"), ("distributor", "MATERIAL DISTRIBUTOR"),
+        ("country", "COUNTRY"), ("test_lab", "TEST LAB"), ("spec", "Spec. No."), ("edition", "Edition"),
+        ("section", "Section no."), ("regulation", "Regulation or substances"), ("limit", "Limit"),
+        ("method", "TEST METHOD"), ("frequency", "Test frequency"), ("document", "Document\nTR/SD"),
+        ("cpsia", "Connect to CPSA/CPSIA"), ("type", "Type"), ("remark_internal", "Remark (internal)"),
+        ("remark", "Remark"), ("warning_limit", "Remark\n(Warning limit)"), ("report_no", "TR/SD no."),
+        ("result", "RESULT"), ("active_date", "Active date"), ("expired_date", "Expired date"),
+        ("connect_id", "Connect ID"), ("reminder_date", "Reminder\ndate")
+    ],
+    'C': [
+        ("no", "No"), ("articles", "ARTICLE NAME "),
+        ("general_type", "GENERAL TYPE COMPONENT(TYPE) PROCESS TYPE"),
+        ("sub_type", "SUB-TYPE  COMPONENT IDENTITY  PROCESS NAME"), ("composition", "COMPOSITION"),
+        ("weight", "WEIGHT"), ("size", "SIZE"), ("colour", "COLOUR/ CODE"), ("material_code", "MATEIAL CODE"),
+        ("supplier", "SUPPLIER"), ("distributor", "MATERIAL DISTRIBUTOR"), ("country", "COUNTRY"),
+        ("test_lab", "TEST LAB"), ("spec", "Spec. No."), ("edition", "Edition"), ("section", "Section no."),
+        ("regulation", "Regulation or substances"), ("limit", "Limit"), ("method", "TEST METHOD"),
+        ("frequency", "Test frequency"), ("document", "Document\nTR/SD"), ("cpsia", "Connect to CPSA/CPSIA"),
+        ("type", "Type"), ("remark_internal", "Remark (Vietnamese)"), ("remark", "Remark"),
+        ("warning_limit", "Remark\n(Warning limit)"), ("report_no", "TR/SD no."), ("result", "RESULT"),
+        ("active_date", "Active date"), ("expired_date", "Expired date"), ("connect_id", "Connect ID"),
+        ("reminder_date", "Reminder\ndate")
+    ],
+    'P': [
+        ("no", "No."), ("articles", "ARTICLE NAME "),
+        ("general_type", "GENERAL TYPE COMPONENT(TYPE) PROCESS TYPE"),
+        ("sub_type", "SUB-TYPE  COMPONENT IDENTITY  PROCESS NAME"), ("material", "MATERIAL"),
+        ("composition", "Material Type in Process"), ("weight", "WEIGHT"), ("size", "SIZE"),
+        ("colour", "COLOR/CODE"), ("material_code", "MATEIAL CODE"), ("supplier", "SUPPLIER"),
+        ("distributor", "MATERIAL DISTRIBUTOR"), ("country", "COUNTRY"), ("test_lab", "TEST LAB"),
+        ("spec", "Spec. No."), ("edition", "Edition"), ("section", "Section no."),
+        ("regulation", "Regulation or substances"), ("limit", "Limit"), ("method", "TEST METHOD"),
+        ("frequency", "Test frequency"), ("document", "Document\nTR/SD"), ("cpsia", "Connect to CPSA/CPSIA"),
+        ("type", "Type"), ("remark_internal", "Remark (internal)"), ("remark", "Remark"),
+        ("warning_limit", "Remark\n(Warning limit)"), ("report_no", "TR/SD no."), ("result", "RESULT"),
+        ("active_date", "Active date"), ("expired_date", "Expired date"), ("connect_id", "Connect ID"),
+        ("reminder_date", "Reminder\ndate")
+    ]
+}
+
+# Material fields given only on a component's first row; Step 3 forward-fills them
+COMPONENT_FIELDS = ("material_code", "supplier", "distributor", "country", "weight", "size", "colour")
+
+# Fields no step reads, so hiding their columns changes nothing downstream
+HIDEABLE_FIELDS = ("remark_internal", "report_no", "result", "active_date", "expired_date", "connect_id")
+
+SHEET_NAMES = {
+    'F': ["F-Finished product", "F-Sales article"],
+    'M': ["M-Textile", "M-Plastic and rubber", "M-Metal", "M-Wood", "M-Paper and board", "M-Glass"],
+    'C': ["C-Zipper", "C-Button", "C-Velcro", "C-Buckle"],
+    'P': ["P- Inorganic Coating", "P- Organic Coating", "P- Printing", "P- Adhesive"]
+}
+
+GENERAL_TYPES = {
+    'F': "Finished product", 'M': "Material", 'C': "Component", 'P': "Process"
+}
+
+ARTICLE_WORDS = ["HEMMAFIXARE", "STUK", "SKUBB", "KUGGIS", "TJENA", "DRONA", "BAXNA", "RABBLA"]
+COLOURS = ["white", "grey", "green", "black", "beige", "blue"]
+SUPPLIERS = ["NGOC SON BR COMPANY LIMITED", "Kgreen Joint Stock Company", "Hoan My Zipper Limited",
+             "QING DAO HKING GROUP LTD", "HONG KONG MIN WIE TRADING"]
+COUNTRIES = ["Viet Nam", "China", "Thailand", "India"]
+REGULATIONS = [
+    ("Biocides of all kinds", "It is not allowed to add biocides to materials.", "ISO 16186"),
+    ("Cadmium (Cd) and its compounds", "Not allowed to be used.\nCLV: 40 mg Cd/kg", "Total digestion and ICP"),
+    ("Lead (Pb) and its compounds", "Not allowed to be used.\nCLV: 90 mg Pb/kg", "Total digestion and ICP"),
+    ("Substances of Very High Concern (SVHC)", "CLV: 0.10% for each individual substance", "Screening test"),
+    ("PFAS - total", "CLV: 100 mg/kg (as total fluorine)", "EN 14582"),
+    ("Azo dyes", "Not allowed to be used.\nCLV: 20 mg/kg per amine", "EN ISO 14362-1"),
+    ("Formaldehyde", "CLV: 75 mg/kg", "EN ISO 14184-1"),
+    ("Seam slippage", "≤ 6 mm", "ISO 13936-2")
+]
+
+@dataclass
+class SyntheticWorkbookSpec:
+    """
+    Shape of a generated TSS workbook
+    
+    Each sheet holds rows_per_sheet requirement rows in components of
+    rows_per_component rows. A component's material fields (supplier,
+    distributor, material code, ...) appear on its first row only, as in real
+    uploads, and merged_ranges_per_sheet components have their distributor
+    merged down instead. SD rows in a component reuse an earlier SD row's
+    requirement source with probability sd_duplicate_ratio, which makes them
+    Step 5 duplicates; na_ratio of the rows have an NA type and are removed.
+    The first M- sheet is "M-Textile", the sheet Step 2 reads articles from.
+    """
+    f_sheets: int = 1
+    m_sheets: int = 2
+    c_sheets: int = 1
+    p_sheets: int = 1
+    rows_per_sheet: int = 200
+    rows_per_component: int = 12
+    articles: int = 3
+    merged_ranges_per_sheet: int = 4
+    hidden_rows_per_sheet: int = 0
+    hidden_columns_per_sheet: int = 0
+    multi_value_ratio: float = 0.5
+    sd_ratio: float = 0.7
+    sd_duplicate_ratio: float = 0.6
+    na_ratio: float = 0.05
+    seed: int = 0
+    
+    def __post_init__(self):
+        if not 1 <= self.articles <= MAX_ARTICLES:
+            raise ValueError(f"articles must be between 1 and {MAX_ARTICLES}")
+        if self.hidden_columns_per_sheet > len(HIDEABLE_FIELDS):
+            raise ValueError(f"hidden_columns_per_sheet must be at most {len(HIDEABLE_FIELDS)}")
+        if self.rows_per_sheet < 1 or self.rows_per_component < 1:
+            raise ValueError("rows_per_sheet and rows_per_component must be positive")
+    
+    @property
+    def sheet_count(self) -> int:
+        """Number of typed sheets"""
+        return self.f_sheets + self.m_sheets + self.c_sheets + self.p_sheets
+    
+    @property
+    def total_rows(self) -> int:
+        """Requirement rows across all sheets"""
+        return self.sheet_count * self.rows_per_sheet
+    
+    @classmethod
+    def for_total_rows(cls, total_rows: int, **options: Any) -> "SyntheticWorkbookSpec":
+        """
+        Spec with roughly total_rows requirement rows spread evenly over the sheets
+        
+        Args:
+            total_rows: Requirement rows wanted across all sheets
+            **options: Other SyntheticWorkbookSpec fields
+        
+        Returns:
+            SyntheticWorkbookSpec
+        """
+        sheets = sum(options.get(f"{kind}_sheets", cls.__dataclass_fields__[f"{kind}_sheets"].default)
+                     for kind in ("f", "m", "c", "p"))
+        return cls(rows_per_sheet=max(1, math.ceil(total_rows / max(1, sheets))), **options)
+
+class SyntheticWorkbookGenerator:
+    """
+    Generator for synthetic TSS workbooks
+    
+    Sheets are streamed through a write-only workbook, so a workbook with
+    100k requirement rows is written without holding it in memory. Output is
+    deterministic for a given spec (including its seed).
+    """
+    
+    def __init__(self, spec: Optional[SyntheticWorkbookSpec] = None):
+        self.spec = spec or SyntheticWorkbookSpec()
+        rng = random.Random(self.spec.seed)
+        self.article_names = [
+            f"{rng.choice(ARTICLE_WORDS)} storage case {30 + 3 * index}x51x{19 + index % 10} "
+            f"{rng.choice(COLOURS)}/{rng.choice(COLOURS)}"
+            for index in range(self.spec.articles)
+        ]
+        self.article_numbers = [f"{rng.randrange(10 ** 8):08d}" for _ in range(self.spec.articles)]
+    
+    def sheet_plan(self) -> List[Tuple[str, str]]:
+        """
+        Sheet names and types in workbook order
+        
+        Returns:
+            List of (sheet name, sheet type)
+        """
+        plan = []
+        for sheet_type, count in (('F', self.spec.f_sheets), ('M', self.spec.m_sheets),
+                                  ('C', self.spec.c_sheets), ('P', self.spec.p_sheets)):
+            names = SHEET_NAMES[sheet_type]
+            for index in range(count):
+                name = names[index % len(names)]
+                if index >= len(names):
+                    name = f"{name} {index // len(names) + 1}"
+                plan.append((name, sheet_type))
+        return plan
+    
+    def header_rows(self, sheet_type: str) -> List[List[Any]]:
+        """
+        Title block, article list and "Product combination" header rows of a sheet
+        
+        Args:
+            sheet_type: 'F', 'M', 'C' or 'P'
+        
+        Returns:
+            Rows from row 1 through the sub-header row
+        """
+        layout = SHEET_LAYOUTS[sheet_type]
+        width = len(layout)
+        rows: List[List[Any]] = [[None] * width for _ in range(6)]
+        rows[0][4] = "TEST PLAN / SUMMARY"
+        rows[2][4] = "BẢNG KẾ HOẠCH VÀ TỔNG HỢP KẾT QUẢ KIỂM NGHIỆM "
+        rows[5][6] = "DOC. REF."
+        
+        # Article block: Step 2 reads names below "Article name" and numbers one column right
+        rows.append(self._padded([None, "Supplier \nnumber ", "Supplier name", "Article name", "Article \nnumber",
+                                  "GENERAL TYPE COMPONENT(TYPE) PROCESS TYPE", "Material name", "TED No",
+                                  "PACKREQ \nNo", "Drawing \nNo.         ", "Test plan\nversion No.         ",
+                                  "Updated \ndate"], width))
+        for index, (name, number) in enumerate(zip(self.article_names, self.article_numbers)):
+            first = index == 0
+            rows.append(self._padded([None, 20143 if first else None, SUPPLIERS[0] if first else None, name, number,
+                                      GENERAL_TYPES[sheet_type] if first else None, None,
+                                      f"AA-{2281883 + index}-7", None, None, 2 if first else None], width))
+        
+        rows.extend([[None] * width, [None] * width])
+        
+        header = [None] * width
+        header[0] = "Product combination"
+        header[self._column(sheet_type, "edition") - 1] = "Requirement source"
+        rows.append(header)
+        rows.append([sub_header for _, sub_header in layout])
+        return rows
+    
+    def header_merges(self, sheet_type: str) -> List[str]:
+        """
+        Merged ranges of the header block
+        
+        Args:
+            sheet_type: 'F', 'M', 'C' or 'P'
+        
+        Returns:
+            Range coordinates
+        """
+        header_row = self.header_row_number()
+        spec_col = self._column(sheet_type, "spec")
+        edition_col = self._column(sheet_type, "edition")
+        last_col = len(SHEET_LAYOUTS[sheet_type])
+        return [
+            "E1:Q1", "E3:R3",
+            f"A{header_row}:{get_column_letter(spec_col - 1)}{header_row}",
+            f"{get_column_letter(edition_col)}{header_row}:"
+            f"{get_column_letter(min(edition_col + 9, last_col))}{header_row}"
+        ]
+    
+    def header_row_number(self) -> int:
+        """Row of the "Product combination" header (same on every sheet)"""
+        return 7 + self.spec.articles + 3
+    
+    def requirement_rows(self, sheet_type: str, sheet_index: int) -> Tuple[List[List[Any]], List[Tuple[int, int, int]]]:
+        """
+        Requirement rows of one sheet
+        
+        Args:
+            sheet_type: 'F', 'M', 'C' or 'P'
+            sheet_index: Position of the sheet in the workbook (varies the data)
+        
+        Returns:
+            Tuple of (rows, vertical merges as (column, first row offset, last row offset))
+        """
+        spec = self.spec
+        rng = random.Random(f"{spec.seed}-{sheet_index}")
+        layout = SHEET_LAYOUTS[sheet_type]
+        rows = []
+        merges = []
+        
+        components = math.ceil(spec.rows_per_sheet / spec.rows_per_component)
+        for component in range(components):
+            first_offset = len(rows)
+            count = min(spec.rows_per_component, spec.rows_per_sheet - first_offset)
+            material = self._component(sheet_type, sheet_index, component, rng)
+            seen_sources: List[Tuple[str, int, str]] = []
+            
+            for index in range(count):
+                values = dict(material)
+                if index:
+                    # Later rows leave the material fields to Step 3's forward fill
+                    for field in COMPONENT_FIELDS:
+                        values.pop(field, None)
+                values.update(self._requirement(rng, seen_sources, component))
+                rows.append([values.get(field) for field, _ in layout])
+            
+            # Distributors of the first components are merged down instead of left blank
+            if component < spec.merged_ranges_per_sheet and count > 1 and "distributor" in dict(layout):
+                merges.append((self._column(sheet_type, "distributor"), first_offset,
+                               first_offset + min(count, 3) - 1))
+        
+        return rows, merges
+    
+    def generate(self, output_file: Union[str, Path]) -> Path:
+        """
+        Write the workbook
+        
+        Args:
+            output_file: Path of the generated workbook
+        
+        Returns:
+            Path to the generated workbook
+        """
+        spec = self.spec
+        output_file = Path(output_file)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        
+        wb = openpyxl.Workbook(write_only=True)
+        for sheet_index, (sheet_name, sheet_type) in enumerate(self.sheet_plan()):
+            ws = wb.create_sheet(sheet_name)
+            header = self.header_rows(sheet_type)
+            rows, merges = self.requirement_rows(sheet_type, sheet_index)
+            first_data_row = len(header) + 1
+            
+            for field in HIDEABLE_FIELDS[:spec.hidden_columns_per_sheet]:
+                ws.column_dimensions[get_column_letter(self._column(sheet_type, field))].hidden = True
+            
+            rng = random.Random(f"{spec.seed}-{sheet_index}-hidden")
+            hidden_rows = set(rng.sample(range(len(rows)), min(spec.hidden_rows_per_sheet, len(rows))))
+            
+            for merged in self.header_merges(sheet_type):
+                ws.merged_cells.add(CellRange(merged))
+            for col, first, last in merges:
+                ws.merged_cells.add(CellRange(min_col=col, min_row=first_data_row + first,
+                                              max_col=col, max_row=first_data_row + last))
+            
+            # Row dimensions are written with their row, so hidden flags go first
+            for offset in hidden_rows:
+                ws.row_dimensions[first_data_row + offset].hidden = True
+            
+            for row in header:
+                ws.append(row)
+            for row in rows:
+                ws.append(row)
+        
+        wb.save(str(output_file))
+        logger.info(f"Generated {output_file.name}: {spec.sheet_count} sheets, {spec.total_rows} requirement rows")
+        return output_file
+    
+    def _component(self, sheet_type: str, sheet_index: int, component: int, rng: random.Random) -> Dict[str, Any]:
+        """Fields shared by all rows of a component"""
+        number = f"{component + 1:02d}"
+        supplier = rng.choice(SUPPLIERS)
+        return {
+            "no": component * 10 + 1,
+            "articles": self._article_cell(rng),
+            "applies_to": GENERAL_TYPES[sheet_type],
+            "article_numbers": ";\n".join(self.article_numbers) + ";",
+            "general_type": f"{number}. {GENERAL_TYPES[sheet_type]} {sheet_index + 1}",
+            "sub_type": f"{number}. Component {sheet_index + 1}-{component + 1}",
+            "material": f"{number}. Material {sheet_index + 1}-{component + 1}",
+            "composition": f"{rng.randint(50, 100)}% Polyester, {rng.choice(COLOURS)}",
+            "weight": f"{rng.randint(100, 400)} g/m2",
+            "size": f"{rng.randint(10, 90)}x{rng.randint(10, 90)} cm",
+            "colour": rng.choice(COLOURS),
+            "material_code": f"MC-{sheet_index + 1}-{component + 1:05d}",
+            "supplier": supplier,
+            "distributor": rng.choice(SUPPLIERS),
+            "country": rng.choice(COUNTRIES),
+            "test_lab": "IKEA approved lab"
+        }
+    
+    def _article_cell(self, rng: random.Random) -> str:
+        """Article list of a component: one article, or a numbered multi-value list"""
+        if len(self.article_names) > 1 and rng.random() < self.spec.multi_value_ratio:
+            count = rng.randint(2, len(self.article_names))
+            names = rng.sample(self.article_names, count)
+            return "\n".join(f"{index}.{name}" for index, name in enumerate(names, start=1))
+        return rng.choice(self.article_names)
+    
+    def _requirement(self, rng: random.Random, seen_sources: List[Tuple[str, int, str]],
+                     component: int) -> Dict[str, Any]:
+        """Fields of one requirement row"""
+        roll = rng.random()
+        if roll < self.spec.na_ratio:
+            req_type = rng.choice(["NA", "-"])
+        elif roll < self.spec.na_ratio + self.spec.sd_ratio:
+            req_type = "SD"
+        else:
+            req_type = "TR"
+        
+        # Step 5 groups SD rows of a component by requirement source and section
+        if req_type == "SD" and seen_sources and rng.random() < self.spec.sd_duplicate_ratio:
+            spec_no, edition, section = rng.choice(seen_sources)
+        else:
+            spec_no = f"IOS-MAT-{rng.randint(1, 300):04d}"
+            edition = rng.randint(1, 20)
+            section = f"{rng.randint(1, 9)}.{rng.randint(1, 9)} Requirements {component + 1}-{len(seen_sources) + 1}"
+            if req_type == "SD":
+                seen_sources.append((spec_no, edition, section))
+        
+        regulation, limit, method = rng.choice(REGULATIONS)
+        return {
+            "spec": spec_no,
+            "edition": edition,
+            "section": section,
+            "regulation": regulation,
+            "limit": limit,
+            "method": method,
+            "frequency": rng.choice(["Yearly", "Yearly", "Every order", None]),
+            "document": "SD" if req_type == "SD" else "TR",
+            "cpsia": "NA",
+            "type": req_type,
+            "warning_limit": rng.choice([None, None, "50% of CLV"])
+        }
+    
+    @staticmethod
+    def _column(sheet_type: str, field: str) -> int:
+        """1-based column of a field in a sheet type's layout"""
+        for index, (name, _) in enumerate(SHEET_LAYOUTS[sheet_type], start=1):
+            if name == field:
+                return index
+        raise KeyError(f"No {field} column in {sheet_type} sheets")
+    
+    @staticmethod
+    def _padded(values: Sequence[Any], width: int) -> List[Any]:
+        """Pad a row to the sheet width"""
+        return list(values) + [None] * (width - len(values))
+
+def generate_workbook(output_file: Union[str, Path], spec: Optional[SyntheticWorkbookSpec] = None) -> Path:
+    """
+    Generate a synthetic TSS workbook
+    
+    Args:
+        output_file: Path of the generated workbook
+        spec: Workbook shape (defaults to SyntheticWorkbookSpec())
+    
+    Returns:
+        Path to the generated workbook
+    """
+    return SyntheticWorkbookGenerator(spec).generate(output_file)
+
+def main():
+    """Command line interface for the synthetic workbook generator"""
+    parser = argparse.ArgumentParser(description='Synthetic TSS Workbooks - Generate test plan workbooks of any size')
+    parser.add_argument('output', help='Output Excel file')
+    parser.add_argument('-n', '--rows', type=int, help='Total requirement rows (overrides --rows-per-sheet)')
+    
+    defaults = SyntheticWorkbookSpec()
+    for spec_field in fields(SyntheticWorkbookSpec):
+        option = '--' + spec_field.name.replace('_', '-')
+        parser.add_argument(option, type=type(getattr(defaults, spec_field.name)),
+                            default=getattr(defaults, spec_field.name),
+                            help=f'(default: {getattr(defaults, spec_field.name)})')
+    
+    args = parser.parse_args()
+    options = {spec_field.name: getattr(args, spec_field.name) for spec_field in fields(SyntheticWorkbookSpec)}
+    
+    try:
+        if args.rows:
+            options.pop("rows_per_sheet")
+            spec = SyntheticWorkbookSpec.for_total_rows(args.rows, **options)
+        else:
+            spec = SyntheticWorkbookSpec(**options)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    
+    output_file = generate_workbook(args.output, spec)
+    print(f"✅ Generated: {output_file} ({spec.sheet_count} sheets, {spec.total_rows} requirement rows)")
+
+if __name__ == "__main__":
+    main()
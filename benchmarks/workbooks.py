@@ -0,0 +1,110 @@
+"""
+Benchmark workbooks for TSS Converter
+Builds larger inputs by repeating the requirement rows of a bundled TSS workbook.
+"""
+
+import logging
+import math
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+import openpyxl
+
+from common.sheet_snapshot import get_sheet_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Sheet prefixes the mapping steps process
+TYPED_SHEET_PREFIXES = ('F-', 'M-', 'C-', 'P')
+
+def find_requirement_rows(worksheet) -> Tuple[int, int]:
+    """
+    Locate the requirement rows of a typed sheet
+    
+    Requirement rows start two rows below the "Product combination" header,
+    as in Steps 3 and 4.
+    
+    Args:
+        worksheet: openpyxl worksheet object
+    
+    Returns:
+        Tuple of (first row, last row); last < first if the sheet has none
+    """
+    snapshot = get_sheet_snapshot(worksheet)
+    match = snapshot.header_index().find_first(["product combination"], max_row=min(snapshot.max_row, 49))
+    if not match:
+        return 0, -1
+    return match[0] + 2, snapshot.last_data_row
+
+def count_requirement_rows(file_path: Union[str, Path]) -> Dict[str, int]:
+    """
+    Count requirement rows per typed sheet
+    
+    Args:
+        file_path: TSS workbook
+    
+    Returns:
+        Dictionary of sheet name to requirement row count
+    """
+    wb = openpyxl.load_workbook(str(file_path))
+    try:
+        counts = {}
+        for worksheet in wb.worksheets:
+            if worksheet.title.upper().startswith(TYPED_SHEET_PREFIXES):
+                first_row, last_row = find_requirement_rows(worksheet)
+                counts[worksheet.title] = max(0, last_row - first_row + 1)
+        return counts
+    finally:
+        wb.close()
+
+def build_scaled_workbook(template_file: Union[str, Path], target_rows: int,
+                          output_file: Union[str, Path]) -> Path:
+    """
+    Scale a TSS workbook to roughly target_rows requirement rows
+    
+    Each typed sheet keeps its share of the template's requirement rows and
+    is extended by repeating its own rows below the existing ones, so header
+    areas, article lists and sheet types stay exactly as in the template.
+    Sheets are never shrunk, so targets below the template's own row count
+    return a copy of the template.
+    
+    Args:
+        template_file: Bundled TSS workbook to scale
+        target_rows: Total requirement rows wanted across all typed sheets
+        output_file: Path of the scaled workbook
+    
+    Returns:
+        Path to the scaled workbook
+    """
+    wb = openpyxl.load_workbook(str(template_file))
+    
+    blocks = {}
+    for worksheet in wb.worksheets:
+        if not worksheet.title.upper().startswith(TYPED_SHEET_PREFIXES):
+            continue
+        first_row, last_row = find_requirement_rows(worksheet)
+        if last_row >= first_row:
+            blocks[worksheet.title] = (first_row, last_row)
+    
+    template_rows = sum(last - first + 1 for first, last in blocks.values())
+    if not template_rows:
+        raise ValueError(f"No requirement rows found in {template_file}")
+    
+    for sheet_name, (first_row, last_row) in blocks.items():
+        worksheet = wb[sheet_name]
+        rows = list(worksheet.iter_rows(min_row=first_row, max_row=last_row, values_only=True))
+        wanted = math.ceil(target_rows * len(rows) / template_rows)
+        
+        next_row = last_row + 1
+        for index in range(len(rows), wanted):
+            for col, value in enumerate(rows[index % len(rows)], start=1):
+                if value is not None:
+                    worksheet.cell(next_row, col, value)
+            next_row += 1
+    
+    output_file = Path(output_file)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    wb.save(str(output_file))
+    
+    logger.info(f"Built {output_file.name}: {template_rows} template rows scaled to ~{target_rows}")
+    return output_file
@@ -0,0 +1,158 @@
+"""
+Article matcher for TSS Converter
+Matches article names against article headers in near-linear time for Step 6.
+"""
+
+import logging
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, List, Sequence, Set, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Joins header names in the reverse index; never part of a cell value
+_HEADER_SEPARATOR = "\x00"
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over a fixed set of patterns
+    
+    Built once; search() reports which patterns occur in a text in a single
+    pass over the text, independent of the number of patterns. Patterns and
+    texts may be str or bytes (both of the same kind), and scan() resumes
+    from a previous state so a stream can be matched chunk by chunk.
+    """
+    
+    def __init__(self, patterns: Sequence[Union[str, bytes]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+        
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                state = next_state
+            self._output[state].append(pattern_id)
+        
+        # Breadth-first failure links; outputs inherit those of their failure state
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    
+    @property
+    def state_count(self) -> int:
+        """Number of automaton states"""
+        return len(self._goto)
+    
+    def search(self, text: Union[str, bytes]) -> Set[int]:
+        """
+        Find the patterns occurring anywhere in a text
+        
+        Args:
+            text: Text to scan
+        
+        Returns:
+            Set of pattern indexes (positions in the constructor list)
+        """
+        return self.scan(text)[0]
+    
+    def scan(self, chunk: Union[str, bytes], state: int = 0) -> Tuple[Set[int], int]:
+        """
+        Continue matching with the next chunk of a stream
+        
+        Matches spanning chunk boundaries are found because the automaton
+        state is carried over from the previous chunk.
+        
+        Args:
+            chunk: Next part of the stream
+            state: State returned for the previous chunk (0 at stream start)
+        
+        Returns:
+            Tuple of (pattern indexes completed in this chunk, state after the chunk)
+        """
+        found = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        for char in chunk:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found, state
+
+class ArticleMatcher:
+    """
+    Matching engine over the article headers of one worksheet
+    
+    Gives the same result as an exact lookup followed by a bidirectional
+    substring test against every header, without the per-header loop:
+    - headers contained in the article are found by an Aho-Corasick scan
+    - headers containing the article are found with str.find over all
+      header names joined into one reverse-index string
+    """
+    
+    def __init__(self, article_headers: Dict[str, int]):
+        self.headers = article_headers
+        self._names = list(article_headers)
+        self._columns = list(article_headers.values())
+        self._automaton = AhoCorasick(self._names)
+        
+        # Start offset of every header name in the joined string
+        self._offsets = []
+        offset = 0
+        for name in self._names:
+            self._offsets.append(offset)
+            offset += len(name) + len(_HEADER_SEPARATOR)
+        self._joined = _HEADER_SEPARATOR.join(self._names)
+        
+        logger.debug(f"Article matcher built over {len(self._names)} headers "
+                     f"({self._automaton.state_count} automaton states)")
+    
+    def _headers_containing(self, name: str) -> Set[int]:
+        """Indexes of header names that contain name"""
+        found = set()
+        position = self._joined.find(name)
+        while position != -1:
+            header_id = bisect_right(self._offsets, position) - 1
+            found.add(header_id)
+            # Continue after this header; further hits in it add nothing
+            if header_id + 1 >= len(self._offsets):
+                break
+            position = self._joined.find(name, self._offsets[header_id + 1])
+        return found
+    
+    def match(self, normalized_name: str) -> List[int]:
+        """
+        Find the header columns matching a normalized article name
+        
+        Args:
+            normalized_name: Article name normalized like the header names
+        
+        Returns:
+            Column of the exact match if there is one, otherwise the columns of
+            all headers contained in or containing the name, in header order
+        """
+        if not normalized_name:
+            return []
+        
+        column = self.headers.get(normalized_name)
+        if column is not None:
+            return [column]
+        
+        header_ids = self._automaton.search(normalized_name)
+        header_ids |= self._headers_containing(normalized_name)
+        return [self._columns[header_id] for header_id in sorted(header_ids)]
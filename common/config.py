@@ -5,6 +5,7 @@ Provides centralized configuration handling with validation and defaults.
 
 import os
 import json
+import hashlib
 from pathlib import Path
 from typing import Dict, Any, Optional, Union, List
 import logging
@@ -33,7 +34,8 @@ class TSConverterConfig:
             "strict_mode": True,
             "skip_format_validation": False,
             "skip_structure_validation": False,
-            "allow_missing_columns": False
+            "allow_missing_columns": False,
+            "metadata_cache_entries": 64
         },
         "step1": {
             "template_headers": [
@@ -79,7 +81,12 @@ class TSConverterConfig:
                 "B": "Q", "C": "B", "D": "C", "F": "G", "J": "D", "K": "F", "L": "E",
                 "Q": "J", "R": "K", "S": "L", "T": "M", "U": "N", "W": "O", "X": "H"
             },
-            "column_delimiter": "-"
+            "combination_columns": {
+                "F": ["K", "L"], "M": ["O", "P"], "C": ["N", "O"], "P": ["O", "P"]
+            },
+            "column_a_prefix": {"F": "Art"},
+            "column_delimiter": "-",
+            "parallel_min_sheets": 8
         },
         "step4": {
             "fill_columns": ["D", "E", "F"],
@@ -382,6 +389,19 @@ class TSConverterConfig:
         """Get maximum file size in MB"""
         return self.get("file_formats.max_file_size_mb", 100)
     
+    def fingerprint(self) -> str:
+        """
+        Get a stable fingerprint of the effective configuration
+        
+        Two configurations with the same values produce the same fingerprint,
+        regardless of where the values came from (defaults, file or environment).
+        
+        Returns:
+            SHA-256 hex digest of the canonical JSON form of the configuration
+        """
+        canonical = json.dumps(self._config, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+    
     def __str__(self) -> str:
         """String representation of configuration"""
         return f"TSConverterConfig(base_dir={self.get('general.base_dir')}, config_file={self.config_file})"
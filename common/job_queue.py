@@ -0,0 +1,287 @@
+"""
+Background job queue for TSS Converter
+Runs pipeline jobs on a bounded worker pool so the web UI only submits and polls.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, Any, Optional, Callable
+
+from .exceptions import TSConverterError
+
+logger = logging.getLogger(__name__)
+
+class QueueFullError(TSConverterError):
+    """Raised when a job is submitted while the queue is at its depth limit"""
+    
+    def __init__(self, max_pending: int):
+        super().__init__(
+            message=f"Server is busy: {max_pending} conversions are already queued or running",
+            error_code="QUEUE_FULL",
+            context={"max_pending": max_pending}
+        )
+
+class JobCancelledError(TSConverterError):
+    """Raised inside a running job when cancellation has been requested"""
+    
+    def __init__(self, job_id: str):
+        super().__init__(
+            message="Conversion was cancelled",
+            error_code="JOB_CANCELLED",
+            context={"job_id": job_id}
+        )
+
+class JobStatus(Enum):
+    """Job lifecycle states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+@dataclass
+class Job:
+    """
+    A queued conversion and its progress
+    
+    The job runner reports progress through update_progress() from the worker
+    thread; readers only ever see copies returned by snapshot().
+    """
+    job_id: str
+    name: str
+    status: JobStatus = JobStatus.QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    progress: Dict[str, Any] = field(default_factory=lambda: {
+        "current_step": 0,
+        "step_status": {f"step{i}": "pending" for i in range(1, 7)},
+        "message": "Waiting in queue...",
+        "error": False
+    })
+    result: Optional[Dict[str, Any]] = None
+    error_message: Optional[str] = None
+    _cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    
+    @property
+    def cancel_requested(self) -> bool:
+        """Whether cancellation has been requested"""
+        return self._cancel_event.is_set()
+    
+    def check_cancelled(self) -> None:
+        """
+        Stop the job if cancellation has been requested
+        
+        Raises:
+            JobCancelledError: If cancel() was called for this job
+        """
+        if self._cancel_event.is_set():
+            raise JobCancelledError(self.job_id)
+    
+    def update_progress(self, progress_data: Dict[str, Any]) -> None:
+        """
+        Merge a progress update (ProgressCallback format) into the job
+        
+        Doubles as the cancellation point: the pipeline reports progress at
+        every step boundary, so a cancelled job stops before its next step.
+        Error reports never raise, so the pipeline can finish its failure handling.
+        
+        Raises:
+            JobCancelledError: If cancellation has been requested
+        """
+        with self._lock:
+            self.progress.update(progress_data)
+        if not progress_data.get("error"):
+            self.check_cancelled()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of the job state, safe to hand to the UI thread"""
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "name": self.name,
+                "status": self.status.value,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "progress": {**self.progress, "step_status": dict(self.progress.get("step_status", {}))},
+                "result": self.result,
+                "error_message": self.error_message,
+                "cancel_requested": self._cancel_event.is_set()
+            }
+    
+    def _set_status(self, status: JobStatus, **updates: Any) -> None:
+        with self._lock:
+            self.status = status
+            for key, value in updates.items():
+                setattr(self, key, value)
+
+class JobQueue:
+    """
+    Bounded in-process job queue with a worker thread pool
+    
+    At most max_workers jobs run at once and at most max_queued more wait;
+    submissions beyond that are rejected with QueueFullError instead of
+    piling up threads. Finished jobs are kept for retention_seconds so their
+    sessions can collect the result, then dropped.
+    """
+    
+    def __init__(self, max_workers: int = 3, max_queued: int = 10, retention_seconds: float = 3600):
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max(0, int(max_queued))
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tss-job")
+        self._jobs: Dict[str, Job] = {}
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def max_pending(self) -> int:
+        """Maximum number of queued plus running jobs"""
+        return self.max_workers + self.max_queued
+    
+    def submit(self, runner: Callable[[Job], Dict[str, Any]], name: str = "job") -> str:
+        """
+        Queue a job
+        
+        Args:
+            runner: Called with the Job on a worker thread; returns the job result.
+                Raising marks the job failed (or cancelled for JobCancelledError).
+            name: Display name for logs
+        
+        Returns:
+            Job ID
+        
+        Raises:
+            QueueFullError: If max_pending jobs are already queued or running
+        """
+        with self._lock:
+            self._evict_finished()
+            pending = sum(1 for job in self._jobs.values() if job.status not in FINISHED_STATUSES)
+            if pending >= self.max_pending:
+                raise QueueFullError(self.max_pending)
+            
+            job = Job(job_id=uuid.uuid4().hex, name=name)
+            self._jobs[job.job_id] = job
+            self._futures[job.job_id] = self._executor.submit(self._run, job, runner)
+        
+        logger.info(f"Queued job {job.job_id[:8]} ({name}); {pending + 1}/{self.max_pending} pending")
+        return job.job_id
+    
+    def _run(self, job: Job, runner: Callable[[Job], Dict[str, Any]]) -> None:
+        """Execute a job on a worker thread and record its outcome"""
+        if job.cancel_requested:
+            job._set_status(JobStatus.CANCELLED, error_message="Conversion was cancelled",
+                            finished_at=time.time())
+            return
+        
+        job._set_status(JobStatus.RUNNING, started_at=time.time())
+        logger.info(f"Started job {job.job_id[:8]} ({job.name})")
+        
+        try:
+            result = runner(job)
+            job._set_status(JobStatus.COMPLETED, result=result, finished_at=time.time())
+        except JobCancelledError as e:
+            job._set_status(JobStatus.CANCELLED, error_message=e.message, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Job {job.job_id[:8]} failed: {e}")
+            job._set_status(JobStatus.FAILED, error_message=str(e), finished_at=time.time())
+        
+        logger.info(f"Finished job {job.job_id[:8]} ({job.name}): {job.status.value}")
+    
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a snapshot of a job
+        
+        Args:
+            job_id: Job ID from submit()
+        
+        Returns:
+            Job snapshot, or None if the job is unknown or has been evicted
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job else None
+    
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job
+        
+        Queued jobs are cancelled immediately; running jobs stop at their next
+        step boundary.
+        
+        Args:
+            job_id: Job ID from submit()
+        
+        Returns:
+            True if the job was queued or running
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return False
+        
+        job._cancel_event.set()
+        if future is not None and future.cancel():
+            job._set_status(JobStatus.CANCELLED, error_message="Conversion was cancelled",
+                            finished_at=time.time())
+        
+        logger.info(f"Cancellation requested for job {job_id[:8]}")
+        return True
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth and capacity"""
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+        return {
+            "queued": statuses.count(JobStatus.QUEUED),
+            "running": statuses.count(JobStatus.RUNNING),
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending
+        }
+    
+    def _evict_finished(self) -> None:
+        """Drop finished jobs older than the retention period (caller holds the lock)"""
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.status in FINISHED_STATUSES and job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+            self._futures.pop(job_id, None)
+    
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting jobs and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+_job_queue: Optional[JobQueue] = None
+_job_queue_lock = threading.Lock()
+
+def get_job_queue(max_workers: int = 3, max_queued: int = 10, retention_seconds: float = 3600) -> JobQueue:
+    """
+    Get the process-wide job queue shared by all sessions
+    
+    The queue is created on first use; later calls return the same instance
+    and ignore the arguments.
+    
+    Args:
+        max_workers: Jobs running at once
+        max_queued: Jobs allowed to wait for a worker
+        retention_seconds: How long finished jobs stay available for polling
+    
+    Returns:
+        JobQueue instance
+    """
+    global _job_queue
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(max_workers, max_queued, retention_seconds)
+        return _job_queue
@@ -0,0 +1,140 @@
+"""
+Streaming output writer for TSS Converter
+Writes the final workbook with a write-only openpyxl workbook, streaming data rows.
+"""
+
+import logging
+from copy import copy
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+
+from .step_metrics import count_cells_written
+
+logger = logging.getLogger(__name__)
+
+# Rows 1-9 hold the merged article names, row 10 the column headers
+OUTPUT_HEADER_ROWS = 10
+
+@dataclass(frozen=True)
+class RowStream:
+    """
+    An output sheet as its header worksheet and a repeatable stream of data rows
+    
+    rows() starts a new pass over the data each time it is called, so a step
+    that must see every row before it can emit the first one (Step 5's
+    duplicate planning) reads the stream twice instead of holding it.
+    """
+    template_ws: Any
+    rows: Callable[[], Iterable[Sequence[Any]]]
+
+class StreamingOutputWriter:
+    """
+    Write-only writer for the final output sheet
+    
+    The header block (Step 1 column headers and widths, Step 2 merged and
+    rotated article columns) is captured from the template worksheet once.
+    Data rows are then taken as a stream of value sequences and written
+    straight to the file, so memory grows with row width, not sheet size.
+    """
+    
+    def __init__(self, template_ws, header_rows: int = OUTPUT_HEADER_ROWS):
+        self.title = template_ws.title
+        self.header_rows = header_rows
+        
+        # Styled header cells per row: (value, font, fill, alignment, number_format)
+        self._header: List[List[Optional[Tuple[Any, ...]]]] = []
+        for row in template_ws.iter_rows(min_row=1, max_row=header_rows):
+            self._header.append([
+                (cell.value, copy(cell.font), copy(cell.fill), copy(cell.alignment), cell.number_format)
+                if cell.value is not None or cell.has_style else None
+                for cell in row
+            ])
+        
+        self._column_widths: Dict[str, float] = {
+            letter: dimension.width
+            for letter, dimension in template_ws.column_dimensions.items()
+            if dimension.width
+        }
+        
+        # Only the header block has merges; data rows are plain values
+        self._merged_ranges = [
+            merged_range.coord for merged_range in template_ws.merged_cells.ranges
+            if merged_range.max_row <= header_rows
+        ]
+    
+    def _header_row(self, worksheet, cells: Sequence[Optional[Tuple[Any, ...]]]) -> List[Any]:
+        """Build one header row of styled write-only cells"""
+        row = []
+        for cell_info in cells:
+            if cell_info is None:
+                row.append(None)
+                continue
+            
+            value, font, fill, alignment, number_format = cell_info
+            cell = WriteOnlyCell(worksheet, value=value)
+            cell.font = font
+            cell.fill = fill
+            cell.alignment = alignment
+            cell.number_format = number_format
+            row.append(cell)
+        return row
+    
+    def write(self, output_path: Union[str, Path], rows: Iterable[Sequence[Any]]) -> int:
+        """
+        Write the header block followed by the streamed data rows
+        
+        Args:
+            output_path: Output Excel file
+            rows: Data rows (values only), written from row header_rows + 1
+        
+        Returns:
+            Number of data rows written
+        """
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet(self.title)
+        
+        # Column widths and merges must be set before the first row is written
+        for letter, width in self._column_widths.items():
+            worksheet.column_dimensions[letter].width = width
+        for merged_range in self._merged_ranges:
+            worksheet.merged_cells.add(merged_range)
+        
+        for cells in self._header:
+            worksheet.append(self._header_row(worksheet, cells))
+        
+        data_rows = 0
+        data_cells = 0
+        for values in rows:
+            values = list(values)
+            worksheet.append(values)
+            data_rows += 1
+            data_cells += len(values) - values.count(None)
+        count_cells_written(data_cells)
+        
+        workbook.save(str(output_path))
+        logger.info(f"💾 Streamed {data_rows} data rows to {Path(output_path).name}")
+        return data_rows
+
+def write_output_workbook(template_ws, output_path: Union[str, Path],
+                          rows: Optional[Iterable[Sequence[Any]]] = None,
+                          header_rows: int = OUTPUT_HEADER_ROWS) -> int:
+    """
+    Write the final output workbook through a write-only stream
+    
+    Args:
+        template_ws: Worksheet holding the header block (rows 1-header_rows)
+        output_path: Output Excel file
+        rows: Data rows to write; defaults to the values below the header block
+            of template_ws
+        header_rows: Number of header rows to copy with their styling
+    
+    Returns:
+        Number of data rows written
+    """
+    if rows is None:
+        rows = template_ws.iter_rows(min_row=header_rows + 1, values_only=True)
+    return StreamingOutputWriter(template_ws, header_rows).write(output_path, rows)
@@ -4,7 +4,9 @@ Tracks processing warnings, errors, and provides quality metrics for user feedba
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Iterator
 from dataclasses import dataclass, field
 from datetime import datetime
 import json
@@ -49,6 +51,7 @@ class QualityReporter:
             'data_rows_extracted': 0,
             'data_rows_final': 0
         }
+        self.step_metrics: List[Dict[str, Any]] = []
         
     def start_processing(self):
         """Mark start of processing"""
@@ -100,6 +103,10 @@ class QualityReporter:
     def update_stats(self, **kwargs):
         """Update processing statistics"""
         self.processing_stats.update(kwargs)
+    
+    def record_step_metrics(self, step_metrics: List[Dict[str, Any]]):
+        """Record per-step timing, memory and cell/row count records"""
+        self.step_metrics = list(step_metrics)
         
     def get_issues_by_level(self, level: str) -> List[ProcessingIssue]:
         """Get all issues of a specific level"""
@@ -205,6 +212,7 @@ class QualityReporter:
         return {
             'issues': [issue.to_dict() for issue in self.issues],
             'statistics': self.processing_stats.copy(),
+            'step_metrics': list(self.step_metrics),
             'summary': self.get_user_summary()
         }
         
@@ -226,13 +234,39 @@ class QualityReporter:
             'data_rows_extracted': 0,
             'data_rows_final': 0
         }
+        self.step_metrics = []
 
 # Global instance for easy access
 _global_reporter = QualityReporter()
 
+# Reporter bound to the current thread by use_reporter()
+_active = threading.local()
+
 def get_global_reporter() -> QualityReporter:
-    """Get the global quality reporter instance"""
-    return _global_reporter
+    """Get the quality reporter bound to this thread, or the global instance"""
+    reporter = getattr(_active, "reporter", None)
+    return reporter if reporter is not None else _global_reporter
+
+@contextmanager
+def use_reporter(reporter: QualityReporter) -> Iterator[QualityReporter]:
+    """
+    Route reporting on the current thread to a given reporter
+    
+    Pipelines that run concurrently (web app jobs) bind their own reporter on
+    the threads running their steps, so their issues and metrics stay apart.
+    
+    Args:
+        reporter: Reporter that get_global_reporter() returns inside the block
+    
+    Yields:
+        The bound reporter
+    """
+    previous = getattr(_active, "reporter", None)
+    _active.reporter = reporter
+    try:
+        yield reporter
+    finally:
+        _active.reporter = previous
 
 def reset_global_reporter():
     """Reset the global quality reporter"""
@@ -242,20 +276,20 @@ def reset_global_reporter():
 # Convenience functions for the global reporter
 def add_warning(step: str, category: str, message: str, details: Optional[str] = None):
     """Add warning to global reporter"""
-    _global_reporter.add_warning(step, category, message, details)
+    get_global_reporter().add_warning(step, category, message, details)
 
 def add_error(step: str, category: str, message: str, details: Optional[str] = None):
     """Add error to global reporter"""
-    _global_reporter.add_error(step, category, message, details)
+    get_global_reporter().add_error(step, category, message, details)
 
 def add_info(step: str, category: str, message: str, details: Optional[str] = None):
     """Add info to global reporter"""
-    _global_reporter.add_info(step, category, message, details)
+    get_global_reporter().add_info(step, category, message, details)
 
 def step_completed(step_name: str):
     """Mark step completed in global reporter"""
-    _global_reporter.step_completed(step_name)
+    get_global_reporter().step_completed(step_name)
 
 def get_user_summary() -> Dict[str, Any]:
     """Get user summary from global reporter"""
-    return _global_reporter.get_user_summary()
\ No newline at end of file
+    return get_global_reporter().get_user_summary()
\ No newline at end of file
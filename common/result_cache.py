@@ -0,0 +1,239 @@
+"""
+Content-addressed result cache for TSS Converter
+Stores final workbooks on disk keyed by upload hash and configuration fingerprint.
+"""
+
+import os
+import json
+import time
+import shutil
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+
+from .config import get_config
+from .security import calculate_file_hash
+
+logger = logging.getLogger(__name__)
+
+# Bump when pipeline changes make previously cached results stale
+RESULT_CACHE_VERSION = 1
+
+class ResultCache:
+    """
+    Disk-backed cache of final pipeline outputs
+    
+    Entries are '<key>.xlsx' workbooks with a '<key>.json' sidecar holding the
+    processing statistics of the run that produced them. The file modification
+    time doubles as last-access time, so eviction is least-recently-used.
+    """
+    
+    def __init__(self, cache_dir: Union[str, Path], max_size_mb: float = 500,
+                 max_age_hours: float = 24.0):
+        self.cache_dir = Path(cache_dir)
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.max_age_seconds = max_age_hours * 3600
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        
+        self.cache_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+    
+    def make_key(self, file_data: bytes) -> str:
+        """
+        Build the cache key for an upload under the current configuration
+        
+        Args:
+            file_data: Uploaded file content
+        
+        Returns:
+            Cache key (hex string)
+        """
+        return self.key_for_hash(calculate_file_hash(file_data))
+    
+    def key_for_hash(self, file_hash: str) -> str:
+        """
+        Build the cache key for an upload whose SHA-256 is already known
+        
+        Args:
+            file_hash: Hex digest of the uploaded file content
+        
+        Returns:
+            Cache key (hex string)
+        """
+        config_fingerprint = get_config().fingerprint()
+        return f"{file_hash}-{config_fingerprint[:16]}-v{RESULT_CACHE_VERSION}"
+    
+    def _entry_paths(self, key: str) -> Tuple[Path, Path]:
+        """Get workbook and metadata paths for a cache key"""
+        return self.cache_dir / f"{key}.xlsx", self.cache_dir / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """
+        Look up a cached result
+        
+        Args:
+            key: Cache key from make_key()
+        
+        Returns:
+            Tuple of (cached workbook path, cached processing stats) or None on miss
+        """
+        workbook_path, meta_path = self._entry_paths(key)
+        
+        with self._lock:
+            try:
+                age = time.time() - workbook_path.stat().st_mtime
+                if age > self.max_age_seconds:
+                    self._remove_entry(key)
+                    raise FileNotFoundError(key)
+                
+                stats = json.loads(meta_path.read_text(encoding='utf-8')) if meta_path.exists() else {}
+                
+                # Touch entry so it becomes most recently used
+                os.utime(workbook_path, None)
+                self.hits += 1
+                logger.info(f"💾 Result cache hit: {key[:16]}...")
+                return workbook_path, stats
+            
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+    
+    def put(self, key: str, result_file: Union[str, Path], stats: Optional[Dict[str, Any]] = None) -> Optional[Path]:
+        """
+        Store a final workbook in the cache
+        
+        Args:
+            key: Cache key from make_key()
+            result_file: Final workbook produced by the pipeline
+            stats: Processing statistics to return with future hits
+        
+        Returns:
+            Path of the cached workbook, or None if it could not be stored
+        """
+        workbook_path, meta_path = self._entry_paths(key)
+        
+        with self._lock:
+            try:
+                # Directory may have been removed by "Clear Temp Files"
+                self.cache_dir.mkdir(parents=True, exist_ok=True, mode=0o700)
+                
+                # Write to temp names first so readers never see partial entries
+                tmp_workbook = workbook_path.with_suffix('.xlsx.tmp')
+                tmp_meta = meta_path.with_suffix('.json.tmp')
+                
+                shutil.copyfile(str(result_file), str(tmp_workbook))
+                tmp_meta.write_text(json.dumps(stats or {}, default=str), encoding='utf-8')
+                os.chmod(tmp_workbook, 0o600)
+                
+                os.replace(tmp_meta, meta_path)
+                os.replace(tmp_workbook, workbook_path)
+                
+                logger.info(f"💾 Stored result in cache: {key[:16]}...")
+            except OSError as e:
+                logger.warning(f"Could not store result in cache: {e}")
+                return None
+            
+            self._evict()
+        
+        return workbook_path if workbook_path.exists() else None
+    
+    def _remove_entry(self, key: str) -> None:
+        """Delete a cache entry and its metadata"""
+        for path in self._entry_paths(key):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def _evict(self) -> int:
+        """
+        Remove expired entries, then least recently used entries until under the size limit
+        
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        entries = []
+        
+        for workbook_path in self.cache_dir.glob('*.xlsx'):
+            try:
+                stat = workbook_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, workbook_path.stem))
+        
+        removed = 0
+        total_size = 0
+        kept = []
+        
+        for mtime, size, key in entries:
+            if now - mtime > self.max_age_seconds:
+                self._remove_entry(key)
+                removed += 1
+            else:
+                kept.append((mtime, size, key))
+                total_size += size
+        
+        # Oldest access first
+        kept.sort()
+        while kept and total_size > self.max_size_bytes:
+            mtime, size, key = kept.pop(0)
+            self._remove_entry(key)
+            total_size -= size
+            removed += 1
+        
+        if removed:
+            logger.info(f"🧹 Evicted {removed} result cache entries")
+        
+        return removed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters and current size
+        
+        Returns:
+            Dictionary with hits, misses, entries and size_bytes
+        """
+        with self._lock:
+            sizes = [p.stat().st_size for p in self.cache_dir.glob('*.xlsx') if p.exists()]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(sizes),
+                "size_bytes": sum(sizes)
+            }
+    
+    def clear(self) -> None:
+        """Remove all cache entries and reset counters"""
+        with self._lock:
+            for path in list(self.cache_dir.glob('*.xlsx')) + list(self.cache_dir.glob('*.json')):
+                path.unlink(missing_ok=True)
+            self.hits = 0
+            self.misses = 0
+
+# Global cache instances, one per cache directory
+_result_caches: Dict[str, ResultCache] = {}
+_result_caches_lock = threading.Lock()
+
+def get_result_cache(cache_dir: Union[str, Path], max_size_mb: float = 500,
+                     max_age_hours: float = 24.0) -> ResultCache:
+    """
+    Get the shared result cache for a directory
+    
+    Counters live on the shared instance, so they accumulate across pipeline runs.
+    
+    Args:
+        cache_dir: Cache directory
+        max_size_mb: Maximum total size of cached workbooks
+        max_age_hours: Maximum age of a cache entry since last access
+    
+    Returns:
+        ResultCache instance
+    """
+    key = str(Path(cache_dir).resolve())
+    with _result_caches_lock:
+        if key not in _result_caches:
+            _result_caches[key] = ResultCache(cache_dir, max_size_mb, max_age_hours)
+        return _result_caches[key]
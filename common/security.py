@@ -4,13 +4,18 @@ Provides file validation, sanitization, and security checks.
 """
 
 import os
+import mmap
 import mimetypes
 import hashlib
 import logging
 from pathlib import Path
-from typing import Tuple, Optional, List, Dict, Any
+from typing import Tuple, Optional, List, Dict, Any, FrozenSet, Union, BinaryIO, Iterator
 import re
 import io
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from common.article_matcher import AhoCorasick
 
 # Safe imports with fallback handling
 try:
@@ -64,31 +69,302 @@ DANGEROUS_PATTERNS = [
     r'\.ps1$', r'\.sh$', r'\.php$', r'\.asp$', r'\.jsp$'
 ]
 
+# Archive members that have no place inside an Excel file
+SUSPICIOUS_MEMBER_PATTERN = re.compile(r'\.(exe|bat|cmd|scr|dll|jar|js|vbs)$', re.IGNORECASE)
+
+# Zip bomb indicators
+MAX_ARCHIVE_MEMBERS = 1000
+MAX_COMPRESSION_RATIO = 100
+
+# Script content that has no place in a spreadsheet, matched case-insensitively
+SUSPICIOUS_CONTENT_PATTERNS = [
+    b'javascript:', b'vbscript:', b'data:text/html',
+    b'<script', b'</script>', b'eval(',
+    b'document.write', b'innerhtml'
+]
+
+# Archive members are decompressed and scanned in chunks of this size
+SCAN_CHUNK_SIZE = 64 * 1024
+
+# Default limit on decompressed bytes per upload (zip bomb defense)
+MAX_DECOMPRESSED_SIZE = 512 * 1024 * 1024
+
+# Uploads are written to disk in chunks of this size
+INGEST_CHUNK_SIZE = 1024 * 1024
+
+# libmagic only looks at the start of a buffer (its default bytes_max)
+MIME_SNIFF_SIZE = 1024 * 1024
+
 class SecurityError(Exception):
     """Raised when security validation fails"""
     pass
 
+@dataclass(frozen=True)
+class ArchiveMember:
+    """One entry of an archive's central directory"""
+    name: str
+    file_size: int
+    compress_size: int
+    
+    @property
+    def ratio(self) -> float:
+        """Uncompressed to compressed size"""
+        return self.file_size / self.compress_size if self.compress_size else float(self.file_size > 0)
+
+@dataclass(frozen=True)
+class ArchiveProfile:
+    """
+    Result of inspecting an upload's ZIP central directory once
+    
+    Every FileValidator check reads its member names and sizes from here
+    instead of reopening the archive. is_zip is False (with error set) when
+    the data is not a readable ZIP file.
+    """
+    archive_size: int
+    is_zip: bool
+    members: Tuple[ArchiveMember, ...] = ()
+    names: FrozenSet[str] = frozenset()
+    suspicious_members: Tuple[str, ...] = ()
+    error: Optional[str] = None
+    
+    @property
+    def member_count(self) -> int:
+        """Number of archive members"""
+        return len(self.members)
+    
+    @property
+    def total_uncompressed(self) -> int:
+        """Sum of the members' uncompressed sizes"""
+        return sum(member.file_size for member in self.members)
+    
+    @property
+    def compression_ratio(self) -> float:
+        """Total uncompressed size relative to the archive size"""
+        return self.total_uncompressed / self.archive_size if self.archive_size else 0.0
+    
+    @property
+    def max_member_ratio(self) -> float:
+        """Highest compression ratio of a single member"""
+        return max((member.ratio for member in self.members), default=0.0)
+    
+    @property
+    def worksheet_count(self) -> int:
+        """Number of worksheet parts"""
+        return sum(1 for name in self.names if name.startswith('xl/worksheets/') and name.endswith('.xml'))
+    
+    def has_member(self, name: str) -> bool:
+        """Check whether the archive contains a member"""
+        return name in self.names
+
+class BufferReader(io.RawIOBase):
+    """
+    Seekable read-only stream over a bytes-like object such as an mmap
+    
+    io.BytesIO copies any buffer that is not a bytes object; this reads
+    through a memoryview instead, so a mapped upload is never copied whole.
+    """
+    
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast('B')
+        self._position = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+    
+    def readinto(self, buffer) -> int:
+        chunk = self._view[self._position:self._position + len(buffer)]
+        size = len(chunk)
+        buffer[:size] = chunk
+        self._position += size
+        return size
+    
+    def close(self) -> None:
+        # Release the view so the underlying mmap can be closed
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+def _byte_stream(file_data) -> BinaryIO:
+    """Open a binary stream over upload content without copying it"""
+    if isinstance(file_data, bytes):
+        return io.BytesIO(file_data)  # shares the bytes object
+    return BufferReader(file_data)
+
+def inspect_archive(file_data: bytes) -> ArchiveProfile:
+    """
+    Parse an upload's ZIP central directory in a single pass
+    
+    Only the central directory is read; no member is decompressed.
+    
+    Args:
+        file_data: Uploaded file content
+    
+    Returns:
+        ArchiveProfile of the upload
+    """
+    if not HAS_ZIPFILE:
+        return ArchiveProfile(archive_size=len(file_data), is_zip=False, error="zipfile module not available")
+    
+    try:
+        with _byte_stream(file_data) as stream, zipfile.ZipFile(stream) as zf:
+            infos = zf.infolist()
+    except zipfile.BadZipFile as e:
+        return ArchiveProfile(archive_size=len(file_data), is_zip=False, error=f"Invalid ZIP structure: {e}")
+    except Exception as e:
+        return ArchiveProfile(archive_size=len(file_data), is_zip=False, error=f"ZIP analysis error: {e}")
+    
+    members = tuple(ArchiveMember(info.filename, info.file_size, info.compress_size) for info in infos)
+    return ArchiveProfile(
+        archive_size=len(file_data),
+        is_zip=True,
+        members=members,
+        names=frozenset(member.name for member in members),
+        suspicious_members=tuple(member.name for member in members if SUSPICIOUS_MEMBER_PATTERN.search(member.name))
+    )
+
+@dataclass(frozen=True)
+class ContentScanResult:
+    """Outcome of scanning an upload's decompressed content"""
+    findings: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()  # (member name, patterns found)
+    scanned_bytes: int = 0
+    budget_exceeded: bool = False
+    error: Optional[str] = None
+    
+    @property
+    def patterns(self) -> List[str]:
+        """Distinct patterns found across all members"""
+        return sorted({pattern for _, patterns in self.findings for pattern in patterns})
+
+class ContentScanner:
+    """
+    Streaming scan of an upload's decompressed content for script patterns
+    
+    Each archive member is decompressed incrementally in chunk_size pieces
+    and fed through one Aho-Corasick automaton, whose state carries over
+    between chunks so patterns split across chunk boundaries are still found.
+    A member stops being read at its first match, and the whole scan stops
+    once max_decompressed_size bytes have been decompressed, so memory stays
+    at one chunk and time stays bounded whatever the archive claims to hold.
+    Data that is not a ZIP archive is scanned as it is.
+    """
+    
+    def __init__(self, patterns: List[bytes] = None, max_decompressed_size: int = MAX_DECOMPRESSED_SIZE,
+                 chunk_size: int = SCAN_CHUNK_SIZE):
+        self.patterns = [pattern.lower() for pattern in (patterns or SUSPICIOUS_CONTENT_PATTERNS)]
+        self.max_decompressed_size = max_decompressed_size
+        self.chunk_size = chunk_size
+        self._automaton = AhoCorasick(self.patterns)
+    
+    def scan(self, file_data: bytes, profile: Optional[ArchiveProfile] = None,
+             stop_on_first: bool = False) -> ContentScanResult:
+        """
+        Scan the decompressed members of an upload
+        
+        Args:
+            file_data: Uploaded file content
+            profile: Archive profile of file_data (inspected here if not given)
+            stop_on_first: Stop at the first member with a match
+        
+        Returns:
+            ContentScanResult
+        """
+        profile = profile or inspect_archive(file_data)
+        if not profile.is_zip:
+            with _byte_stream(file_data) as stream:
+                found, scanned, exceeded = self._scan_stream(stream, self.max_decompressed_size)
+            findings = (("", found),) if found else ()
+            return ContentScanResult(findings, scanned, exceeded)
+        
+        # Declared sizes already over budget are rejected without decompressing anything
+        if profile.total_uncompressed > self.max_decompressed_size:
+            return ContentScanResult(budget_exceeded=True)
+        
+        findings = []
+        scanned = 0
+        try:
+            with _byte_stream(file_data) as stream, zipfile.ZipFile(stream) as zf:
+                for member in profile.members:
+                    if member.name.endswith('/'):
+                        continue
+                    with zf.open(member.name) as stream:
+                        found, member_bytes, exceeded = self._scan_stream(stream, self.max_decompressed_size - scanned)
+                    scanned += member_bytes
+                    if found:
+                        findings.append((member.name, found))
+                    if exceeded:
+                        return ContentScanResult(tuple(findings), scanned, True)
+                    if found and stop_on_first:
+                        break
+        except (zipfile.BadZipFile, RuntimeError, NotImplementedError, OSError) as e:
+            # Corrupt, encrypted or unsupported members end the scan with what was found so far
+            return ContentScanResult(tuple(findings), scanned, error=str(e))
+        
+        return ContentScanResult(tuple(findings), scanned)
+    
+    def _scan_stream(self, stream, budget: int) -> Tuple[Tuple[str, ...], int, bool]:
+        """
+        Scan one stream chunk by chunk until its end, its first match or the budget
+        
+        Returns:
+            Tuple of (patterns found, bytes read, whether the budget was exceeded)
+        """
+        state = 0
+        read = 0
+        while True:
+            # One byte past the budget tells an exhausted budget from an exact fit
+            chunk = stream.read(min(self.chunk_size, budget - read + 1))
+            if not chunk:
+                return (), read, False
+            read += len(chunk)
+            if read > budget:
+                return (), read, True
+            
+            found, state = self._automaton.scan(chunk.lower(), state)
+            if found:
+                return tuple(self.patterns[index].decode('ascii') for index in sorted(found)), read, False
+
 class FileValidator:
     """Comprehensive file validation and security checks with graceful fallbacks"""
     
-    def __init__(self, max_size: int = None, strict_mode: bool = True, enable_fallbacks: bool = True):
+    def __init__(self, max_size: int = None, strict_mode: bool = True, enable_fallbacks: bool = True,
+                 max_decompressed_size: int = None):
         self.max_size = max_size or MAX_FILE_SIZES['default']
         self.strict_mode = strict_mode
         self.enable_fallbacks = enable_fallbacks
+        self.content_scanner = ContentScanner(max_decompressed_size=max_decompressed_size or MAX_DECOMPRESSED_SIZE)
         self.validation_warnings = []
+        self.archive_profile: Optional[ArchiveProfile] = None
     
     def validate_file(self, file_data: bytes, filename: str) -> Tuple[bool, Optional[str]]:
         """
         Comprehensive file validation with graceful fallbacks
         
+        The ZIP central directory is inspected once and the resulting
+        ArchiveProfile is shared by all checks; it stays available as
+        archive_profile afterwards.
+        
         Returns:
             (is_valid, error_message)
         """
         self.validation_warnings = []
+        self.archive_profile = None
         validation_score = 0
         max_score = 6
         
         try:
+            profile = self.archive_profile = inspect_archive(file_data)
+            
             # 1. File size check (critical)
             if not self._check_file_size(file_data):
                 if self.strict_mode:
@@ -117,7 +393,7 @@ class FileValidator:
                 validation_score += 1
             
             # 4. MIME type validation (optional with fallback)
-            if not self._check_mime_type_with_fallback(file_data, filename):
+            if not self._check_mime_type_with_fallback(file_data, filename, profile):
                 if self.strict_mode:
                     return False, "File MIME type is not supported"
                 else:
@@ -126,7 +402,7 @@ class FileValidator:
                 validation_score += 1
             
             # 5. Excel structure validation (important, with fallback)
-            if not self._check_excel_structure_with_fallback(file_data):
+            if not self._check_excel_structure_with_fallback(file_data, profile):
                 if self.strict_mode:
                     return False, "File does not contain valid Excel structure"
                 else:
@@ -135,7 +411,7 @@ class FileValidator:
                 validation_score += 1
             
             # 6. Malicious content scan (optional)
-            if not self._scan_malicious_content_safe(file_data):
+            if not self._scan_malicious_content_safe(file_data, profile):
                 if self.strict_mode:
                     return False, "File contains potentially malicious content"
                 else:
@@ -228,13 +504,14 @@ class FileValidator:
         """Legacy method - redirect to new method"""
         return self._check_file_signature_with_fallback(file_data)
     
-    def _check_mime_type_with_fallback(self, file_data: bytes, filename: str) -> bool:
+    def _check_mime_type_with_fallback(self, file_data: bytes, filename: str,
+                                       profile: Optional[ArchiveProfile] = None) -> bool:
         """Check MIME type using multiple methods with fallbacks"""
         try:
             # Method 1: Use python-magic if available
             if HAS_MAGIC:
                 try:
-                    mime_type = magic.from_buffer(file_data, mime=True)
+                    mime_type = magic.from_buffer(file_data[:MIME_SNIFF_SIZE], mime=True)
                     if mime_type in ALLOWED_MIME_TYPES:
                         return True
                 except Exception as e:
@@ -248,19 +525,13 @@ class FileValidator:
             except Exception as e:
                 logger.warning(f"mimetypes.guess_type error: {e}")
             
-            # Method 3: Check ZIP structure (XLSX is ZIP-based) with safe fallback
-            if HAS_ZIPFILE:
-                try:
-                    # Use BytesIO instead of tempfile for compatibility
-                    file_buffer = io.BytesIO(file_data)
-                    with zipfile.ZipFile(file_buffer) as zf:
-                        # Check for Excel-specific files in the ZIP
-                        excel_indicators = ['xl/workbook.xml', 'xl/styles.xml', '_rels/.rels']
-                        return any(indicator in zf.namelist() for indicator in excel_indicators)
-                except zipfile.BadZipFile:
-                    logger.debug("File is not a valid ZIP file")
-                except Exception as e:
-                    logger.warning(f"ZIP structure check error: {e}")
+            # Method 3: Check ZIP structure (XLSX is ZIP-based)
+            profile = profile or inspect_archive(file_data)
+            if profile.is_zip:
+                # Check for Excel-specific files in the ZIP
+                excel_indicators = ['xl/workbook.xml', 'xl/styles.xml', '_rels/.rels']
+                return any(profile.has_member(indicator) for indicator in excel_indicators)
+            logger.debug(f"ZIP structure check skipped: {profile.error}")
             
             # Method 4: Basic filename check as last resort
             if filename.lower().endswith('.xlsx'):
@@ -276,113 +547,66 @@ class FileValidator:
         """Legacy method - redirect to new method"""
         return self._check_mime_type_with_fallback(file_data, filename)
     
-    def _check_excel_structure(self, file_data: bytes) -> bool:
+    def _check_excel_structure(self, file_data: bytes, profile: Optional[ArchiveProfile] = None) -> bool:
         """Validate Excel file internal structure"""
-        try:
-            with zipfile.ZipFile(tempfile.BytesIO(file_data)) as zf:
-                # Required Excel files
-                required_files = [
-                    'xl/workbook.xml',
-                    '_rels/.rels',
-                    '[Content_Types].xml'
-                ]
-                
-                file_list = zf.namelist()
-                
-                # Check for required files
-                for required_file in required_files:
-                    if required_file not in file_list:
-                        logger.warning(f"Missing required Excel file: {required_file}")
-                        return False
-                
-                # Check for suspicious files
-                suspicious_patterns = [
-                    r'\.exe$', r'\.bat$', r'\.cmd$', r'\.scr$',
-                    r'\.dll$', r'\.jar$', r'\.js$', r'\.vbs$'
-                ]
-                
-                for file_path in file_list:
-                    for pattern in suspicious_patterns:
-                        if re.search(pattern, file_path, re.IGNORECASE):
-                            logger.warning(f"Suspicious file found in Excel: {file_path}")
-                            return False
-                
-                return True
-                
-        except zipfile.BadZipFile:
-            logger.error("Invalid ZIP structure in Excel file")
+        profile = profile or inspect_archive(file_data)
+        if not profile.is_zip:
+            logger.error(profile.error)
             return False
-        except Exception as e:
-            logger.error(f"Excel structure validation failed: {e}")
+    
+        # Required Excel files
+        required_files = [
+            'xl/workbook.xml',
+            '_rels/.rels',
+            '[Content_Types].xml'
+        ]
+        
+        for required_file in required_files:
+            if not profile.has_member(required_file):
+                logger.warning(f"Missing required Excel file: {required_file}")
+                return False
+        
+        if profile.suspicious_members:
+            logger.warning(f"Suspicious file found in Excel: {profile.suspicious_members[0]}")
             return False
+        
+        return True
     
-    def _check_excel_structure_with_fallback(self, file_data: bytes) -> bool:
+    def _check_excel_structure_with_fallback(self, file_data: bytes,
+                                             profile: Optional[ArchiveProfile] = None) -> bool:
         """Validate Excel file internal structure with fallbacks"""
-        if not HAS_ZIPFILE:
-            logger.warning("zipfile module not available, using basic structure check")
-            return self._basic_excel_check(file_data)
-            
-        try:
-            # Use BytesIO instead of tempfile for compatibility
-            file_buffer = io.BytesIO(file_data)
-            with zipfile.ZipFile(file_buffer) as zf:
-                # Required Excel files (relaxed requirements for compatibility)
-                critical_files = ['xl/workbook.xml']
-                optional_files = ['_rels/.rels', '[Content_Types].xml', 'xl/styles.xml']
-                
-                file_list = zf.namelist()
-                
-                # Check for critical files
-                critical_found = 0
-                for critical_file in critical_files:
-                    if critical_file in file_list:
-                        critical_found += 1
-                
-                # Check for optional files
-                optional_found = 0
-                for optional_file in optional_files:
-                    if optional_file in file_list:
-                        optional_found += 1
-                
-                # Flexible validation: need at least one critical file
-                if critical_found == 0 and self.strict_mode:
-                    logger.warning(f"No critical Excel files found. Available: {file_list[:5]}...")
-                    return False
-                elif critical_found == 0:
-                    self.validation_warnings.append("Warning: No critical Excel files found, but continuing")
-                
-                # Check for suspicious files
-                suspicious_patterns = [
-                    r'\.exe$', r'\.bat$', r'\.cmd$', r'\.scr$',
-                    r'\.dll$', r'\.jar$', r'\.js$', r'\.vbs$'
-                ]
-                
-                suspicious_found = []
-                for file_path in file_list:
-                    for pattern in suspicious_patterns:
-                        if re.search(pattern, file_path, re.IGNORECASE):
-                            suspicious_found.append(file_path)
-                
-                if suspicious_found:
-                    if self.strict_mode:
-                        logger.warning(f"Suspicious files found in Excel: {suspicious_found}")
-                        return False
-                    else:
-                        self.validation_warnings.append(f"Warning: Suspicious files found: {suspicious_found}")
-                
-                # Success criteria: critical files found, no major issues
-                return critical_found > 0 or optional_found >= 2
-                
-        except zipfile.BadZipFile:
-            logger.debug("Not a valid ZIP file, trying fallback validation")
-            if self.enable_fallbacks:
+        profile = profile or inspect_archive(file_data)
+        if not profile.is_zip:
+            logger.debug(f"{profile.error}, trying fallback validation")
+            if self.enable_fallbacks or not HAS_ZIPFILE:
                 return self._basic_excel_check(file_data)
             return False
-        except Exception as e:
-            logger.error(f"Excel structure validation failed: {e}")
-            if self.enable_fallbacks:
-                return self._basic_excel_check(file_data)
+        
+        # Required Excel files (relaxed requirements for compatibility)
+        critical_files = ['xl/workbook.xml']
+        optional_files = ['_rels/.rels', '[Content_Types].xml', 'xl/styles.xml']
+        
+        critical_found = sum(1 for critical_file in critical_files if profile.has_member(critical_file))
+        optional_found = sum(1 for optional_file in optional_files if profile.has_member(optional_file))
+        
+        # Flexible validation: need at least one critical file
+        if critical_found == 0 and self.strict_mode:
+            logger.warning(f"No critical Excel files found. Available: {[m.name for m in profile.members[:5]]}...")
             return False
+        elif critical_found == 0:
+            self.validation_warnings.append("Warning: No critical Excel files found, but continuing")
+        
+        # Check for suspicious files
+        suspicious_found = list(profile.suspicious_members)
+        if suspicious_found:
+            if self.strict_mode:
+                logger.warning(f"Suspicious files found in Excel: {suspicious_found}")
+                return False
+            else:
+                self.validation_warnings.append(f"Warning: Suspicious files found: {suspicious_found}")
+        
+        # Success criteria: critical files found, no major issues
+        return critical_found > 0 or optional_found >= 2
             
     def _basic_excel_check(self, file_data: bytes) -> bool:
         """Basic Excel format check when advanced validation fails"""
@@ -392,7 +616,8 @@ class FileValidator:
                 return False
                 
             zip_signatures = [b'\x50\x4B\x03\x04', b'\x50\x4B\x05\x06', b'\x50\x4B\x07\x08']
-            has_zip_signature = any(file_data.startswith(sig) for sig in zip_signatures)
+            file_header = file_data[:4]
+            has_zip_signature = any(file_header.startswith(sig) for sig in zip_signatures)
             
             # Look for Excel-specific content markers in raw data
             excel_markers = [
@@ -403,7 +628,8 @@ class FileValidator:
                 b'[Content_Types].xml'
             ]
             
-            excel_markers_found = sum(1 for marker in excel_markers if marker in file_data)
+            # find() rather than 'in' so mapped files are searched without copying
+            excel_markers_found = sum(1 for marker in excel_markers if file_data.find(marker) != -1)
             
             # Basic validation: ZIP signature + some Excel markers
             return has_zip_signature and excel_markers_found >= 2
@@ -412,62 +638,52 @@ class FileValidator:
             logger.warning(f"Basic Excel check failed: {e}")
             return False
     
-    def _scan_malicious_content_safe(self, file_data: bytes) -> bool:
+    def _scan_malicious_content_safe(self, file_data: bytes, profile: Optional[ArchiveProfile] = None) -> bool:
         """Safe malicious content scanning with fallbacks"""
         try:
             # Check file size again (prevent zip bombs)
             if len(file_data) > self.max_size:
                 return False
             
-            # Check for zip bombs (high compression ratio) with safe handling
-            if HAS_ZIPFILE:
-                try:
-                    file_buffer = io.BytesIO(file_data)
-                    with zipfile.ZipFile(file_buffer) as zf:
-                        total_compressed = sum(info.file_size for info in zf.infolist())
-                        total_uncompressed = len(file_data)
-                        
-                        if total_uncompressed > 0:
-                            compression_ratio = total_compressed / total_uncompressed
-                            if compression_ratio > 100:  # Suspiciously high compression
-                                logger.warning(f"Suspicious compression ratio: {compression_ratio}")
-                                if self.strict_mode:
-                                    return False
-                                else:
-                                    self.validation_warnings.append(f"High compression ratio: {compression_ratio}")
+            # Check for zip bombs (high compression ratio, too many files)
+            profile = profile or inspect_archive(file_data)
+            if profile.is_zip:
+                compression_ratio = profile.compression_ratio
+                if compression_ratio > MAX_COMPRESSION_RATIO:  # Suspiciously high compression
+                    logger.warning(f"Suspicious compression ratio: {compression_ratio}")
+                    if self.strict_mode:
+                        return False
+                    else:
+                        self.validation_warnings.append(f"High compression ratio: {compression_ratio}")
                         
-                        # Check for too many files (zip bomb indicator)
-                        if len(zf.infolist()) > 1000:
-                            logger.warning(f"Too many files in archive: {len(zf.infolist())}")
-                            if self.strict_mode:
-                                return False
-                            else:
-                                self.validation_warnings.append(f"Many files in archive: {len(zf.infolist())}")
-                                
-                except zipfile.BadZipFile:
-                    logger.debug("Cannot analyze ZIP structure for malicious content")
-                except Exception as e:
-                    logger.warning(f"ZIP analysis error: {e}")
+                if profile.member_count > MAX_ARCHIVE_MEMBERS:
+                    logger.warning(f"Too many files in archive: {profile.member_count}")
+                    if self.strict_mode:
+                        return False
+                    else:
+                        self.validation_warnings.append(f"Many files in archive: {profile.member_count}")
+            else:
+                logger.debug(f"Cannot analyze ZIP structure for malicious content: {profile.error}")
             
-            # Check for suspicious byte patterns (basic scan)
+            # Check the decompressed content for suspicious patterns (streaming scan)
             try:
-                suspicious_bytes = [
-                    b'javascript:', b'vbscript:', b'data:text/html',
-                    b'<script', b'</script>', b'eval(',
-                    b'document.write', b'innerHTML'
-                ]
+                result = self.content_scanner.scan(file_data, profile, stop_on_first=self.strict_mode)
+                if result.error:
+                    logger.warning(f"Content pattern scan error: {result.error}")
                 
-                # Only scan first 1MB to avoid performance issues
-                scan_data = file_data[:1024*1024].lower()
-                suspicious_found = []
-                
-                for suspicious in suspicious_bytes:
-                    if suspicious in scan_data:
-                        suspicious_found.append(suspicious.decode('utf-8', errors='ignore'))
+                if result.budget_exceeded:
+                    limit_mb = self.content_scanner.max_decompressed_size / (1024 * 1024)
+                    logger.warning(f"Decompressed content exceeds {limit_mb:.0f}MB")
+                    if self.strict_mode:
+                        return False
+                    else:
+                        self.validation_warnings.append(f"Decompressed content exceeds {limit_mb:.0f}MB")
                 
+                suspicious_found = result.patterns
                 if suspicious_found:
+                    members = [member for member, _ in result.findings]
                     if self.strict_mode:
-                        logger.warning(f"Suspicious content patterns found: {suspicious_found}")
+                        logger.warning(f"Suspicious content patterns found: {suspicious_found} in {members}")
                         return False
                     else:
                         self.validation_warnings.append(f"Suspicious patterns: {suspicious_found}")
@@ -489,38 +705,22 @@ class FileValidator:
             if len(file_data) > self.max_size:
                 return False
             
-            # Check for zip bombs (high compression ratio)
-            try:
-                with zipfile.ZipFile(tempfile.BytesIO(file_data)) as zf:
-                    total_compressed = sum(info.file_size for info in zf.infolist())
-                    total_uncompressed = len(file_data)
-                    
-                    if total_uncompressed > 0:
-                        compression_ratio = total_compressed / total_uncompressed
-                        if compression_ratio > 100:  # Suspiciously high compression
-                            logger.warning(f"Suspicious compression ratio: {compression_ratio}")
-                            return False
-                    
-                    # Check for too many files (zip bomb indicator)
-                    if len(zf.infolist()) > 1000:
-                        logger.warning(f"Too many files in archive: {len(zf.infolist())}")
-                        return False
-                        
-            except zipfile.BadZipFile:
+            # Check for zip bombs (high compression ratio, too many files)
+            profile = inspect_archive(file_data)
+            if not profile.is_zip:
+                return False
+            if profile.compression_ratio > MAX_COMPRESSION_RATIO:
+                logger.warning(f"Suspicious compression ratio: {profile.compression_ratio}")
+                return False
+            if profile.member_count > MAX_ARCHIVE_MEMBERS:
+                logger.warning(f"Too many files in archive: {profile.member_count}")
                 return False
             
-            # Check for suspicious byte patterns
-            suspicious_bytes = [
-                b'javascript:', b'vbscript:', b'data:text/html',
-                b'<script', b'</script>', b'eval(',
-                b'document.write', b'innerHTML'
-            ]
-            
-            file_lower = file_data.lower()
-            for suspicious in suspicious_bytes:
-                if suspicious in file_lower:
-                    logger.warning(f"Suspicious content pattern found")
-                    return False
+            # Check the decompressed content for suspicious patterns
+            result = self.content_scanner.scan(file_data, profile, stop_on_first=True)
+            if result.budget_exceeded or result.findings:
+                logger.warning(f"Suspicious content pattern found")
+                return False
             
             return True
             
@@ -635,7 +835,7 @@ def calculate_file_hash(file_data: bytes, algorithm: str = 'sha256') -> str:
     Calculate hash of file data for integrity verification
     
     Args:
-        file_data: File content as bytes
+        file_data: File content as bytes (or any bytes-like object, e.g. an mmap)
         algorithm: Hash algorithm to use
         
     Returns:
@@ -645,6 +845,100 @@ def calculate_file_hash(file_data: bytes, algorithm: str = 'sha256') -> str:
     hash_obj.update(file_data)
     return hash_obj.hexdigest()
 
+@dataclass(frozen=True)
+class IngestedUpload:
+    """An upload written to disk, with what was learned about it while writing"""
+    path: Path
+    size: int
+    file_hash: str
+    has_excel_signature: bool
+
+def _read_chunks(source: BinaryIO, chunk_size: int) -> Iterator[memoryview]:
+    """Read a binary stream into one reused buffer, yielding views of the filled part"""
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    while True:
+        size = source.readinto(buffer)
+        if not size:
+            return
+        yield view[:size]
+
+def ingest_upload(source: Union[bytes, bytearray, memoryview, BinaryIO], destination: Path,
+                  max_size: Optional[int] = None, algorithm: str = 'sha256',
+                  chunk_size: int = INGEST_CHUNK_SIZE) -> IngestedUpload:
+    """
+    Write an upload to disk in one pass, hashing it and sniffing its signature on the way
+    
+    Content already in memory is written through memoryview slices and a
+    stream is read into one reused buffer, so no chunk is copied and a
+    stream never has to be held in memory whole. The file is created with
+    owner-only permissions.
+    
+    Args:
+        source: Upload content, or a binary stream positioned at its start
+        destination: File to write
+        max_size: Size limit in bytes, checked while writing
+        algorithm: Hash algorithm to use
+        chunk_size: Bytes written per chunk
+    
+    Returns:
+        IngestedUpload describing the written file
+    
+    Raises:
+        SecurityError: If the upload exceeds max_size; the partial file is removed
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source).cast('B')
+        chunks = (view[offset:offset + chunk_size] for offset in range(0, len(view), chunk_size))
+    else:
+        chunks = _read_chunks(source, chunk_size)
+    
+    hash_obj = hashlib.new(algorithm)
+    header = b''
+    size = 0
+    try:
+        with open(destination, 'wb') as f:
+            os.chmod(destination, 0o600)
+            for chunk in chunks:
+                size += len(chunk)
+                if max_size is not None and size > max_size:
+                    raise SecurityError(f"File too large: more than {max_size} bytes")
+                if len(header) < 4:
+                    header += bytes(chunk[:4 - len(header)])
+                hash_obj.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        Path(destination).unlink(missing_ok=True)
+        raise
+    
+    return IngestedUpload(
+        path=Path(destination),
+        size=size,
+        file_hash=hash_obj.hexdigest(),
+        has_excel_signature=any(header.startswith(sig) for sig in EXCEL_SIGNATURES)
+    )
+
+@contextmanager
+def map_file(file_path: Union[str, Path]) -> Iterator[Union[bytes, mmap.mmap]]:
+    """
+    Map a file read-only into memory for validation
+    
+    Validators accept the mapping in place of bytes, so a saved upload is
+    checked without reading a second copy of it into memory.
+    
+    Args:
+        file_path: File to map
+    
+    Yields:
+        Read-only mmap of the file (b'' for an empty file, which cannot be mapped)
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+
 # Security configuration with enhanced options
 SECURITY_CONFIG = {
     'max_file_size_mb': 100,
@@ -656,6 +950,7 @@ SECURITY_CONFIG = {
     'strict_mode': False,  # Default to lenient for better compatibility
     'enable_fallbacks': True,
     'validation_timeout': 30,  # seconds
+    'max_decompressed_mb': MAX_DECOMPRESSED_SIZE // (1024 * 1024),
     'debug_validation': False
 }
 
@@ -6,14 +6,25 @@ Provides safe concurrent access to session state variables.
 import threading
 import time
 import logging
+from collections import OrderedDict
 from typing import Dict, Any, Optional, Callable, Union
 from contextlib import contextmanager
 import streamlit as st
 from dataclasses import dataclass, field
 from enum import Enum
 
+try:
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # Older Streamlit without the runtime package
+    get_script_run_ctx = None
+
 logger = logging.getLogger(__name__)
 
+# Session lock registry defaults
+SESSION_LOCK_TTL_SECONDS = 30 * 60
+MAX_SESSION_LOCKS = 1000
+SESSION_LOCK_SWEEP_SECONDS = 60.0
+
 class SessionLockTimeout(Exception):
     """Raised when session lock acquisition times out"""
     pass
@@ -38,12 +49,146 @@ class ProgressData:
     processing_start_time: Optional[float] = None
     last_updated: float = field(default_factory=time.time)
 
+@dataclass
+class SessionLockEntry:
+    """A session's lock with its last use and current number of holders"""
+    lock: threading.RLock = field(default_factory=threading.RLock)
+    last_access: float = field(default_factory=time.time)
+    holders: int = 0
+
+class SessionLockRegistry:
+    """
+    Per-session locks with idle eviction
+    
+    Entries idle for longer than ttl_seconds are dropped by a background
+    sweeper thread, and the least recently used idle entries are dropped as
+    soon as the registry grows past max_entries, so the number of locks
+    follows the active sessions instead of every session (or worker thread)
+    ever seen. An entry is never evicted while a caller is inside hold().
+    """
+    
+    def __init__(self, ttl_seconds: float = SESSION_LOCK_TTL_SECONDS, max_entries: int = MAX_SESSION_LOCKS,
+                 sweep_interval: float = SESSION_LOCK_SWEEP_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.sweep_interval = sweep_interval
+        self.created = 0
+        self.evicted_idle = 0
+        self.evicted_capacity = 0
+        self._entries: "OrderedDict[str, SessionLockEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+    
+    @contextmanager
+    def hold(self, session_id: str):
+        """
+        Get a session's lock, creating it if needed
+        
+        The caller is counted as a holder until the block exits, so the
+        entry cannot be evicted while the lock may be acquired or held.
+        
+        Args:
+            session_id: Session identifier
+        
+        Yields:
+            The session's RLock (not acquired)
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                entry = self._entries[session_id] = SessionLockEntry()
+                self.created += 1
+            else:
+                self._entries.move_to_end(session_id)
+            entry.holders += 1
+            entry.last_access = time.time()
+            self._evict_over_capacity()
+        
+        try:
+            yield entry.lock
+        finally:
+            with self._lock:
+                entry.holders -= 1
+                entry.last_access = time.time()
+    
+    def sweep(self, max_idle: Optional[float] = None) -> int:
+        """
+        Drop entries that nobody holds and that have been idle too long
+        
+        Args:
+            max_idle: Idle time in seconds (ttl_seconds if None)
+        
+        Returns:
+            Number of entries evicted
+        """
+        cutoff = time.time() - (self.ttl_seconds if max_idle is None else max_idle)
+        with self._lock:
+            expired = [session_id for session_id, entry in self._entries.items()
+                       if entry.holders == 0 and entry.last_access < cutoff]
+            for session_id in expired:
+                del self._entries[session_id]
+            self.evicted_idle += len(expired)
+        return len(expired)
+    
+    def start_sweeper(self) -> None:
+        """Start the background sweeper thread (no-op if it is already running)"""
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._stop_event.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="session-lock-sweeper", daemon=True)
+            self._sweeper.start()
+    
+    def stop_sweeper(self, timeout: Optional[float] = None) -> None:
+        """Stop the background sweeper thread"""
+        self._stop_event.set()
+        sweeper = self._sweeper
+        if sweeper is not None:
+            sweeper.join(timeout)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Registry size, eviction counts and sweeper state"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "held": sum(1 for entry in self._entries.values() if entry.holders),
+                "created": self.created,
+                "evicted_idle": self.evicted_idle,
+                "evicted_capacity": self.evicted_capacity,
+                "sweeper_running": self._sweeper is not None and self._sweeper.is_alive()
+            }
+    
+    def _sweep_loop(self) -> None:
+        while not self._stop_event.wait(self.sweep_interval):
+            try:
+                evicted = self.sweep()
+                if evicted:
+                    logger.debug(f"Evicted {evicted} idle session locks")
+            except Exception as e:
+                logger.error(f"Session lock sweep failed: {e}")
+    
+    def _evict_over_capacity(self) -> None:
+        """Drop least recently used idle entries beyond max_entries (caller holds the lock)"""
+        excess = len(self._entries) - self.max_entries
+        if excess <= 0:
+            return
+        
+        victims = []
+        for session_id, entry in self._entries.items():
+            if len(victims) >= excess:
+                break
+            if entry.holders == 0:
+                victims.append(session_id)
+        for session_id in victims:
+            del self._entries[session_id]
+        self.evicted_capacity += len(victims)
+
 class ThreadSafeSessionManager:
     """Thread-safe session state manager for Streamlit"""
     
     _instance = None
     _lock = threading.Lock()
-    _session_locks = {}
     
     def __new__(cls):
         if cls._instance is None:
@@ -54,13 +199,18 @@ class ThreadSafeSessionManager:
     
     def __init__(self):
         if not hasattr(self, '_initialized'):
-            self._session_locks = {}
+            self._session_locks = SessionLockRegistry()
             self._default_timeout = 30.0  # 30 seconds default timeout
             self._initialized = True
     
     def _get_session_id(self) -> str:
         """Get current Streamlit session ID"""
         try:
+            # Script threads carry the session's run context; its ID is stable across reruns
+            ctx = get_script_run_ctx(suppress_warning=True) if get_script_run_ctx else None
+            if ctx is not None:
+                return ctx.session_id
+            
             # Try to get session ID from Streamlit context
             if hasattr(st, 'session_state') and hasattr(st.session_state, '_session_id'):
                 return st.session_state._session_id
@@ -70,17 +220,6 @@ class ThreadSafeSessionManager:
         except Exception:
             return f"fallback_{int(time.time())}"
     
-    def _get_session_lock(self) -> threading.RLock:
-        """Get or create lock for current session"""
-        session_id = self._get_session_id()
-        
-        if session_id not in self._session_locks:
-            with self._lock:
-                if session_id not in self._session_locks:
-                    self._session_locks[session_id] = threading.RLock()
-        
-        return self._session_locks[session_id]
-    
     @contextmanager
     def session_lock(self, timeout: Optional[float] = None):
         """
@@ -92,17 +231,41 @@ class ThreadSafeSessionManager:
         Raises:
             SessionLockTimeout: If lock cannot be acquired within timeout
         """
-        session_lock = self._get_session_lock()
         timeout = timeout or self._default_timeout
         
-        acquired = session_lock.acquire(timeout=timeout)
-        if not acquired:
-            raise SessionLockTimeout(f"Failed to acquire session lock within {timeout} seconds")
+        with self._session_locks.hold(self._get_session_id()) as session_lock:
+            acquired = session_lock.acquire(timeout=timeout)
+            if not acquired:
+                raise SessionLockTimeout(f"Failed to acquire session lock within {timeout} seconds")
         
-        try:
-            yield
-        finally:
-            session_lock.release()
+            try:
+                yield
+            finally:
+                session_lock.release()
+    
+    def configure_lock_registry(self, ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None,
+                                sweep_interval: Optional[float] = None) -> None:
+        """
+        Set session lock eviction limits and start the background sweeper
+        
+        Safe to call on every script run; the sweeper is only started once.
+        
+        Args:
+            ttl_seconds: Idle time after which a session's lock is dropped
+            max_entries: Maximum number of session locks kept
+            sweep_interval: Seconds between sweeps
+        """
+        if ttl_seconds is not None:
+            self._session_locks.ttl_seconds = ttl_seconds
+        if max_entries is not None:
+            self._session_locks.max_entries = max_entries
+        if sweep_interval is not None:
+            self._session_locks.sweep_interval = sweep_interval
+        self._session_locks.start_sweeper()
+    
+    def get_lock_stats(self) -> Dict[str, Any]:
+        """Session lock registry size and eviction counts"""
+        return self._session_locks.get_stats()
     
     def safe_update_session_state(self, updates: Dict[str, Any], timeout: Optional[float] = None) -> bool:
         """
@@ -333,23 +496,23 @@ class ThreadSafeSessionManager:
         state = self.get_processing_state(timeout)
         return state in {ProcessingState.UPLOADING, ProcessingState.VALIDATING, ProcessingState.PROCESSING}
     
-    def cleanup_old_sessions(self, max_age_hours: float = 24.0):
+    def cleanup_old_sessions(self, max_age_hours: float = 24.0) -> int:
         """
         Clean up old session locks to prevent memory leaks
         
         Args:
-            max_age_hours: Maximum age of session locks to keep
+            max_age_hours: Maximum idle time of session locks to keep
+        
+        Returns:
+            Number of session locks removed
         """
         try:
-            with self._lock:
-                current_time = time.time()
-                cutoff_time = current_time - (max_age_hours * 3600)
-                
-                # This is a simplified cleanup - in production, you'd need
-                # to track session creation times
-                logger.info(f"Cleaned up old session locks older than {max_age_hours} hours")
+            evicted = self._session_locks.sweep(max_idle=max_age_hours * 3600)
+            logger.info(f"Cleaned up {evicted} session locks idle for more than {max_age_hours} hours")
+            return evicted
         except Exception as e:
             logger.error(f"Session cleanup failed: {e}")
+            return 0
 
 # Global session manager instance
 session_manager = ThreadSafeSessionManager()
@@ -385,4 +548,8 @@ def get_processing_state(timeout: Optional[float] = None) -> ProcessingState:
 
 def is_processing_active(timeout: Optional[float] = None) -> bool:
     """Convenience function to check if processing is active"""
-    return session_manager.is_processing_active(timeout)
\ No newline at end of file
+    return session_manager.is_processing_active(timeout)
+
+def get_session_lock_stats() -> Dict[str, Any]:
+    """Convenience function for session lock registry metrics"""
+    return session_manager.get_lock_stats()
\ No newline at end of file
@@ -0,0 +1,683 @@
+"""
+Sheet snapshots for TSS Converter
+Reads a worksheet once into normalized strings so steps can do cheap repeated lookups.
+"""
+
+import threading
+import weakref
+import logging
+from bisect import bisect_left
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, FrozenSet, Sequence, Callable, Iterable
+
+from openpyxl.utils import column_index_from_string
+
+from .step_metrics import count_cells_read, count_cells_written
+
+logger = logging.getLogger(__name__)
+
+# Excel formula error markers - cells containing these read as empty
+FORMULA_ERRORS = ('#N/A', '#REF!', '#VALUE!', '#DIV/0!', '#NAME?', '#NULL!', '#NUM!', '#ERROR!')
+
+# Header searches only look at the top of a sheet (rows 1-99)
+HEADER_INDEX_ROWS = 99
+
+def normalize_cell_value(value: Any) -> str:
+    """
+    Normalize a raw cell value the same way the steps' safe_cell_value() does
+    
+    Args:
+        value: Raw openpyxl cell value
+    
+    Returns:
+        Normalized string ("" for empty cells and formula errors)
+    """
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        if any(error in value for error in FORMULA_ERRORS):
+            return ""
+        return value.strip()
+    if isinstance(value, (int, float)):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    return str(value).strip()
+
+def cell_text(value: Any) -> str:
+    """
+    Read a raw cell value as text the way SheetSnapshot.text() does
+    
+    Args:
+        value: Raw cell value
+    
+    Returns:
+        Normalized string, or the stripped text of a formula error string
+    """
+    normalized = normalize_cell_value(value)
+    if not normalized and isinstance(value, str):
+        return value.strip()
+    return normalized
+
+def _is_raw_data(value: Any) -> bool:
+    """Check whether a raw value counts as data (non-None, not a blank string)"""
+    return value is not None and (not isinstance(value, str) or bool(value.strip()))
+
+class SheetSnapshot:
+    """
+    Normalized, row-major copy of a worksheet's values
+    
+    Built with a single iter_rows(values_only=True) pass. Lookups outside the
+    sheet bounds return "" like reading an empty cell. Writes must go through
+    set_value()/delete_rows()/delete_row_set() so the snapshot and worksheet
+    stay in sync.
+    
+    Snapshots of read-only worksheets are detached: merged ranges and hidden
+    rows/columns are passed in (read-only sheets do not expose them) and writes
+    only update the snapshot.
+    """
+    
+    def __init__(self, worksheet, merged_ranges: Optional[List[Tuple[int, int, int, int]]] = None,
+                 hidden: Optional[Tuple[FrozenSet[int], FrozenSet[int]]] = None,
+                 write_through: bool = True):
+        self.title = worksheet.title
+        self._worksheet_ref = weakref.ref(worksheet) if write_through else None
+        self._merged_ranges = merged_ranges
+        self._rows: List[List[str]] = []
+        self._row_has_data: List[bool] = []
+        self._errors: Dict[Tuple[int, int], str] = {}
+        
+        # Read-only sheets without trustworthy dimensions yield rows of varying width
+        width = worksheet.max_column or 0
+        cells_read = 0
+        for row_index, raw_row in enumerate(worksheet.iter_rows(max_col=width or None, values_only=True), start=1):
+            values = [""] * len(raw_row)
+            has_data = False
+            for col_index, raw_value in enumerate(raw_row, start=1):
+                if raw_value is None:
+                    continue
+                cells_read += 1
+                normalized = normalize_cell_value(raw_value)
+                values[col_index - 1] = normalized
+                if not normalized and isinstance(raw_value, str) and raw_value.strip():
+                    self._errors[(row_index, col_index)] = raw_value.strip()
+                has_data = has_data or _is_raw_data(raw_value)
+            self._rows.append(values)
+            self._row_has_data.append(has_data)
+            width = max(width, len(values))
+        
+        self.max_column = width
+        count_cells_read(cells_read)
+        for values in self._rows:
+            if len(values) < width:
+                values.extend([""] * (width - len(values)))
+        
+        # Built lazily, see column_last_row(), merged_anchor(), hidden_rows/hidden_columns
+        # and header_index()
+        self._column_last_row: Optional[List[int]] = None
+        self._merged_anchors: Optional[Dict[Tuple[int, int], Tuple[int, int]]] = None
+        self._hidden: Optional[Tuple[FrozenSet[int], FrozenSet[int]]] = hidden
+        self._header_index: Optional["HeaderIndex"] = None
+        
+        logger.debug(f"Snapshot of {self.title}: {self.max_row} rows x {self.max_column} columns, "
+                     f"{len(self._errors)} formula errors")
+    
+    @property
+    def worksheet(self):
+        """The worksheet this snapshot was taken from (None once it has been garbage collected)"""
+        return self._worksheet_ref() if self._worksheet_ref is not None else None
+    
+    @property
+    def max_row(self) -> int:
+        """Number of rows in the snapshot"""
+        return len(self._rows)
+    
+    @property
+    def last_data_row(self) -> int:
+        """Last row containing data, or 0 if the sheet is empty"""
+        for row in range(len(self._row_has_data), 0, -1):
+            if self._row_has_data[row - 1]:
+                return row
+        return 0
+    
+    def _build_column_last_rows(self) -> List[int]:
+        """Compute the last non-empty row of every column"""
+        last_rows = [0] * self.max_column
+        for row_index, values in enumerate(self._rows, start=1):
+            for col_index, value in enumerate(values):
+                if value:
+                    last_rows[col_index] = row_index
+        return last_rows
+    
+    def _build_merged_index(self) -> Dict[Tuple[int, int], Tuple[int, int]]:
+        """Map every cell covered by a merged range to the range's top-left anchor"""
+        anchors = {}
+        merged_ranges = self._merged_ranges
+        if merged_ranges is None:
+            merged_cells = getattr(self.worksheet, 'merged_cells', None)
+            if merged_cells is None:
+                return anchors
+            merged_ranges = [(r.min_row, r.min_col, r.max_row, r.max_col) for r in merged_cells.ranges]
+        
+        for min_row, min_col, max_row, max_col in merged_ranges:
+            for row in range(min_row, max_row + 1):
+                for col in range(min_col, max_col + 1):
+                    # First range wins, like a linear scan over the ranges would
+                    anchors.setdefault((row, col), (min_row, min_col))
+        
+        logger.debug(f"Merged index of {self.title}: {len(merged_ranges)} ranges, {len(anchors)} cells")
+        return anchors
+    
+    def _build_hidden_index(self) -> Tuple[FrozenSet[int], FrozenSet[int]]:
+        """Collect hidden row numbers and column indexes from the worksheet dimensions"""
+        worksheet = self.worksheet
+        hidden_rows = set()
+        hidden_columns = set()
+        
+        for row, dimension in getattr(worksheet, 'row_dimensions', {}).items():
+            if getattr(dimension, 'hidden', False):
+                hidden_rows.add(row)
+        
+        # Grouped column dimensions are keyed by their first letter only; like a
+        # column_dimensions.get(letter) lookup, only that key counts as hidden
+        for letter, dimension in getattr(worksheet, 'column_dimensions', {}).items():
+            if getattr(dimension, 'hidden', False):
+                hidden_columns.add(column_index_from_string(letter))
+        
+        if hidden_rows or hidden_columns:
+            logger.debug(f"Hidden in {self.title}: {len(hidden_rows)} rows, {len(hidden_columns)} columns")
+        return frozenset(hidden_rows), frozenset(hidden_columns)
+    
+    @property
+    def hidden_rows(self) -> FrozenSet[int]:
+        """Row numbers marked hidden"""
+        if self._hidden is None:
+            self._hidden = self._build_hidden_index()
+        return self._hidden[0]
+    
+    @property
+    def hidden_columns(self) -> FrozenSet[int]:
+        """Column indexes marked hidden"""
+        if self._hidden is None:
+            self._hidden = self._build_hidden_index()
+        return self._hidden[1]
+    
+    def is_hidden(self, row: int, col: int) -> bool:
+        """
+        Check if a cell is in a hidden row or column
+        
+        Args:
+            row: Row number (1-based)
+            col: Column number (1-based)
+        
+        Returns:
+            True if the cell is hidden
+        """
+        return row in self.hidden_rows or col in self.hidden_columns
+    
+    def visible_columns(self, first: int, last: int) -> List[int]:
+        """
+        Get the non-hidden columns in a range
+        
+        Args:
+            first: First column (1-based, inclusive)
+            last: Last column (inclusive)
+        
+        Returns:
+            Column indexes in ascending order
+        """
+        hidden = self.hidden_columns
+        return [col for col in range(first, last + 1) if col not in hidden]
+    
+    def value(self, row: int, col: int) -> str:
+        """
+        Get the normalized value of a cell
+        
+        Args:
+            row: Row number (1-based)
+            col: Column number (1-based)
+        
+        Returns:
+            Normalized string, "" for empty, error or out-of-range cells
+        """
+        if 1 <= row <= len(self._rows) and 1 <= col <= self.max_column:
+            return self._rows[row - 1][col - 1]
+        return ""
+    
+    def error_value(self, row: int, col: int) -> Optional[str]:
+        """
+        Get the original text of a formula error cell
+        
+        Args:
+            row: Row number (1-based)
+            col: Column number (1-based)
+        
+        Returns:
+            Stripped error text, or None if the cell is not a formula error
+        """
+        return self._errors.get((row, col))
+    
+    def text(self, row: int, col: int) -> str:
+        """
+        Get a cell as stripped text, keeping formula error strings instead of blanking them
+        
+        Args:
+            row: Row number (1-based)
+            col: Column number (1-based)
+        
+        Returns:
+            Cell text
+        """
+        return self._errors.get((row, col)) or self.value(row, col)
+    
+    def row_values(self, row: int) -> List[str]:
+        """
+        Get all normalized values of a row
+        
+        Args:
+            row: Row number (1-based)
+        
+        Returns:
+            List of max_column normalized strings
+        """
+        if 1 <= row <= len(self._rows):
+            return list(self._rows[row - 1])
+        return [""] * self.max_column
+    
+    def column_values(self, col: int, first_row: int, last_row: int) -> List[str]:
+        """
+        Get the normalized values of a column over a row range
+        
+        Args:
+            col: Column number (1-based)
+            first_row: First row (1-based)
+            last_row: Last row (1-based, inclusive)
+        
+        Returns:
+            List of last_row - first_row + 1 normalized strings
+        """
+        first_row = max(first_row, 1)
+        if not 1 <= col <= self.max_column:
+            return [""] * max(last_row - first_row + 1, 0)
+        
+        index = col - 1
+        values = [values[index] for values in self._rows[first_row - 1:last_row]]
+        values.extend([""] * (last_row - first_row + 1 - len(values)))
+        return values
+    
+    def has_data(self, row: int) -> bool:
+        """
+        Check whether a row has any non-blank raw value (formula errors count as data)
+        
+        Args:
+            row: Row number (1-based)
+        
+        Returns:
+            True if the row contains data
+        """
+        return 1 <= row <= len(self._row_has_data) and self._row_has_data[row - 1]
+    
+    def column_last_row(self, col: int) -> int:
+        """
+        Get the last row with a non-empty normalized value in a column
+        
+        Args:
+            col: Column number (1-based)
+        
+        Returns:
+            Row number, or 0 if the column is empty
+        """
+        if self._column_last_row is None:
+            self._column_last_row = self._build_column_last_rows()
+        if 1 <= col <= self.max_column:
+            return self._column_last_row[col - 1]
+        return 0
+    
+    def merged_anchor(self, row: int, col: int) -> Optional[Tuple[int, int]]:
+        """
+        Get the top-left cell of the merged range covering a cell
+        
+        The index is built once per snapshot, so each lookup is O(1) instead of
+        a scan over worksheet.merged_cells.ranges.
+        
+        Args:
+            row: Row number (1-based)
+            col: Column number (1-based)
+        
+        Returns:
+            (row, col) of the merged range anchor (the cell itself for anchors),
+            or None if the cell is not merged
+        """
+        if self._merged_anchors is None:
+            self._merged_anchors = self._build_merged_index()
+        return self._merged_anchors.get((row, col))
+    
+    def header_index(self, min_rows: int = HEADER_INDEX_ROWS) -> "HeaderIndex":
+        """
+        Get the header index of the top of the sheet, building it on first use
+        
+        Args:
+            min_rows: Number of rows the index must cover
+        
+        Returns:
+            HeaderIndex covering at least min_rows rows (or the whole sheet)
+        """
+        index = self._header_index
+        if index is None or index.rows < min(min_rows, self.max_row):
+            index = HeaderIndex(self, max(min_rows, HEADER_INDEX_ROWS))
+            self._header_index = index
+        return index
+    
+    def copy(self) -> "SheetSnapshot":
+        """
+        Make a detached copy that later writes to this snapshot do not affect
+        
+        Merged ranges and hidden rows/columns are resolved from the worksheet
+        first, so the copy answers every lookup without it.
+        
+        Returns:
+            Detached SheetSnapshot with the current values
+        """
+        clone = SheetSnapshot.__new__(SheetSnapshot)
+        clone.title = self.title
+        clone._worksheet_ref = None
+        clone._merged_ranges = self._merged_ranges
+        if clone._merged_ranges is None:
+            merged_cells = getattr(self.worksheet, 'merged_cells', None)
+            clone._merged_ranges = [(r.min_row, r.min_col, r.max_row, r.max_col)
+                                    for r in merged_cells.ranges] if merged_cells is not None else []
+        clone._rows = [list(values) for values in self._rows]
+        clone._row_has_data = list(self._row_has_data)
+        clone._errors = dict(self._errors)
+        clone.max_column = self.max_column
+        clone._column_last_row = None
+        clone._merged_anchors = None
+        clone._hidden = (self.hidden_rows, self.hidden_columns)
+        clone._header_index = None
+        return clone
+    
+    def set_value(self, row: int, col: int, value: Any) -> None:
+        """
+        Write a value to the worksheet and the snapshot
+        
+        Args:
+            row: Row number (1-based)
+            col: Column number (1-based)
+            value: New cell value
+        
+        Raises:
+            AttributeError: If the target is a read-only merged cell
+        """
+        worksheet = self.worksheet
+        if worksheet is not None:
+            worksheet.cell(row=row, column=col).value = value
+        count_cells_written(1)
+        
+        # Grow to cover writes outside the original bounds
+        if col > self.max_column:
+            extra = col - self.max_column
+            for values in self._rows:
+                values.extend([""] * extra)
+            if self._column_last_row is not None:
+                self._column_last_row.extend([0] * extra)
+            self.max_column = col
+        while row > len(self._rows):
+            self._rows.append([""] * self.max_column)
+            self._row_has_data.append(False)
+        
+        if self._header_index is not None and row <= self._header_index.rows:
+            self._header_index = None
+        
+        normalized = normalize_cell_value(value)
+        self._rows[row - 1][col - 1] = normalized
+        self._errors.pop((row, col), None)
+        if not normalized and isinstance(value, str) and value.strip():
+            self._errors[(row, col)] = value.strip()
+        
+        self._row_has_data[row - 1] = any(self._rows[row - 1]) or any(
+            (row, c) in self._errors for c in range(1, self.max_column + 1))
+        
+        if self._column_last_row is None:
+            return
+        if normalized:
+            self._column_last_row[col - 1] = max(self._column_last_row[col - 1], row)
+        elif self._column_last_row[col - 1] == row:
+            last = 0
+            for r in range(row - 1, 0, -1):
+                if self._rows[r - 1][col - 1]:
+                    last = r
+                    break
+            self._column_last_row[col - 1] = last
+    
+    def delete_rows(self, row: int, amount: int = 1) -> None:
+        """
+        Delete rows from the worksheet and the snapshot, shifting later rows up
+        
+        Args:
+            row: First row to delete (1-based)
+            amount: Number of rows to delete
+        """
+        worksheet = self.worksheet
+        if worksheet is not None:
+            worksheet.delete_rows(row, amount)
+        
+        del self._rows[row - 1:row - 1 + amount]
+        del self._row_has_data[row - 1:row - 1 + amount]
+        
+        if self._errors:
+            shifted = {}
+            for (r, c), error in self._errors.items():
+                if r < row:
+                    shifted[(r, c)] = error
+                elif r >= row + amount:
+                    shifted[(r - amount, c)] = error
+            self._errors = shifted
+        
+        # Row numbers moved - rebuild derived indexes on next use
+        self._column_last_row = None
+        self._merged_anchors = None
+        self._header_index = None
+        if self.worksheet is not None:
+            self._hidden = None
+    
+    def delete_row_set(self, rows: Iterable[int]) -> int:
+        """
+        Delete any set of rows from the worksheet and the snapshot in one pass
+        
+        Same result as calling delete_rows() for each row from the bottom up,
+        but every surviving cell is moved once instead of once per deleted row
+        above it.
+        
+        Args:
+            rows: Row numbers to delete (1-based, any order)
+        
+        Returns:
+            Number of rows deleted
+        """
+        doomed = sorted({row for row in rows if 1 <= row <= len(self._rows)})
+        if not doomed:
+            return 0
+        doomed_set = set(doomed)
+        
+        def new_row(row: int) -> int:
+            return row - bisect_left(doomed, row)
+        
+        worksheet = self.worksheet
+        if worksheet is not None and _has_cell_store(worksheet):
+            # openpyxl keeps a regular worksheet's cells in _cells, a dict keyed by
+            # (row, column) that must agree with each cell's own row, and append()
+            # writes after _current_row. delete_rows() only moves dict entries (through
+            # _move_cell) and then resets _current_row to max_row, or 0 when empty;
+            # rebuilding the dict once with shifted keys gives the same state.
+            cells = {}
+            for (row, col), cell in worksheet._cells.items():
+                if row in doomed_set:
+                    continue
+                if row > doomed[0]:
+                    cell.row = new_row(row)
+                cells[(cell.row, col)] = cell
+            worksheet._cells = cells
+            worksheet._current_row = worksheet.max_row if cells else 0
+        elif worksheet is not None:
+            # Without those internals, delete each run of consecutive rows through the
+            # public API, bottom run first so the row numbers of the runs above stay valid
+            for start, count in reversed(_row_runs(doomed)):
+                worksheet.delete_rows(start, count)
+        
+        self._rows = [values for index, values in enumerate(self._rows, start=1) if index not in doomed_set]
+        self._row_has_data = [flag for index, flag in enumerate(self._row_has_data, start=1)
+                              if index not in doomed_set]
+        
+        if self._errors:
+            self._errors = {(new_row(r), c): error for (r, c), error in self._errors.items()
+                            if r not in doomed_set}
+        
+        # Row numbers moved - rebuild derived indexes on next use
+        self._column_last_row = None
+        self._merged_anchors = None
+        self._header_index = None
+        if worksheet is not None:
+            self._hidden = None
+        
+        return len(doomed)
+
+def _has_cell_store(worksheet) -> bool:
+    """Check that a worksheet has the openpyxl internals delete_row_set() rewrites"""
+    return isinstance(getattr(worksheet, '_cells', None), dict) and hasattr(worksheet, '_current_row')
+
+def _row_runs(rows: List[int]) -> List[Tuple[int, int]]:
+    """Group sorted row numbers into (first row, count) runs of consecutive rows"""
+    runs = []
+    for row in rows:
+        if runs and runs[-1][0] + runs[-1][1] == row:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((row, 1))
+    return runs
+
+class HeaderIndex:
+    """
+    Lowercased text of every non-empty cell at the top of a sheet
+    
+    Built in one pass over the snapshot. Substring queries are memoized per
+    pattern, so "product combination", article name/number headers etc. are
+    each located once per sheet no matter how many steps ask for them.
+    """
+    
+    def __init__(self, snapshot: SheetSnapshot, max_row: int = HEADER_INDEX_ROWS):
+        self.title = snapshot.title
+        self.rows = min(max_row, snapshot.max_row)
+        self._cells: List[Tuple[int, int, str]] = []
+        self._matches: Dict[str, List[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+        
+        for row in range(1, self.rows + 1):
+            for col_index, value in enumerate(snapshot._rows[row - 1], start=1):
+                if value:
+                    self._cells.append((row, col_index, value.lower()))
+        
+        # Row-major, like the cell-by-cell scans the index replaces
+        self.error_cells: List[Tuple[int, int]] = sorted(
+            (row, col) for row, col in snapshot._errors if row <= self.rows)
+    
+    def positions(self, pattern: str) -> List[Tuple[int, int]]:
+        """
+        Get all cells whose lowercased text contains a pattern
+        
+        Args:
+            pattern: Substring to look for (case insensitive)
+        
+        Returns:
+            (row, col) positions in row-major order
+        """
+        pattern = pattern.lower()
+        with self._lock:
+            matches = self._matches.get(pattern)
+            if matches is None:
+                matches = [(row, col) for row, col, text in self._cells if pattern in text]
+                self._matches[pattern] = matches
+            return matches
+    
+    def find(self, patterns: Sequence[str], max_row: Optional[int] = None, max_col: Optional[int] = None,
+             skip: Optional[Callable[[int, int], bool]] = None) -> List[Tuple[int, int, str]]:
+        """
+        Find cells matching any of several patterns
+        
+        Args:
+            patterns: Substrings to look for (case insensitive), in priority order
+            max_row: Last row to consider (defaults to the whole index)
+            max_col: Last column to consider
+            skip: Optional predicate (row, col) -> True for cells to ignore (e.g. hidden)
+        
+        Returns:
+            (row, col, pattern) in row-major order, where pattern is the first
+            pattern in the list that the cell matches
+        """
+        max_row = self.rows if max_row is None else min(max_row, self.rows)
+        first_pattern = {}
+        for pattern in patterns:
+            for position in self.positions(pattern):
+                first_pattern.setdefault(position, pattern)
+        
+        found = []
+        for (row, col), pattern in sorted(first_pattern.items()):
+            if row > max_row or (max_col is not None and col > max_col):
+                continue
+            if skip is not None and skip(row, col):
+                continue
+            found.append((row, col, pattern))
+        return found
+    
+    def find_first(self, patterns: Sequence[str], max_row: Optional[int] = None, max_col: Optional[int] = None,
+                   skip: Optional[Callable[[int, int], bool]] = None) -> Optional[Tuple[int, int, str]]:
+        """
+        Find the first cell in row-major order matching any of several patterns
+        
+        Args:
+            patterns: Substrings to look for (case insensitive), in priority order
+            max_row: Last row to consider
+            max_col: Last column to consider
+            skip: Optional predicate (row, col) -> True for cells to ignore
+        
+        Returns:
+            (row, col, pattern) or None if nothing matches
+        """
+        found = self.find(patterns, max_row, max_col, skip)
+        return found[0] if found else None
+
+# Snapshots are cached per worksheet object and dropped with it
+_snapshots: "weakref.WeakKeyDictionary[Any, SheetSnapshot]" = weakref.WeakKeyDictionary()
+_snapshots_lock = threading.Lock()
+
+def get_sheet_snapshot(worksheet) -> SheetSnapshot:
+    """
+    Get the shared snapshot of a worksheet, reading it on first use
+    
+    Steps that run on the same loaded workbook (in-memory pipeline) share one
+    snapshot per sheet, so each sheet is only read once.
+    
+    Args:
+        worksheet: openpyxl worksheet (or an existing SheetSnapshot)
+    
+    Returns:
+        SheetSnapshot for the worksheet
+    """
+    if isinstance(worksheet, SheetSnapshot):
+        return worksheet
+    
+    with _snapshots_lock:
+        snapshot = _snapshots.get(worksheet)
+        if snapshot is None:
+            snapshot = SheetSnapshot(worksheet)
+            _snapshots[worksheet] = snapshot
+        return snapshot
+
+def invalidate_sheet_snapshot(worksheet) -> None:
+    """
+    Drop the cached snapshot of a worksheet after it was modified directly
+    
+    Args:
+        worksheet: openpyxl worksheet
+    """
+    with _snapshots_lock:
+        _snapshots.pop(worksheet, None)
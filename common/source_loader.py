@@ -0,0 +1,156 @@
+"""
+Streaming source workbook loader for TSS Converter
+Opens source files read-only and materializes sheets lazily as SheetSnapshots.
+"""
+
+import threading
+import logging
+from pathlib import Path
+from typing import Dict, List, Tuple, FrozenSet, Union, IO, Iterable
+from xml.etree import ElementTree
+
+import openpyxl
+from openpyxl.worksheet.cell_range import CellRange
+
+from .sheet_snapshot import SheetSnapshot, get_sheet_snapshot
+
+logger = logging.getLogger(__name__)
+
+def _xml_bool(value) -> bool:
+    """Parse an OOXML boolean attribute"""
+    return str(value).lower() in ('1', 'true')
+
+def read_sheet_metadata(source: IO[bytes]) -> Tuple[List[Tuple[int, int, int, int]], FrozenSet[int], FrozenSet[int]]:
+    """
+    Read merged ranges and hidden rows/columns from worksheet XML
+    
+    Read-only worksheets do not expose this information, so the XML is scanned
+    once without building any cell objects.
+    
+    Args:
+        source: Open worksheet XML stream
+    
+    Returns:
+        Tuple of (merged ranges as (min_row, min_col, max_row, max_col),
+        hidden row numbers, hidden column indexes)
+    """
+    merged_ranges = []
+    hidden_rows = set()
+    hidden_columns = set()
+    row_counter = 0
+    
+    for event, element in ElementTree.iterparse(source, events=('start', 'end')):
+        tag = element.tag.rsplit('}', 1)[-1]
+        
+        if event == 'start':
+            if tag == 'row':
+                row_counter = int(element.get('r', row_counter + 1))
+                if _xml_bool(element.get('hidden', '0')):
+                    hidden_rows.add(row_counter)
+            continue
+        
+        if tag == 'col':
+            # openpyxl keys column dimensions by their first column only
+            if _xml_bool(element.get('hidden', '0')):
+                hidden_columns.add(int(element.get('min')))
+        elif tag == 'mergeCell':
+            min_col, min_row, max_col, max_row = CellRange(element.get('ref')).bounds
+            merged_ranges.append((min_row, min_col, max_row, max_col))
+        
+        if tag in ('c', 'row', 'col', 'mergeCell'):
+            element.clear()
+    
+    return merged_ranges, frozenset(hidden_rows), frozenset(hidden_columns)
+
+class SourceWorkbook:
+    """
+    Read-only, lazily materialized view of a source workbook
+    
+    Behaves like a loaded workbook for the steps (sheetnames, workbook[name]),
+    but a sheet is only read when it is first accessed, and it is read into a
+    detached SheetSnapshot instead of openpyxl cell objects. Steps only access
+    the sheets they classify as relevant (F/M/C/P types, M-Textile), so other
+    sheets are never parsed.
+    """
+    
+    def __init__(self, file_path: Union[str, Path]):
+        self.file_path = Path(file_path)
+        self._workbook = openpyxl.load_workbook(str(self.file_path), read_only=True)
+        self._snapshots: Dict[str, SheetSnapshot] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def sheetnames(self) -> List[str]:
+        """Sheet names in workbook order"""
+        return self._workbook.sheetnames
+    
+    @property
+    def loaded_sheetnames(self) -> List[str]:
+        """Names of the sheets that have been materialized so far"""
+        return list(self._snapshots)
+    
+    def __contains__(self, sheet_name: str) -> bool:
+        return sheet_name in self._workbook.sheetnames
+    
+    def __getitem__(self, sheet_name: str) -> SheetSnapshot:
+        with self._lock:
+            snapshot = self._snapshots.get(sheet_name)
+            if snapshot is None:
+                snapshot = self._load_sheet(sheet_name)
+                self._snapshots[sheet_name] = snapshot
+            return snapshot
+    
+    def _load_sheet(self, sheet_name: str) -> SheetSnapshot:
+        """Stream one sheet into a detached snapshot"""
+        worksheet = self._workbook[sheet_name]
+        
+        with worksheet._get_source() as source:
+            merged_ranges, hidden_rows, hidden_columns = read_sheet_metadata(source)
+        
+        # Stored dimensions can be stale, so read every row that is actually present
+        worksheet.reset_dimensions()
+        snapshot = SheetSnapshot(worksheet, merged_ranges=merged_ranges,
+                                 hidden=(hidden_rows, hidden_columns), write_through=False)
+        
+        logger.info(f"📖 Loaded sheet '{sheet_name}' ({snapshot.max_row} rows x {snapshot.max_column} columns)")
+        return snapshot
+    
+    def close(self) -> None:
+        """Close the underlying read-only workbook"""
+        self._workbook.close()
+
+class DetachedWorkbook:
+    """
+    Detached copies of some sheets of a workbook, read like the workbook
+    
+    Lets a step keep reading sheets as they were when the copies were taken
+    while another step fills the original workbook in place.
+    """
+    
+    def __init__(self, workbook, sheet_names: Iterable[str]):
+        self._snapshots: Dict[str, SheetSnapshot] = {
+            name: get_sheet_snapshot(workbook[name]).copy() for name in sheet_names
+        }
+    
+    @property
+    def sheetnames(self) -> List[str]:
+        """Names of the copied sheets"""
+        return list(self._snapshots)
+    
+    def __contains__(self, sheet_name: str) -> bool:
+        return sheet_name in self._snapshots
+    
+    def __getitem__(self, sheet_name: str) -> SheetSnapshot:
+        return self._snapshots[sheet_name]
+
+def open_source_workbook(file_path: Union[str, Path]) -> SourceWorkbook:
+    """
+    Open a source workbook for streaming, lazy per-sheet reading
+    
+    Args:
+        file_path: Source Excel file
+    
+    Returns:
+        SourceWorkbook
+    """
+    return SourceWorkbook(file_path)
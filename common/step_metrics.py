@@ -0,0 +1,155 @@
+"""
+Step instrumentation for TSS Converter
+Records wall time, CPU time, memory and cell/row counts for each pipeline step.
+"""
+
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Union
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Metrics of the step running on the current thread; the scheduler runs each step on one thread
+_active = threading.local()
+_metrics_file_lock = threading.Lock()
+
+@dataclass
+class StepMetrics:
+    """
+    Measurements of one pipeline step
+    
+    cpu_time is the step thread's own CPU time. peak_rss_delta_kb is how far
+    the process's peak resident memory grew while the step ran, and
+    traced_peak_kb the peak of Python allocations when tracemalloc tracing is
+    enabled; both are process-wide, so steps running concurrently share them.
+    cells_read counts non-empty cells scanned into sheet snapshots, and
+    cells_written the cell values the step wrote. rows_in/rows_out are the
+    rows of the step's main input and output as reported by the step (None
+    if it reports none). Work done in other processes is not counted.
+    """
+    step_num: int
+    name: str
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    peak_rss_delta_kb: Optional[int] = None
+    traced_peak_kb: Optional[float] = None
+    cells_read: int = 0
+    cells_written: int = 0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    success: bool = True
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a JSON-serializable dictionary"""
+        return asdict(self)
+
+def _peak_rss_kb() -> Optional[int]:
+    """Peak resident set size of the process in KB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, KB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+@contextmanager
+def measure_step(step_num: int, name: str, trace_memory: bool = False) -> Iterator[StepMetrics]:
+    """
+    Measure a step running on the current thread
+    
+    Counters reported through count_cells_read(), count_cells_written() and
+    record_rows() on this thread are attributed to the step.
+    
+    Args:
+        step_num: Step number
+        name: Step name
+        trace_memory: Also trace Python allocations with tracemalloc (slows the step down)
+    
+    Yields:
+        StepMetrics, filled in when the block exits
+    """
+    metrics = StepMetrics(step_num, name)
+    previous = getattr(_active, "metrics", None)
+    _active.metrics = metrics
+    
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif trace_memory:
+        tracemalloc.reset_peak()
+    
+    rss_before = _peak_rss_kb()
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time()
+    
+    try:
+        yield metrics
+    except BaseException:
+        metrics.success = False
+        raise
+    finally:
+        metrics.wall_time = time.perf_counter() - wall_start
+        metrics.cpu_time = time.thread_time() - cpu_start
+        rss_after = _peak_rss_kb()
+        if rss_before is not None and rss_after is not None:
+            metrics.peak_rss_delta_kb = rss_after - rss_before
+        if trace_memory:
+            metrics.traced_peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+            if started_tracing:
+                tracemalloc.stop()
+        _active.metrics = previous
+
+def count_cells_read(count: int) -> None:
+    """Add to the cells read by the current step (no-op outside a measured step)"""
+    metrics = getattr(_active, "metrics", None)
+    if metrics is not None:
+        metrics.cells_read += count
+
+def count_cells_written(count: int) -> None:
+    """Add to the cells written by the current step (no-op outside a measured step)"""
+    metrics = getattr(_active, "metrics", None)
+    if metrics is not None:
+        metrics.cells_written += count
+
+def record_rows(rows_in: Optional[int] = None, rows_out: Optional[int] = None) -> None:
+    """Record the input and output row counts of the current step (no-op outside a measured step)"""
+    metrics = getattr(_active, "metrics", None)
+    if metrics is None:
+        return
+    if rows_in is not None:
+        metrics.rows_in = rows_in
+    if rows_out is not None:
+        metrics.rows_out = rows_out
+
+def append_metrics_file(file_path: Union[str, Path], records: List[Dict[str, Any]],
+                        context: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Append step metrics to a JSON-lines file, one line per step
+    
+    Args:
+        file_path: Metrics file (created if missing)
+        records: Step metrics dictionaries
+        context: Fields added to every line (e.g. run ID, input file)
+    """
+    file_path = Path(file_path)
+    lines = [json.dumps({**(context or {}), **record}, default=str) for record in records]
+    
+    try:
+        with _metrics_file_lock:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(file_path, 'a', encoding='utf-8') as f:
+                for line in lines:
+                    f.write(line + "\n")
+    except OSError as e:
+        logger.warning(f"Could not write step metrics to {file_path}: {e}")
@@ -0,0 +1,128 @@
+"""
+Dependency-graph scheduler for TSS Converter pipeline steps
+Runs independent steps concurrently on a thread pool while dependent steps wait for their inputs.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, List, Tuple
+
+from .config import get_config
+from .exceptions import ConfigurationError
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PipelineStep:
+    """
+    A pipeline step and the steps it has to wait for
+    
+    The step function is called with the results of its depends_on steps as positional
+    arguments, in the order they are listed. Steps in after are waited for but their
+    results are not passed (e.g. when two steps mutate the same workbook).
+    """
+    step_num: int
+    name: str
+    func: Callable[..., Any]
+    depends_on: Tuple[int, ...] = ()
+    after: Tuple[int, ...] = ()
+    
+    @property
+    def prerequisites(self) -> Tuple[int, ...]:
+        """All steps that must finish before this one starts"""
+        return self.depends_on + self.after
+
+class StepScheduler:
+    """Executes a DAG of pipeline steps, running ready steps in parallel"""
+    
+    def __init__(self, max_workers: Optional[int] = None):
+        if max_workers is None:
+            max_workers = get_config().get("general.max_workers", 4)
+        self.max_workers = max(1, int(max_workers))
+    
+    def _validate_graph(self, steps: List[PipelineStep]) -> Dict[int, PipelineStep]:
+        """Check step numbers are unique, dependencies exist and there are no cycles"""
+        graph = {}
+        for step in steps:
+            if step.step_num in graph:
+                raise ConfigurationError("pipeline.steps", f"Duplicate step number: {step.step_num}")
+            graph[step.step_num] = step
+        
+        for step in steps:
+            for dependency in step.prerequisites:
+                if dependency not in graph:
+                    raise ConfigurationError("pipeline.steps",
+                                             f"Step {step.step_num} depends on unknown step {dependency}")
+        
+        # Kahn's algorithm - every step must become ready at some point
+        remaining = {num: set(step.prerequisites) for num, step in graph.items()}
+        while remaining:
+            ready = [num for num, deps in remaining.items() if not deps]
+            if not ready:
+                raise ConfigurationError("pipeline.steps", f"Dependency cycle between steps {sorted(remaining)}")
+            for num in ready:
+                del remaining[num]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        
+        return graph
+    
+    def run(self, steps: List[PipelineStep],
+            on_start: Optional[Callable[[int, str], None]] = None,
+            on_complete: Optional[Callable[[int, str], None]] = None,
+            on_error: Optional[Callable[[int, Exception], None]] = None) -> Dict[int, Any]:
+        """
+        Run all steps, starting each one as soon as its dependencies have finished
+        
+        Callbacks are always invoked from the calling thread, so they may safely
+        update UI or session state.
+        
+        Args:
+            steps: Steps to run
+            on_start: Called with (step_num, name) when a step is submitted
+            on_complete: Called with (step_num, name) when a step finishes
+            on_error: Called with (step_num, exception) when a step fails
+        
+        Returns:
+            Dictionary mapping step number to step result
+        
+        Raises:
+            The first exception raised by a step (remaining steps are not started)
+        """
+        graph = self._validate_graph(steps)
+        results = {}
+        running = {}
+        pending = [step.step_num for step in steps]
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tss-step") as executor:
+            while pending or running:
+                # Submit every step whose dependencies are satisfied, in declaration order
+                for step_num in list(pending):
+                    step = graph[step_num]
+                    if all(dep in results for dep in step.prerequisites):
+                        pending.remove(step_num)
+                        if on_start:
+                            on_start(step.step_num, step.name)
+                        args = [results[dep] for dep in step.depends_on]
+                        running[executor.submit(step.func, *args)] = step
+                
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                
+                for future in sorted(done, key=lambda f: running[f].step_num):
+                    step = running.pop(future)
+                    try:
+                        results[step.step_num] = future.result()
+                    except Exception as e:
+                        logger.error(f"Step {step.step_num} ({step.name}) failed: {e}")
+                        if on_error:
+                            on_error(step.step_num, e)
+                        # Let already running steps finish, but start nothing new
+                        wait(list(running))
+                        raise
+                    
+                    logger.info(f"Step {step.step_num} ({step.name}) finished")
+                    if on_complete:
+                        on_complete(step.step_num, step.name)
+        
+        return results
@@ -10,6 +10,7 @@ import logging
 
 try:
     import openpyxl
+    from .workbook_metadata import get_metadata_cache
     OPENPYXL_AVAILABLE = True
 except ImportError:
     OPENPYXL_AVAILABLE = False
@@ -98,14 +99,14 @@ class FileValidator:
         # File extension validation already done above
         # MIME type check removed for deployment compatibility
         
-        # Try to open with openpyxl to validate structure
+        # Try to open with openpyxl to validate structure; the metadata cache
+        # remembers files already opened (or written by a step) in this version
         if not OPENPYXL_AVAILABLE:
             logger.warning("openpyxl not available, skipping Excel structure validation")
             return path
             
         try:
-            wb = openpyxl.load_workbook(str(path), read_only=True)
-            wb.close()
+            get_metadata_cache().get(path)
         except Exception as e:
             raise FileFormatError(
                 file_path=str(path),
@@ -190,9 +191,7 @@ class ExcelStructureValidator:
             return []
         
         try:
-            wb = openpyxl.load_workbook(str(path), read_only=True)
-            available_sheets = wb.sheetnames
-            wb.close()
+            available_sheets = get_metadata_cache().get(path).sheetnames
         except Exception as e:
             raise FileAccessError(
                 file_path=str(path),
@@ -235,15 +234,12 @@ class ExcelStructureValidator:
             return {"worksheet_name": worksheet_name or "unknown", "available_columns": [], "max_column": 0, "required_columns": required_columns}
         
         try:
-            wb = openpyxl.load_workbook(str(path), read_only=True)
+            metadata = get_metadata_cache().get(path)
             
-            if worksheet_name:
-                if worksheet_name not in wb.sheetnames:
-                    raise WorksheetNotFoundError(worksheet_name, wb.sheetnames)
-                ws = wb[worksheet_name]
-            else:
-                ws = wb.active
-                worksheet_name = ws.title
+            if worksheet_name and worksheet_name not in metadata.sheets:
+                raise WorksheetNotFoundError(worksheet_name, metadata.sheetnames)
+            ws = metadata.sheet(worksheet_name)
+            worksheet_name = ws.title
             
             # Check if columns have data or headers
             max_col = ws.max_column
@@ -251,8 +247,6 @@ class ExcelStructureValidator:
             
             missing_columns = [col for col in required_columns if col not in available_columns]
             
-            wb.close()
-            
             if missing_columns:
                 raise ColumnMissingError(
                     missing_columns=missing_columns,
@@ -307,47 +301,29 @@ class ExcelStructureValidator:
             return {"worksheet_name": worksheet_name or "unknown", "found_headers": {}, "search_rows": search_rows}, warnings
         
         try:
-            wb = openpyxl.load_workbook(str(path), read_only=True)
-            
-            if worksheet_name:
-                if worksheet_name not in wb.sheetnames:
-                    wb.close()
-                    if graceful:
-                        warning = f"Worksheet '{worksheet_name}' not found, using active sheet"
-                        warnings.append(warning)
-                        wb = openpyxl.load_workbook(str(path), read_only=True)
-                        ws = wb.active
-                        worksheet_name = ws.title
-                    else:
-                        raise WorksheetNotFoundError(worksheet_name, wb.sheetnames)
+            metadata = get_metadata_cache().get(path)
+            
+            if worksheet_name and worksheet_name not in metadata.sheets:
+                if graceful:
+                    warning = f"Worksheet '{worksheet_name}' not found, using active sheet"
+                    warnings.append(warning)
+                    worksheet_name = None
                 else:
-                    ws = wb[worksheet_name]
-            else:
-                ws = wb.active
-                worksheet_name = ws.title
+                    raise WorksheetNotFoundError(worksheet_name, metadata.sheetnames)
+            ws = metadata.sheet(worksheet_name)
+            worksheet_name = ws.title
             
             found_headers = {}
             missing_headers = []
             
             # Search for headers in first N rows
             for header in required_headers:
-                found = False
-                for row in range(1, min(search_rows + 1, ws.max_row + 1)):
-                    for col in range(1, ws.max_column + 1):
-                        cell_value = ws.cell(row, col).value
-                        if cell_value and isinstance(cell_value, str):
-                            if header.lower() in cell_value.lower():
-                                found_headers[header] = {"row": row, "column": col, "value": cell_value}
-                                found = True
-                                break
-                    if found:
-                        break
-                
-                if not found:
+                match = ws.find_header(header, search_rows)
+                if match:
+                    found_headers[header] = match
+                else:
                     missing_headers.append(header)
             
-            wb.close()
-            
             if missing_headers:
                 warning = f"Missing headers in '{worksheet_name}': {', '.join(missing_headers)}"
                 warnings.append(warning)
@@ -409,38 +385,24 @@ class ExcelStructureValidator:
             return {"worksheet_name": worksheet_name or "unknown", "found_headers": {}, "search_rows": search_rows}
         
         try:
-            wb = openpyxl.load_workbook(str(path), read_only=True)
+            metadata = get_metadata_cache().get(path)
             
-            if worksheet_name:
-                if worksheet_name not in wb.sheetnames:
-                    raise WorksheetNotFoundError(worksheet_name, wb.sheetnames)
-                ws = wb[worksheet_name]
-            else:
-                ws = wb.active
-                worksheet_name = ws.title
+            if worksheet_name and worksheet_name not in metadata.sheets:
+                raise WorksheetNotFoundError(worksheet_name, metadata.sheetnames)
+            ws = metadata.sheet(worksheet_name)
+            worksheet_name = ws.title
             
             found_headers = {}
             missing_headers = []
             
             # Search for headers in first N rows
             for header in required_headers:
-                found = False
-                for row in range(1, min(search_rows + 1, ws.max_row + 1)):
-                    for col in range(1, ws.max_column + 1):
-                        cell_value = ws.cell(row, col).value
-                        if cell_value and isinstance(cell_value, str):
-                            if header.lower() in cell_value.lower():
-                                found_headers[header] = {"row": row, "column": col, "value": cell_value}
-                                found = True
-                                break
-                    if found:
-                        break
-                
-                if not found:
+                match = ws.find_header(header, search_rows)
+                if match:
+                    found_headers[header] = match
+                else:
                     missing_headers.append(header)
             
-            wb.close()
-            
             if missing_headers:
                 search_area = f"first {search_rows} rows of '{worksheet_name}'"
                 raise HeaderNotFoundError(
@@ -488,33 +450,19 @@ class ExcelStructureValidator:
             return {"worksheet_name": worksheet_name or "unknown", "total_rows": 0, "total_columns": 0, "data_rows": 0, "min_required": min_rows}
         
         try:
-            wb = openpyxl.load_workbook(str(path), read_only=True)
+            cache = get_metadata_cache()
+            metadata = cache.get(path)
             
-            if worksheet_name:
-                if worksheet_name not in wb.sheetnames:
-                    raise WorksheetNotFoundError(worksheet_name, wb.sheetnames)
-                ws = wb[worksheet_name]
-            else:
-                ws = wb.active
-                worksheet_name = ws.title
+            if worksheet_name and worksheet_name not in metadata.sheets:
+                raise WorksheetNotFoundError(worksheet_name, metadata.sheetnames)
             
+            # Count non-empty data rows (skip first few rows that might be headers);
+            # the count takes one pass over the sheet and is then cached with the metadata
+            ws, data_rows = cache.data_rows(path, worksheet_name, start_row=4)  # Start from row 4 (common header location)
+            worksheet_name = ws.title
             max_row = ws.max_row
             max_col = ws.max_column
             
-            # Count non-empty data rows (skip first few rows that might be headers)
-            data_rows = 0
-            for row in range(4, max_row + 1):  # Start from row 4 (common header location)
-                has_data = False
-                for col in range(1, max_col + 1):
-                    cell_value = ws.cell(row, col).value
-                    if cell_value is not None and str(cell_value).strip():
-                        has_data = True
-                        break
-                if has_data:
-                    data_rows += 1
-            
-            wb.close()
-            
             if data_rows < min_rows:
                 raise InsufficientDataError(
                     data_type="data rows",
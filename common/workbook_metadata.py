@@ -0,0 +1,285 @@
+"""
+Workbook metadata cache for TSS Converter
+Holds sheet names, dimensions and header rows per file version so validators read a file at most once.
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import openpyxl
+
+logger = logging.getLogger(__name__)
+
+# Header rows kept per sheet; header validation searches at most this many rows
+METADATA_HEADER_ROWS = 20
+
+FileKey = Tuple[str, int, int]
+
+def _has_text(value: Any) -> bool:
+    """Check whether a cell value counts as data (non-blank after str())"""
+    return value is not None and bool(str(value).strip())
+
+@dataclass
+class SheetMetadata:
+    """
+    Dimensions and header rows of one worksheet
+    
+    nonempty_rows (rows with at least one non-blank cell) needs a pass over
+    the whole sheet, so for files opened from disk it is only counted when a
+    validator first asks for it.
+    """
+    title: str
+    max_row: int
+    max_column: int
+    header_rows: Tuple[Tuple[Any, ...], ...]
+    nonempty_rows: Optional[int] = None
+    
+    def find_header(self, header: str, search_rows: int) -> Optional[Dict[str, Any]]:
+        """
+        Find the first cell in the top rows containing a header text
+        
+        Args:
+            header: Header text (case-insensitive substring match)
+            search_rows: Number of rows to search
+        
+        Returns:
+            Dictionary with row, column and value, or None if not found
+        """
+        if search_rows > len(self.header_rows) and self.max_row > len(self.header_rows):
+            raise ValueError(f"Header search of {search_rows} rows exceeds the {len(self.header_rows)} cached rows")
+        
+        header = header.lower()
+        for row, values in enumerate(self.header_rows[:min(search_rows, self.max_row)], start=1):
+            for col, value in enumerate(values[:self.max_column], start=1):
+                if value and isinstance(value, str) and header in value.lower():
+                    return {"row": row, "column": col, "value": value}
+        return None
+    
+    def data_rows(self, start_row: int) -> int:
+        """
+        Number of non-empty rows from start_row down
+        
+        Args:
+            start_row: First row counted (at most METADATA_HEADER_ROWS + 1)
+        
+        Returns:
+            Row count
+        """
+        skipped = sum(1 for values in self.header_rows[:start_row - 1] if any(_has_text(v) for v in values))
+        return self.nonempty_rows - skipped
+
+@dataclass
+class WorkbookMetadata:
+    """Sheet metadata of one version of a workbook file"""
+    sheets: Dict[str, SheetMetadata] = field(default_factory=dict)
+    active_sheet: Optional[str] = None
+    
+    @property
+    def sheetnames(self) -> List[str]:
+        """Sheet names in workbook order"""
+        return list(self.sheets)
+    
+    def sheet(self, name: Optional[str] = None) -> SheetMetadata:
+        """
+        Get a sheet's metadata
+        
+        Args:
+            name: Sheet name (active sheet if None)
+        
+        Returns:
+            SheetMetadata
+        """
+        return self.sheets[name if name is not None else self.active_sheet]
+
+class WorkbookMetadataCache:
+    """
+    Cache of workbook metadata keyed by (path, mtime, size)
+    
+    A rewritten file gets a new key, so stale metadata is never served.
+    Entries come from one read-only pass over the file or, cheaper, from the
+    in-memory workbook of the step that just saved it (populate()).
+    Least recently used entries are evicted beyond max_entries.
+    """
+    
+    def __init__(self, max_entries: int = 64, header_rows: int = METADATA_HEADER_ROWS):
+        self.max_entries = max_entries
+        self.header_rows = header_rows
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[FileKey, WorkbookMetadata]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def file_key(file_path: Union[str, Path]) -> FileKey:
+        """Get the cache key of a file's current version"""
+        path = Path(file_path).resolve()
+        stat = path.stat()
+        return str(path), stat.st_mtime_ns, stat.st_size
+    
+    def get(self, file_path: Union[str, Path]) -> WorkbookMetadata:
+        """
+        Get the metadata of a workbook file, reading the file on a miss
+        
+        Args:
+            file_path: Workbook file
+        
+        Returns:
+            WorkbookMetadata
+        
+        Raises:
+            Exception: Whatever openpyxl raises for an unreadable file
+        """
+        key = self.file_key(file_path)
+        with self._lock:
+            metadata = self._entries.get(key)
+            if metadata is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return metadata
+            self.misses += 1
+        
+        metadata = self._read_file(key[0])
+        self._store(key, metadata)
+        return metadata
+    
+    def data_rows(self, file_path: Union[str, Path], worksheet_name: Optional[str] = None,
+                  start_row: int = 1) -> Tuple[SheetMetadata, int]:
+        """
+        Count non-empty rows of a sheet from start_row down
+        
+        Args:
+            file_path: Workbook file
+            worksheet_name: Sheet name (active sheet if None)
+            start_row: First row counted
+        
+        Returns:
+            Tuple of (sheet metadata, row count)
+        
+        Raises:
+            KeyError: If the sheet does not exist
+        """
+        sheet = self.get(file_path).sheet(worksheet_name)
+        if sheet.nonempty_rows is None:
+            wb = openpyxl.load_workbook(str(file_path), read_only=True)
+            try:
+                sheet.nonempty_rows = sum(1 for values in wb[sheet.title].iter_rows(values_only=True)
+                                          if any(_has_text(v) for v in values))
+            finally:
+                wb.close()
+        return sheet, sheet.data_rows(start_row)
+    
+    def populate(self, file_path: Union[str, Path], workbook) -> WorkbookMetadata:
+        """
+        Record the metadata of a workbook that was just saved to file_path
+        
+        Args:
+            file_path: File the workbook was saved to
+            workbook: The saved (regular, not read-only) openpyxl workbook
+        
+        Returns:
+            WorkbookMetadata
+        """
+        sheets = {}
+        for ws in workbook.worksheets:
+            # Read the cell store directly; iter_rows() would create every empty cell it visits
+            cells = ws._cells
+            header_rows = tuple(
+                tuple(cells[(row, col)].value if (row, col) in cells else None for col in range(1, ws.max_column + 1))
+                for row in range(1, min(self.header_rows, ws.max_row) + 1)
+            )
+            sheets[ws.title] = SheetMetadata(
+                title=ws.title,
+                max_row=ws.max_row,
+                max_column=ws.max_column,
+                header_rows=header_rows,
+                nonempty_rows=len({row for (row, _), cell in cells.items() if _has_text(cell.value)})
+            )
+        metadata = WorkbookMetadata(sheets, workbook.active.title if workbook.active is not None else None)
+        self._store(self.file_key(file_path), metadata)
+        return metadata
+    
+    def invalidate(self, file_path: Optional[Union[str, Path]] = None) -> None:
+        """
+        Drop cached metadata of one file (all versions) or of all files
+        
+        Args:
+            file_path: Workbook file (all files if None)
+        """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                return
+            path = str(Path(file_path).resolve())
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+    
+    def _store(self, key: FileKey, metadata: WorkbookMetadata) -> None:
+        """Store an entry, replacing older versions of the same file"""
+        with self._lock:
+            for old_key in [k for k in self._entries if k[0] == key[0] and k != key]:
+                del self._entries[old_key]
+            self._entries[key] = metadata
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def _read_file(self, file_path: str) -> WorkbookMetadata:
+        """Read sheet names, dimensions and header rows in one read-only pass"""
+        wb = openpyxl.load_workbook(file_path, read_only=True)
+        try:
+            sheets = {}
+            for ws in wb.worksheets:
+                header_rows = tuple(ws.iter_rows(max_row=self.header_rows, values_only=True))
+                sheets[ws.title] = SheetMetadata(
+                    title=ws.title,
+                    max_row=ws.max_row or len(header_rows),
+                    max_column=ws.max_column or max((len(values) for values in header_rows), default=0),
+                    header_rows=header_rows
+                )
+            return WorkbookMetadata(sheets, wb.active.title if wb.active is not None else None)
+        finally:
+            wb.close()
+
+# Shared cache instance
+_metadata_cache: Optional[WorkbookMetadataCache] = None
+_metadata_cache_lock = threading.Lock()
+
+def get_metadata_cache() -> WorkbookMetadataCache:
+    """
+    Get the shared workbook metadata cache
+    
+    Returns:
+        WorkbookMetadataCache instance
+    """
+    global _metadata_cache
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            from .config import get_config
+            _metadata_cache = WorkbookMetadataCache(
+                max_entries=get_config().get("validation.metadata_cache_entries", 64)
+            )
+        return _metadata_cache
+
+def populate_workbook_metadata(file_path: Union[str, Path], workbook) -> None:
+    """
+    Record the metadata of a workbook a step just saved, so validating it
+    as the next step's input does not reopen the file
+    
+    Args:
+        file_path: File the workbook was saved to
+        workbook: The saved openpyxl workbook
+    """
+    try:
+        get_metadata_cache().populate(file_path, workbook)
+    except Exception as e:
+        # The cache is an optimization; validators fall back to reading the file
+        logger.debug(f"Could not record workbook metadata for {file_path}: {e}")
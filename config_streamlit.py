@@ -26,12 +26,30 @@ STREAMLIT_CONFIG = {
     "show_progress_bar": True,
     "show_step_details": False,  # Hide intermediate steps from user
     "auto_cleanup_temp_files": True,
-    "session_timeout_minutes": 30,
+    "session_timeout_minutes": 30,  # Idle sessions' locks are dropped after this
+    "max_session_locks": 1000,  # Beyond this the least recently used idle session locks are dropped
+    "session_lock_sweep_seconds": 60,
     
     # Processing settings
     "enable_async_processing": True,
-    "max_concurrent_uploads": 3,
+    "max_concurrent_uploads": 3,  # Conversion jobs running at once (job queue workers)
+    "max_queued_jobs": 10,  # Further jobs allowed to wait; beyond that uploads are rejected
+    "job_poll_interval_seconds": 1.0,
+    "job_retention_minutes": 60,  # Finished jobs stay available for their session to collect
     "processing_timeout_minutes": 10,
+    "in_memory_pipeline": True,  # Pass workbooks between steps without save/reload
+    "save_intermediate_files": False,  # Debug: also write Step1-Step5 files in in-memory mode
+    
+    # Step instrumentation (timings, memory, cell and row counts in processing_stats)
+    "collect_step_metrics": True,
+    "metrics_trace_memory": False,  # tracemalloc peak per step; slows processing down noticeably
+    "metrics_file": None,  # JSON-lines file receiving one record per step, e.g. "temp/metrics/steps.jsonl"
+    
+    # Result cache settings (identical re-uploads are served from disk)
+    "enable_result_cache": True,
+    "result_cache_directory": "temp/result_cache",
+    "result_cache_max_size_mb": 500,
+    "result_cache_max_age_hours": 24,
     
     # Display settings
     "theme": {
@@ -54,6 +72,7 @@ STREAMLIT_CONFIG = {
     "validation_timeout_seconds": 30,
     "debug_validation": False,
     "allow_large_files": False,  # Allow files up to 2x size limit in emergency
+    "max_decompressed_mb": 512,  # Content scan budget; larger decompressed uploads are treated as zip bombs
     "strict_excel_validation": False  # Require all Excel structure checks to pass
 }
 
@@ -1064,6 +1083,7 @@ def get_validation_config() -> Dict[str, Any]:
         'debug_validation': config.get('debug_validation', False),
         'enable_enhanced_logging': config.get('enable_enhanced_logging', False),
         'allow_large_files': config.get('allow_large_files', False),
+        'max_decompressed_mb': config.get('max_decompressed_mb', 512),
         'strict_excel_validation': config.get('strict_excel_validation', False)
     }
     
@@ -1081,5 +1101,6 @@ elif os.getenv("STREAMLIT_ENV") == "development":
     STREAMLIT_CONFIG.update({
         "show_error_details": True,
         "log_user_actions": True,
-        "auto_cleanup_temp_files": False  # Keep files for debugging
+        "auto_cleanup_temp_files": False,  # Keep files for debugging
+        "save_intermediate_files": True
     })
\ No newline at end of file
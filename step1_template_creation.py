@@ -16,6 +16,8 @@ import re
 from common.validation import FileValidator, validate_step1_template
 from common.exceptions import TSConverterError
 from common.config import get_config, get_clean_basename
+from common.step_metrics import count_cells_written
+from common.workbook_metadata import populate_workbook_metadata
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -47,6 +49,42 @@ class TemplateCreator:
         # Define styles
         self.header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
     
+    def build_template_workbook(self) -> openpyxl.Workbook:
+        """
+        Build the Step 1 template workbook in memory
+        
+        Returns:
+            Workbook with formatted headers in row 10 (columns A-Q)
+        """
+        # Create new workbook with template structure
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "Output Template"
+        
+        # Row 10: Headers (17 columns A-Q) with specific formatting and column widths
+        for col_idx, header_info in enumerate(self.template_headers, 1):
+            cell = ws.cell(10, col_idx, header_info["name"])
+            
+            # Apply font with specific color for each column
+            cell.font = Font(bold=True, color=header_info["font_color"])
+            
+            # Apply background color
+            cell.fill = PatternFill(start_color=header_info["bg_color"], 
+                                   end_color=header_info["bg_color"], 
+                                   fill_type="solid")
+            
+            # Apply alignment
+            cell.alignment = self.header_alignment
+            
+            # Set column width
+            col_letter = chr(64 + col_idx)
+            ws.column_dimensions[col_letter].width = header_info["width"]
+        count_cells_written(len(self.template_headers))
+        
+        logger.info(f"✅ Created formatted template with {len(self.template_headers)} headers")
+        
+        return wb
+    
     def create_template(self, input_file: Union[str, Path], 
                        output_file: Optional[Union[str, Path]] = None) -> str:
         """
@@ -85,35 +123,12 @@ class TemplateCreator:
         logger.info(f"Input: {input_path}")
         logger.info(f"Output: {output_file}")
         
-        # Create new workbook with template structure
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Output Template"
-        
-        # Row 10: Headers (17 columns A-Q) with specific formatting and column widths
-        for col_idx, header_info in enumerate(self.template_headers, 1):
-            cell = ws.cell(10, col_idx, header_info["name"])
-            
-            # Apply font with specific color for each column
-            cell.font = Font(bold=True, color=header_info["font_color"])
-            
-            # Apply background color
-            cell.fill = PatternFill(start_color=header_info["bg_color"], 
-                                   end_color=header_info["bg_color"], 
-                                   fill_type="solid")
-            
-            # Apply alignment
-            cell.alignment = self.header_alignment
-            
-            # Set column width
-            col_letter = chr(64 + col_idx)
-            ws.column_dimensions[col_letter].width = header_info["width"]
-        
-        logger.info(f"✅ Created formatted template with {len(self.template_headers)} headers")
+        wb = self.build_template_workbook()
         
         # Save template
         try:
             wb.save(str(output_file))
+            populate_workbook_metadata(output_file, wb)
             logger.info(f"✅ Step 1 completed: {output_file}")
             
             # Validate created template structure
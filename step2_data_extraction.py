@@ -18,6 +18,10 @@ from common.validation import validate_step2_input, FileValidator
 from common.exceptions import TSConverterError
 from common.quality_reporter import get_global_reporter
 from common.config import get_clean_basename
+from common.sheet_snapshot import get_sheet_snapshot
+from common.source_loader import open_source_workbook
+from common.step_metrics import count_cells_written, record_rows
+from common.workbook_metadata import populate_workbook_metadata
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -56,18 +60,8 @@ class DataExtractor:
             True if cell is hidden, False otherwise
         """
         try:
-            # Check if row is hidden
-            row_hidden = worksheet.row_dimensions.get(row_num, None)
-            if row_hidden and getattr(row_hidden, 'hidden', False):
-                return True
-            
-            # Check if column is hidden
-            col_letter = get_column_letter(col_num)
-            col_hidden = worksheet.column_dimensions.get(col_letter, None)
-            if col_hidden and getattr(col_hidden, 'hidden', False):
-                return True
-            
-            return False
+            # Hidden rows/columns are collected once per sheet snapshot
+            return get_sheet_snapshot(worksheet).is_hidden(row_num, col_num)
         except Exception as e:
             logger.debug(f"Error checking if cell {row_num},{col_num} is hidden: {e}")
             return False
@@ -84,45 +78,31 @@ class DataExtractor:
             List of (row, col) tuples where headers are found
         """
         found_cells = []
-        cells_checked = 0
-        hidden_cells_skipped = 0
-        max_cells = 10000  # Safety limit to prevent infinite search
         
         try:
-            # Search through all cells in the worksheet (with limits)
-            for row_num in range(1, min(worksheet.max_row + 1, 100)):  # Limit to first 100 rows
-                for col_num in range(1, min(worksheet.max_column + 1, 50)):  # Limit to first 50 columns
-                    cells_checked += 1
-                    if cells_checked > max_cells:
-                        logger.warning(f"Header search timeout in {worksheet.title}: checked {cells_checked} cells")
-                        break
-                    
-                    # Skip hidden cells
-                    if self.is_cell_hidden(worksheet, row_num, col_num):
-                        hidden_cells_skipped += 1
-                        logger.debug(f"Skipping hidden cell {worksheet.title}!{row_num},{col_num}")
-                        continue
-                        
-                    try:
-                        cell = worksheet.cell(row=row_num, column=col_num)
-                        cell_value = self.safe_cell_value(cell)
-                        if cell_value:
-                            for header in headers:
-                                if header.lower() in cell_value.lower():
-                                    found_cells.append((cell.row, cell.column))
-                                    logger.info(f"Found '{header}' at {worksheet.title}!{cell.coordinate}: {cell_value}")
-                                    break
-                    except Exception as cell_error:
-                        logger.debug(f"Error reading cell {worksheet.title}!{row_num},{col_num}: {cell_error}")
-                        continue
-                        
-                if cells_checked > max_cells:
-                    break
-                    
+            snapshot = get_sheet_snapshot(worksheet)
+            
+            # Limit to first 100 rows / 50 columns, looked up in the shared header index
+            last_row = min(snapshot.max_row, 99)
+            last_col = min(snapshot.max_column, 49)
+            index = snapshot.header_index()
+            
+            for row_num, col_num, header in index.find(headers, last_row, last_col, skip=snapshot.is_hidden):
+                found_cells.append((row_num, col_num))
+                logger.info(f"Found '{header}' at {worksheet.title}!{get_column_letter(col_num)}{row_num}: {snapshot.value(row_num, col_num)}")
+            
+            self.report_formula_errors(snapshot, [
+                (row_num, col_num) for row_num, col_num in index.error_cells
+                if row_num <= last_row and col_num <= last_col and not snapshot.is_hidden(row_num, col_num)
+            ])
+            
+            hidden_rows = sum(1 for row_num in snapshot.hidden_rows if row_num <= last_row)
+            visible_cells = (last_row - hidden_rows) * len(snapshot.visible_columns(1, last_col))
+            logger.debug(f"Header search in {worksheet.title}: checked {last_row * last_col} cells, skipped {last_row * last_col - visible_cells} hidden cells, found {len(found_cells)} matches")
+        
         except Exception as e:
             logger.error(f"Error searching headers in {worksheet.title}: {e}")
         
-        logger.debug(f"Header search in {worksheet.title}: checked {cells_checked} cells, skipped {hidden_cells_skipped} hidden cells, found {len(found_cells)} matches")
         return found_cells
     
     def find_m_textile_sheets(self, workbook) -> List[str]:
@@ -164,24 +144,26 @@ class DataExtractor:
         search_patterns = ["product combination", "product information"]
         
         try:
-            # Search through the worksheet for header patterns (case insensitive)
-            for row_num in range(1, min(worksheet.max_row + 1, 100)):  # Limit to first 100 rows
-                for col_num in range(1, min(worksheet.max_column + 1, 50)):  # Limit to first 50 columns
-                    # Skip hidden cells
-                    if self.is_cell_hidden(worksheet, row_num, col_num):
-                        continue
-                        
-                    try:
-                        cell = worksheet.cell(row=row_num, column=col_num)
-                        cell_value = self.safe_cell_value(cell)
-                        if cell_value:
-                            for pattern in search_patterns:
-                                if pattern in cell_value.lower():
-                                    logger.info(f"Found '{pattern}' at {worksheet.title}!{cell.coordinate}: {cell_value}")
-                                    return (cell.row, cell.column)
-                    except Exception as cell_error:
-                        logger.debug(f"Error reading cell {worksheet.title}!{row_num},{col_num}: {cell_error}")
-                        continue
+            snapshot = get_sheet_snapshot(worksheet)
+            
+            # Limit to first 100 rows / 50 columns, looked up in the shared header index
+            last_row = min(snapshot.max_row, 99)
+            last_col = min(snapshot.max_column, 49)
+            index = snapshot.header_index()
+            match = index.find_first(search_patterns, last_row, last_col, skip=snapshot.is_hidden)
+            
+            # Formula errors in cells a cell-by-cell scan would have passed are still reported
+            stop = (match[0], match[1]) if match else (last_row + 1, 0)
+            self.report_formula_errors(snapshot, [
+                (row_num, col_num) for row_num, col_num in index.error_cells
+                if (row_num, col_num) < stop and row_num <= last_row and col_num <= last_col
+                and not snapshot.is_hidden(row_num, col_num)
+            ])
+            
+            if match:
+                row_num, col_num, pattern = match
+                logger.info(f"Found '{pattern}' at {worksheet.title}!{get_column_letter(col_num)}{row_num}: {snapshot.value(row_num, col_num)}")
+                return (row_num, col_num)
         except Exception as e:
             logger.error(f"Error searching for product headers in {worksheet.title}: {e}")
         
@@ -203,26 +185,22 @@ class DataExtractor:
         found_cells = []
         
         try:
-            # Search upward from start_row to row 1
-            for row_num in range(start_row, 0, -1):  # Search upward
-                for col_num in range(1, min(worksheet.max_column + 1, 50)):  # Limit to first 50 columns
-                    # Skip hidden cells
-                    if self.is_cell_hidden(worksheet, row_num, col_num):
-                        continue
-                        
-                    try:
-                        cell = worksheet.cell(row=row_num, column=col_num)
-                        cell_value = self.safe_cell_value(cell)
-                        if cell_value:
-                            for header in headers:
-                                if header.lower() in cell_value.lower():
-                                    found_cells.append((cell.row, cell.column))
-                                    logger.info(f"Found '{header}' upward at {worksheet.title}!{cell.coordinate}: {cell_value}")
-                                    break
-                    except Exception as cell_error:
-                        logger.debug(f"Error reading cell {worksheet.title}!{row_num},{col_num}: {cell_error}")
-                        continue
-                        
+            snapshot = get_sheet_snapshot(worksheet)
+            last_col = min(snapshot.max_column, 49)  # Limit to first 50 columns
+            index = snapshot.header_index(start_row)
+            
+            # Matches nearest to start_row first, left to right within a row
+            matches = index.find(headers, start_row, last_col, skip=snapshot.is_hidden)
+            for row_num, col_num, header in sorted(matches, key=lambda match: (-match[0], match[1])):
+                found_cells.append((row_num, col_num))
+                logger.info(f"Found '{header}' upward at {worksheet.title}!{get_column_letter(col_num)}{row_num}: {snapshot.value(row_num, col_num)}")
+            
+            self.report_formula_errors(snapshot, sorted(
+                ((row_num, col_num) for row_num, col_num in index.error_cells
+                 if row_num <= start_row and col_num <= last_col and not snapshot.is_hidden(row_num, col_num)),
+                key=lambda cell: (-cell[0], cell[1])
+            ))
+            
         except Exception as e:
             logger.error(f"Error searching headers upward in {worksheet.title}: {e}")
         
@@ -271,6 +249,40 @@ class DataExtractor:
             logger.warning(f"Error reading cell {getattr(cell, 'coordinate', 'unknown')}: {e} - using empty value")
             return ""
     
+    def snapshot_cell_value(self, snapshot, row_num: int, col_num: int) -> str:
+        """
+        Read a cell from a sheet snapshot, reporting formula errors like safe_cell_value
+        
+        Args:
+            snapshot: SheetSnapshot of the worksheet
+            row_num: Row number (1-based)
+            col_num: Column number (1-based)
+            
+        Returns:
+            Safe string value or empty string if error
+        """
+        if snapshot.error_value(row_num, col_num) is not None:
+            self.report_formula_errors(snapshot, [(row_num, col_num)])
+        return snapshot.value(row_num, col_num)
+    
+    def report_formula_errors(self, snapshot, cells: List[Tuple[int, int]]) -> None:
+        """
+        Log and report formula error cells that were read as empty
+        
+        Args:
+            snapshot: SheetSnapshot of the worksheet
+            cells: (row, col) positions of formula error cells
+        """
+        for row_num, col_num in cells:
+            error_value = snapshot.error_value(row_num, col_num)
+            coordinate = f"{get_column_letter(col_num)}{row_num}"
+            logger.warning(f"Formula error detected in {coordinate}: {error_value} - using empty value")
+            get_global_reporter().add_warning(
+                'step2', 'formula_errors',
+                f"Excel formula error in cell {coordinate}",
+                f"Error value: {error_value}"
+            )
+    
     def clean_value(self, value: str) -> str:
         """
         Clean individual value by removing trailing punctuation and whitespace
@@ -344,23 +356,31 @@ class DataExtractor:
         hidden_rows_skipped = 0
         
         try:
+            snapshot = get_sheet_snapshot(worksheet)
+            
+            # A hidden column hides every row - skip the whole column at once
+            if start_col in snapshot.hidden_columns:
+                logger.debug(f"Skipping hidden column {worksheet.title}!{get_column_letter(start_col)}")
+                hidden_rows_skipped = max_rows
+                rows_checked = max_rows
+            
             while rows_checked < max_rows:
-                # Skip hidden cells
-                if self.is_cell_hidden(worksheet, current_row, start_col):
+                # Skip hidden rows
+                if current_row in snapshot.hidden_rows:
                     hidden_rows_skipped += 1
                     logger.debug(f"Skipping hidden cell {worksheet.title}!{current_row},{start_col}")
                     current_row += 1
                     rows_checked += 1
                     continue
                 
-                cell = worksheet.cell(row=current_row, column=start_col)
+                coordinate = f"{get_column_letter(start_col)}{current_row}"
                 
                 # Use safe cell reading to handle formula errors
-                value = self.safe_cell_value(cell)
+                value = self.snapshot_cell_value(snapshot, current_row, start_col)
                 
                 # Check if we've reached end of data
                 if not value:
-                    logger.debug(f"Stopping extraction at {worksheet.title}!{cell.coordinate}: empty cell")
+                    logger.debug(f"Stopping extraction at {worksheet.title}!{coordinate}: empty cell")
                     break
                 
                 if value:
@@ -368,9 +388,9 @@ class DataExtractor:
                     try:
                         parsed_values = self.parse_multi_value_cell(value)
                         data.extend(parsed_values)
-                        logger.debug(f"Extracted from {worksheet.title}!{cell.coordinate}: {len(parsed_values)} items: {parsed_values}")
+                        logger.debug(f"Extracted from {worksheet.title}!{coordinate}: {len(parsed_values)} items: {parsed_values}")
                     except Exception as parse_error:
-                        logger.warning(f"Error parsing cell {worksheet.title}!{cell.coordinate}: {parse_error}")
+                        logger.warning(f"Error parsing cell {worksheet.title}!{coordinate}: {parse_error}")
                         # Continue with raw value
                         cleaned_value = self.clean_value(value)
                         if cleaned_value:
@@ -380,7 +400,7 @@ class DataExtractor:
                 rows_checked += 1
                 
                 # Check if we're going beyond reasonable worksheet bounds
-                if current_row > worksheet.max_row + 100:
+                if current_row > snapshot.max_row + 100:
                     logger.warning(f"Stopping extraction: exceeded max_row + 100 at row {current_row}")
                     break
                     
@@ -412,7 +432,7 @@ class DataExtractor:
             try:
                 numbers = self.extract_data_vertical(worksheet, name_row, number_col)
                 all_numbers.extend(numbers)
-                logger.info(f"Extracted {len(numbers)} article numbers from {worksheet.title}!{worksheet.cell(name_row, number_col).coordinate} (position-based: col {name_col} + 1)")
+                logger.info(f"Extracted {len(numbers)} article numbers from {worksheet.title}!{get_column_letter(number_col)}{name_row} (position-based: col {name_col} + 1)")
             except Exception as e:
                 logger.warning(f"Failed to extract article numbers from position {worksheet.title}!({name_row}, {number_col}): {e}")
                 # Try to find number headers as fallback
@@ -422,7 +442,7 @@ class DataExtractor:
                     for row, col in number_cells:
                         numbers = self.extract_data_vertical(worksheet, row, col)
                         all_numbers.extend(numbers)
-                        logger.info(f"Fallback: Extracted {len(numbers)} numbers from {worksheet.title}!{worksheet.cell(row, col).coordinate}")
+                        logger.info(f"Fallback: Extracted {len(numbers)} numbers from {worksheet.title}!{get_column_letter(col)}{row}")
                 except Exception as fallback_error:
                     logger.warning(f"Fallback also failed: {fallback_error}")
         
@@ -512,64 +532,22 @@ class DataExtractor:
         
         return unique_names, unique_numbers
 
-    def process_m_textile_file(self, step1_file: Union[str, Path], 
-                              source_file: Union[str, Path],
-                              output_file: Optional[Union[str, Path]] = None) -> str:
+    def extract_m_textile_data(self, step1_ws, source_wb) -> int:
         """
-        Process Step1 file and extract data from M-Textile sheets using the new logic
+        Extract article data from M-Textile sheets into an already loaded template
         
         Args:
-            step1_file: Step1 template file path
-            source_file: Source Excel file to extract data from
-            output_file: Optional output file path (if None, auto-generate)
+            step1_ws: Step1 template worksheet to populate (modified in place)
+            source_wb: Loaded source workbook to extract data from
             
         Returns:
-            Path to output file
+            Number of article pairs written to the template
         """
-        logger.info("📋 Step 2: M-Textile Data Extraction (New Logic)")
-        
-        # Validate input files
-        try:
-            validate_step2_input(step1_file, source_file)
-            step1_path = Path(step1_file)
-            source_path = Path(source_file)
-        except TSConverterError as e:
-            logger.error(f"Input validation failed: {e}")
-            raise
-        
-        # Auto-generate output file if not provided
-        if output_file is None:
-            base_name = get_clean_basename(step1_path)
-            output_file = self.output_dir / f"{base_name} - Step2.xlsx"
-        else:
-            output_file = Path(output_file)
-        
-        # Validate output path is writable
-        try:
-            output_file = FileValidator.validate_output_writable(output_file)
-        except TSConverterError as e:
-            logger.error(f"Output validation failed: {e}")
-            raise
-        
-        logger.info(f"Step1 Template: {step1_path}")
-        logger.info(f"Source Data: {source_path}")
-        logger.info(f"Output: {output_file}")
-        
-        # Load Step1 template (preserve formatting)
-        step1_wb = openpyxl.load_workbook(str(step1_path))
-        step1_ws = step1_wb.active
-        
-        # Load source file for data extraction
-        source_wb = openpyxl.load_workbook(str(source_path))
-        
         # Find M-Textile sheets
         m_textile_sheets = self.find_m_textile_sheets(source_wb)
         if not m_textile_sheets:
             logger.warning("No M-Textile sheets found - creating empty output")
-            step1_wb.save(str(output_file))
-            source_wb.close()
-            step1_wb.close()
-            return str(output_file)
+            return 0
         
         all_names = []
         all_numbers = []
@@ -598,9 +576,9 @@ class DataExtractor:
                     try:
                         names = self.extract_data_vertical(worksheet, row, col)
                         all_names.extend(names)
-                        logger.info(f"Extracted {len(names)} names from {sheet_name}!{worksheet.cell(row, col).coordinate}")
+                        logger.info(f"Extracted {len(names)} names from {sheet_name}!{get_column_letter(col)}{row}")
                     except Exception as e:
-                        logger.error(f"Error extracting names from {sheet_name}!{worksheet.cell(row, col).coordinate}: {e}")
+                        logger.error(f"Error extracting names from {sheet_name}!{get_column_letter(col)}{row}: {e}")
                         continue
                 
                 # Use position-based article number extraction (numbers are right of names)
@@ -614,9 +592,9 @@ class DataExtractor:
                         try:
                             numbers = self.extract_data_vertical(worksheet, row, col)
                             all_numbers.extend(numbers)
-                            logger.info(f"Extracted {len(numbers)} numbers from {sheet_name}!{worksheet.cell(row, col).coordinate} (fallback)")
+                            logger.info(f"Extracted {len(numbers)} numbers from {sheet_name}!{get_column_letter(col)}{row} (fallback)")
                         except Exception as e:
-                            logger.error(f"Error extracting numbers from {sheet_name}!{worksheet.cell(row, col).coordinate}: {e}")
+                            logger.error(f"Error extracting numbers from {sheet_name}!{get_column_letter(col)}{row}: {e}")
                             continue
                         
             except Exception as e:
@@ -633,12 +611,71 @@ class DataExtractor:
         # Populate Step1 template with merged cells starting from column R
         if unique_names or unique_numbers:
             self.populate_template_with_merged_cells(step1_ws, unique_names, unique_numbers)
+            count_cells_written(len(unique_names) + len(unique_numbers))
         else:
             logger.warning("No data extracted from M-Textile sheets")
         
+        # Rows here are extracted article values and the article pairs written
+        record_rows(rows_in=len(all_names) + len(all_numbers), rows_out=max(len(unique_names), len(unique_numbers)))
+        
+        return max(len(unique_names), len(unique_numbers))
+
+    def process_m_textile_file(self, step1_file: Union[str, Path], 
+                              source_file: Union[str, Path],
+                              output_file: Optional[Union[str, Path]] = None) -> str:
+        """
+        Process Step1 file and extract data from M-Textile sheets using the new logic
+        
+        Args:
+            step1_file: Step1 template file path
+            source_file: Source Excel file to extract data from
+            output_file: Optional output file path (if None, auto-generate)
+            
+        Returns:
+            Path to output file
+        """
+        logger.info("📋 Step 2: M-Textile Data Extraction (New Logic)")
+        
+        # Validate input files
+        try:
+            validate_step2_input(step1_file, source_file)
+            step1_path = Path(step1_file)
+            source_path = Path(source_file)
+        except TSConverterError as e:
+            logger.error(f"Input validation failed: {e}")
+            raise
+        
+        # Auto-generate output file if not provided
+        if output_file is None:
+            base_name = get_clean_basename(step1_path)
+            output_file = self.output_dir / f"{base_name} - Step2.xlsx"
+        else:
+            output_file = Path(output_file)
+        
+        # Validate output path is writable
+        try:
+            output_file = FileValidator.validate_output_writable(output_file)
+        except TSConverterError as e:
+            logger.error(f"Output validation failed: {e}")
+            raise
+        
+        logger.info(f"Step1 Template: {step1_path}")
+        logger.info(f"Source Data: {source_path}")
+        logger.info(f"Output: {output_file}")
+        
+        # Load Step1 template (preserve formatting)
+        step1_wb = openpyxl.load_workbook(str(step1_path))
+        step1_ws = step1_wb.active
+        
+        # Stream source file; only the sheets that are read get materialized
+        source_wb = open_source_workbook(source_path)
+        
+        self.extract_m_textile_data(step1_ws, source_wb)
+        
         # Save output file
         try:
             step1_wb.save(str(output_file))
+            populate_workbook_metadata(output_file, step1_wb)
             logger.info(f"✅ Step 2 M-Textile completed: {output_file}")
         except Exception as e:
             logger.error(f"Failed to save file: {e}")
@@ -723,8 +760,8 @@ class DataExtractor:
         step1_wb = openpyxl.load_workbook(str(step1_path))
         step1_ws = step1_wb.active
         
-        # Load source file for data extraction
-        source_wb = openpyxl.load_workbook(str(source_path))
+        # Stream source file; only the sheets that are read get materialized
+        source_wb = open_source_workbook(source_path)
         
         all_names = []
         all_numbers = []
@@ -754,9 +791,9 @@ class DataExtractor:
                             try:
                                 names = self.extract_data_vertical(worksheet, row, col)
                                 all_names.extend(names)
-                                logger.info(f"Extracted {len(names)} names from {sheet_name}!{worksheet.cell(row, col).coordinate}")
+                                logger.info(f"Extracted {len(names)} names from {sheet_name}!{get_column_letter(col)}{row}")
                             except Exception as e:
-                                logger.error(f"Error extracting names from {sheet_name}!{worksheet.cell(row, col).coordinate}: {e}")
+                                logger.error(f"Error extracting names from {sheet_name}!{get_column_letter(col)}{row}: {e}")
                                 if allow_missing_headers:
                                     processing_warnings.append(f"Failed to extract names from {sheet_name}: {str(e)}")
                                     continue
@@ -782,9 +819,9 @@ class DataExtractor:
                             try:
                                 numbers = self.extract_data_vertical(worksheet, row, col)
                                 all_numbers.extend(numbers)
-                                logger.info(f"Extracted {len(numbers)} numbers from {sheet_name}!{worksheet.cell(row, col).coordinate}")
+                                logger.info(f"Extracted {len(numbers)} numbers from {sheet_name}!{get_column_letter(col)}{row}")
                             except Exception as e:
-                                logger.error(f"Error extracting numbers from {sheet_name}!{worksheet.cell(row, col).coordinate}: {e}")
+                                logger.error(f"Error extracting numbers from {sheet_name}!{get_column_letter(col)}{row}: {e}")
                                 if allow_missing_headers:
                                     processing_warnings.append(f"Failed to extract numbers from {sheet_name}: {str(e)}")
                                     continue
@@ -846,6 +883,7 @@ class DataExtractor:
         # Save output file
         try:
             step1_wb.save(str(output_file))
+            populate_workbook_metadata(output_file, step1_wb)
             if processing_warnings:
                 logger.info(f"✅ Step 2 completed with warnings: {output_file}")
             else:
@@ -906,8 +944,8 @@ class DataExtractor:
         step1_wb = openpyxl.load_workbook(str(step1_path))
         step1_ws = step1_wb.active
         
-        # Load source file for data extraction
-        source_wb = openpyxl.load_workbook(str(source_path))
+        # Stream source file; only the sheets that are read get materialized
+        source_wb = open_source_workbook(source_path)
         
         all_names = []
         all_numbers = []
@@ -925,9 +963,9 @@ class DataExtractor:
                         try:
                             names = self.extract_data_vertical(worksheet, row, col)
                             all_names.extend(names)
-                            logger.info(f"Extracted {len(names)} names from {sheet_name}!{worksheet.cell(row, col).coordinate}")
+                            logger.info(f"Extracted {len(names)} names from {sheet_name}!{get_column_letter(col)}{row}")
                         except Exception as e:
-                            logger.error(f"Error extracting names from {sheet_name}!{worksheet.cell(row, col).coordinate}: {e}")
+                            logger.error(f"Error extracting names from {sheet_name}!{get_column_letter(col)}{row}: {e}")
                             continue
                 except Exception as e:
                     logger.error(f"Error finding name headers in sheet {sheet_name}: {e}")
@@ -939,9 +977,9 @@ class DataExtractor:
                         try:
                             numbers = self.extract_data_vertical(worksheet, row, col)
                             all_numbers.extend(numbers)
-                            logger.info(f"Extracted {len(numbers)} numbers from {sheet_name}!{worksheet.cell(row, col).coordinate}")
+                            logger.info(f"Extracted {len(numbers)} numbers from {sheet_name}!{get_column_letter(col)}{row}")
                         except Exception as e:
-                            logger.error(f"Error extracting numbers from {sheet_name}!{worksheet.cell(row, col).coordinate}: {e}")
+                            logger.error(f"Error extracting numbers from {sheet_name}!{get_column_letter(col)}{row}: {e}")
                             continue
                 except Exception as e:
                     logger.error(f"Error finding number headers in sheet {sheet_name}: {e}")
@@ -979,6 +1017,7 @@ class DataExtractor:
         # Save output file
         try:
             step1_wb.save(str(output_file))
+            populate_workbook_metadata(output_file, step1_wb)
             logger.info(f"✅ Step 2 completed: {output_file}")
         except Exception as e:
             logger.error(f"Failed to save file: {e}")
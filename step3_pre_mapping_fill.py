@@ -14,14 +14,18 @@ import openpyxl
 from openpyxl.utils import get_column_letter
 import logging
 from pathlib import Path
-from typing import Union, Optional, Dict, List
+from typing import Union, Optional, Dict, List, Tuple
 import argparse
 import sys
 import shutil
+from itertools import accumulate
 
 from common.validation import FileValidator
 from common.exceptions import TSConverterError
 from common.config import get_config, get_clean_basename
+from common.sheet_snapshot import get_sheet_snapshot
+from common.step_metrics import record_rows
+from common.workbook_metadata import populate_workbook_metadata
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -97,14 +101,14 @@ class PreMappingFiller:
         Returns:
             Row number (1-based) or None if not found
         """
-        for row in range(1, min(worksheet.max_row + 1, 50)):  # Search first 50 rows
-            for col in range(1, worksheet.max_column + 1):
-                cell = worksheet.cell(row, col)
-                cell_value = self.safe_cell_value(cell)
-                if cell_value:
-                    if header_text.lower() in cell_value.lower():
-                        logger.info(f"Found '{header_text}' at row {row}, column {get_column_letter(col)}")
-                        return row
+        snapshot = get_sheet_snapshot(worksheet)
+        
+        # Search first 50 rows via the header index shared with the other steps
+        match = snapshot.header_index().find_first([header_text], max_row=min(snapshot.max_row, 49))
+        if match:
+            row, col, _ = match
+            logger.info(f"Found '{header_text}' at row {row}, column {get_column_letter(col)}")
+            return row
         
         logger.warning(f"Header '{header_text}' not found in worksheet")
         return None
@@ -157,28 +161,35 @@ class PreMappingFiller:
         Returns:
             Last row number (1-based) with data
         """
-        last_row = worksheet.max_row
-        
-        # Search backwards from max_row to find actual last row with data
-        for row in range(last_row, start_row - 1, -1):
-            has_data = False
-            for col in range(1, worksheet.max_column + 1):
-                cell_value = worksheet.cell(row, col).value
-                if cell_value is not None and (not isinstance(cell_value, str) or cell_value.strip()):
-                    has_data = True
-                    break
-            
-            if has_data:
-                logger.debug(f"Found last data row: {row}")
-                return row
+        # The snapshot tracks the last row with data, so no backwards scan is needed
+        last_row = get_sheet_snapshot(worksheet).last_data_row
+        
+        if last_row >= start_row:
+            logger.debug(f"Found last data row: {last_row}")
+            return last_row
         
         logger.debug(f"No data found after row {start_row}")
         return start_row
     
+    def forward_fill(self, values: List[str]) -> List[str]:
+        """
+        Carry the last non-empty value down over empty entries
+        
+        Args:
+            values: Column values (normalized strings, "" for empty)
+        
+        Returns:
+            Filled values; entries before the first non-empty value stay empty
+        """
+        return list(accumulate(values, lambda last, value: value or last))
+    
     def fill_column_in_sheet(self, worksheet, column_letter: str, start_row: int, end_row: int) -> int:
         """
         Fill empty cells in a column with data from the last non-empty row in same column
         
+        The column range is read once, forward-filled in one pass and only the
+        cells whose value changed are written back.
+        
         Args:
             worksheet: openpyxl worksheet object
             column_letter: Column letter to fill
@@ -189,34 +200,41 @@ class PreMappingFiller:
             Number of cells filled
         """
         col_num = openpyxl.utils.column_index_from_string(column_letter)
+        snapshot = get_sheet_snapshot(worksheet)
         filled_count = 0
-        last_non_empty_value = ""
         
         logger.debug(f"Filling column {column_letter} from row {start_row} to {end_row}")
         
-        # Process each row from start to end
-        for row in range(start_row, end_row + 1):
-            current_cell = worksheet.cell(row, col_num)
-            current_value = self.safe_cell_value(current_cell)
+        values = snapshot.column_values(col_num, start_row, end_row)
+        filled_values = self.forward_fill(values)
+            
+        for row, value, filled_value in zip(range(start_row, end_row + 1), values, filled_values):
+            if value:
+                continue
             
-            # Check if current cell has data
-            is_empty = (not current_value or current_value.strip() == "")
+            # Formula errors read as empty and get filled over
+            error_value = snapshot.error_value(row, col_num)
+            if error_value is not None:
+                logger.warning(f"Formula error detected in {column_letter}{row}: {error_value} - using empty value")
+                
+            if not filled_value:
+                continue
             
-            if not is_empty:
-                # Update reference value for subsequent empty cells
-                last_non_empty_value = current_value
-                logger.debug(f"Found data in {column_letter}{row}: '{current_value}' - will use as reference")
-            elif is_empty and last_non_empty_value:
-                # Check if cell is merged (can't write to merged cells)
-                try:
-                    # Fill current empty cell with last non-empty value
-                    current_cell.value = last_non_empty_value
-                    filled_count += 1
-                    logger.debug(f"Filled {column_letter}{row} with '{last_non_empty_value}' from last non-empty")
-                except AttributeError as e:
-                    # Skip merged cells (they are read-only)
-                    logger.debug(f"Skipping merged cell {column_letter}{row}: {e}")
-                    continue
+            # Check if cell is merged (can't write to merged cells)
+            anchor = snapshot.merged_anchor(row, col_num)
+            if anchor is not None and anchor != (row, col_num):
+                logger.debug(f"Skipping merged cell {column_letter}{row} (anchor {anchor})")
+                continue
+            
+            try:
+                # Fill current empty cell with last non-empty value
+                snapshot.set_value(row, col_num, filled_value)
+                filled_count += 1
+                logger.debug(f"Filled {column_letter}{row} with '{filled_value}' from last non-empty")
+            except AttributeError as e:
+                # Skip merged cells (they are read-only)
+                logger.debug(f"Skipping merged cell {column_letter}{row}: {e}")
+                continue
         
         return filled_count
     
@@ -278,6 +296,38 @@ class PreMappingFiller:
         
         return fill_results
     
+    def fill_workbook(self, workbook) -> Tuple[int, int]:
+        """
+        Fill data in every recognized sheet of an already loaded workbook
+        
+        Args:
+            workbook: openpyxl workbook (modified in place)
+            
+        Returns:
+            Tuple of (sheets processed, cells filled)
+        """
+        total_sheets_processed = 0
+        total_cells_filled = 0
+        total_rows = 0
+        
+        for sheet_name in workbook.sheetnames:
+            # Sheets without fill columns are skipped by name, so they are never read
+            worksheet = workbook[sheet_name] if self.get_sheet_type(sheet_name) in self.fill_columns else None
+            
+            # Fill data in this sheet
+            fill_results = self.fill_sheet_data(sheet_name, worksheet)
+            
+            if fill_results:
+                total_sheets_processed += 1
+                sheet_total = sum(fill_results.values())
+                total_cells_filled += sheet_total
+                total_rows += get_sheet_snapshot(worksheet).max_row
+        
+        # Filling never adds or removes rows
+        record_rows(rows_in=total_rows, rows_out=total_rows)
+        
+        return total_sheets_processed, total_cells_filled
+    
     def process_file(self, input_file: Union[str, Path],
                     output_file: Optional[Union[str, Path]] = None) -> str:
         """
@@ -334,23 +384,12 @@ class PreMappingFiller:
         workbook = openpyxl.load_workbook(str(output_file))
         
         # Process each sheet
-        total_sheets_processed = 0
-        total_cells_filled = 0
-        
-        for sheet_name in workbook.sheetnames:
-            worksheet = workbook[sheet_name]
-            
-            # Fill data in this sheet
-            fill_results = self.fill_sheet_data(sheet_name, worksheet)
-            
-            if fill_results:
-                total_sheets_processed += 1
-                sheet_total = sum(fill_results.values())
-                total_cells_filled += sheet_total
+        total_sheets_processed, total_cells_filled = self.fill_workbook(workbook)
         
         # Save output file
         try:
             workbook.save(str(output_file))
+            populate_workbook_metadata(output_file, workbook)
             logger.info(f"✅ Step 3 completed: {output_file}")
             logger.info(f"📊 Summary: Processed {total_sheets_processed} sheets, filled {total_cells_filled} cells")
         except Exception as e:
@@ -8,22 +8,61 @@ Output: Step4 file with data mapped from Step3 to Step2 template
 """
 
 import openpyxl
-from openpyxl.utils import get_column_letter
+from openpyxl.utils import get_column_letter, column_index_from_string
 import logging
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Union, Optional, List, Tuple, Dict
+from typing import Union, Optional, List, Tuple, Dict, Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import argparse
+import pickle
 import sys
 import shutil
 
 from common.validation import validate_step3_input, FileValidator
 from common.exceptions import TSConverterError
 from common.config import get_config, get_clean_basename
+from common.sheet_snapshot import get_sheet_snapshot, invalidate_sheet_snapshot
+from common.source_loader import open_source_workbook
+from common.step_metrics import count_cells_written, record_rows
+from common.workbook_metadata import populate_workbook_metadata
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Mapper and source workbook of a parallel mapping worker process
+_worker_mapper = None
+_worker_source = None
+
+# Target column receiving the combined value of a sheet type's combination columns (I)
+COMBINATION_TARGET_COL = 9
+
+@dataclass(frozen=True)
+class MappingPlan:
+    """
+    Integer-indexed mapping of one sheet type onto the target columns
+    
+    Compiled once from the column-letter configuration, so mapping a row is a
+    loop over (source, target) column numbers.
+    """
+    sheet_type: str
+    columns: Tuple[Tuple[int, int], ...]
+    combination: Optional[Tuple[int, int]] = None
+    column_a_prefix: Optional[str] = None
+    delimiter: str = "-"
+    
+    @property
+    def width(self) -> int:
+        """Length of the target rows produced by this plan"""
+        target_cols = [target_col for _, target_col in self.columns]
+        if self.combination:
+            target_cols.append(COMBINATION_TARGET_COL)
+        if self.column_a_prefix:
+            target_cols.append(1)
+        return max(target_cols, default=0)
+
 class DataMapper:
     """
     Data Mapper for Step 4
@@ -75,6 +114,25 @@ class DataMapper:
             'B': 'Q', 'C': 'B', 'D': 'C', 'F': 'G', 'J': 'D', 'K': 'F', 'L': 'E',
             'Q': 'J', 'R': 'K', 'S': 'L', 'T': 'M', 'U': 'N', 'W': 'O', 'X': 'H'
         })
+        
+        # Two source columns combined into column I, and the fixed column A value, per sheet type
+        self.combination_columns = self.config.get('step3.combination_columns', {
+            'F': ['K', 'L'], 'M': ['O', 'P'], 'C': ['N', 'O'], 'P': ['O', 'P']
+        })
+        self.column_a_prefix = self.config.get('step3.column_a_prefix', {'F': 'Art'})
+        self.column_delimiter = self.config.get('step3.column_delimiter', '-')
+        
+        # Worker processes for mapping sheets in parallel; small workbooks are
+        # mapped serially since worker startup would outweigh the gain
+        self.max_workers = max(1, int(self.config.get('general.max_workers', 4)))
+        self.parallel_min_sheets = self.config.get('step3.parallel_min_sheets', 8)
+        
+        # Compile the mappings once into integer-indexed plans
+        self.mapping_plans = {
+            sheet_type: self.compile_mapping_plan(sheet_type, column_mapping)
+            for sheet_type, column_mapping in (('F', self.f_type_mapping), ('M', self.m_type_mapping),
+                                               ('C', self.c_type_mapping), ('P', self.p_type_mapping))
+        }
     
     def get_sheet_type(self, sheet_name: str) -> Optional[str]:
         """
@@ -114,9 +172,9 @@ class DataMapper:
             True if sheet should be processed
         """
         # Check if sheet is empty first
-        if worksheet.max_row == 1 and worksheet.max_column == 1:
-            cell_value = worksheet.cell(1, 1).value
-            if cell_value is None or (isinstance(cell_value, str) and cell_value.strip() == ""):
+        snapshot = get_sheet_snapshot(worksheet)
+        if snapshot.max_row == 1 and snapshot.max_column == 1:
+            if snapshot.text(1, 1) == "":
                 logger.debug(f"Skipping empty sheet '{sheet_name}'")
                 return False
         
@@ -140,14 +198,14 @@ class DataMapper:
         Returns:
             Row number (1-based) or None if not found
         """
-        for row in range(1, min(worksheet.max_row + 1, 50)):  # Search first 50 rows
-            for col in range(1, worksheet.max_column + 1):
-                cell = worksheet.cell(row, col)
-                cell_value = self.safe_cell_value(cell)
-                if cell_value:
-                    if header_text.lower() in cell_value.lower():
-                        logger.info(f"Found '{header_text}' at row {row}, column {get_column_letter(col)}")
-                        return row
+        snapshot = get_sheet_snapshot(worksheet)
+        
+        # Search first 50 rows via the header index shared with the other steps
+        match = snapshot.header_index().find_first([header_text], max_row=min(snapshot.max_row, 49))
+        if match:
+            row, col, _ = match
+            logger.info(f"Found '{header_text}' at row {row}, column {get_column_letter(col)}")
+            return row
         
         logger.warning(f"Header '{header_text}' not found in worksheet")
         return None
@@ -157,7 +215,7 @@ class DataMapper:
         Get cell value with merged cell detection and handling
         
         Args:
-            worksheet: openpyxl worksheet object
+            worksheet: openpyxl worksheet object (or its SheetSnapshot)
             row: Row number (1-based)
             col: Column number (1-based)
             
@@ -165,20 +223,19 @@ class DataMapper:
             Cell value as string, handling merged cells appropriately
         """
         try:
-            # Check if cell is part of a merged range
-            for merged_range in worksheet.merged_cells.ranges:
-                if (merged_range.min_row <= row <= merged_range.max_row and 
-                    merged_range.min_col <= col <= merged_range.max_col):
-                    # Cell is part of a merged range - get value from top-left cell
-                    top_left_cell = worksheet.cell(merged_range.min_row, merged_range.min_col)
-                    logger.debug(f"Cell ({row},{col}) is in merged range {merged_range}, extracting from top-left ({merged_range.min_row},{merged_range.min_col})")
-                    
-                    # Use safe_cell_value to extract the actual value
-                    return self.safe_cell_value(top_left_cell)
+            snapshot = get_sheet_snapshot(worksheet)
+            
+            # Check if cell is part of a merged range (O(1) index lookup)
+            anchor = snapshot.merged_anchor(row, col)
+            if anchor is not None:
+                # Cell is part of a merged range - get value from top-left cell
+                logger.debug(f"Cell ({row},{col}) is in a merged range, extracting from top-left {anchor}")
+                
+                # Use the snapshot to extract the actual value
+                return self.snapshot_cell_value(snapshot, *anchor)
             
             # Not a merged cell, read directly
-            cell = worksheet.cell(row, col)
-            return self.safe_cell_value(cell)
+            return self.snapshot_cell_value(snapshot, row, col)
             
         except Exception as e:
             logger.warning(f"Error getting merged cell value at ({row},{col}): {e} - using empty value")
@@ -221,423 +278,312 @@ class DataMapper:
             logger.warning(f"Error reading cell {getattr(cell, 'coordinate', 'unknown')}: {e} - using empty value")
             return ""
 
-    def set_column_a_prefix(self, target_ws, target_row: int, sheet_type: str) -> None:
+    def snapshot_cell_value(self, snapshot, row: int, col: int) -> str:
         """
-        Set column A prefix based on sheet type
+        Read a cell from a sheet snapshot, logging formula errors like safe_cell_value
         
         Args:
-            target_ws: Target worksheet
-            target_row: Target row number
-            sheet_type: Sheet type ('F', 'M', 'C', 'P')
+            snapshot: SheetSnapshot of the worksheet
+            row: Row number (1-based)
+            col: Column number (1-based)
+            
+        Returns:
+            Safe string value or empty string if error
         """
-        if sheet_type == 'F':
-            target_ws.cell(target_row, 1, "Art")
-        # M-type, C-type, and P-type: do not set Column A prefix (leave unchanged)
+        error_value = snapshot.error_value(row, col)
+        if error_value is not None:
+            logger.warning(f"Formula error detected in {get_column_letter(col)}{row}: {error_value} - using empty value")
+        return snapshot.value(row, col)
 
-    def handle_f_type_combinations(self, source_ws, source_row: int, target_ws, target_row: int) -> None:
+    def compile_mapping_plan(self, sheet_type: str, column_mapping: Dict[str, str]) -> MappingPlan:
         """
-        Handle special F-type combinations: K & L → I
+        Compile a sheet type's column mapping and combination rule into an integer-indexed plan
         
         Args:
-            source_ws: Source worksheet
-            source_row: Source row number
-            target_ws: Target worksheet  
-            target_row: Target row number
+            sheet_type: Sheet type ('F', 'M', 'C', 'P')
+            column_mapping: Source column letter -> target column letter
+        
+        Returns:
+            MappingPlan for the sheet type
         """
-        try:
-            k_col = openpyxl.utils.column_index_from_string('K')
-            l_col = openpyxl.utils.column_index_from_string('L')
-            
-            k_value = self.get_merged_cell_value(source_ws, source_row, k_col)
-            l_value = self.get_merged_cell_value(source_ws, source_row, l_col)
-            
-            if k_value and l_value:
-                combined = f"{k_value}-{l_value}"
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), combined)
-                logger.debug(f"F-type combination K&L→I: {k_value}-{l_value} = {combined}")
-            elif k_value:
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), k_value)
-                logger.debug(f"F-type combination K→I: {k_value}")
-            elif l_value:
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), l_value)
-                logger.debug(f"F-type combination L→I: {l_value}")
-        except Exception as e:
-            logger.warning(f"Error handling F-type combinations at row {source_row}: {e}")
+        columns = tuple(
+            (column_index_from_string(source_col), column_index_from_string(target_col))
+            for source_col, target_col in column_mapping.items()
+        )
 
-    def handle_m_type_combinations(self, source_ws, source_row: int, target_ws, target_row: int) -> None:
+        combination = self.combination_columns.get(sheet_type)
+        if combination:
+            combination = tuple(column_index_from_string(col) for col in combination)
+        
+        plan = MappingPlan(
+            sheet_type=sheet_type,
+            columns=columns,
+            combination=combination or None,
+            column_a_prefix=self.column_a_prefix.get(sheet_type),
+            delimiter=self.column_delimiter,
+        )
+        logger.debug(f"Compiled {sheet_type}-type mapping plan: {len(columns)} columns, "
+                     f"combination {combination or 'none'}, row width {plan.width}")
+        return plan
+    
+    def row_has_data(self, snapshot, row: int) -> bool:
         """
-        Handle special M-type combinations: O & P → I
+        Check if a source row has any data using merged cell aware reading
         
         Args:
-            source_ws: Source worksheet
-            source_row: Source row number
-            target_ws: Target worksheet  
-            target_row: Target row number
+            snapshot: SheetSnapshot of the source worksheet
+            row: Row number (1-based)
+        
+        Returns:
+            True if any cell of the row (or the merged range covering it) has a value
         """
-        try:
-            o_col = openpyxl.utils.column_index_from_string('O')
-            p_col = openpyxl.utils.column_index_from_string('P')
-            
-            o_value = self.get_merged_cell_value(source_ws, source_row, o_col)
-            p_value = self.get_merged_cell_value(source_ws, source_row, p_col)
+        for col in range(1, snapshot.max_column + 1):
+            if self.get_merged_cell_value(snapshot, row, col):
+                return True
+        return False
             
-            if o_value and p_value:
-                combined = f"{o_value}-{p_value}"
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), combined)
-                logger.debug(f"M-type combination O&P→I: {o_value}-{p_value} = {combined}")
-            elif o_value:
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), o_value)
-            elif p_value:
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), p_value)
-        except Exception as e:
-            logger.warning(f"Error handling M-type combinations at row {source_row}: {e}")
-
-    def handle_c_type_combinations(self, source_ws, source_row: int, target_ws, target_row: int) -> None:
+    def iter_mapped_rows(self, plan: MappingPlan, source_ws, start_row: int) -> Iterator[Tuple[Optional[str], ...]]:
         """
-        Handle special C-type combinations: N & O → I
+        Apply a mapping plan to a source sheet, yielding one target row per source row
+            
+        Rows are read from start_row until the first empty row.
         
         Args:
-            source_ws: Source worksheet
-            source_row: Source row number
-            target_ws: Target worksheet
-            target_row: Target row number
+            plan: Compiled mapping plan for the sheet type
+            source_ws: Source worksheet (or its SheetSnapshot)
+            start_row: Starting row in source (1-based)
+        
+        Yields:
+            Target row tuples of plan.width values; None means the target cell is not written
         """
-        try:
-            n_col = openpyxl.utils.column_index_from_string('N')
-            o_col = openpyxl.utils.column_index_from_string('O')
+        snapshot = get_sheet_snapshot(source_ws)
             
-            n_value = self.get_merged_cell_value(source_ws, source_row, n_col)
-            o_value = self.get_merged_cell_value(source_ws, source_row, o_col)
+        for source_row in range(start_row, snapshot.max_row + 1):
+            if not self.row_has_data(snapshot, source_row):
+                logger.debug(f"Stopping at empty row {source_row}")
+                break
             
-            if n_value and o_value:
-                combined = f"{n_value}-{o_value}"
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), combined)
-                logger.debug(f"C-type combination N&O→I: {n_value}-{o_value} = {combined}")
-            elif n_value:
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), n_value)
-            elif o_value:
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), o_value)
-        except Exception as e:
-            logger.warning(f"Error handling C-type combinations at row {source_row}: {e}")
+            target_values = [None] * plan.width
 
-    def handle_p_type_combinations(self, source_ws, source_row: int, target_ws, target_row: int) -> None:
+            if plan.column_a_prefix:
+                target_values[0] = plan.column_a_prefix
+            
+            # Special combination of two source columns into column I
+            if plan.combination:
+                first_value = self.get_merged_cell_value(snapshot, source_row, plan.combination[0])
+                second_value = self.get_merged_cell_value(snapshot, source_row, plan.combination[1])
+                if first_value and second_value:
+                    target_values[COMBINATION_TARGET_COL - 1] = f"{first_value}{plan.delimiter}{second_value}"
+                elif first_value or second_value:
+                    target_values[COMBINATION_TARGET_COL - 1] = first_value or second_value
+            
+            for source_col, target_col in plan.columns:
+                source_value = self.get_merged_cell_value(snapshot, source_row, source_col)
+                if source_value:
+                    target_values[target_col - 1] = source_value
+            
+            yield tuple(target_values)
+    
+    def write_mapped_rows(self, rows: Iterable[Sequence[Optional[str]]], target_ws, target_start_row: int) -> int:
         """
-        Handle special P-type combinations: O & P → I
+        Write mapped row tuples into the target worksheet
         
         Args:
-            source_ws: Source worksheet
-            source_row: Source row number
-            target_ws: Target worksheet  
-            target_row: Target row number
+            rows: Target row tuples (None values are skipped)
+            target_ws: Target worksheet
+            target_start_row: Starting row in target (1-based)
+        
+        Returns:
+            Next available row in target worksheet
         """
-        try:
-            o_col = openpyxl.utils.column_index_from_string('O')
-            p_col = openpyxl.utils.column_index_from_string('P')
+        target_row = target_start_row
+        cells_written = 0
+        for values in rows:
+            for col, value in enumerate(values, start=1):
+                if value is not None:
+                    target_ws.cell(target_row, col, value)
+                    cells_written += 1
+            target_row += 1
+        count_cells_written(cells_written)
+        return target_row
             
-            o_value = self.get_merged_cell_value(source_ws, source_row, o_col)
-            p_value = self.get_merged_cell_value(source_ws, source_row, p_col)
-            
-            if o_value and p_value:
-                combined = f"{o_value}-{p_value}"
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), combined)
-                logger.debug(f"P-type combination O&P→I: {o_value}-{p_value} = {combined}")
-            elif o_value:
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), o_value)
-                logger.debug(f"P-type combination O→I: {o_value}")
-            elif p_value:
-                target_ws.cell(target_row, openpyxl.utils.column_index_from_string('I'), p_value)
-                logger.debug(f"P-type combination P→I: {p_value}")
-        except Exception as e:
-            logger.warning(f"Error handling P-type combinations at row {source_row}: {e}")
-    
-    def combine_columns(self, worksheet, row: int, col1: str, col2: str, delimiter: str = "-") -> str:
+    def find_data_start_row(self, source_wb, sheet_name: str, sheet_type: str) -> Optional[int]:
         """
-        Combine values from two columns with delimiter using merged cell aware reading
+        Find the first data row of a source sheet
         
         Args:
-            worksheet: openpyxl worksheet object
-            row: Row number (1-based)
-            col1: First column letter
-            col2: Second column letter
-            delimiter: Delimiter between values
+            source_wb: Source workbook (openpyxl Workbook or SourceWorkbook)
+            sheet_name: Name of the sheet to map
+            sheet_type: Sheet type ('F', 'M', 'C', 'P')
             
         Returns:
-            Combined string value
-        """
-        col1_num = openpyxl.utils.column_index_from_string(col1)
-        col2_num = openpyxl.utils.column_index_from_string(col2)
-        
-        # Use merged cell aware reading
-        str1 = self.get_merged_cell_value(worksheet, row, col1_num)
-        str2 = self.get_merged_cell_value(worksheet, row, col2_num)
-        
-        # Combine with delimiter
-        if str1 and str2:
-            return f"{str1}{delimiter}{str2}"
-        elif str1:
-            return str1
-        elif str2:
-            return str2
-        else:
-            return ""
+            First data row (1-based), or None if the sheet is skipped
+        """
+        worksheet = source_wb[sheet_name]
+        
+        # Check if sheet is relevant for processing
+        if not self.is_sheet_relevant(sheet_name, worksheet):
+            return None
+        
+        logger.info(f"Processing {sheet_type}-type sheet: {sheet_name}")
+        
+        # Find header row ("product combination") for every sheet type
+        header_row = self.find_header_row(worksheet, "product combination")
+        if header_row is None:
+            logger.warning(f"No 'product combination' found in {sheet_name}, skipping")
+            return None
+        
+        # Data starts at header_row + 2
+        data_start_row = header_row + 2
+        logger.info(f"Mapping {sheet_type}-type data from row {data_start_row}")
+        return data_start_row
     
-    def map_f_type_data(self, source_ws, target_ws, start_row: int, target_start_row: int) -> int:
+    def map_sheet_rows(self, source_wb, sheet_name: str, sheet_type: str) -> Optional[List[Tuple[Optional[str], ...]]]:
         """
-        Map data from F-type sheet (F-[Finished products])
+        Map one source sheet into a block of target row tuples
         
         Args:
-            source_ws: Source worksheet
-            target_ws: Target worksheet
-            start_row: Starting row in source (1-based)
-            target_start_row: Starting row in target (1-based)
+            source_wb: Source workbook (openpyxl Workbook or SourceWorkbook)
+            sheet_name: Name of the sheet to map
+            sheet_type: Sheet type ('F', 'M', 'C', 'P')
             
         Returns:
-            Next available row in target worksheet
+            Target row tuples, or None if the sheet is skipped
         """
-        logger.info(f"Mapping F-type data from row {start_row}")
-        current_target_row = target_start_row
-        
-        # Process each row until empty
-        for source_row in range(start_row, source_ws.max_row + 1):
-            # Check if row has any data using merged cell aware reading
-            has_data = False
-            for col in range(1, source_ws.max_column + 1):
-                cell_value = self.get_merged_cell_value(source_ws, source_row, col)
-                if cell_value:
-                    has_data = True
-                    break
-            
-            if not has_data:
-                logger.debug(f"Stopping at empty row {source_row}")
-                break
-            
-            logger.debug(f"Processing source row {source_row} -> target row {current_target_row}")
-            
-            # Set column A prefix for F-type
-            self.set_column_a_prefix(target_ws, current_target_row, 'F')
-            
-            # Handle F-type special combination: K & L → I
-            self.handle_f_type_combinations(source_ws, source_row, target_ws, current_target_row)
-            
-            # Apply F-type column mappings using merged cell aware approach
-            source_values = {}
-            for source_col in self.f_type_mapping.keys():
-                try:
-                    source_col_num = openpyxl.utils.column_index_from_string(source_col)
-                    source_value = self.get_merged_cell_value(source_ws, source_row, source_col_num)
-                    if source_value:
-                        source_values[source_col] = source_value
-                except Exception as e:
-                    logger.warning(f"Error reading F-type source column {source_col}: {e}")
-                    
-            for source_col, target_col in self.f_type_mapping.items():
-                if source_col in source_values:
-                    try:
-                        target_col_num = openpyxl.utils.column_index_from_string(target_col)
-                        target_ws.cell(current_target_row, target_col_num, source_values[source_col])
-                        logger.debug(f"F-type {source_col} -> {target_col}: '{source_values[source_col][:30]}...'")
-                    except Exception as e:
-                        logger.warning(f"Error mapping F-type {source_col} -> {target_col}: {e}")
-            
-            current_target_row += 1
+        data_start_row = self.find_data_start_row(source_wb, sheet_name, sheet_type)
+        if data_start_row is None:
+            return None
+        return list(self.iter_mapped_rows(self.mapping_plans[sheet_type], source_wb[sheet_name], data_start_row))
+    
+    def typed_sheets(self, source_wb) -> List[Tuple[str, str]]:
+        """
+        List the F/M/C/P sheets of a source workbook
+        
+        Sheet type only depends on the name, so unrelated sheets are never read.
         
-        rows_mapped = current_target_row - target_start_row
-        logger.info(f"Mapped {rows_mapped} rows from F-type sheet")
-        return current_target_row
+        Args:
+            source_wb: Source workbook (openpyxl Workbook or SourceWorkbook)
+        
+        Returns:
+            (sheet name, sheet type) pairs in workbook order
+        """
+        sheets = []
+        for sheet_name in source_wb.sheetnames:
+            sheet_type = self.get_sheet_type(sheet_name)
+            if sheet_type is None:
+                logger.debug(f"Skipping sheet '{sheet_name}' - not F/M/C/P type")
+                continue
+            sheets.append((sheet_name, sheet_type))
+        return sheets
     
-    def map_m_type_data(self, source_ws, target_ws, start_row: int, target_start_row: int) -> int:
+    def find_row_blocks(self, source_wb) -> List[Tuple[str, str, int]]:
         """
-        Map data from M-type sheet (M-[Material type])
+        Locate the mapped row block of every source sheet without mapping any rows
         
         Args:
-            source_ws: Source worksheet
-            target_ws: Target worksheet
-            start_row: Starting row in source (1-based)
-            target_start_row: Starting row in target (1-based)
-            
+            source_wb: Loaded Step3 workbook (source data with filled information)
+        
         Returns:
-            Next available row in target worksheet
+            (sheet name, sheet type, first data row) per mapped sheet, in workbook order
+        """
+        blocks = []
+        for sheet_name, sheet_type in self.typed_sheets(source_wb):
+            data_start_row = self.find_data_start_row(source_wb, sheet_name, sheet_type)
+            if data_start_row is not None:
+                blocks.append((sheet_name, sheet_type, data_start_row))
+        return blocks
+    
+    def iter_row_blocks(self, source_wb, blocks: Sequence[Tuple[str, str, int]]) -> Iterator[Tuple[Optional[str], ...]]:
         """
-        logger.info(f"Mapping M-type data from row {start_row}")
-        current_target_row = target_start_row
-        
-        # Process each row until empty
-        for source_row in range(start_row, source_ws.max_row + 1):
-            # Check if row has any data using merged cell aware reading
-            has_data = False
-            for col in range(1, source_ws.max_column + 1):
-                cell_value = self.get_merged_cell_value(source_ws, source_row, col)
-                if cell_value:
-                    has_data = True
-                    break
-            
-            if not has_data:
-                logger.debug(f"Stopping at empty row {source_row}")
-                break
-            
-            logger.debug(f"Processing source row {source_row} -> target row {current_target_row}")
-            
-            # Set column A prefix for M-type
-            self.set_column_a_prefix(target_ws, current_target_row, 'M')
-            
-            # Handle M-type special combination: O & P → I
-            self.handle_m_type_combinations(source_ws, source_row, target_ws, current_target_row)
-            
-            # Apply M-type column mappings using merged cell aware approach
-            # First, collect all source values to avoid overwriting issues
-            source_values = {}
-            for source_col in self.m_type_mapping.keys():
-                try:
-                    source_col_num = openpyxl.utils.column_index_from_string(source_col)
-                    source_value = self.get_merged_cell_value(source_ws, source_row, source_col_num)
-                    if source_value:
-                        source_values[source_col] = source_value
-                except Exception as e:
-                    logger.warning(f"Error reading source column {source_col}: {e}")
-                    
-            # Then apply all mappings
-            for source_col, target_col in self.m_type_mapping.items():
-                if source_col in source_values:
-                    try:
-                        target_col_num = openpyxl.utils.column_index_from_string(target_col)
-                        target_ws.cell(current_target_row, target_col_num, source_values[source_col])
-                        logger.debug(f"M-type {source_col} -> {target_col}: '{source_values[source_col][:30]}...'")
-                    except Exception as e:
-                        logger.warning(f"Error mapping {source_col} -> {target_col}: {e}")
-            
-            current_target_row += 1
+        Map row blocks lazily, yielding the target rows map_workbook() would append
+        
+        Each call maps the source again, so a consumer that needs two passes
+        calls this twice instead of holding the mapped rows.
         
-        rows_mapped = current_target_row - target_start_row
-        logger.info(f"Mapped {rows_mapped} rows from M-type sheet")
-        return current_target_row
+        Args:
+            source_wb: Workbook the blocks were found in
+            blocks: Row blocks from find_row_blocks()
         
-    def map_c_type_data(self, source_ws, target_ws, start_row: int, target_start_row: int) -> int:
+        Yields:
+            Target row tuples in block order (see iter_mapped_rows())
         """
-        Map data from C-type sheet (C-[Component type])
+        for sheet_name, sheet_type, data_start_row in blocks:
+            yield from self.iter_mapped_rows(self.mapping_plans[sheet_type], source_wb[sheet_name], data_start_row)
+    
+    def map_sheets_parallel(self, source_path: Union[str, Path],
+                            sheets: List[Tuple[str, str]]) -> Optional[List[Optional[List[Tuple[Optional[str], ...]]]]]:
+        """
+        Map sheets of a source file on a process pool, one sheet per task
+        
+        Each worker opens the source file once and maps the sheets it is given
+        into row blocks; blocks are returned in the order of sheets.
         
         Args:
-            source_ws: Source worksheet
-            target_ws: Target worksheet
-            start_row: Starting row in source (1-based)
-            target_start_row: Starting row in target (1-based)
-            
+            source_path: Source Excel file (unmodified Step3 output)
+            sheets: (sheet name, sheet type) pairs in workbook order
+        
         Returns:
-            Next available row in target worksheet
+            Row blocks per sheet (None for skipped sheets), or None if no
+            process pool could be used
         """
-        logger.info(f"Mapping C-type data from row {start_row}")
-        current_target_row = target_start_row
-        
-        # Process each row until empty
-        for source_row in range(start_row, source_ws.max_row + 1):
-            # Check if row has any data using merged cell aware reading
-            has_data = False
-            for col in range(1, source_ws.max_column + 1):
-                cell_value = self.get_merged_cell_value(source_ws, source_row, col)
-                if cell_value:
-                    has_data = True
-                    break
-            
-            if not has_data:
-                logger.debug(f"Stopping at empty row {source_row}")
-                break
-            
-            logger.debug(f"Processing source row {source_row} -> target row {current_target_row}")
-            
-            # Set column A prefix for C-type (not specified in requirements)
-            self.set_column_a_prefix(target_ws, current_target_row, 'C')
-            
-            # Handle C-type special combination: N & O → I
-            self.handle_c_type_combinations(source_ws, source_row, target_ws, current_target_row)
-            
-            # Apply C-type column mappings using merged cell aware approach
-            source_values = {}
-            for source_col in self.c_type_mapping.keys():
-                try:
-                    source_col_num = openpyxl.utils.column_index_from_string(source_col)
-                    source_value = self.get_merged_cell_value(source_ws, source_row, source_col_num)
-                    if source_value:
-                        source_values[source_col] = source_value
-                except Exception as e:
-                    logger.warning(f"Error reading C-type source column {source_col}: {e}")
-                    
-            for source_col, target_col in self.c_type_mapping.items():
-                if source_col in source_values:
-                    try:
-                        target_col_num = openpyxl.utils.column_index_from_string(target_col)
-                        target_ws.cell(current_target_row, target_col_num, source_values[source_col])
-                        logger.debug(f"C-type {source_col} -> {target_col}: '{source_values[source_col][:30]}...'")
-                    except Exception as e:
-                        logger.warning(f"Error mapping C-type {source_col} -> {target_col}: {e}")
-            
-            current_target_row += 1
-        
-        rows_mapped = current_target_row - target_start_row
-        logger.info(f"Mapped {rows_mapped} rows from C-type sheet")
-        return current_target_row
+        workers = min(self.max_workers, len(sheets))
+        logger.info(f"Mapping {len(sheets)} sheets on {workers} worker processes")
         
-    def map_p_type_data(self, source_ws, target_ws, start_row: int, target_start_row: int) -> int:
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_mapping_worker,
+                                     initargs=(str(self.base_dir), self.mapping_plans, str(source_path))) as executor:
+                return list(executor.map(_map_sheet_in_worker, sheets))
+        except (BrokenProcessPool, OSError, pickle.PicklingError) as e:
+            logger.warning(f"Parallel mapping unavailable ({e}), mapping sheets serially")
+            return None
+    
+    def map_workbook(self, source_wb, target_ws, source_path: Optional[Union[str, Path]] = None) -> int:
         """
-        Map data from P-type sheet (P-type sheets like PInorganic coating)
+        Map every relevant sheet of a loaded source workbook into the target worksheet
+        
+        Sheets are mapped independently into row blocks, which are appended to
+        the target in workbook order. When source_path is given, more than one
+        worker is configured and there are at least parallel_min_sheets typed
+        sheets, the sheets are mapped in parallel processes.
         
         Args:
-            source_ws: Source worksheet
-            target_ws: Target worksheet
-            start_row: Starting row in source (1-based)
-            target_start_row: Starting row in target (1-based)
+            source_wb: Loaded Step3 workbook (source data with filled information)
+            target_ws: Step2 template worksheet to append mapped rows to (modified in place)
+            source_path: File that source_wb was loaded from, unmodified; only
+                then can worker processes re-read the sheets
             
         Returns:
-            Next available row in target worksheet
+            Next free target row after mapping
         """
-        logger.info(f"Mapping P-type data from row {start_row}")
-        current_target_row = target_start_row
-        
-        # Process each row until empty
-        for source_row in range(start_row, source_ws.max_row + 1):
-            # Check if row has any data using merged cell aware reading
-            has_data = False
-            for col in range(1, source_ws.max_column + 1):
-                cell_value = self.get_merged_cell_value(source_ws, source_row, col)
-                if cell_value:
-                    has_data = True
-                    break
-            
-            if not has_data:
-                logger.debug(f"Stopping at empty row {source_row}")
-                break
-            
-            logger.debug(f"Processing source row {source_row} -> target row {current_target_row}")
-            
-            # Set column A prefix for P-type
-            self.set_column_a_prefix(target_ws, current_target_row, 'P')
-            
-            # Handle P-type special combination: O & P → I
-            self.handle_p_type_combinations(source_ws, source_row, target_ws, current_target_row)
-            
-            # Apply P-type column mappings using merged cell aware approach
-            source_values = {}
-            for source_col in self.p_type_mapping.keys():
-                try:
-                    source_col_num = openpyxl.utils.column_index_from_string(source_col)
-                    source_value = self.get_merged_cell_value(source_ws, source_row, source_col_num)
-                    if source_value:
-                        source_values[source_col] = source_value
-                except Exception as e:
-                    logger.warning(f"Error reading P-type source column {source_col}: {e}")
-                    
-            for source_col, target_col in self.p_type_mapping.items():
-                if source_col in source_values:
-                    try:
-                        target_col_num = openpyxl.utils.column_index_from_string(target_col)
-                        target_ws.cell(current_target_row, target_col_num, source_values[source_col])
-                        logger.debug(f"P-type {source_col} -> {target_col}: '{source_values[source_col][:30]}...'")
-                    except Exception as e:
-                        logger.warning(f"Error mapping P-type {source_col} -> {target_col}: {e}")
-            
-            current_target_row += 1
+        # Find next available row in target (after existing data)
+        next_row = 11  # Start from row 11 (after headers and article data)
+        while target_ws.cell(next_row, 2).value is not None:  # Check column B
+            next_row += 1
         
-        rows_mapped = current_target_row - target_start_row
-        logger.info(f"Mapped {rows_mapped} rows from P-type sheet")
-        return current_target_row
+        logger.info(f"Starting data mapping at target row {next_row}")
+        
+        sheets = self.typed_sheets(source_wb)
+        
+        blocks = None
+        if source_path is not None and self.max_workers > 1 and len(sheets) >= self.parallel_min_sheets:
+            blocks = self.map_sheets_parallel(source_path, sheets)
+        if blocks is None:
+            blocks = [self.map_sheet_rows(source_wb, sheet_name, sheet_type) for sheet_name, sheet_type in sheets]
+        
+        # Concatenate the blocks in workbook order
+        source_rows = 0
+        for (sheet_name, sheet_type), rows in zip(sheets, blocks):
+            if rows is None:
+                continue
+            next_row = self.write_mapped_rows(rows, target_ws, next_row)
+            source_rows += len(rows)
+            logger.info(f"Mapped {len(rows)} rows from {sheet_type}-type sheet '{sheet_name}'")
+        
+        # Target rows were written directly, so any earlier snapshot of the target is stale
+        invalidate_sheet_snapshot(target_ws)
+        record_rows(rows_in=source_rows, rows_out=next_row - 1)
+        
+        return next_row
     
     def process_file(self, input_file: Union[str, Path],
                     output_file: Optional[Union[str, Path]] = None) -> str:
@@ -709,83 +655,16 @@ class DataMapper:
         logger.info("Copied Step2 template as base")
         
         # Load workbooks
-        source_wb = openpyxl.load_workbook(str(input_path))
+        source_wb = open_source_workbook(input_path)
         target_wb = openpyxl.load_workbook(str(output_file))
         target_ws = target_wb.active
         
-        # Find next available row in target (after existing data)
-        next_row = 11  # Start from row 11 (after headers and article data)
-        while target_ws.cell(next_row, 2).value is not None:  # Check column B
-            next_row += 1
-        
-        logger.info(f"Starting data mapping at target row {next_row}")
-        
-        # Process each sheet in source file
-        for sheet_name in source_wb.sheetnames:
-            worksheet = source_wb[sheet_name]
-            
-            # Check if sheet is relevant for processing
-            if not self.is_sheet_relevant(sheet_name, worksheet):
-                continue
-            
-            # Get sheet type and process accordingly
-            sheet_type = self.get_sheet_type(sheet_name)
-            
-            if sheet_type == 'F':
-                logger.info(f"Processing F-type sheet: {sheet_name}")
-                
-                # Find header row for F-type sheets
-                header_row = self.find_header_row(worksheet, "product combination")
-                if header_row is None:
-                    logger.warning(f"No 'product combination' found in {sheet_name}, skipping")
-                    continue
-                
-                # Data starts at header_row + 2
-                data_start_row = header_row + 2
-                next_row = self.map_f_type_data(worksheet, target_ws, data_start_row, next_row)
-                
-            elif sheet_type == 'M':
-                logger.info(f"Processing M-type sheet: {sheet_name}")
-                
-                # Find header row for M-type sheets
-                header_row = self.find_header_row(worksheet, "product combination")
-                if header_row is None:
-                    logger.warning(f"No 'product combination' found in {sheet_name}, skipping")
-                    continue
-                
-                # Data starts at header_row + 2
-                data_start_row = header_row + 2
-                next_row = self.map_m_type_data(worksheet, target_ws, data_start_row, next_row)
-                
-            elif sheet_type == 'C':
-                logger.info(f"Processing C-type sheet: {sheet_name}")
-                
-                # Find header row for C-type sheets
-                header_row = self.find_header_row(worksheet, "product combination")
-                if header_row is None:
-                    logger.warning(f"No 'product combination' found in {sheet_name}, skipping")
-                    continue
-                
-                # Data starts at header_row + 2
-                data_start_row = header_row + 2
-                next_row = self.map_c_type_data(worksheet, target_ws, data_start_row, next_row)
-                
-            elif sheet_type == 'P':
-                logger.info(f"Processing P-type sheet: {sheet_name}")
-                
-                # Find header row for P-type sheets
-                header_row = self.find_header_row(worksheet, "product combination")
-                if header_row is None:
-                    logger.warning(f"No 'product combination' found in {sheet_name}, skipping")
-                    continue
-                
-                # Data starts at header_row + 2
-                data_start_row = header_row + 2
-                next_row = self.map_p_type_data(worksheet, target_ws, data_start_row, next_row)
+        self.map_workbook(source_wb, target_ws, source_path=input_path)
         
         # Save output file
         try:
             target_wb.save(str(output_file))
+            populate_workbook_metadata(output_file, target_wb)
             logger.info(f"✅ Step 4 completed: {output_file}")
         except Exception as e:
             logger.error(f"Failed to save file: {e}")
@@ -796,6 +675,18 @@ class DataMapper:
         
         return str(output_file)
 
+def _init_mapping_worker(base_dir: str, mapping_plans: Dict[str, MappingPlan], source_path: str) -> None:
+    """Set up a mapping worker process: one mapper and one open source workbook"""
+    global _worker_mapper, _worker_source
+    _worker_mapper = DataMapper(base_dir=base_dir)
+    _worker_mapper.mapping_plans = mapping_plans
+    _worker_source = open_source_workbook(source_path)
+
+def _map_sheet_in_worker(sheet: Tuple[str, str]) -> Optional[List[Tuple[Optional[str], ...]]]:
+    """Map one (sheet name, sheet type) pair in a worker process"""
+    sheet_name, sheet_type = sheet
+    return _worker_mapper.map_sheet_rows(_worker_source, sheet_name, sheet_type)
+
 def main():
     """Command line interface for data mapping"""
     parser = argparse.ArgumentParser(description='Data Mapper Step 3 - Map Excel Data')
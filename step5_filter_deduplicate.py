@@ -8,21 +8,48 @@ import os
 import openpyxl
 from openpyxl.utils import get_column_letter
 import logging
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Union, Optional, List, Dict, Tuple
+from typing import Union, Optional, List, Dict, Tuple, Set, Iterable, Iterator, Sequence, Any
 import argparse
 import sys
 import shutil
-from collections import defaultdict
+from collections import defaultdict, Counter
 
 from common.validation import validate_step5_input, FileValidator
 from common.exceptions import TSConverterError
 from common.config import get_clean_basename
+from common.sheet_snapshot import get_sheet_snapshot, cell_text
+from common.step_metrics import record_rows
+from common.workbook_metadata import populate_workbook_metadata
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def _row_text(values: Sequence[Any], index: int) -> str:
+    """Read a cell of a row stream as text, like the snapshot reads it in filter_worksheet()"""
+    return cell_text(values[index]) if index < len(values) else ""
+
+@dataclass
+class RowFilterPlan:
+    """
+    Step 5 decisions for a stream of data rows, planned in one pass over it
+    
+    Rows are identified by their position in the stream. NA rows are decided
+    again while filtering, so only SD duplicates and kept group rows are held.
+    """
+    rows_in: int = 0
+    na_rows: int = 0
+    sd_rows: int = 0
+    duplicate_rows: Set[int] = field(default_factory=set)
+    common_n_values: Dict[int, str] = field(default_factory=dict)
+    
+    @property
+    def rows_out(self) -> int:
+        """Number of rows left after filtering"""
+        return self.rows_in - self.na_rows - len(self.duplicate_rows)
+
 class DataFilter:
     """
     Data Filter for Step 5
@@ -75,17 +102,12 @@ class DataFilter:
         Returns:
             Tuple of values from specified columns
         """
+        snapshot = get_sheet_snapshot(worksheet)
         values = []
         for col_letter in columns:
             col_num = openpyxl.utils.column_index_from_string(col_letter)
-            cell_value = worksheet.cell(row, col_num).value
-            # Normalize value for comparison
-            if cell_value is None:
-                values.append("")
-            elif isinstance(cell_value, str):
-                values.append(cell_value.strip())
-            else:
-                values.append(str(cell_value))
+            # Snapshot text is already normalized for comparison
+            values.append(snapshot.text(row, col_num))
         
         return tuple(values)
     
@@ -119,22 +141,19 @@ class DataFilter:
         logger.info("Step 5.1: Removing NA rows from column H")
         
         h_col_num = openpyxl.utils.column_index_from_string('H')
+        snapshot = get_sheet_snapshot(worksheet)
         rows_to_delete = []
         
-        # Find all rows to delete (process from bottom to top to avoid index issues)
-        for row in range(worksheet.max_row, self.start_row - 1, -1):
-            h_value = worksheet.cell(row, h_col_num).value
+        # Find all rows to delete
+        for row in range(self.start_row, snapshot.max_row + 1):
+            h_value = snapshot.text(row, h_col_num)
             
             if self.is_na_value(h_value):
                 rows_to_delete.append(row)
                 logger.debug(f"Marking row {row} for deletion (H = '{h_value}')")
         
-        # Delete rows
-        for row in rows_to_delete:
-            worksheet.delete_rows(row, 1)
-            logger.debug(f"Deleted row {row}")
-        
-        removed_count = len(rows_to_delete)
+        # Delete all marked rows in one compaction pass
+        removed_count = snapshot.delete_row_set(rows_to_delete)
         logger.info(f"Removed {removed_count} NA rows")
         return removed_count
     
@@ -151,6 +170,7 @@ class DataFilter:
         logger.info("Step 5.2: Finding SD duplicate groups")
         
         h_col_num = openpyxl.utils.column_index_from_string('H')
+        snapshot = get_sheet_snapshot(worksheet)
         duplicate_groups = defaultdict(list)
         
         # Counters for logging
@@ -159,8 +179,8 @@ class DataFilter:
         empty_sd_rows = 0
         
         # Find all SD rows and group by comparison columns
-        for row in range(self.start_row, worksheet.max_row + 1):
-            h_value = worksheet.cell(row, h_col_num).value
+        for row in range(self.start_row, snapshot.max_row + 1):
+            h_value = snapshot.text(row, h_col_num)
             
             if h_value and isinstance(h_value, str) and h_value.strip().upper() == "SD":
                 total_sd_rows += 1
@@ -236,17 +256,18 @@ class DataFilter:
         logger.info("Step 5.3: Clearing K,L,M for all SD rows")
         
         h_col_num = openpyxl.utils.column_index_from_string('H')
+        snapshot = get_sheet_snapshot(worksheet)
         cleared_count = 0
         
         # Process all rows to find SD entries
-        for row in range(self.start_row, worksheet.max_row + 1):
-            h_value = worksheet.cell(row, h_col_num).value
+        for row in range(self.start_row, snapshot.max_row + 1):
+            h_value = snapshot.text(row, h_col_num)
             
             if h_value and isinstance(h_value, str) and h_value.strip().upper() == "SD":
                 # Clear columns K, L, M for this SD row
                 for col_letter in ['K', 'L', 'M']:
                     col_num = openpyxl.utils.column_index_from_string(col_letter)
-                    worksheet.cell(row, col_num).value = None
+                    snapshot.set_value(row, col_num, None)
                     logger.debug(f"Cleared {col_letter}{row}")
                 
                 cleared_count += 1
@@ -271,6 +292,7 @@ class DataFilter:
             logger.info("No SD duplicates found")
             return 0
         
+        snapshot = get_sheet_snapshot(worksheet)
         rows_to_delete = []
         rows_processed = 0
         
@@ -287,18 +309,13 @@ class DataFilter:
             logger.debug(f"Keeping row {keep_row}, setting column N")
             n_col_num = openpyxl.utils.column_index_from_string('N')
             common_n_value = self.determine_common_value(worksheet, group_rows, 'N')
-            worksheet.cell(keep_row, n_col_num).value = common_n_value
+            snapshot.set_value(keep_row, n_col_num, common_n_value)
             logger.debug(f"Set N{keep_row} = '{common_n_value}'")
             
             rows_processed += 1
         
-        # Delete duplicate rows (from bottom to top to avoid index issues)
-        rows_to_delete.sort(reverse=True)
-        for row in rows_to_delete:
-            worksheet.delete_rows(row, 1)
-            logger.debug(f"Deleted duplicate row {row}")
-        
-        removed_count = len(rows_to_delete)
+        # Delete all duplicate rows in one compaction pass
+        removed_count = snapshot.delete_row_set(rows_to_delete)
         logger.info(f"Deduplicated {rows_processed} groups, removed {removed_count} duplicate rows")
         return removed_count
     
@@ -315,18 +332,18 @@ class DataFilter:
         logger.info("Step 5.5: Cleaning NA values in column O")
         
         o_col_num = openpyxl.utils.column_index_from_string('O')
+        snapshot = get_sheet_snapshot(worksheet)
         cleaned_count = 0
         
         # Process all rows from start_row to max_row
-        for row in range(self.start_row, worksheet.max_row + 1):
+        for row in range(self.start_row, snapshot.max_row + 1):
             try:
-                cell = worksheet.cell(row, o_col_num)
-                cell_value = cell.value
+                cell_value = snapshot.text(row, o_col_num)
                 
                 # Check if cell value is "NA" (case-insensitive)
-                if cell_value and isinstance(cell_value, str):
-                    if cell_value.strip().upper() == "NA":
-                        cell.value = None  # Set to empty
+                if cell_value:
+                    if cell_value.upper() == "NA":
+                        snapshot.set_value(row, o_col_num, None)  # Set to empty
                         cleaned_count += 1
                         logger.debug(f"Cleaned NA value in O{row}")
                 
@@ -337,6 +354,213 @@ class DataFilter:
         logger.info(f"Cleaned {cleaned_count} NA values in column O")
         return cleaned_count
     
+    def filter_worksheet(self, worksheet) -> Dict[str, int]:
+        """
+        Apply all Step 5 filtering and deduplication stages to a loaded worksheet
+        
+        The stages are planned against the unmodified sheet: the keep-mask (NA
+        rows and SD duplicates), the SD groups and their column N values. Cell
+        updates are written to surviving rows only and all removed rows are
+        compacted away in a single pass at the end.
+        
+        Args:
+            worksheet: openpyxl worksheet (modified in place)
+            
+        Returns:
+            Dictionary with processing statistics
+        """
+        # Get initial stats
+        initial_rows = worksheet.max_row
+        logger.info(f"Initial rows: {initial_rows}")
+        
+        snapshot = get_sheet_snapshot(worksheet)
+        h_col_num = openpyxl.utils.column_index_from_string('H')
+        n_col_num = openpyxl.utils.column_index_from_string('N')
+        o_col_num = openpyxl.utils.column_index_from_string('O')
+        clear_col_nums = [openpyxl.utils.column_index_from_string(col) for col in ['K', 'L', 'M']]
+        
+        # Step 5.1: Rows where column H is NA/empty/"-"
+        logger.info("Step 5.1: Finding NA rows in column H")
+        na_rows = set()
+        sd_rows = []
+        for row in range(self.start_row, snapshot.max_row + 1):
+            h_value = snapshot.text(row, h_col_num)
+            if self.is_na_value(h_value):
+                na_rows.add(row)
+            elif h_value.upper() == "SD":
+                sd_rows.append(row)
+        na_removed = len(na_rows)
+        logger.info(f"Found {na_removed} NA rows")
+        
+        # Step 5.2: SD duplicate groups (NA rows are never SD rows)
+        duplicate_groups = self.find_sd_duplicates(worksheet)
+        
+        # Step 5.4 (planned): keep the first row of each group with the group's common N value
+        duplicate_rows = set()
+        common_n_values = {}
+        for group_rows in duplicate_groups.values():
+            common_n_values[group_rows[0]] = self.determine_common_value(worksheet, group_rows, 'N')
+            duplicate_rows.update(group_rows[1:])
+        sd_removed = len(duplicate_rows)
+        
+        # Step 5.3: Clear K,L,M for all SD rows (rows about to be removed are skipped)
+        logger.info("Step 5.3: Clearing K,L,M for all SD rows")
+        for row in sd_rows:
+            if row in duplicate_rows:
+                continue
+            for col_num in clear_col_nums:
+                snapshot.set_value(row, col_num, None)
+        sd_cleared = len(sd_rows)
+        logger.info(f"Cleared K,L,M for {sd_cleared} SD rows")
+        
+        # Step 5.4: Set column N on the kept rows
+        for keep_row, common_n_value in common_n_values.items():
+            snapshot.set_value(keep_row, n_col_num, common_n_value)
+            logger.debug(f"Set N{keep_row} = '{common_n_value}'")
+        logger.info(f"Deduplicated {len(common_n_values)} groups, removing {sd_removed} duplicate rows")
+        
+        # Step 5.5: Clean column O NA values on surviving rows
+        logger.info("Step 5.5: Cleaning NA values in column O")
+        column_o_cleaned = 0
+        for row in range(self.start_row, snapshot.max_row + 1):
+            if row in na_rows or row in duplicate_rows:
+                continue
+            if snapshot.text(row, o_col_num).upper() == "NA":
+                snapshot.set_value(row, o_col_num, None)
+                column_o_cleaned += 1
+        logger.info(f"Cleaned {column_o_cleaned} NA values in column O")
+        
+        # Remove NA and duplicate rows in one compaction pass
+        snapshot.delete_row_set(na_rows | duplicate_rows)
+        
+        # Get final stats
+        final_rows = worksheet.max_row
+        total_removed = na_removed + sd_removed
+        record_rows(rows_in=initial_rows, rows_out=final_rows)
+        
+        logger.info("Processing Summary:")
+        logger.info(f"  Initial rows: {initial_rows}")
+        logger.info(f"  NA rows removed: {na_removed}")
+        logger.info(f"  SD rows cleared (K,L,M): {sd_cleared}")
+        logger.info(f"  SD duplicates removed: {sd_removed}")
+        logger.info(f"  Column O NA values cleaned: {column_o_cleaned}")
+        logger.info(f"  Total rows removed: {total_removed}")
+        logger.info(f"  Final rows: {final_rows}")
+        
+        return {
+            'initial_rows': initial_rows,
+            'na_removed': na_removed,
+            'sd_cleared': sd_cleared,
+            'sd_removed': sd_removed,
+            'column_o_cleaned': column_o_cleaned,
+            'total_removed': total_removed,
+            'final_rows': final_rows
+        }
+    
+    def plan_rows(self, rows: Iterable[Sequence[Any]]) -> RowFilterPlan:
+        """
+        Plan Step 5 for a stream of data rows (the rows from start_row on)
+        
+        Applies the same rules as filter_worksheet(): NA rows by column H, SD
+        duplicate groups by columns B,C,D,E,F,I,J and the common column N value
+        of each group. Only the SD group keys are held while reading.
+        
+        Args:
+            rows: Data rows as value sequences (column A first)
+            
+        Returns:
+            RowFilterPlan for filter_rows()
+        """
+        plan = RowFilterPlan()
+        h_index = openpyxl.utils.column_index_from_string('H') - 1
+        n_index = openpyxl.utils.column_index_from_string('N') - 1
+        comparison_indexes = [openpyxl.utils.column_index_from_string(col) - 1 for col in self.comparison_columns]
+        
+        # Group key -> [first row, rows in group, column N values counted in row order]
+        groups: Dict[tuple, list] = {}
+        for index, values in enumerate(rows):
+            plan.rows_in += 1
+            h_value = _row_text(values, h_index)
+            if self.is_na_value(h_value):
+                plan.na_rows += 1
+                continue
+            if h_value.upper() != "SD":
+                continue
+            
+            plan.sd_rows += 1
+            comparison_values = tuple(_row_text(values, col_index) for col_index in comparison_indexes)
+            if not self.has_meaningful_data(comparison_values):
+                continue
+            
+            group = groups.get(comparison_values)
+            if group is None:
+                group = groups[comparison_values] = [index, 0, Counter()]
+            else:
+                plan.duplicate_rows.add(index)
+            group[1] += 1
+            
+            # Same counting as determine_common_value()
+            n_value = values[n_index] if n_index < len(values) else None
+            if n_value and isinstance(n_value, str) and n_value.strip():
+                group[2][n_value.strip()] += 1
+        
+        for keep_index, group_size, n_values in groups.values():
+            if group_size > 1:
+                plan.common_n_values[keep_index] = n_values.most_common(1)[0][0] if n_values else "Yearly"
+        
+        logger.info(f"Planned Step 5 for {plan.rows_in} rows: {plan.na_rows} NA rows, {plan.sd_rows} SD rows, "
+                    f"{len(plan.common_n_values)} SD duplicate groups removing {len(plan.duplicate_rows)} rows")
+        record_rows(rows_in=plan.rows_in, rows_out=plan.rows_out)
+        return plan
+    
+    def filter_rows(self, rows: Iterable[Sequence[Any]], plan: RowFilterPlan) -> Iterator[List[Any]]:
+        """
+        Apply a Step 5 plan to the same stream of data rows it was planned on
+        
+        Yields the rows filter_worksheet() would leave, in order: NA rows and
+        SD duplicates are dropped, K,L,M are cleared on SD rows, kept group
+        rows get their common column N value and "NA" in column O is cleared.
+        
+        Args:
+            rows: Data rows as value sequences, in the order plan_rows() saw them
+            plan: Plan from plan_rows()
+            
+        Yields:
+            Filtered data rows as lists
+        """
+        h_index = openpyxl.utils.column_index_from_string('H') - 1
+        n_index = openpyxl.utils.column_index_from_string('N') - 1
+        o_index = openpyxl.utils.column_index_from_string('O') - 1
+        clear_indexes = [openpyxl.utils.column_index_from_string(col) - 1 for col in ['K', 'L', 'M']]
+        column_o_cleaned = 0
+        
+        for index, values in enumerate(rows):
+            if index in plan.duplicate_rows:
+                continue
+            h_value = _row_text(values, h_index)
+            if self.is_na_value(h_value):
+                continue
+            
+            values = list(values)
+            if h_value.upper() == "SD":
+                for col_index in clear_indexes:
+                    if col_index < len(values):
+                        values[col_index] = None
+            
+            common_n_value = plan.common_n_values.get(index)
+            if common_n_value is not None:
+                if n_index >= len(values):
+                    values.extend([None] * (n_index + 1 - len(values)))
+                values[n_index] = common_n_value
+            
+            if _row_text(values, o_index).upper() == "NA":
+                values[o_index] = None
+                column_o_cleaned += 1
+            
+            yield values
+        
+        logger.info(f"Cleaned {column_o_cleaned} NA values in column O")
+    
     def process_file(self, step4_file: Union[str, Path],
                     output_file: Optional[Union[str, Path]] = None) -> str:
         """
@@ -461,38 +685,8 @@ class DataFilter:
             logger.error(f"   - File size: {output_file.stat().st_size if output_file.exists() else 'N/A'}")
             raise TSConverterError(f"Could not open output file for processing: {str(e)}")
         
-        # Get initial stats
-        initial_rows = ws.max_row
-        logger.info(f"Initial rows: {initial_rows}")
-        
         try:
-            # Step 5.1: Remove NA rows
-            na_removed = self.remove_na_rows(ws)
-            
-            # Step 5.2: Find SD duplicate groups (for later use)
-            duplicate_groups = self.find_sd_duplicates(ws)
-            
-            # Step 5.3: Clear K,L,M for all SD rows
-            sd_cleared = self.clear_sd_row_data(ws)
-            
-            # Step 5.4: Deduplicate SD rows
-            sd_removed = self.deduplicate_sd_rows(ws)
-            
-            # Step 5.5: Clean column O NA values
-            column_o_cleaned = self.clean_column_o_na_values(ws)
-            
-            # Get final stats
-            final_rows = ws.max_row
-            total_removed = na_removed + sd_removed
-            
-            logger.info("Processing Summary:")
-            logger.info(f"  Initial rows: {initial_rows}")
-            logger.info(f"  NA rows removed: {na_removed}")
-            logger.info(f"  SD rows cleared (K,L,M): {sd_cleared}")
-            logger.info(f"  SD duplicates removed: {sd_removed}")
-            logger.info(f"  Column O NA values cleaned: {column_o_cleaned}")
-            logger.info(f"  Total rows removed: {total_removed}")
-            logger.info(f"  Final rows: {final_rows}")
+            self.filter_worksheet(ws)
             
             # Save output file with enhanced error handling
             try:
@@ -504,6 +698,7 @@ class DataFilter:
                 logger.info(f"   - Output file parent exists: {output_file.parent.exists()}")
                 
                 wb.save(str(output_file))
+                populate_workbook_metadata(output_file, wb)
                 
                 logger.info(f"✅ DATAFILTER: Workbook save operation completed")
                 logger.info(f"   - Output file after save exists: {output_file.exists()}")
@@ -8,19 +8,28 @@ import openpyxl
 from openpyxl.utils import get_column_letter, column_index_from_string
 import logging
 from pathlib import Path
-from typing import Union, Optional, List, Dict, Tuple
+from typing import Union, Optional, List, Dict, Tuple, Iterable, Iterator, Sequence, Any, Callable
 import argparse
 import sys
 import re
+from functools import lru_cache, partial
 
 from common.validation import FileValidator
 from common.exceptions import TSConverterError
 from common.config import get_clean_basename
+from common.sheet_snapshot import get_sheet_snapshot, invalidate_sheet_snapshot, cell_text
+from common.article_matcher import ArticleMatcher
+from common.step_metrics import count_cells_written, record_rows
+from common.output_writer import write_output_workbook
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Numbering at the start of an article list entry ("1.", "2. ")
+NUMBERING_PATTERN = re.compile(r'^\s*\d+\.\s*')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
 class ArticleCrossReference:
     """
     Article Cross-Reference for Step 6
@@ -43,6 +52,7 @@ class ArticleCrossReference:
         self.header_row = 1  # Row containing article name headers
         self.article_header_start_col = 'R'  # First column with article headers
         self.match_marker = "X"  # Value to mark matches
+        self.article_list_cache_size = 1024  # Distinct column Q texts remembered per worksheet
     
     def safe_cell_value(self, cell) -> str:
         """
@@ -79,7 +89,7 @@ class ArticleCrossReference:
         normalized = name.lower().strip()
         
         # Remove extra whitespace
-        normalized = re.sub(r'\s+', ' ', normalized)
+        normalized = WHITESPACE_PATTERN.sub(' ', normalized)
         
         return normalized
     
@@ -119,9 +129,7 @@ class ArticleCrossReference:
                 continue
             
             # Remove numbering pattern (1., 2., etc.) from start
-            # Pattern: optional whitespace, number, dot, optional space
-            numbered_pattern = r'^\s*\d+\.\s*'
-            clean_line = re.sub(numbered_pattern, '', line)
+            clean_line = NUMBERING_PATTERN.sub('', line)
             
             # Remove trailing punctuation (semicolons, etc.)
             clean_line = clean_line.rstrip(';,').strip()
@@ -145,16 +153,16 @@ class ArticleCrossReference:
         """
         article_headers = {}
         start_col = column_index_from_string(self.article_header_start_col)
+        snapshot = get_sheet_snapshot(worksheet)
         
         # Check columns R onwards until we find no more headers
         col = start_col
         empty_count = 0
         max_empty = 5  # Stop after 5 consecutive empty columns
         
-        while empty_count < max_empty and col <= worksheet.max_column + 10:
+        while empty_count < max_empty and col <= snapshot.max_column + 10:
             try:
-                cell = worksheet.cell(row=self.header_row, column=col)
-                header_value = self.safe_cell_value(cell)
+                header_value = snapshot.text(self.header_row, col)
                 
                 if header_value:
                     normalized_name = self.normalize_article_name(header_value)
@@ -176,40 +184,62 @@ class ArticleCrossReference:
         logger.info(f"Found {len(article_headers)} article headers in row {self.header_row}")
         return article_headers
     
-    def find_matches(self, article_name: str, article_headers: Dict[str, int]) -> List[int]:
+    def find_matches(self, article_name: str,
+                     article_headers: Union[Dict[str, int], ArticleMatcher]) -> List[int]:
         """
         Find matching columns for an article name
         
+        An exact header match wins; otherwise every header that contains the
+        name or is contained in it matches.
+        
         Args:
             article_name: Article name to find matches for
-            article_headers: Dictionary of normalized header names to column numbers
+            article_headers: Dictionary of normalized header names to column numbers,
+                or an ArticleMatcher built from it (reuse one for a whole worksheet)
             
         Returns:
             List of column numbers that match
         """
-        matches = []
         normalized_name = self.normalize_article_name(article_name)
         
         if not normalized_name:
-            return matches
-        
-        # First try exact match
-        if normalized_name in article_headers:
-            matches.append(article_headers[normalized_name])
-            logger.debug(f"Exact match found for '{article_name}' -> column {get_column_letter(article_headers[normalized_name])}")
-            return matches
+            return []
         
-        # Try partial matching (contains)
-        for header_name, col_num in article_headers.items():
-            if normalized_name in header_name or header_name in normalized_name:
-                matches.append(col_num)
-                logger.debug(f"Partial match found for '{article_name}' with header '{header_name}' -> column {get_column_letter(col_num)}")
+        matcher = article_headers if isinstance(article_headers, ArticleMatcher) else ArticleMatcher(article_headers)
+        matches = matcher.match(normalized_name)
         
         if not matches:
             logger.debug(f"No matches found for article: '{article_name}'")
+        else:
+            logger.debug(f"Found {len(matches)} matching columns for '{article_name}'")
         
         return matches
     
+    def resolve_article_list(self, cell_value: str,
+                             article_headers: Union[Dict[str, int], ArticleMatcher]) -> Tuple[int, Tuple[int, ...]]:
+        """
+        Parse an article list and resolve it to the columns it matches
+        
+        Args:
+            cell_value: Raw cell value containing article list
+            article_headers: Header dictionary or ArticleMatcher (see find_matches)
+        
+        Returns:
+            Tuple of (number of articles parsed, matching columns without duplicates
+            in first-match order)
+        """
+        articles = self.parse_article_list(cell_value)
+        
+        unique_matching_columns = []
+        seen = set()
+        for article in articles:
+            for col in self.find_matches(article, article_headers):
+                if col not in seen:
+                    unique_matching_columns.append(col)
+                    seen.add(col)
+        
+        return len(articles), tuple(unique_matching_columns)
+    
     def mark_matches(self, worksheet, row_num: int, matching_columns: List[int]) -> int:
         """
         Mark matching columns with "X" in the specified row
@@ -222,14 +252,14 @@ class ArticleCrossReference:
         Returns:
             Number of cells marked
         """
+        snapshot = get_sheet_snapshot(worksheet)
         marked_count = 0
         
         for col_num in matching_columns:
             try:
-                cell = worksheet.cell(row=row_num, column=col_num)
-                cell.value = self.match_marker
+                snapshot.set_value(row_num, col_num, self.match_marker)
                 marked_count += 1
-                logger.debug(f"Marked {cell.coordinate} with '{self.match_marker}'")
+                logger.debug(f"Marked {get_column_letter(col_num)}{row_num} with '{self.match_marker}'")
             except Exception as e:
                 logger.warning(f"Error marking cell at row {row_num}, column {col_num}: {e}")
         
@@ -251,8 +281,9 @@ class ArticleCrossReference:
         cleared_count = 0
         
         current_row = self.start_row
+        max_row = worksheet.max_row
         
-        while current_row <= worksheet.max_row:
+        while current_row <= max_row:
             try:
                 # Get article list cell
                 list_cell = worksheet.cell(row=current_row, column=article_list_col)
@@ -269,78 +300,56 @@ class ArticleCrossReference:
             
             current_row += 1
         
+        # Column Q was cleared directly on the worksheet
+        invalidate_sheet_snapshot(worksheet)
+        count_cells_written(cleared_count)
+        
         logger.info(f"Cleared {cleared_count} article list cells from column Q")
         return cleared_count
     
-    def process_file(self, step5_file: Union[str, Path], 
-                    output_file: Optional[Union[str, Path]] = None) -> str:
+    def list_resolver(self, article_headers: Dict[str, int]) -> Callable[[str], Tuple[int, Tuple[int, ...]]]:
         """
-        Process Step 5 file and add article cross-references
+        Build the matching engine once for a whole sheet, and memoize resolved article lists against it
         
         Args:
-            step5_file: Step 5 input file path
-            output_file: Optional output file path (if None, auto-generate)
-            
+            article_headers: Dictionary of normalized header names to column numbers
+        
         Returns:
-            Path to output file
+            Cached resolve_article_list() for these headers
         """
-        logger.info("📋 Step 6: Article Name Cross-Reference")
+        matcher = ArticleMatcher(article_headers)
+        return lru_cache(maxsize=self.article_list_cache_size)(
+            partial(self.resolve_article_list, article_headers=matcher))
+    
+    def crossref_worksheet(self, worksheet) -> Dict[str, int]:
+        """
+        Mark article cross-references and clear article lists in a loaded worksheet
         
-        # Validate input file
-        try:
-            step5_path = Path(step5_file)
-            if not step5_path.exists():
-                raise FileNotFoundError(f"Step 5 file not found: {step5_path}")
-            
-            # Basic file validation
-            FileValidator.validate_file_format(step5_path)
+        Args:
+            worksheet: openpyxl worksheet (modified in place)
             
-        except Exception as e:
-            logger.error(f"Input validation failed: {e}")
-            raise TSConverterError(f"Invalid Step 5 file: {e}")
-        
-        # Auto-generate output file if not provided
-        if output_file is None:
-            base_name = get_clean_basename(step5_path)
-            output_file = self.output_dir / f"{base_name} - Final.xlsx"
-        else:
-            output_file = Path(output_file)
-        
-        # Validate output path is writable
-        try:
-            output_file = FileValidator.validate_output_writable(output_file)
-        except Exception as e:
-            logger.error(f"Output validation failed: {e}")
-            raise TSConverterError(f"Invalid output path: {e}")
-        
-        logger.info(f"Input: {step5_path}")
-        logger.info(f"Output: {output_file}")
-        
-        # Load Step 5 file
-        try:
-            workbook = openpyxl.load_workbook(str(step5_path))
-            worksheet = workbook.active
-        except Exception as e:
-            logger.error(f"Failed to load Step 5 file: {e}")
-            raise TSConverterError(f"Cannot load Excel file: {e}")
-        
+        Returns:
+            Dictionary with processing statistics
+        """
         # Find article headers in row 1
         article_headers = self.find_article_headers(worksheet)
         if not article_headers:
             logger.warning("No article headers found - output will have no cross-references")
         
+        resolve_list = self.list_resolver(article_headers)
+        
         # Process article lists starting from specified row
         article_list_col = column_index_from_string(self.article_list_column)
+        snapshot = get_sheet_snapshot(worksheet)
         total_matches = 0
         processed_rows = 0
         
         current_row = self.start_row
         
-        while current_row <= worksheet.max_row:
+        while current_row <= snapshot.max_row:
             try:
                 # Get article list from column Q
-                list_cell = worksheet.cell(row=current_row, column=article_list_col)
-                list_value = self.safe_cell_value(list_cell)
+                list_value = snapshot.text(current_row, article_list_col)
                 
                 if not list_value:
                     # Skip empty rows but continue checking
@@ -349,35 +358,21 @@ class ArticleCrossReference:
                 
                 logger.debug(f"Processing row {current_row}: '{list_value[:50]}...'")
                 
-                # Parse article list from cell
-                articles = self.parse_article_list(list_value)
+                # Parse and match the article list (repeated lists are a cache hit)
+                article_count, unique_matching_columns = resolve_list(list_value)
                 
-                if not articles:
+                if not article_count:
                     logger.debug(f"No articles parsed from row {current_row}")
                     current_row += 1
                     continue
                 
-                # Find matches for each article
-                all_matching_columns = []
-                for article in articles:
-                    matching_cols = self.find_matches(article, article_headers)
-                    all_matching_columns.extend(matching_cols)
-                
-                # Remove duplicates while preserving order
-                unique_matching_columns = []
-                seen = set()
-                for col in all_matching_columns:
-                    if col not in seen:
-                        unique_matching_columns.append(col)
-                        seen.add(col)
-                
                 # Mark matches in current row
                 if unique_matching_columns:
                     marked = self.mark_matches(worksheet, current_row, unique_matching_columns)
                     total_matches += marked
-                    logger.info(f"Row {current_row}: Found {len(articles)} articles, marked {marked} columns")
+                    logger.info(f"Row {current_row}: Found {article_count} articles, marked {marked} columns")
                 else:
-                    logger.debug(f"Row {current_row}: Found {len(articles)} articles but no matches")
+                    logger.debug(f"Row {current_row}: Found {article_count} articles but no matches")
                 
                 processed_rows += 1
                 
@@ -387,16 +382,156 @@ class ArticleCrossReference:
             
             current_row += 1
         
+        cache_info = resolve_list.cache_info()
+        lookups = cache_info.hits + cache_info.misses
+        hit_rate = cache_info.hits / lookups * 100 if lookups else 0.0
+        
         logger.info(f"Processed {processed_rows} rows with article lists")
         logger.info(f"Total matches marked: {total_matches}")
+        logger.info(f"Article list cache: {cache_info.hits} hits, {cache_info.misses} misses "
+                    f"({hit_rate:.1f}% hit rate, {cache_info.currsize} distinct lists)")
+        
+        # Cross-referencing marks cells but never adds or removes rows
+        record_rows(rows_in=snapshot.max_row, rows_out=snapshot.max_row)
         
         # Sub-step: Clear article names from column Q
         cleared_count = self.clear_article_lists(worksheet)
         logger.info(f"Sub-step completed: Cleared {cleared_count} article list cells")
         
+        return {
+            'processed_rows': processed_rows,
+            'total_matches': total_matches,
+            'cleared_cells': cleared_count,
+            'list_cache_hits': cache_info.hits,
+            'list_cache_misses': cache_info.misses
+        }
+    
+    def crossref_rows(self, rows: Iterable[Sequence[Any]], article_headers: Dict[str, int]) -> Iterator[List[Any]]:
+        """
+        Mark article cross-references and clear article lists in a stream of data rows
+        
+        Applies crossref_worksheet() row by row, for rows that are written
+        straight to the output instead of into a loaded worksheet.
+        
+        Args:
+            rows: Data rows as value sequences (column A first), from start_row on
+            article_headers: Article headers from find_article_headers() on the header block
+            
+        Yields:
+            Data rows as lists, with matching columns marked and column Q cleared
+        """
+        if not article_headers:
+            logger.warning("No article headers found - output will have no cross-references")
+        
+        resolve_list = self.list_resolver(article_headers)
+        list_index = column_index_from_string(self.article_list_column) - 1
+        total_matches = 0
+        processed_rows = 0
+        cleared_count = 0
+        row_count = 0
+        
+        for row_num, values in enumerate(rows, start=self.start_row):
+            values = list(values)
+            row_count += 1
+            list_value = cell_text(values[list_index]) if list_index < len(values) else ""
+            
+            if list_value:
+                try:
+                    # Parse and match the article list (repeated lists are a cache hit)
+                    article_count, unique_matching_columns = resolve_list(list_value)
+                    if article_count:
+                        if unique_matching_columns:
+                            width = max(unique_matching_columns)
+                            if width > len(values):
+                                values.extend([None] * (width - len(values)))
+                            for col_num in unique_matching_columns:
+                                values[col_num - 1] = self.match_marker
+                            total_matches += len(unique_matching_columns)
+                            logger.info(f"Row {row_num}: Found {article_count} articles, "
+                                        f"marked {len(unique_matching_columns)} columns")
+                        processed_rows += 1
+                except Exception as e:
+                    logger.error(f"Error processing row {row_num}: {e}")
+            
+            # Article lists are not part of the output
+            if list_index < len(values) and values[list_index] is not None:
+                values[list_index] = None
+                cleared_count += 1
+            
+            yield values
+        
+        cache_info = resolve_list.cache_info()
+        lookups = cache_info.hits + cache_info.misses
+        hit_rate = cache_info.hits / lookups * 100 if lookups else 0.0
+        
+        logger.info(f"Processed {processed_rows} rows with article lists")
+        logger.info(f"Total matches marked: {total_matches}")
+        logger.info(f"Article list cache: {cache_info.hits} hits, {cache_info.misses} misses "
+                    f"({hit_rate:.1f}% hit rate, {cache_info.currsize} distinct lists)")
+        logger.info(f"Cleared {cleared_count} article list cells from column Q")
+        
+        # Cross-referencing marks cells but never adds or removes rows
+        record_rows(rows_in=row_count, rows_out=row_count)
+    
+    def process_file(self, step5_file: Union[str, Path], 
+                    output_file: Optional[Union[str, Path]] = None) -> str:
+        """
+        Process Step 5 file and add article cross-references
+        
+        Args:
+            step5_file: Step 5 input file path
+            output_file: Optional output file path (if None, auto-generate)
+            
+        Returns:
+            Path to output file
+        """
+        logger.info("📋 Step 6: Article Name Cross-Reference")
+        
+        # Validate input file
+        try:
+            step5_path = Path(step5_file)
+            if not step5_path.exists():
+                raise FileNotFoundError(f"Step 5 file not found: {step5_path}")
+            
+            # Basic file validation
+            FileValidator.validate_file_format(step5_path)
+            
+        except Exception as e:
+            logger.error(f"Input validation failed: {e}")
+            raise TSConverterError(f"Invalid Step 5 file: {e}")
+        
+        # Auto-generate output file if not provided
+        if output_file is None:
+            base_name = get_clean_basename(step5_path)
+            output_file = self.output_dir / f"{base_name} - Final.xlsx"
+        else:
+            output_file = Path(output_file)
+        
+        # Validate output path is writable
+        try:
+            output_file = FileValidator.validate_output_writable(output_file)
+        except Exception as e:
+            logger.error(f"Output validation failed: {e}")
+            raise TSConverterError(f"Invalid output path: {e}")
+        
+        logger.info(f"Input: {step5_path}")
+        logger.info(f"Output: {output_file}")
+        
+        # Load Step 5 file
+        try:
+            workbook = openpyxl.load_workbook(str(step5_path))
+            worksheet = workbook.active
+        except Exception as e:
+            logger.error(f"Failed to load Step 5 file: {e}")
+            raise TSConverterError(f"Cannot load Excel file: {e}")
+        
+        # Cross-reference the data rows on their way to a write-only output workbook
+        rows = self.crossref_rows(worksheet.iter_rows(min_row=self.start_row, values_only=True),
+                                  self.find_article_headers(worksheet))
+        
         # Save output file
         try:
-            workbook.save(str(output_file))
+            write_output_workbook(worksheet, output_file, rows, header_rows=self.start_row - 1)
             logger.info(f"✅ Step 6 completed: {output_file}")
         except Exception as e:
             logger.error(f"Failed to save file: {e}")
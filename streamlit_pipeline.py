@@ -9,9 +9,12 @@ import tempfile
 import shutil
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, Callable, Tuple
+from typing import Dict, Any, Optional, Callable, Tuple, List, Union, BinaryIO
+from functools import partial
+from dataclasses import replace
 import logging
 import traceback
+import openpyxl
 
 # Import existing pipeline modules (they use function-based approach)
 import step1_template_creation
@@ -22,9 +25,14 @@ import step5_filter_deduplicate
 import step6_article_crossref
 from common.exceptions import TSConverterError
 from common.validation import FileValidator
-from common.quality_reporter import get_global_reporter, reset_global_reporter
+from common.quality_reporter import QualityReporter, use_reporter
 from common.error_handler import global_error_handler
-from common.security import FileValidator as SecurityFileValidator, validate_path_security, sanitize_filename, generate_secure_filename, SecurityError
+from common.step_scheduler import StepScheduler, PipelineStep
+from common.step_metrics import StepMetrics, measure_step, append_metrics_file
+from common.result_cache import get_result_cache
+from common.source_loader import open_source_workbook, DetachedWorkbook
+from common.output_writer import RowStream, write_output_workbook
+from common.security import FileValidator as SecurityFileValidator, validate_path_security, sanitize_filename, generate_secure_filename, SecurityError, ingest_upload, map_file
 from common.session_manager import session_manager, ProcessingState, safe_update_session_state, safe_get_session_value
 from config_streamlit import get_temp_directory, STREAMLIT_CONFIG
 
@@ -146,10 +154,31 @@ class StreamlitTSSPipeline:
     Provides progress tracking, file management, and error handling for web interface with security features
     """
     
-    def __init__(self, temp_dir: Optional[Path] = None):
+    def __init__(self, temp_dir: Optional[Path] = None, in_memory: Optional[bool] = None,
+                 use_session_state: bool = True):
         self.temp_dir = temp_dir or get_temp_directory()
+        # Off when running outside a Streamlit script thread (job workers), where session state is not available
+        self.use_session_state = use_session_state
         self.current_session_id = None
         self.processing_stats = {}
+        self.reporter = QualityReporter()
+        
+        # In-memory mode hands workbooks from step to step and only serializes the final result
+        self.in_memory = STREAMLIT_CONFIG.get("in_memory_pipeline", True) if in_memory is None else in_memory
+        self.save_intermediates = STREAMLIT_CONFIG.get("save_intermediate_files", False)
+        
+        # Security validation of each saved upload, reused by validate_input_file while the file is unchanged
+        self._validated_uploads = {}
+        
+        # Content-addressed cache of final outputs, keyed per saved upload
+        self.result_cache = None
+        self._cache_keys = {}
+        if STREAMLIT_CONFIG.get("enable_result_cache", True):
+            self.result_cache = get_result_cache(
+                STREAMLIT_CONFIG.get("result_cache_directory", "temp/result_cache"),
+                max_size_mb=STREAMLIT_CONFIG.get("result_cache_max_size_mb", 500),
+                max_age_hours=STREAMLIT_CONFIG.get("result_cache_max_age_hours", 24)
+            )
         
         # Initialize security validator with configuration from Streamlit settings
         from config_streamlit import get_validation_config
@@ -157,14 +186,32 @@ class StreamlitTSSPipeline:
         self.security_validator = SecurityFileValidator(
             max_size=validation_config.get('max_file_size_mb', 50) * 1024 * 1024,
             strict_mode=validation_config.get('strict_mode', False),
-            enable_fallbacks=validation_config.get('enable_fallbacks', True)
+            enable_fallbacks=validation_config.get('enable_fallbacks', True),
+            max_decompressed_size=validation_config.get('max_decompressed_mb', 512) * 1024 * 1024
         )
         
         # Ensure temp directory is secure
         self.temp_dir.mkdir(parents=True, exist_ok=True)
         
         # Initialize session manager
-        session_manager.initialize_session_state()
+        if self.use_session_state:
+            session_manager.initialize_session_state()
+    
+    def _update_session_state(self, updates: Dict[str, Any]) -> None:
+        """Write to session state unless the pipeline runs without it"""
+        if self.use_session_state:
+            safe_update_session_state(updates)
+    
+    def _get_session_value(self, key: str, default: Any = None) -> Any:
+        """Read from session state, or return default when the pipeline runs without it"""
+        if not self.use_session_state:
+            return default
+        return safe_get_session_value(key, default)
+    
+    def _set_processing_state(self, state: ProcessingState) -> None:
+        """Record the processing state in session state unless the pipeline runs without it"""
+        if self.use_session_state:
+            session_manager.update_processing_state(state)
     
     def _validate_paths_security(self, *paths: Path) -> None:
         """Helper method to validate multiple paths for security"""
@@ -484,7 +531,7 @@ class StreamlitTSSPipeline:
             output_dir.mkdir(mode=0o700, exist_ok=True)
             
             # Update session state safely
-            safe_update_session_state({
+            self._update_session_state({
                 'session_id': session_id,
                 'session_dir': str(session_dir)
             })
@@ -496,54 +543,110 @@ class StreamlitTSSPipeline:
             logger.error(f"Failed to create session directory: {e}")
             raise SecurityError(f"Session creation failed: {str(e)}")
     
-    def save_uploaded_file(self, file_data: bytes, filename: str) -> Path:
-        """Save uploaded file to session directory with comprehensive security validation"""
-        try:
-            # Step 1: Validate file data using security validator
-            is_valid, error_msg = self.security_validator.validate_file(file_data, filename)
-            if not is_valid:
-                raise SecurityError(f"File security validation failed: {error_msg}")
+    def get_cached_result(self, input_file_path: Path) -> Optional[Tuple[Path, Dict[str, Any]]]:
+        """
+        Look up the final workbook of a previous run on identical bytes and configuration
+        
+        Uses the key save_uploaded_file() derived from the hash taken while
+        writing the upload, so the content is not hashed a second time.
+        
+        Args:
+            input_file_path: Upload saved by save_uploaded_file()
             
-            # Step 2: Sanitize filename
+        Returns:
+            Tuple of (cached final workbook path, processing stats) or None on miss
+        """
+        cache_key = self._cache_keys.get(str(input_file_path))
+        if not self.result_cache or cache_key is None:
+            return None
+        
+        lookup_start = time.time()
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            return None
+        
+        cached_output, cached_stats = cached
+        stats = dict(cached_stats)
+        stats.update({
+            "success": True,
+            "final_output": str(cached_output),
+            "original_processing_time": cached_stats.get("processing_time"),
+            "processing_time": time.time() - lookup_start,
+            "cache_hit": True,
+            "result_cache": self.result_cache.get_stats()
+        })
+        self.processing_stats = stats
+        
+        return cached_output, stats
+    
+    def save_uploaded_file(self, file_data: Union[bytes, BinaryIO], filename: str) -> Path:
+        """
+        Save uploaded file to session directory with comprehensive security validation
+        
+        The upload is written, hashed and signature-checked in one streaming pass;
+        validation then reads a memory map of the saved file instead of another copy.
+        
+        Args:
+            file_data: Uploaded file content, or a binary stream of it
+            filename: Original filename
+        
+        Returns:
+            Path of the saved upload
+        """
+        try:
+            # Step 1: Sanitize filename
             safe_filename = sanitize_filename(filename)
             if safe_filename != filename:
                 logger.info(f"Filename sanitized: {filename} -> {safe_filename}")
             
-            # Step 3: Create session directory if needed
+            # Step 2: Create session directory if needed
             if not self.current_session_id:
                 self.create_session_directory()
             
             session_dir = self.temp_dir / self.current_session_id
             input_file_path = session_dir / "input" / safe_filename
             
-            # Step 4: Security check - validate final path
+            # Step 3: Security check - validate final path
             if not validate_path_security(input_file_path, self.temp_dir):
                 raise SecurityError("File path validation failed - potential path traversal")
             
-            # Step 5: Check file size before writing
+            # Step 4: Write file with restricted permissions, hashing it and enforcing the size limit on the way
             max_size = STREAMLIT_CONFIG.get("max_file_size_mb", 50) * 1024 * 1024
-            if len(file_data) > max_size:
-                raise SecurityError(f"File too large: {len(file_data)} bytes > {max_size} bytes")
-            
-            # Step 6: Write file securely with restricted permissions
             input_file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(input_file_path, "wb") as f:
-                f.write(file_data)
+            upload = ingest_upload(file_data, input_file_path, max_size=max_size)
+            
+            # Step 5: Validate the saved file through a memory map; rejected files are removed
+            if not upload.has_excel_signature and self.security_validator.strict_mode:
+                is_valid, error_msg = False, "File signature does not match Excel format"
+            else:
+                with map_file(input_file_path) as mapped_data:
+                    is_valid, error_msg = self.security_validator.validate_file(mapped_data, filename)
+            if not is_valid:
+                input_file_path.unlink(missing_ok=True)
+                raise SecurityError(f"File security validation failed: {error_msg}")
+            
+            # The saved bytes were just validated; keep the archive profile so they are not re-read
+            file_stat = input_file_path.stat()
+            self._validated_uploads[str(input_file_path)] = (
+                self.security_validator.archive_profile, list(self.security_validator.validation_warnings),
+                file_stat.st_size, file_stat.st_mtime_ns
+            )
             
-            # Set restrictive file permissions
-            input_file_path.chmod(0o600)
+            # Remember the cache key so a successful run can be stored for identical re-uploads
+            if self.result_cache:
+                self._cache_keys[str(input_file_path)] = self.result_cache.key_for_hash(upload.file_hash)
             
-            # Step 7: Update session state safely while preserving original_filename
+            # Step 6: Update session state safely while preserving original_filename
             # Get current uploaded_file_info to preserve original_filename if it exists
-            current_uploaded_info = safe_get_session_value('uploaded_file_info', {})
+            current_uploaded_info = self._get_session_value('uploaded_file_info', {})
             preserved_original_filename = current_uploaded_info.get('original_filename', filename)
             
-            safe_update_session_state({
+            self._update_session_state({
                 'uploaded_file_info': {
                     'original_filename': preserved_original_filename,  # Preserve original filename
                     'safe_filename': safe_filename,
                     'file_path': str(input_file_path),
-                    'file_size': len(file_data),
+                    'file_size': upload.size,
                     'upload_time': time.time()
                 }
             })
@@ -585,11 +688,10 @@ class StreamlitTSSPipeline:
                 raise SecurityError("Output directory path validation failed")
             
             # Update processing state safely
-            session_manager.update_processing_state(ProcessingState.PROCESSING)
+            self._set_processing_state(ProcessingState.PROCESSING)
             
-            # Reset and initialize quality reporter
-            reset_global_reporter()
-            reporter = get_global_reporter()
+            # Each run reports to its own quality reporter, so concurrent runs do not mix results
+            reporter = self.reporter = QualityReporter()
             reporter.start_processing()
             
             # Initialize processing stats
@@ -597,84 +699,21 @@ class StreamlitTSSPipeline:
                 "start_time": start_time,
                 "input_file": str(input_file_path.name),
                 "steps_completed": 0,
-                "errors": []
+                "errors": [],
+                "cache_hit": False
             }
             
             # Update session state with processing info
-            safe_update_session_state({
+            self._update_session_state({
                 'processing_start_time': start_time,
                 'processing_stats': self.processing_stats
             })
             
-            # Step 1: Template Creation
-            if progress_callback:
-                progress_callback.start_step(1, "Create Template")
-            
-            step1_output = self._run_step1(input_file_path, output_dir)
-            
-            if progress_callback:
-                progress_callback.complete_step(1, "Create Template")
-            self.processing_stats["steps_completed"] = 1
-            
-            # Step 2: Data Extraction
-            if progress_callback:
-                progress_callback.start_step(2, "Extract Data")
-            
-            step2_output = self._run_step2(step1_output, input_file_path, output_dir)
-            
-            if progress_callback:
-                progress_callback.complete_step(2, "Extract Data")
-            self.processing_stats["steps_completed"] = 2
-            
-            # Step 3: Pre-mapping Fill (process SOURCE FILE, not Step2 output)
-            if progress_callback:
-                progress_callback.start_step(3, "Pre-mapping Fill")
-            
-            step3_output = self._run_step3(input_file_path, output_dir)
-            
-            if progress_callback:
-                progress_callback.complete_step(3, "Pre-mapping Fill")
-            self.processing_stats["steps_completed"] = 3
-            
-            # Step 4: Data Mapping (needs Step2 template + Step3 filled source)
-            if progress_callback:
-                progress_callback.start_step(4, "Data Mapping")
-            
-            step4_output = self._run_step4(input_file_path, step2_output, step3_output, output_dir)
-            
-            if progress_callback:
-                progress_callback.complete_step(4, "Data Mapping")
-            self.processing_stats["steps_completed"] = 4
-            
-            # Step 5: Filter & Deduplicate
-            if progress_callback:
-                progress_callback.start_step(5, "Filter & Deduplicate")
-            
-            logger.info(f"Starting Step 5 with input: {step4_output}")
-            logger.info(f"Step 5 output directory: {output_dir}")
-            
-            step5_output = self._run_step5(step4_output, output_dir)
-            
-            logger.info(f"Step 5 output: {step5_output}")
-            
-            if progress_callback:
-                progress_callback.complete_step(5, "Filter & Deduplicate")
-            self.processing_stats["steps_completed"] = 5
-            
-            # Step 6: Article Cross-Reference
-            if progress_callback:
-                progress_callback.start_step(6, "Article Cross-Reference")
-            
-            logger.info(f"Starting Step 6 with input: {step5_output}")
-            logger.info(f"Step 6 output directory: {output_dir}")
-            
-            final_output = self._run_step6(step5_output, output_dir)
-            
-            logger.info(f"Step 6 final output: {final_output}")
-            
-            if progress_callback:
-                progress_callback.complete_step(6, "Article Cross-Reference")
-            self.processing_stats["steps_completed"] = 6
+            # Run the six steps, passing live workbooks between them unless file mode is requested
+            if self.in_memory:
+                final_output = self._run_steps_in_memory(input_file_path, output_dir, progress_callback)
+            else:
+                final_output = self._run_steps_on_files(input_file_path, output_dir, progress_callback)
             
             # Calculate final statistics
             end_time = time.time()
@@ -684,7 +723,7 @@ class StreamlitTSSPipeline:
             quality_summary = reporter.get_user_summary()
             
             # Update processing state
-            session_manager.update_processing_state(ProcessingState.COMPLETED)
+            self._set_processing_state(ProcessingState.COMPLETED)
             
             self.processing_stats.update({
                 "end_time": end_time,
@@ -697,12 +736,19 @@ class StreamlitTSSPipeline:
                 "quality_summary": quality_summary
             })
             
+            # Store the result for identical re-uploads
+            if self.result_cache:
+                cache_key = self._cache_keys.pop(str(input_file_path), None)
+                if cache_key:
+                    self.result_cache.put(cache_key, final_output, self.processing_stats)
+                self.processing_stats["result_cache"] = self.result_cache.get_stats()
+            
             # Update session state with final results
             logger.info(f"🔄 PIPELINE: Updating final session state...")
             logger.info(f"   - final_output: {final_output}")
             logger.info(f"   - final_output exists before session update: {final_output.exists()}")
             
-            safe_update_session_state({
+            self._update_session_state({
                 'processing_stats': self.processing_stats,
                 'output_file_path': str(final_output),
                 'processing_complete': True
@@ -766,10 +812,14 @@ class StreamlitTSSPipeline:
             logger.error(f"Security violation during pipeline: {error_msg}")
             
             # Update processing state safely
-            session_manager.update_processing_state(ProcessingState.ERROR)
+            self._set_processing_state(ProcessingState.ERROR)
+            
+            # A failed run is never cached, so its key is not needed any more
+            self._cache_keys.pop(str(input_file_path), None)
             
             if progress_callback:
-                current_step = self.processing_stats.get("steps_completed", 0) + 1
+                current_step = self.processing_stats.get("failed_step",
+                                                          self.processing_stats.get("steps_completed", 0) + 1)
                 progress_callback.error_step(current_step, error_msg)
             
             self.processing_stats.update({
@@ -780,7 +830,7 @@ class StreamlitTSSPipeline:
                 "error_type": "security_error"
             })
             
-            safe_update_session_state({
+            self._update_session_state({
                 'processing_stats': self.processing_stats,
                 'error_message': error_msg
             })
@@ -795,10 +845,14 @@ class StreamlitTSSPipeline:
             logger.error(f"Error details: {error_details}")
             
             # Update processing state safely
-            session_manager.update_processing_state(ProcessingState.ERROR)
+            self._set_processing_state(ProcessingState.ERROR)
+            
+            # A failed run is never cached, so its key is not needed any more
+            self._cache_keys.pop(str(input_file_path), None)
             
             if progress_callback:
-                current_step = self.processing_stats.get("steps_completed", 0) + 1
+                current_step = self.processing_stats.get("failed_step",
+                                                          self.processing_stats.get("steps_completed", 0) + 1)
                 progress_callback.error_step(current_step, error_msg)
             
             self.processing_stats.update({
@@ -809,13 +863,302 @@ class StreamlitTSSPipeline:
                 "error_details": error_details if STREAMLIT_CONFIG.get("show_error_details") else None
             })
             
-            safe_update_session_state({
+            self._update_session_state({
                 'processing_stats': self.processing_stats,
                 'error_message': error_msg
             })
             
             return False, None, self.processing_stats
     
+    def _run_step_graph(self, steps: List[PipelineStep],
+                        progress_callback: Optional[ProgressCallback]) -> Dict[int, Any]:
+        """
+        Run pipeline steps through the dependency scheduler with progress reporting
+        
+        Independent steps run concurrently; progress callbacks are still issued per step
+        from the calling thread.
+        
+        Returns:
+            Dictionary mapping step number to step result
+        """
+        completed_steps = []
+        
+        def on_start(step_num: int, step_name: str):
+            if progress_callback:
+                progress_callback.start_step(step_num, step_name)
+        
+        def on_complete(step_num: int, step_name: str):
+            completed_steps.append(step_num)
+            if progress_callback:
+                progress_callback.complete_step(step_num, step_name)
+            self.processing_stats["steps_completed"] = len(completed_steps)
+        
+        def on_error(step_num: int, error: Exception):
+            self.processing_stats["failed_step"] = step_num
+        
+        # Steps run on scheduler threads; bind this run's quality reporter there
+        steps = [self._with_reporter(step) for step in steps]
+        
+        if not STREAMLIT_CONFIG.get("collect_step_metrics", True):
+            return StepScheduler().run(steps, on_start, on_complete, on_error)
+        
+        # Measure every step on the thread it runs on
+        step_metrics = []
+        trace_memory = STREAMLIT_CONFIG.get("metrics_trace_memory", False)
+        
+        def instrumented(step: PipelineStep) -> PipelineStep:
+            def run(*args):
+                with measure_step(step.step_num, step.name, trace_memory) as metrics:
+                    try:
+                        return step.func(*args)
+                    finally:
+                        step_metrics.append(metrics)
+            return replace(step, func=run)
+        
+        try:
+            return StepScheduler().run([instrumented(step) for step in steps], on_start, on_complete, on_error)
+        finally:
+            self._publish_step_metrics(sorted(step_metrics, key=lambda m: m.step_num))
+    
+    def _with_reporter(self, step: PipelineStep) -> PipelineStep:
+        """Wrap a step so it reports to this pipeline's quality reporter on whatever thread runs it"""
+        reporter = self.reporter
+        
+        def run(*args):
+            with use_reporter(reporter):
+                return step.func(*args)
+        return replace(step, func=run)
+    
+    def _publish_step_metrics(self, step_metrics: List[StepMetrics]) -> None:
+        """Expose step metrics in processing_stats, the quality report and the optional metrics file"""
+        records = [metrics.to_dict() for metrics in step_metrics]
+        self.processing_stats["step_metrics"] = records
+        self.reporter.record_step_metrics(records)
+        
+        for record in records:
+            logger.info(f"⏱️ Step {record['step_num']} ({record['name']}): {record['wall_time']:.2f}s wall, "
+                        f"{record['cpu_time']:.2f}s CPU, {record['cells_read']} cells read, "
+                        f"{record['cells_written']} written")
+        
+        metrics_file = STREAMLIT_CONFIG.get("metrics_file")
+        if metrics_file:
+            append_metrics_file(metrics_file, records, {
+                "session_id": self.current_session_id,
+                "input_file": self.processing_stats.get("input_file"),
+                "in_memory": self.in_memory,
+                "recorded_at": time.time()
+            })
+    
+    def _run_steps_on_files(self, input_file_path: Path, output_dir: Path,
+                            progress_callback: Optional[ProgressCallback]) -> Path:
+        """
+        Run the pipeline in file mode - every step saves its output and the next step reloads it
+        
+        Step 3 only reads the source file, so it runs alongside Steps 1 and 2.
+        
+        Returns:
+            Path to final output file
+        """
+        steps = [
+            PipelineStep(1, "Create Template",
+                         partial(self._run_step1, input_file_path, output_dir)),
+            PipelineStep(2, "Extract Data",
+                         partial(self._run_step2, source_file=input_file_path, output_dir=output_dir),
+                         depends_on=(1,)),
+            # Step 3 processes the SOURCE FILE, not Step2 output
+            PipelineStep(3, "Pre-mapping Fill",
+                         partial(self._run_step3, input_file_path, output_dir)),
+            # Step 4 needs Step2 template + Step3 filled source
+            PipelineStep(4, "Data Mapping",
+                         partial(self._run_step4, input_file_path, output_dir=output_dir),
+                         depends_on=(2, 3)),
+            PipelineStep(5, "Filter & Deduplicate",
+                         partial(self._run_step5, output_dir=output_dir),
+                         depends_on=(4,)),
+            PipelineStep(6, "Article Cross-Reference",
+                         partial(self._run_step6, output_dir=output_dir),
+                         depends_on=(5,)),
+        ]
+        
+        final_output = self._run_step_graph(steps, progress_callback)[6]
+        
+        logger.info(f"Step 6 final output: {final_output}")
+        return final_output
+    
+    def _run_steps_in_memory(self, input_file_path: Path, output_dir: Path,
+                             progress_callback: Optional[ProgressCallback]) -> Path:
+        """
+        Run the pipeline in memory - the source is loaded once, Steps 1-3 hand live
+        workbooks to each other, Steps 4-6 hand on row streams that are mapped,
+        filtered and cross-referenced on their way into the final workbook, which
+        is the only file written to disk
+        
+        Returns:
+            Path to final output file
+        """
+        self._validate_paths_security(input_file_path, output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        base_name = input_file_path.stem
+        
+        try:
+            if self.save_intermediates:
+                # The Step 3 intermediate is a full copy of the source, so it needs a writable workbook
+                source_wb = openpyxl.load_workbook(str(input_file_path))
+            else:
+                # Stream the source; sheets are only read when a step needs them
+                source_wb = open_source_workbook(input_file_path)
+        except Exception as e:
+            raise TSConverterError(f"Cannot load source file: {str(e)}")
+        
+        try:
+            # Step 3 fills the shared source workbook in place; Step 2 reads its own copy of the
+            # unfilled M-Textile sheets, so the two steps can run at the same time
+            extraction_source = DetachedWorkbook(
+                source_wb, step2_data_extraction.DataExtractor().find_m_textile_sheets(source_wb)
+            )
+        except Exception as e:
+            source_wb.close()
+            raise TSConverterError(f"Step 2 failed: {str(e)}")
+        
+        steps = [
+            PipelineStep(1, "Create Template",
+                         partial(self._run_step1_in_memory, output_dir, base_name)),
+            PipelineStep(2, "Extract Data",
+                         partial(self._run_step2_in_memory, source_wb=extraction_source,
+                                 output_dir=output_dir, base_name=base_name),
+                         depends_on=(1,)),
+            PipelineStep(3, "Pre-mapping Fill",
+                         partial(self._run_step3_in_memory, source_wb, output_dir, base_name)),
+            PipelineStep(4, "Data Mapping",
+                         partial(self._run_step4_in_memory, source_wb=source_wb,
+                                 output_dir=output_dir, base_name=base_name),
+                         depends_on=(2,), after=(3,)),
+            PipelineStep(5, "Filter & Deduplicate",
+                         partial(self._run_step5_in_memory, output_dir=output_dir, base_name=base_name),
+                         depends_on=(4,)),
+            PipelineStep(6, "Article Cross-Reference",
+                         partial(self._run_step6_in_memory, output_dir=output_dir, base_name=base_name),
+                         depends_on=(5,)),
+        ]
+        
+        try:
+            final_output = self._run_step_graph(steps, progress_callback)[6]
+        finally:
+            source_wb.close()
+        
+        logger.info(f"Step 6 final output: {final_output}")
+        return final_output
+    
+    def _save_workbook(self, workbook, output_dir: Path, output_filename: str) -> Path:
+        """Save a workbook into the session output directory with secure permissions"""
+        output_path = output_dir / output_filename
+        if not validate_path_security(output_path, self.temp_dir):
+            raise SecurityError(f"Session output path validation failed: {output_path}")
+        
+        workbook.save(str(output_path))
+        output_path.chmod(0o600)
+        return output_path
+    
+    def _save_intermediate(self, workbook, output_dir: Path, output_filename: str) -> None:
+        """Write an intermediate step result when debug output is enabled"""
+        if self.save_intermediates:
+            saved_path = self._save_workbook(workbook, output_dir, output_filename)
+            logger.info(f"Saved intermediate output: {saved_path}")
+    
+    def _run_step1_in_memory(self, output_dir: Path, base_name: str):
+        """Run Step 1 in memory: build the template workbook"""
+        try:
+            creator = step1_template_creation.TemplateCreator()
+            target_wb = creator.build_template_workbook()
+            self._save_intermediate(target_wb, output_dir, f"{base_name} - Step1.xlsx")
+            return target_wb
+        except SecurityError:
+            raise
+        except Exception as e:
+            raise TSConverterError(f"Step 1 failed: {str(e)}")
+    
+    def _run_step2_in_memory(self, target_wb, source_wb, output_dir: Path, base_name: str):
+        """Run Step 2 in memory: extract M-Textile article data into the template"""
+        try:
+            extractor = step2_data_extraction.DataExtractor()
+            extractor.extract_m_textile_data(target_wb.active, source_wb)
+            self._save_intermediate(target_wb, output_dir, f"{base_name} - Step2.xlsx")
+            return target_wb
+        except SecurityError:
+            raise
+        except Exception as e:
+            raise TSConverterError(f"Step 2 failed: {str(e)}")
+    
+    def _run_step3_in_memory(self, source_wb, output_dir: Path, base_name: str) -> None:
+        """Run Step 3 in memory: fill the loaded source workbook in place"""
+        try:
+            filler = step3_pre_mapping_fill.PreMappingFiller()
+            sheets_processed, cells_filled = filler.fill_workbook(source_wb)
+            logger.info(f"Step 3 (Pre-mapping Fill): processed {sheets_processed} sheets, filled {cells_filled} cells")
+            self._save_intermediate(source_wb, output_dir, f"{base_name} - Step3.xlsx")
+        except SecurityError:
+            raise
+        except Exception as e:
+            raise TSConverterError(f"Step 3 failed: {str(e)}")
+    
+    def _run_step4_in_memory(self, target_wb, source_wb, output_dir: Path, base_name: str) -> RowStream:
+        """Run Step 4 in memory: locate the row blocks of the filled source; rows are mapped as they are read"""
+        try:
+            mapper = step4_data_mapping.DataMapper(base_dir=str(output_dir.parent))
+            mapper.output_dir = output_dir
+            blocks = mapper.find_row_blocks(source_wb)
+            mapped = RowStream(target_wb.active, partial(mapper.iter_row_blocks, source_wb, blocks))
+            self._save_intermediate_rows(mapped, output_dir, f"{base_name} - Step4.xlsx")
+            return mapped
+        except SecurityError:
+            raise
+        except Exception as e:
+            raise TSConverterError(f"Step 4 failed: {str(e)}")
+    
+    def _run_step5_in_memory(self, mapped: RowStream, output_dir: Path, base_name: str) -> RowStream:
+        """Run Step 5 in memory: plan filtering and deduplication in one pass over the mapped rows"""
+        try:
+            filter_dedup = step5_filter_deduplicate.DataFilter()
+            plan = filter_dedup.plan_rows(mapped.rows())
+            filtered = RowStream(mapped.template_ws, lambda: filter_dedup.filter_rows(mapped.rows(), plan))
+            self._save_intermediate_rows(filtered, output_dir, f"{base_name} - Step5.xlsx")
+            return filtered
+        except SecurityError:
+            raise
+        except Exception as e:
+            raise TSConverterError(f"Step 5 failed: {str(e)}")
+    
+    def _run_step6_in_memory(self, filtered: RowStream, output_dir: Path, base_name: str) -> Path:
+        """Run Step 6 in memory: cross-reference the filtered rows while streaming them to the final workbook"""
+        try:
+            crossref = step6_article_crossref.ArticleCrossReference()
+            article_headers = crossref.find_article_headers(filtered.template_ws)
+            final = RowStream(filtered.template_ws,
+                              lambda: crossref.crossref_rows(filtered.rows(), article_headers))
+            final_output = self._write_rows(final, output_dir, f"Standard Internal TSS - {base_name}.xlsx")
+            logger.info(f"Step 6 (Article Cross-Reference) completed successfully: {final_output}")
+            return final_output
+        except SecurityError:
+            raise
+        except Exception as e:
+            raise TSConverterError(f"Step 6 failed: {str(e)}")
+    
+    def _write_rows(self, stream: RowStream, output_dir: Path, output_filename: str) -> Path:
+        """Stream a row stream below its template header block into a session output file"""
+        output_path = output_dir / output_filename
+        if not validate_path_security(output_path, self.temp_dir):
+            raise SecurityError(f"Session output path validation failed: {output_path}")
+        
+        write_output_workbook(stream.template_ws, output_path, stream.rows())
+        output_path.chmod(0o600)
+        return output_path
+    
+    def _save_intermediate_rows(self, stream: RowStream, output_dir: Path, output_filename: str) -> None:
+        """Write an intermediate row stream when debug output is enabled (another pass over its source)"""
+        if self.save_intermediates:
+            saved_path = self._write_rows(stream, output_dir, output_filename)
+            logger.info(f"Saved intermediate output: {saved_path}")
+    
     def _run_step1(self, input_file: Path, output_dir: Path) -> Path:
         """Run Step 1: Template Creation - Direct CLI module call with security wrapper"""
         try:
@@ -988,7 +1331,7 @@ class StreamlitTSSPipeline:
             
             # Also update session state
             logger.info(f"📊 EXTRACT_STATS: Updating session state")
-            safe_update_session_state({
+            self._update_session_state({
                 'processing_stats': self.processing_stats
             })
             
@@ -1049,7 +1392,8 @@ class StreamlitTSSPipeline:
                 logger.error(f"Failed to cleanup session {self.current_session_id}: {e}")
             finally:
                 self.current_session_id = None
-                session_manager.cleanup_session_state()
+                if self.use_session_state:
+                    session_manager.cleanup_session_state()
     
     def validate_input_file(self, file_path: Path) -> Tuple[bool, str]:
         """
@@ -1088,16 +1432,25 @@ class StreamlitTSSPipeline:
                 logger.warning(f"File size check failed: {e}")
                 validation_warnings.append("Không thể kiểm tra kích thước file")
             
-            # Enhanced security validation with full file read
+            # Enhanced security validation; an upload saved by save_uploaded_file was already
+            # validated from the same bytes, so its result is reused unless the file changed
+            archive_profile = None
             try:
-                with open(file_path, 'rb') as f:
-                    file_data = f.read()  # Read full file for comprehensive validation
-                
-                is_valid, error_msg = self.security_validator.validate_file(file_data, file_path.name)
+                file_stat = file_path.stat()
+                validated = self._validated_uploads.pop(str(file_path), None)
+                if validated and validated[2:] == (file_stat.st_size, file_stat.st_mtime_ns):
+                    archive_profile, upload_warnings = validated[0], validated[1]
+                    validation_warnings.extend(upload_warnings)
+                    is_valid, error_msg = True, None
+                else:
+                    # Map rather than read the file, so validation does not hold another copy of it
+                    with map_file(file_path) as file_data:
+                        is_valid, error_msg = self.security_validator.validate_file(file_data, file_path.name)
+                    archive_profile = self.security_validator.archive_profile
                 
-                # Check if validator has warnings (for lenient mode)
-                if hasattr(self.security_validator, 'validation_warnings') and self.security_validator.validation_warnings:
-                    validation_warnings.extend(self.security_validator.validation_warnings)
+                    # Check if validator has warnings (for lenient mode)
+                    if hasattr(self.security_validator, 'validation_warnings') and self.security_validator.validation_warnings:
+                        validation_warnings.extend(self.security_validator.validation_warnings)
                 
                 if not is_valid:
                     logger.error(f"Security validation failed for {file_path.name}: {error_msg}")
@@ -1116,27 +1469,35 @@ class StreamlitTSSPipeline:
                 logger.error(f"Security validation error: {e}")
                 return False, f"Lỗi kiểm tra bảo mật: {str(e)}"
             
-            # Basic structure validation with fallback
+            # Basic structure validation with fallback; the archive profile already lists the
+            # workbook parts, so the file is only opened with openpyxl when it is not a readable ZIP
             excel_validation_passed = False
-            try:
-                import openpyxl
-                wb = openpyxl.load_workbook(file_path, read_only=True)
-                if not wb.worksheets:
-                    wb.close()
-                    validation_warnings.append("File Excel có vấn đề về cấu trúc")
-                else:
+            if archive_profile is not None and archive_profile.is_zip:
+                if archive_profile.has_member('xl/workbook.xml') and archive_profile.worksheet_count:
                     excel_validation_passed = True
-                    wb.close()
                     logger.info(f"Excel structure validation passed for {file_path.name}")
+                else:
+                    validation_warnings.append("File Excel có vấn đề về cấu trúc")
+            else:
+                try:
+                    import openpyxl
+                    wb = openpyxl.load_workbook(file_path, read_only=True)
+                    if not wb.worksheets:
+                        wb.close()
+                        validation_warnings.append("File Excel có vấn đề về cấu trúc")
+                    else:
+                        excel_validation_passed = True
+                        wb.close()
+                        logger.info(f"Excel structure validation passed for {file_path.name}")
                     
-            except ImportError:
-                logger.warning("openpyxl not available for Excel validation")
-                validation_warnings.append("Không thể kiểm tra cấu trúc Excel chi tiết")
-                excel_validation_passed = True  # Allow in degraded mode
-            except Exception as excel_error:
-                logger.warning(f"Excel structure validation failed: {excel_error}")
-                validation_warnings.append(f"Cấu trúc Excel có vấn đề: {str(excel_error)}")
-                # Don't fail completely - might still be processable
+                except ImportError:
+                    logger.warning("openpyxl not available for Excel validation")
+                    validation_warnings.append("Không thể kiểm tra cấu trúc Excel chi tiết")
+                    excel_validation_passed = True  # Allow in degraded mode
+                except Exception as excel_error:
+                    logger.warning(f"Excel structure validation failed: {excel_error}")
+                    validation_warnings.append(f"Cấu trúc Excel có vấn đề: {str(excel_error)}")
+                    # Don't fail completely - might still be processable
             
             # Compile validation result
             if validation_warnings:
@@ -1157,7 +1518,7 @@ class StreamlitTSSPipeline:
         """Get current processing statistics from secure session state"""
         try:
             # Get stats from secure session state if available
-            session_stats = safe_get_session_value('processing_stats', {})
+            session_stats = self._get_session_value('processing_stats', {})
             if session_stats:
                 return session_stats.copy()
             return self.processing_stats.copy()
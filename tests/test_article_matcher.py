@@ -0,0 +1,122 @@
+"""
+Article matcher tests for TSS Converter
+Tests the Step 6 matching engine and the memoized article list resolution
+"""
+
+import unittest
+import random
+import tempfile
+import shutil
+from pathlib import Path
+
+import openpyxl
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.article_matcher import AhoCorasick, ArticleMatcher
+from step6_article_crossref import ArticleCrossReference
+
+
+def brute_force_matches(normalized_name, article_headers):
+    """Reference rule: exact match, else bidirectional substring test per header"""
+    if not normalized_name:
+        return []
+    if normalized_name in article_headers:
+        return [article_headers[normalized_name]]
+    return [col for name, col in article_headers.items()
+            if normalized_name in name or name in normalized_name]
+
+
+class TestArticleMatcher(unittest.TestCase):
+    """Test the multi-pattern article matcher"""
+    
+    def setUp(self):
+        self.headers = {
+            "stuk stor case 34x51x28 white/black": 18,
+            "stuk stor case 34x51x28 white/black ap": 19,
+            "case": 20,
+            "skubb box": 21,
+        }
+        self.matcher = ArticleMatcher(self.headers)
+    
+    def test_automaton_finds_overlapping_patterns(self):
+        """Test all patterns occurring in a text are reported"""
+        automaton = AhoCorasick(["he", "she", "his", "hers"])
+        self.assertEqual(automaton.search("ushers"), {0, 1, 3})
+        self.assertEqual(automaton.search("xyz"), set())
+    
+    def test_automaton_scan_resumes_across_chunks(self):
+        """Test a pattern split across chunks is found by carrying the state"""
+        automaton = AhoCorasick([b"<script", b"eval("])
+        found, state = automaton.scan(b"<table><scr")
+        self.assertEqual(found, set())
+        found, state = automaton.scan(b"ipt>", state)
+        self.assertEqual(found, {0})
+        self.assertEqual(automaton.scan(b"ipt>")[0], set())
+    
+    def test_exact_match_wins(self):
+        """Test an exact header match returns only that column"""
+        self.assertEqual(self.matcher.match("case"), [20])
+        self.assertEqual(self.matcher.match("stuk stor case 34x51x28 white/black"), [18])
+    
+    def test_substring_matches_in_header_order(self):
+        """Test headers containing or contained in the name all match"""
+        self.assertEqual(self.matcher.match("stor case"), [18, 19, 20])
+        self.assertEqual(self.matcher.match("skubb box 2-pack case"), [20, 21])
+        self.assertEqual(self.matcher.match("kallax"), [])
+        self.assertEqual(self.matcher.match(""), [])
+    
+    def test_matches_brute_force_rule(self):
+        """Test random headers and names give the same result as the reference rule"""
+        rng = random.Random(7)
+        alphabet = "ab c"
+        for _ in range(50):
+            headers = {}
+            for col in range(18, 18 + rng.randint(1, 12)):
+                name = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6))).strip()
+                if name and name not in headers:
+                    headers[name] = col
+            matcher = ArticleMatcher(headers)
+            for _ in range(30):
+                name = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 8))).strip()
+                self.assertEqual(matcher.match(name), brute_force_matches(name, headers), (name, headers))
+
+
+class TestArticleListMemo(unittest.TestCase):
+    """Test repeated column Q lists are resolved once per worksheet"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.crossref = ArticleCrossReference(base_dir=str(self.temp_dir))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_repeated_lists_hit_the_cache(self):
+        """Test identical lists give identical marks and count as cache hits"""
+        worksheet = openpyxl.Workbook().active
+        worksheet["R1"] = "STUK box"
+        worksheet["S1"] = "SKUBB case"
+        for row in range(11, 16):
+            worksheet.cell(row, 17, "1. STUK box;\n2.  skubb   CASE;")
+        worksheet["Q16"] = "KALLAX"
+        
+        stats = self.crossref.crossref_worksheet(worksheet)
+        
+        self.assertEqual(stats['processed_rows'], 6)
+        self.assertEqual(stats['total_matches'], 10)
+        self.assertEqual((stats['list_cache_hits'], stats['list_cache_misses']), (4, 2))
+        self.assertEqual([worksheet.cell(15, col).value for col in (18, 19)], ["X", "X"])
+        self.assertIsNone(worksheet["R16"].value)
+        self.assertIsNone(worksheet["Q11"].value)
+    
+    def test_resolve_article_list(self):
+        """Test a list resolves to its article count and de-duplicated columns"""
+        headers = {"stuk box": 18, "stuk box white": 19}
+        self.assertEqual(self.crossref.resolve_article_list("1. STUK box white;2. stuk", headers), (2, (19, 18)))
+        self.assertEqual(self.crossref.resolve_article_list(" ; ", headers), (0, ()))
+
+
+if __name__ == '__main__':
+    unittest.main()
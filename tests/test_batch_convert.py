@@ -0,0 +1,78 @@
+"""
+Batch conversion tests for TSS Converter
+Tests input collection and pooled conversion with the JSON summary
+"""
+
+import unittest
+import tempfile
+import shutil
+import json
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from batch_convert import BatchConverter
+
+
+class TestBatchConverter(unittest.TestCase):
+    """Test batch conversion of several workbooks"""
+    
+    def setUp(self):
+        self.source_file = Path(__file__).parent.parent / "input" / "Input-4.xlsx"
+        if not self.source_file.exists():
+            self.skipTest("Sample input file not available")
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.input_dir = self.temp_dir / "in"
+        self.input_dir.mkdir()
+        self.converter = BatchConverter(self.temp_dir / "out", max_workers=2)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_collect_input_files(self):
+        """Test directories, globs and files resolve to unique Excel files"""
+        shutil.copy(self.source_file, self.input_dir / "b.xlsx")
+        shutil.copy(self.source_file, self.input_dir / "a.xlsx")
+        shutil.copy(self.source_file, self.input_dir / "~$a.xlsx")
+        (self.input_dir / "notes.txt").write_text("not a workbook")
+        
+        files = self.converter.collect_input_files([
+            str(self.input_dir / "b.xlsx"),
+            str(self.input_dir),
+            str(self.input_dir / "*.txt"),
+            str(self.input_dir / "missing.xlsx")
+        ])
+        
+        self.assertEqual([f.name for f in files], ["b.xlsx", "a.xlsx"])
+    
+    def test_run_writes_outputs_and_summary(self):
+        """Test same-named inputs are converted on the pool into distinct outputs"""
+        other_dir = self.temp_dir / "other"
+        other_dir.mkdir()
+        shutil.copy(self.source_file, self.input_dir / "Input-4.xlsx")
+        shutil.copy(self.source_file, other_dir / "Input-4.xlsx")
+        broken = self.input_dir / "broken.xlsx"
+        broken.write_bytes(b"not a zip file")
+        
+        files = [self.input_dir / "Input-4.xlsx", other_dir / "Input-4.xlsx", broken]
+        summary = self.converter.run(files)
+        summary_file = self.converter.write_summary(summary)
+        
+        self.assertEqual(json.loads(summary_file.read_text(encoding='utf-8')), summary)
+        self.assertEqual((summary["files_total"], summary["files_succeeded"], summary["files_failed"]), (3, 2, 1))
+        self.assertEqual(summary["max_workers"], 2)
+        
+        results = summary["results"]
+        self.assertEqual([r["input_file"] for r in results], [str(f) for f in files])
+        self.assertEqual(len({r["output_file"] for r in results[:2]}), 2)
+        for result in results[:2]:
+            self.assertTrue(Path(result["output_file"]).exists())
+            self.assertIsNotNone(result["quality_score"])
+            self.assertGreater(result["processing_time"], 0)
+        self.assertFalse(results[2]["success"])
+        self.assertTrue(results[2]["error_message"])
+
+
+if __name__ == '__main__':
+    unittest.main()
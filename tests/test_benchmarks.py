@@ -0,0 +1,106 @@
+"""
+Benchmark suite tests for TSS Converter
+Tests workbook scaling and regression detection against a baseline
+"""
+
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import openpyxl
+
+from benchmarks.workbooks import build_scaled_workbook, count_requirement_rows
+from benchmarks.run_benchmarks import compare_results
+
+
+def _results(total_time, step_times, peak_kb=None):
+    """Results dictionary with one case and the pipeline suite"""
+    return {"cases": {"scaled-1000": {"pipeline": {
+        "total_time": total_time,
+        "steps": [{"step_num": num, "name": f"Step {num}", "wall_time": wall, "traced_peak_kb": peak_kb}
+                  for num, wall in enumerate(step_times, start=1)]
+    }}}}
+
+
+class TestScaledWorkbooks(unittest.TestCase):
+    """Test building larger benchmark inputs"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws.title = "M-Plastic"
+        ws["A1"] = "TEST PLAN / SUMMARY"
+        ws["A3"] = "Product combination"
+        ws["A4"] = "No."
+        for row in range(5, 8):
+            ws.cell(row, 1, row - 4)
+            ws.cell(row, 2, f"Requirement {row - 4}")
+        wb.create_sheet("Notes")["A1"] = "Not a typed sheet"
+        self.template = self.temp_dir / "template.xlsx"
+        wb.save(str(self.template))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def test_count_requirement_rows(self):
+        """Only rows below the typed sheet's header are counted"""
+        self.assertEqual(count_requirement_rows(self.template), {"M-Plastic": 3})
+    
+    def test_scaled_workbook_repeats_rows(self):
+        """Scaled workbooks reach the target by repeating requirement rows"""
+        scaled = build_scaled_workbook(self.template, 10, self.temp_dir / "scaled.xlsx")
+        
+        self.assertEqual(count_requirement_rows(scaled), {"M-Plastic": 10})
+        ws = openpyxl.load_workbook(str(scaled))["M-Plastic"]
+        self.assertEqual(ws["B8"].value, "Requirement 1")
+        self.assertEqual(ws["B14"].value, "Requirement 1")
+        self.assertEqual(ws["A1"].value, "TEST PLAN / SUMMARY")
+
+
+class TestCompareResults(unittest.TestCase):
+    """Test regression detection"""
+    
+    def test_no_regression_within_tolerance(self):
+        """Slowdowns within tolerance are not reported"""
+        baseline = _results(2.0, [1.0, 1.0])
+        current = _results(2.2, [1.1, 1.1])
+        self.assertEqual(compare_results(current, baseline, tolerance=0.25), [])
+    
+    def test_step_regression_reported(self):
+        """A step slower than the tolerance is reported"""
+        baseline = _results(2.0, [1.0, 1.0])
+        current = _results(2.4, [1.0, 1.4])
+        
+        regressions = compare_results(current, baseline, tolerance=0.25)
+        
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0]["step"], 2)
+        self.assertEqual(regressions[0]["metric"], "wall_time")
+    
+    def test_tiny_absolute_changes_ignored(self):
+        """Relative jumps on very short steps are treated as noise"""
+        baseline = _results(0.02, [0.01, 0.01])
+        current = _results(0.04, [0.02, 0.02])
+        self.assertEqual(compare_results(current, baseline), [])
+    
+    def test_memory_regression_reported(self):
+        """Peak memory growth beyond tolerance is reported"""
+        baseline = _results(2.0, [1.0], peak_kb=10240)
+        current = _results(2.0, [1.0], peak_kb=20480)
+        
+        regressions = compare_results(current, baseline)
+        
+        self.assertEqual([r["metric"] for r in regressions], ["traced_peak_kb"])
+    
+    def test_missing_cases_skipped(self):
+        """Cases absent from the baseline are not compared"""
+        self.assertEqual(compare_results(_results(5.0, [5.0]), {"cases": {}}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Data mapping tests for TSS Converter
+Tests compiled Step 4 mapping plans and the row executor
+"""
+
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import openpyxl
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from step4_data_mapping import DataMapper, MappingPlan
+
+
+class TestMappingPlans(unittest.TestCase):
+    """Test integer-indexed mapping plans"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.mapper = DataMapper(base_dir=str(self.temp_dir))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_plans_are_compiled_per_sheet_type(self):
+        """Test column letters and combination rules become column numbers"""
+        plan = self.mapper.mapping_plans['F']
+        self.assertEqual(plan.combination, (11, 12))
+        self.assertEqual(plan.column_a_prefix, "Art")
+        self.assertIn((2, 17), plan.columns)
+        self.assertIsNone(self.mapper.mapping_plans['M'].column_a_prefix)
+        
+        plan = self.mapper.compile_mapping_plan('X', {'AA': 'C'})
+        self.assertEqual(plan, MappingPlan('X', ((27, 3),), delimiter='-'))
+        self.assertEqual(plan.width, 3)
+    
+    def test_rows_are_mapped_until_first_empty_row(self):
+        """Test the executor yields target tuples and stops at an empty source row"""
+        source_ws = openpyxl.Workbook().active
+        source_ws["B3"] = "Article list"
+        source_ws["C3"] = "Type"
+        source_ws["O3"] = "Designation"
+        source_ws["P3"] = "Code"
+        source_ws["C4"] = "Second"
+        source_ws["P4"] = "Only P"
+        source_ws["C6"] = "After gap"
+        plan = MappingPlan('M', ((2, 17), (3, 2)), combination=(15, 16))
+        
+        rows = list(self.mapper.iter_mapped_rows(plan, source_ws, 3))
+        
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(len(rows[0]), 17)
+        self.assertEqual((rows[0][1], rows[0][8], rows[0][16]), ("Type", "Designation-Code", "Article list"))
+        self.assertEqual((rows[1][1], rows[1][8], rows[1][16]), ("Second", "Only P", None))
+        
+        target_ws = openpyxl.Workbook().active
+        self.assertEqual(self.mapper.write_mapped_rows(rows, target_ws, 11), 13)
+        self.assertEqual(target_ws["I11"].value, "Designation-Code")
+        self.assertIsNone(target_ws["Q12"].value)
+    
+    def test_parallel_mapping_matches_serial(self):
+        """Test sheets mapped on a process pool are merged in workbook order"""
+        source_file = self.temp_dir / "source.xlsx"
+        workbook = openpyxl.Workbook()
+        workbook.active.title = "Notes"
+        for index, name in enumerate(["M-Textile", "C-Zipper", "P- Coating"]):
+            worksheet = workbook.create_sheet(name)
+            worksheet["A1"] = "Product combination"
+            for row in range(3, 6 + index):
+                worksheet.cell(row, 2, f"{name} article {row}")
+                worksheet.cell(row, 3, f"{name} type {row}")
+        workbook.save(str(source_file))
+        
+        def mapped_values(source_path):
+            target_ws = openpyxl.Workbook().active
+            source_wb = openpyxl.load_workbook(str(source_file))
+            next_row = self.mapper.map_workbook(source_wb, target_ws, source_path=source_path)
+            return next_row, [list(row) for row in target_ws.iter_rows(values_only=True)]
+        
+        serial = mapped_values(None)
+        self.mapper.max_workers = 2
+        self.mapper.parallel_min_sheets = 2
+        
+        # The pool falls back to serial mapping on failure, so check it really produced the blocks
+        pool_results = []
+        map_sheets_parallel = self.mapper.map_sheets_parallel
+        
+        def spy(*args, **kwargs):
+            pool_results.append(map_sheets_parallel(*args, **kwargs))
+            return pool_results[-1]
+        
+        with patch.object(self.mapper, "map_sheets_parallel", side_effect=spy):
+            parallel = mapped_values(source_file)
+        
+        self.assertEqual(len(pool_results), 1)
+        self.assertIsNotNone(pool_results[0])
+        self.assertEqual(parallel, serial)
+        self.assertEqual(serial[0], 23)
+        self.assertEqual(serial[1][10][16], "M-Textile article 3")
+        self.assertEqual(serial[1][21][16], "P- Coating article 7")
+
+
+if __name__ == '__main__':
+    unittest.main()
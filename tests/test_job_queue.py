@@ -0,0 +1,100 @@
+"""
+Job queue tests for TSS Converter
+Tests bounded submission, progress snapshots, cancellation and eviction
+"""
+
+import unittest
+import threading
+import time
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.job_queue import JobQueue, JobStatus, QueueFullError
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test the background job queue"""
+    
+    def setUp(self):
+        self.queue = JobQueue(max_workers=1, max_queued=1, retention_seconds=3600)
+        self.release = threading.Event()
+    
+    def tearDown(self):
+        self.release.set()
+        self.queue.shutdown()
+    
+    def _wait_for(self, job_id, statuses, timeout=5.0):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = self.queue.get(job_id)
+            if job["status"] in statuses:
+                return job
+            time.sleep(0.01)
+        self.fail(f"Job {job_id} did not reach {statuses}")
+    
+    def _blocking_runner(self, job):
+        job.update_progress({"current_step": 1, "message": "Running Step 1..."})
+        self.release.wait(5)
+        job.update_progress({"current_step": 2, "message": "Running Step 2..."})
+        return {"success": True}
+    
+    def test_job_runs_and_reports_progress(self):
+        """Test progress is visible while running and the result once completed"""
+        job_id = self.queue.submit(self._blocking_runner, name="upload.xlsx")
+        
+        self._wait_for(job_id, {"running"})
+        while self.queue.get(job_id)["progress"]["current_step"] != 1:
+            time.sleep(0.01)
+        self.assertEqual(self.queue.get_stats()["running"], 1)
+        
+        self.release.set()
+        job = self._wait_for(job_id, {"completed"})
+        self.assertEqual(job["result"], {"success": True})
+        self.assertEqual(job["progress"]["message"], "Running Step 2...")
+        self.assertIsNotNone(job["finished_at"])
+    
+    def test_queue_depth_limit(self):
+        """Test submissions beyond running + queued capacity are rejected"""
+        self.queue.submit(self._blocking_runner)
+        self.queue.submit(self._blocking_runner)
+        
+        with self.assertRaises(QueueFullError):
+            self.queue.submit(self._blocking_runner)
+        
+        self.release.set()
+    
+    def test_cancel_queued_and_running_jobs(self):
+        """Test queued jobs never start and running jobs stop at their next progress update"""
+        running_id = self.queue.submit(self._blocking_runner)
+        queued_id = self.queue.submit(self._blocking_runner)
+        self._wait_for(running_id, {"running"})
+        
+        self.assertTrue(self.queue.cancel(queued_id))
+        self.assertEqual(self.queue.get(queued_id)["status"], JobStatus.CANCELLED.value)
+        
+        self.assertTrue(self.queue.cancel(running_id))
+        self.release.set()
+        job = self._wait_for(running_id, {"cancelled"})
+        self.assertEqual(job["progress"]["current_step"], 2)  # Stopped right after reporting
+        self.assertIsNone(job["result"])
+        self.assertFalse(self.queue.cancel(running_id))
+    
+    def test_failed_jobs_and_eviction(self):
+        """Test runner errors mark the job failed and old finished jobs are dropped"""
+        def failing_runner(job):
+            raise ValueError("broken workbook")
+        
+        job_id = self.queue.submit(failing_runner)
+        job = self._wait_for(job_id, {"failed"})
+        self.assertEqual(job["error_message"], "broken workbook")
+        
+        self.queue.retention_seconds = 0
+        time.sleep(0.01)
+        self.queue.submit(lambda job: {})
+        self.assertIsNone(self.queue.get(job_id))
+
+
+if __name__ == '__main__':
+    unittest.main()
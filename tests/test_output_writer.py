@@ -0,0 +1,112 @@
+"""
+Output writer tests for TSS Converter
+Tests streamed final workbooks keep the template header block and data rows
+"""
+
+import unittest
+import tempfile
+import shutil
+import tracemalloc
+from pathlib import Path
+
+import openpyxl
+from openpyxl.styles import Alignment, Font, PatternFill
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.output_writer import write_output_workbook
+from step5_filter_deduplicate import DataFilter
+from step6_article_crossref import ArticleCrossReference
+
+
+class TestStreamingOutputWriter(unittest.TestCase):
+    """Test write-only output of the final sheet"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.output_file = self.temp_dir / "final.xlsx"
+        
+        workbook = openpyxl.Workbook()
+        self.template_ws = workbook.active
+        self.template_ws.title = "Output Template"
+        
+        header = self.template_ws.cell(10, 1, "Article")
+        header.font = Font(bold=True, color="FF0000")
+        header.fill = PatternFill(start_color="DDEBF7", end_color="DDEBF7", fill_type="solid")
+        self.template_ws.column_dimensions["A"].width = 25
+        
+        self.template_ws.merge_cells("R1:R9")
+        name = self.template_ws.cell(1, 18, "Shirt")
+        name.alignment = Alignment(horizontal="center", vertical="center", text_rotation=90)
+        
+        self.template_ws.cell(11, 1, "Art")
+        self.template_ws.cell(11, 18, "X")
+        self.template_ws.cell(12, 2, 42)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_header_block_is_preserved(self):
+        """Test header styling, column widths and merged article columns survive"""
+        write_output_workbook(self.template_ws, self.output_file)
+        
+        worksheet = openpyxl.load_workbook(str(self.output_file)).active
+        self.assertEqual(worksheet.title, "Output Template")
+        self.assertEqual(worksheet.cell(10, 1).value, "Article")
+        self.assertTrue(worksheet.cell(10, 1).font.b)
+        self.assertEqual(worksheet.cell(10, 1).fill.fgColor.rgb, "00DDEBF7")
+        self.assertEqual(worksheet.column_dimensions["A"].width, 25)
+        self.assertEqual([str(r) for r in worksheet.merged_cells.ranges], ["R1:R9"])
+        self.assertEqual(worksheet.cell(1, 18).alignment.text_rotation, 90)
+    
+    def test_data_rows_are_streamed(self):
+        """Test data rows come from the template by default or from a given stream"""
+        self.assertEqual(write_output_workbook(self.template_ws, self.output_file), 2)
+        worksheet = openpyxl.load_workbook(str(self.output_file)).active
+        self.assertEqual(worksheet.cell(11, 1).value, "Art")
+        self.assertEqual(worksheet.cell(11, 18).value, "X")
+        self.assertEqual(worksheet.cell(12, 2).value, 42)
+        
+        rows = (("Row", index) for index in range(3))
+        self.assertEqual(write_output_workbook(self.template_ws, self.output_file, rows), 3)
+        worksheet = openpyxl.load_workbook(str(self.output_file)).active
+        self.assertEqual(worksheet.max_row, 13)
+        self.assertEqual(worksheet.cell(13, 2).value, 2)
+    
+    def _peak_streamed_memory(self, row_count: int) -> int:
+        """Stream generated rows through Steps 5 and 6 into the writer and return peak traced memory"""
+        def rows():
+            for index in range(row_count):
+                yield (f"Art {index}", "B", "C", "D", "E", "F", "G", "TR", "I", "J",
+                       "K", "L", "M", "Yearly", "NA", "P", "1.Shirt")
+        
+        filter_dedup = DataFilter(str(self.temp_dir))
+        crossref = ArticleCrossReference(str(self.temp_dir))
+        article_headers = crossref.find_article_headers(self.template_ws)
+        
+        tracemalloc.start()
+        try:
+            plan = filter_dedup.plan_rows(rows())
+            final_rows = crossref.crossref_rows(filter_dedup.filter_rows(rows(), plan), article_headers)
+            self.assertEqual(write_output_workbook(self.template_ws, self.output_file, final_rows), row_count)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    
+    def test_streamed_rows_do_not_grow_memory(self):
+        """Test peak memory of streaming Steps 5 and 6 into the writer does not scale with row count"""
+        small_peak = self._peak_streamed_memory(1000)
+        large_peak = self._peak_streamed_memory(4000)
+        self.assertLess(large_peak, small_peak * 1.5)
+        
+        worksheet = openpyxl.load_workbook(str(self.output_file), read_only=True).active
+        last_row = next(worksheet.iter_rows(min_row=4010, max_row=4010, values_only=True))
+        self.assertEqual(last_row[0], "Art 3999")
+        self.assertIsNone(last_row[14])  # "NA" cleared from column O
+        self.assertIsNone(last_row[16])  # article list cleared from column Q
+        self.assertEqual(last_row[17], "X")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,9 @@ Tests the core processing pipeline and error handling
 import unittest
 import tempfile
 import shutil
+import io
 import os
+import threading
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -14,7 +16,10 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from streamlit_pipeline import StreamlitTSSPipeline, ProgressCallback, ResourceManager, with_retry
-from common.exceptions import TSConverterError
+from common.exceptions import TSConverterError, ConfigurationError
+from common.step_scheduler import StepScheduler, PipelineStep
+from common.result_cache import ResultCache
+from common.security import calculate_file_hash
 
 
 class TestResourceManager(unittest.TestCase):
@@ -219,6 +224,205 @@ class TestPipelineIntegration(unittest.TestCase):
         self.assertTrue(saved_path.exists())
         self.assertEqual(saved_path.read_bytes(), test_content)
         self.assertEqual(saved_path.name, filename)
+    
+    def test_job_pipeline_leaves_session_state_alone(self):
+        """Test a pipeline without session state saves uploads without session state I/O"""
+        pipeline = StreamlitTSSPipeline(use_session_state=False)
+        try:
+            with patch("streamlit_pipeline.safe_update_session_state") as update, \
+                 patch("streamlit_pipeline.safe_get_session_value") as get, \
+                 patch("streamlit_pipeline.session_manager") as manager:
+                saved_path = pipeline.save_uploaded_file(b"test file content", "job.xlsx")
+                pipeline.cleanup_session()
+            
+            self.assertFalse(saved_path.exists())
+            update.assert_not_called()
+            get.assert_not_called()
+            self.assertEqual(manager.method_calls, [])
+        finally:
+            pipeline.cleanup_session()
+    
+    def test_failed_run_drops_cache_key(self):
+        """Test the result cache key of an upload is released when its run fails"""
+        cache_dir = Path(tempfile.mkdtemp())
+        try:
+            self.pipeline.result_cache = ResultCache(cache_dir)
+            saved_path = self.pipeline.save_uploaded_file(b"test file content", "broken.xlsx")
+            self.assertIn(str(saved_path), self.pipeline._cache_keys)
+            
+            success, _, _ = self.pipeline.process_pipeline(saved_path)
+            
+            self.assertFalse(success)
+            self.assertEqual(self.pipeline._cache_keys, {})
+            self.assertEqual(list(cache_dir.iterdir()), [])
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+    
+    def test_cached_result_found_by_upload_hash(self):
+        """Test the cache lookup reuses the hash taken while saving the upload"""
+        cache_dir = Path(tempfile.mkdtemp())
+        try:
+            self.pipeline.result_cache = ResultCache(cache_dir)
+            result_file = cache_dir.parent / f"{cache_dir.name}-result.xlsx"
+            result_file.write_bytes(b"final workbook")
+            self.pipeline.result_cache.put(
+                self.pipeline.result_cache.key_for_hash(calculate_file_hash(b"test file content")),
+                result_file, {"quality_score": 90.0}
+            )
+            result_file.unlink()
+            
+            with patch.object(ResultCache, "make_key") as make_key:
+                saved_path = self.pipeline.save_uploaded_file(io.BytesIO(b"test file content"), "cached.xlsx")
+                cached_output, stats = self.pipeline.get_cached_result(saved_path)
+            
+            make_key.assert_not_called()
+            self.assertEqual(cached_output.read_bytes(), b"final workbook")
+            self.assertTrue(stats["cache_hit"])
+            self.assertEqual(stats["quality_score"], 90.0)
+        finally:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+class TestStepScheduler(unittest.TestCase):
+    """Test dependency-graph step scheduling"""
+    
+    def test_results_passed_to_dependents(self):
+        """Test dependency results are passed in depends_on order"""
+        steps = [
+            PipelineStep(1, "one", lambda: 1),
+            PipelineStep(2, "two", lambda: 2),
+            PipelineStep(3, "sum", lambda a, b: (a, b), depends_on=(2, 1)),
+        ]
+        
+        results = StepScheduler(max_workers=2).run(steps)
+        
+        self.assertEqual(results[3], (2, 1))
+    
+    def test_independent_steps_run_concurrently(self):
+        """Test steps without dependencies between them overlap"""
+        barrier = threading.Barrier(2, timeout=5)
+        steps = [
+            PipelineStep(1, "left", barrier.wait),
+            PipelineStep(2, "right", barrier.wait),
+        ]
+        
+        # Would raise BrokenBarrierError if the steps ran one after another
+        StepScheduler(max_workers=2).run(steps)
+    
+    def test_after_orders_without_passing_results(self):
+        """Test ordering-only dependencies"""
+        order = []
+        steps = [
+            PipelineStep(1, "first", lambda: order.append(1)),
+            PipelineStep(2, "second", lambda: order.append(2), after=(1,)),
+        ]
+        
+        StepScheduler(max_workers=2).run(steps)
+        
+        self.assertEqual(order, [1, 2])
+    
+    def test_progress_callbacks_and_failure(self):
+        """Test callbacks fire per step and a failure stops dependents"""
+        events = []
+        
+        def failing_step(_):
+            raise ValueError("boom")
+        
+        steps = [
+            PipelineStep(1, "ok", lambda: "done"),
+            PipelineStep(2, "fails", failing_step, depends_on=(1,)),
+            PipelineStep(3, "never", lambda _: None, depends_on=(2,)),
+        ]
+        
+        with self.assertRaises(ValueError):
+            StepScheduler(max_workers=2).run(
+                steps,
+                on_start=lambda num, name: events.append(("start", num)),
+                on_complete=lambda num, name: events.append(("complete", num)),
+                on_error=lambda num, error: events.append(("error", num)),
+            )
+        
+        self.assertEqual(events, [("start", 1), ("complete", 1), ("start", 2), ("error", 2)])
+    
+    def test_cycle_rejected(self):
+        """Test dependency cycles are reported as configuration errors"""
+        steps = [
+            PipelineStep(1, "a", lambda _: None, depends_on=(2,)),
+            PipelineStep(2, "b", lambda _: None, depends_on=(1,)),
+        ]
+        
+        with self.assertRaises(ConfigurationError):
+            StepScheduler().run(steps)
+
+
+class TestInMemoryPipeline(unittest.TestCase):
+    """Test that in-memory mode matches file mode and only writes the final output"""
+    
+    def setUp(self):
+        self.source_file = Path(__file__).parent.parent / "input" / "Input-4.xlsx"
+        if not self.source_file.exists():
+            self.skipTest("Sample input file not available")
+        self.pipelines = []
+    
+    def tearDown(self):
+        for pipeline in self.pipelines:
+            if pipeline.current_session_id:
+                pipeline.cleanup_session()
+    
+    def _run_pipeline(self, in_memory):
+        pipeline = StreamlitTSSPipeline(in_memory=in_memory)
+        pipeline.save_intermediates = False
+        # Runs must not leave entries in the shared result cache directory
+        pipeline.result_cache = None
+        self.pipelines.append(pipeline)
+        
+        input_path = pipeline.save_uploaded_file(self.source_file.read_bytes(), self.source_file.name)
+        success, final_output, stats = pipeline.process_pipeline(input_path)
+        self.assertTrue(success, stats.get("error_message"))
+        return final_output
+    
+    def _read_values(self, path):
+        import openpyxl
+        wb = openpyxl.load_workbook(path)
+        values = [row for row in wb.active.iter_rows(values_only=True) if any(v is not None for v in row)]
+        merged = sorted(str(r) for r in wb.active.merged_cells.ranges)
+        wb.close()
+        return values, merged
+    
+    def test_in_memory_matches_file_mode(self):
+        """Test both modes produce the same final workbook content"""
+        file_output = self._run_pipeline(in_memory=False)
+        memory_output = self._run_pipeline(in_memory=True)
+        
+        self.assertEqual(file_output.name, memory_output.name)
+        self.assertEqual(self._read_values(file_output), self._read_values(memory_output))
+    
+    def test_in_memory_writes_only_final_output(self):
+        """Test intermediate step files are not written unless requested"""
+        final_output = self._run_pipeline(in_memory=True)
+        
+        written = sorted(p.name for p in final_output.parent.iterdir())
+        self.assertEqual(written, [final_output.name])
+    
+    def test_in_memory_extraction_overlaps_fill(self):
+        """Test Steps 2 and 3 run at the same time in memory mode and Step 2 still sees the unfilled source"""
+        barrier = threading.Barrier(2, timeout=10)
+        
+        def after_barrier(method):
+            def run(*args, **kwargs):
+                # Raises BrokenBarrierError if the other step only starts once this one is done
+                barrier.wait()
+                return method(*args, **kwargs)
+            return run
+        
+        with patch.object(StreamlitTSSPipeline, "_run_step2_in_memory", autospec=True,
+                          side_effect=after_barrier(StreamlitTSSPipeline._run_step2_in_memory)), \
+             patch.object(StreamlitTSSPipeline, "_run_step3_in_memory", autospec=True,
+                          side_effect=after_barrier(StreamlitTSSPipeline._run_step3_in_memory)):
+            memory_output = self._run_pipeline(in_memory=True)
+        file_output = self._run_pipeline(in_memory=False)
+        
+        self.assertEqual(self._read_values(file_output), self._read_values(memory_output))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,69 @@
+"""
+Quality reporter tests for TSS Converter
+Tests that concurrent pipeline runs keep their quality reports apart
+"""
+
+import threading
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.quality_reporter import QualityReporter, get_global_reporter, use_reporter, add_warning
+from common.step_scheduler import PipelineStep
+from streamlit_pipeline import StreamlitTSSPipeline
+
+
+class TestReporterBinding(unittest.TestCase):
+    """Test thread-bound reporters"""
+    
+    def test_bound_reporter_used_and_restored(self):
+        """Test reporting goes to the bound reporter and falls back to the global one after"""
+        global_reporter = get_global_reporter()
+        reporter = QualityReporter()
+        
+        with use_reporter(reporter):
+            self.assertIs(get_global_reporter(), reporter)
+            add_warning("step2", "missing_data", "bound")
+        
+        self.assertIs(get_global_reporter(), global_reporter)
+        self.assertEqual([issue.message for issue in reporter.issues], ["bound"])
+        self.assertNotIn("bound", [issue.message for issue in global_reporter.issues])
+
+
+class TestConcurrentPipelineReports(unittest.TestCase):
+    """Test concurrent pipeline runs report to their own reporters"""
+    
+    def test_concurrent_runs_do_not_mix(self):
+        """Test warnings and step metrics of two overlapping runs stay with their pipeline"""
+        barrier = threading.Barrier(2, timeout=10)
+        pipelines = {}
+        
+        def warn(label):
+            def step():
+                barrier.wait()
+                get_global_reporter().add_warning("step2", "missing_data", label)
+                barrier.wait()
+                return label
+            return step
+        
+        def run(label):
+            pipeline = StreamlitTSSPipeline(use_session_state=False)
+            pipelines[label] = pipeline
+            pipeline._run_step_graph([PipelineStep(1, "Warn", warn(label))], None)
+        
+        threads = [threading.Thread(target=run, args=(label,)) for label in ("first", "second")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        for label, pipeline in pipelines.items():
+            self.assertEqual([issue.message for issue in pipeline.reporter.issues], [label])
+            self.assertEqual(len(pipeline.reporter.step_metrics), 1)
+            pipeline.cleanup_session()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Result cache tests for TSS Converter
+Tests content-addressed storage, LRU eviction and hit/miss accounting
+"""
+
+import unittest
+import tempfile
+import shutil
+import os
+import time
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.config import get_config
+from common.result_cache import ResultCache
+from common.security import calculate_file_hash
+
+
+class TestResultCache(unittest.TestCase):
+    """Test disk-backed result cache"""
+    
+    def setUp(self):
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.cache = ResultCache(self.test_dir / "cache", max_size_mb=1, max_age_hours=1)
+        self.result_file = self.test_dir / "result.xlsx"
+        self.result_file.write_bytes(b"PK\x03\x04 final workbook")
+    
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+    
+    def test_miss_then_hit(self):
+        """Test a stored result is returned with its stats"""
+        key = self.cache.make_key(b"upload bytes")
+        self.assertIsNone(self.cache.get(key))
+        
+        self.cache.put(key, self.result_file, {"quality_score": 95.0})
+        cached_path, stats = self.cache.get(key)
+        
+        self.assertEqual(cached_path.read_bytes(), self.result_file.read_bytes())
+        self.assertEqual(stats["quality_score"], 95.0)
+        self.assertEqual(self.cache.get_stats()["hits"], 1)
+        self.assertEqual(self.cache.get_stats()["misses"], 1)
+    
+    def test_key_depends_on_content_and_config(self):
+        """Test keys change with upload bytes and effective configuration"""
+        config = get_config()
+        key = self.cache.make_key(b"upload bytes")
+        
+        self.assertEqual(key, self.cache.make_key(b"upload bytes"))
+        self.assertNotEqual(key, self.cache.make_key(b"other bytes"))
+        self.assertEqual(key, self.cache.key_for_hash(calculate_file_hash(b"upload bytes")))
+        
+        original = config.get("step6.match_marker")
+        try:
+            config.set("step6.match_marker", "Y")
+            self.assertNotEqual(key, self.cache.make_key(b"upload bytes"))
+        finally:
+            config.set("step6.match_marker", original)
+    
+    def test_expired_entries_are_misses(self):
+        """Test entries older than the age limit are dropped"""
+        key = self.cache.make_key(b"old upload")
+        cached_path = self.cache.put(key, self.result_file)
+        
+        old = time.time() - 2 * 3600
+        os.utime(cached_path, (old, old))
+        
+        self.assertIsNone(self.cache.get(key))
+        self.assertFalse(cached_path.exists())
+    
+    def test_size_limit_evicts_least_recently_used(self):
+        """Test the least recently used entry is evicted first"""
+        self.result_file.write_bytes(b"x" * 400 * 1024)
+        
+        first = self.cache.make_key(b"first")
+        second = self.cache.make_key(b"second")
+        first_path = self.cache.put(first, self.result_file)
+        second_path = self.cache.put(second, self.result_file)
+        
+        # Make 'first' the oldest entry, then touch it through a hit
+        old = time.time() - 60
+        os.utime(first_path, (old, old))
+        os.utime(second_path, (old + 1, old + 1))
+        self.assertIsNotNone(self.cache.get(first))
+        
+        # Third entry pushes the cache over 1 MB - 'second' is now least recently used
+        self.cache.put(self.cache.make_key(b"third"), self.result_file)
+        
+        self.assertTrue(first_path.exists())
+        self.assertFalse(second_path.exists())
+        self.assertEqual(self.cache.get_stats()["entries"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
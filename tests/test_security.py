@@ -5,7 +5,10 @@ Tests file validation, malicious content detection, and rate limiting
 
 import unittest
 import tempfile
+import shutil
 import os
+import io
+import zipfile
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -14,6 +17,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from common.validation import FileValidator
 from common.exceptions import FileFormatError, TSConverterError
+from common.security import (FileValidator as UploadValidator, ContentScanner, SecurityError, inspect_archive,
+                             ingest_upload, map_file, calculate_file_hash)
 
 
 class TestFileSecurityValidation(unittest.TestCase):
@@ -24,7 +29,6 @@ class TestFileSecurityValidation(unittest.TestCase):
         
     def tearDown(self):
         # Clean up test files
-        import shutil
         shutil.rmtree(self.test_dir, ignore_errors=True)
     
     def create_test_file(self, content: bytes, filename: str = "test.xlsx"):
@@ -118,6 +122,166 @@ class TestFileSecurityValidation(unittest.TestCase):
         self.assertIn("Empty file", str(ctx.exception))
 
 
+def excel_archive(**extra):
+    """ZIP bytes with the parts of a minimal Excel file plus extra members"""
+    members = {
+        '[Content_Types].xml': '<Types/>',
+        '_rels/.rels': '<Relationships/>',
+        'xl/workbook.xml': '<workbook/>',
+        'xl/styles.xml': '<styleSheet/>',
+        'xl/worksheets/sheet1.xml': '<worksheet/>'
+    }
+    members.update(extra)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for name, content in members.items():
+            zf.writestr(name, content)
+    return buffer.getvalue()
+
+
+class TestArchiveProfile(unittest.TestCase):
+    """Test single-pass archive inspection of uploads"""
+    
+    def test_profile_of_excel_archive(self):
+        """Test member names, sizes and ratios are read from the central directory"""
+        data = excel_archive(**{'xl/sharedStrings.xml': 'x' * 10000})
+        profile = inspect_archive(data)
+        
+        self.assertTrue(profile.is_zip)
+        self.assertEqual(profile.member_count, 6)
+        self.assertEqual(profile.worksheet_count, 1)
+        self.assertTrue(profile.has_member('xl/workbook.xml'))
+        self.assertEqual(profile.suspicious_members, ())
+        self.assertEqual(profile.archive_size, len(data))
+        self.assertGreater(profile.max_member_ratio, 50)
+        with self.assertRaises(Exception):
+            profile.is_zip = False
+    
+    def test_profile_of_non_zip_data(self):
+        """Test data that is not a ZIP file gives an empty profile with an error"""
+        profile = inspect_archive(b'PK\x03\x04' + b'\x00' * 100)
+        
+        self.assertFalse(profile.is_zip)
+        self.assertEqual(profile.member_count, 0)
+        self.assertIsNotNone(profile.error)
+    
+    def test_validator_shares_one_inspection(self):
+        """Test every check of validate_file uses the same archive profile"""
+        validator = UploadValidator(strict_mode=True)
+        data = excel_archive()
+        
+        with patch('common.security.inspect_archive', wraps=inspect_archive) as inspect:
+            is_valid, error = validator.validate_file(data, 'upload.xlsx')
+        
+        self.assertTrue(is_valid, error)
+        self.assertEqual(inspect.call_count, 1)
+        self.assertEqual(validator.archive_profile.member_count, 5)
+    
+    def test_suspicious_member_rejected(self):
+        """Test executable members are rejected in strict mode"""
+        validator = UploadValidator(strict_mode=True)
+        
+        is_valid, error = validator.validate_file(excel_archive(**{'xl/payload.exe': 'MZ'}), 'upload.xlsx')
+        
+        self.assertFalse(is_valid)
+        self.assertEqual(validator.archive_profile.suspicious_members, ('xl/payload.exe',))
+    
+    def test_zip_bomb_ratio_rejected(self):
+        """Test a highly compressed archive is rejected in strict mode"""
+        validator = UploadValidator(strict_mode=True)
+        
+        is_valid, error = validator.validate_file(excel_archive(**{'xl/media/pad.bin': b'\x00' * 2000000}),
+                                                  'upload.xlsx')
+        
+        self.assertFalse(is_valid)
+        self.assertIn("malicious", error)
+
+
+class TestContentScanner(unittest.TestCase):
+    """Test the streaming scan of decompressed archive content"""
+    
+    def test_pattern_split_across_chunks_found(self):
+        """Test patterns inside deflated members are found across chunk boundaries"""
+        # "<SC" ends the tenth chunk and "RIPT>" starts the next one
+        data = excel_archive(**{'xl/sharedStrings.xml': 'x' * (4096 * 10 - 3) + '<SCRIPT>'})
+        
+        result = ContentScanner(chunk_size=4096).scan(data)
+        
+        self.assertEqual(result.findings, (('xl/sharedStrings.xml', ('<script',)),))
+        self.assertEqual(result.patterns, ['<script'])
+        self.assertFalse(result.budget_exceeded)
+    
+    def test_member_scan_stops_at_first_match(self):
+        """Test a member is not read past the chunk with its first match"""
+        data = excel_archive(**{'xl/sharedStrings.xml': 'javascript:' + 'x' * 1000000})
+        
+        result = ContentScanner(chunk_size=1024).scan(data, stop_on_first=True)
+        
+        self.assertEqual(result.patterns, ['javascript:'])
+        self.assertLess(result.scanned_bytes, 10000)
+    
+    def test_decompressed_budget_enforced(self):
+        """Test scanning stops once the decompressed byte budget is spent"""
+        data = excel_archive(**{'xl/sharedStrings.xml': 'x' * 100000})
+        
+        self.assertTrue(ContentScanner(max_decompressed_size=50000).scan(data).budget_exceeded)
+        self.assertFalse(ContentScanner(max_decompressed_size=200000).scan(data).budget_exceeded)
+    
+    def test_clean_archive_passes(self):
+        """Test an archive without script content has no findings"""
+        result = ContentScanner().scan(excel_archive())
+        
+        self.assertEqual(result.findings, ())
+        self.assertGreater(result.scanned_bytes, 0)
+
+
+class TestUploadIngest(unittest.TestCase):
+    """Test single-pass upload persistence and validation of mapped files"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.data = excel_archive(**{'xl/sharedStrings.xml': 'x' * 50000})
+    
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_bytes_and_stream_ingested_alike(self):
+        """Test content and streams are written, hashed and sniffed in the same pass"""
+        from_bytes = ingest_upload(self.data, self.temp_dir / "a.xlsx", chunk_size=1000)
+        from_stream = ingest_upload(io.BytesIO(self.data), self.temp_dir / "b.xlsx", chunk_size=1000)
+        
+        for upload in (from_bytes, from_stream):
+            self.assertEqual(upload.path.read_bytes(), self.data)
+            self.assertEqual(upload.size, len(self.data))
+            self.assertEqual(upload.file_hash, calculate_file_hash(self.data))
+            self.assertTrue(upload.has_excel_signature)
+        self.assertFalse(ingest_upload(b"plain text", self.temp_dir / "c.xlsx").has_excel_signature)
+    
+    def test_size_limit_removes_partial_file(self):
+        """Test an oversized upload is rejected while streaming and leaves no file"""
+        destination = self.temp_dir / "big.xlsx"
+        
+        with self.assertRaises(SecurityError):
+            ingest_upload(io.BytesIO(self.data), destination, max_size=len(self.data) - 1, chunk_size=1000)
+        self.assertFalse(destination.exists())
+    
+    def test_mapped_file_validated_like_bytes(self):
+        """Test validating an mmap of the saved file matches validating its bytes"""
+        path = ingest_upload(self.data, self.temp_dir / "book.xlsx").path
+        validator = UploadValidator()
+        expected = validator.validate_file(self.data, "book.xlsx")
+        expected_profile = validator.archive_profile
+        
+        with map_file(path) as mapped:
+            self.assertEqual(validator.validate_file(mapped, "book.xlsx"), expected)
+            self.assertEqual(ContentScanner().scan(mapped), ContentScanner().scan(self.data))
+        self.assertEqual(validator.archive_profile, expected_profile)
+        
+        with map_file(ingest_upload(b"", self.temp_dir / "empty.xlsx").path) as mapped:
+            self.assertEqual(mapped, b"")
+
+
 class TestIntegrationSecurity(unittest.TestCase):
     """Integration tests for security features"""
     
@@ -0,0 +1,110 @@
+"""
+Session lock registry tests for TSS Converter
+Tests idle and capacity eviction of per-session locks
+"""
+
+import time
+import threading
+import unittest
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.session_manager import SessionLockRegistry, ThreadSafeSessionManager
+
+
+class TestSessionLockRegistry(unittest.TestCase):
+    """Test the per-session lock registry"""
+    
+    def setUp(self):
+        self.registry = SessionLockRegistry(ttl_seconds=60, max_entries=3, sweep_interval=0.05)
+    
+    def tearDown(self):
+        self.registry.stop_sweeper(timeout=1)
+    
+    def test_same_session_shares_lock(self):
+        """Test a session gets the same lock until its entry is evicted"""
+        with self.registry.hold("a") as first:
+            pass
+        with self.registry.hold("a") as second:
+            self.assertIs(first, second)
+        
+        self.assertEqual(self.registry.sweep(max_idle=0), 1)
+        with self.registry.hold("a") as third:
+            self.assertIsNot(first, third)
+        self.assertEqual(self.registry.get_stats()["created"], 2)
+    
+    def test_held_entries_survive_sweep(self):
+        """Test only idle entries nobody holds are swept"""
+        with self.registry.hold("idle"):
+            pass
+        with self.registry.hold("busy"):
+            self.assertEqual(self.registry.sweep(max_idle=0), 1)
+            self.assertEqual(self.registry.get_stats()["held"], 1)
+        
+        self.assertEqual(self.registry.sweep(max_idle=60), 0)
+        self.assertEqual(self.registry.get_stats()["entries"], 1)
+    
+    def test_capacity_evicts_least_recently_used(self):
+        """Test the registry stays at max_entries by dropping the oldest idle entries"""
+        for session_id in ("a", "b", "c"):
+            with self.registry.hold(session_id):
+                pass
+        with self.registry.hold("a"):
+            pass
+        with self.registry.hold("d"):
+            pass
+        
+        stats = self.registry.get_stats()
+        self.assertEqual((stats["entries"], stats["evicted_capacity"]), (3, 1))
+        self.assertNotIn("b", self.registry._entries)
+    
+    def test_background_sweeper_evicts_idle_entries(self):
+        """Test the sweeper thread drops entries idle longer than the TTL"""
+        self.registry.ttl_seconds = 0
+        for index in range(3):
+            with self.registry.hold(f"thread_{index}"):
+                pass
+        
+        self.registry.start_sweeper()
+        self.registry.start_sweeper()
+        deadline = time.time() + 2
+        while self.registry.get_stats()["entries"] and time.time() < deadline:
+            time.sleep(0.01)
+        
+        stats = self.registry.get_stats()
+        self.assertEqual(stats["entries"], 0)
+        self.assertEqual(stats["evicted_idle"], 3)
+        self.assertTrue(stats["sweeper_running"])
+        self.assertEqual(sum(1 for thread in threading.enumerate() if thread.name == "session-lock-sweeper"), 1)
+
+
+class TestSessionManagerLocks(unittest.TestCase):
+    """Test session manager lock lifecycle"""
+    
+    def test_worker_thread_locks_are_cleaned_up(self):
+        """Test the thread-ID fallback no longer leaves a lock behind per worker thread"""
+        manager = ThreadSafeSessionManager()
+        manager.cleanup_old_sessions(max_age_hours=0)
+        
+        # Threads stay alive together so each gets its own thread ID
+        barrier = threading.Barrier(5)
+        
+        def use_lock():
+            with manager.session_lock(timeout=1):
+                barrier.wait(timeout=5)
+        
+        threads = [threading.Thread(target=use_lock) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertGreaterEqual(manager.get_lock_stats()["entries"], 5)
+        self.assertGreaterEqual(manager.cleanup_old_sessions(max_age_hours=0), 5)
+        self.assertEqual(manager.get_lock_stats()["entries"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Sheet snapshot tests for TSS Converter
+Tests value normalization, row/column indexes and write-through updates
+"""
+
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+import openpyxl
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.sheet_snapshot import SheetSnapshot, get_sheet_snapshot, invalidate_sheet_snapshot
+
+
+class TestSheetSnapshot(unittest.TestCase):
+    """Test normalized worksheet snapshots"""
+    
+    def setUp(self):
+        self.workbook = openpyxl.Workbook()
+        self.worksheet = self.workbook.active
+        self.worksheet.title = "M-Textile"
+        self.worksheet["A1"] = "  Product combination  "
+        self.worksheet["B2"] = 42
+        self.worksheet["C2"] = datetime(2024, 1, 2, 3, 4, 5)
+        self.worksheet["A3"] = "#N/A"
+        self.worksheet["B5"] = "   "
+        self.worksheet["C6"] = "last"
+    
+    def test_values_match_safe_cell_value(self):
+        """Test cells are normalized like the steps' safe_cell_value"""
+        snapshot = SheetSnapshot(self.worksheet)
+        
+        self.assertEqual(snapshot.value(1, 1), "Product combination")
+        self.assertEqual(snapshot.value(2, 2), "42")
+        self.assertEqual(snapshot.value(2, 3), "2024-01-02 03:04:05")
+        self.assertEqual(snapshot.value(3, 1), "")
+        self.assertEqual(snapshot.error_value(3, 1), "#N/A")
+        self.assertEqual(snapshot.text(3, 1), "#N/A")
+        self.assertEqual(snapshot.value(100, 100), "")
+    
+    def test_row_and_column_indexes(self):
+        """Test has-data flags and last non-empty rows"""
+        snapshot = SheetSnapshot(self.worksheet)
+        
+        self.assertTrue(snapshot.has_data(3))  # Formula errors count as data
+        self.assertFalse(snapshot.has_data(4))
+        self.assertFalse(snapshot.has_data(5))  # Blank strings do not
+        self.assertEqual(snapshot.last_data_row, 6)
+        self.assertEqual(snapshot.column_last_row(1), 1)
+        self.assertEqual(snapshot.column_last_row(3), 6)
+    
+    def test_column_values(self):
+        """Test a column range is read as one list, padded past the sheet bounds"""
+        snapshot = SheetSnapshot(self.worksheet)
+        
+        self.assertEqual(snapshot.column_values(3, 2, 7), ["2024-01-02 03:04:05", "", "", "", "last", ""])
+        self.assertEqual(snapshot.column_values(1, 1, 3), ["Product combination", "", ""])
+        self.assertEqual(snapshot.column_values(9, 1, 2), ["", ""])
+    
+    def test_writes_go_through_to_worksheet(self):
+        """Test set_value and delete_rows keep worksheet and snapshot in sync"""
+        snapshot = SheetSnapshot(self.worksheet)
+        
+        snapshot.set_value(4, 1, "filled")
+        self.assertEqual(self.worksheet["A4"].value, "filled")
+        self.assertTrue(snapshot.has_data(4))
+        
+        snapshot.delete_rows(2, 2)
+        self.assertEqual(self.worksheet["A2"].value, "filled")
+        self.assertEqual(snapshot.value(2, 1), "filled")
+        self.assertEqual(snapshot.value(4, 3), "last")
+        self.assertEqual(snapshot.column_last_row(3), 4)
+        self.assertIsNone(snapshot.error_value(3, 1))
+    
+    def test_delete_row_set_matches_repeated_deletes(self):
+        """Test deleting scattered rows at once equals deleting them one by one"""
+        self._check_delete_row_set()
+    
+    def test_delete_row_set_falls_back_to_public_api(self):
+        """Test worksheets without the openpyxl cell store get one delete_rows() call per run"""
+        with patch("common.sheet_snapshot._has_cell_store", return_value=False), \
+             patch.object(self.worksheet, "delete_rows", wraps=self.worksheet.delete_rows) as delete_rows:
+            self._check_delete_row_set()
+        
+        self.assertEqual([c.args for c in delete_rows.call_args_list], [(12, 1), (8, 2), (2, 1)])
+    
+    def _check_delete_row_set(self):
+        for row in range(7, 13):
+            self.worksheet.cell(row, 1, f"row {row}")
+        expected_wb = openpyxl.Workbook()
+        expected_ws = expected_wb.active
+        for row in self.worksheet.iter_rows():
+            for cell in row:
+                expected_ws.cell(cell.row, cell.column, cell.value)
+        
+        doomed = [2, 8, 9, 12]
+        expected = SheetSnapshot(expected_ws)
+        for row in sorted(doomed, reverse=True):
+            expected.delete_rows(row, 1)
+        
+        snapshot = SheetSnapshot(self.worksheet)
+        self.assertEqual(snapshot.delete_row_set(doomed + [8, 99]), 4)
+        
+        self.assertEqual(snapshot.max_row, expected.max_row)
+        for row in range(1, expected.max_row + 1):
+            self.assertEqual(snapshot.row_values(row), expected.row_values(row))
+            self.assertEqual([c.value for c in self.worksheet[row]], [c.value for c in expected_ws[row]])
+        self.assertEqual(snapshot.error_value(2, 1), "#N/A")
+        self.assertEqual(self.worksheet.max_row, 8)
+    
+    def test_merged_anchor_index(self):
+        """Test merged cells resolve to the top-left cell of their range"""
+        self.worksheet.merge_cells("E1:F3")
+        snapshot = SheetSnapshot(self.worksheet)
+        
+        self.assertEqual(snapshot.merged_anchor(1, 5), (1, 5))
+        self.assertEqual(snapshot.merged_anchor(3, 6), (1, 5))
+        self.assertIsNone(snapshot.merged_anchor(4, 6))
+        self.assertIsNone(snapshot.merged_anchor(1, 1))
+    
+    def test_hidden_rows_and_columns(self):
+        """Test hidden rows/columns are collected once from the sheet dimensions"""
+        self.worksheet.row_dimensions[2].hidden = True
+        self.worksheet.column_dimensions["B"].hidden = True
+        snapshot = SheetSnapshot(self.worksheet)
+        
+        self.assertEqual(snapshot.hidden_rows, {2})
+        self.assertEqual(snapshot.hidden_columns, {2})
+        self.assertTrue(snapshot.is_hidden(2, 1))
+        self.assertTrue(snapshot.is_hidden(6, 2))
+        self.assertFalse(snapshot.is_hidden(6, 3))
+        self.assertEqual(snapshot.visible_columns(1, 4), [1, 3, 4])
+    
+    def test_header_index(self):
+        """Test header lookups are answered from one indexed pass"""
+        self.worksheet["D4"] = "Article name"
+        self.worksheet["B4"] = "PRODUCT NAME"
+        snapshot = SheetSnapshot(self.worksheet)
+        index = snapshot.header_index()
+        
+        self.assertEqual(index.find(["article name", "product name"]),
+                         [(4, 2, "product name"), (4, 4, "article name")])
+        self.assertEqual(index.find_first(["product combination"]), (1, 1, "product combination"))
+        self.assertEqual(index.find(["article name"], max_col=3), [])
+        self.assertEqual(index.find(["name"], skip=lambda row, col: col == 2), [(4, 4, "name")])
+        self.assertEqual(index.error_cells, [(3, 1)])
+        self.assertIs(snapshot.header_index(), index)
+        
+        # Writes into the indexed rows invalidate the index
+        snapshot.set_value(2, 1, "Article name")
+        self.assertEqual(snapshot.header_index().find_first(["article name"]), (2, 1, "article name"))
+    
+    def test_shared_snapshot_per_worksheet(self):
+        """Test snapshots are cached per worksheet until invalidated"""
+        snapshot = get_sheet_snapshot(self.worksheet)
+        self.assertIs(get_sheet_snapshot(self.worksheet), snapshot)
+        self.assertIs(get_sheet_snapshot(snapshot), snapshot)
+        
+        invalidate_sheet_snapshot(self.worksheet)
+        self.assertIsNot(get_sheet_snapshot(self.worksheet), snapshot)
+
+
+if __name__ == '__main__':
+    unittest.main()
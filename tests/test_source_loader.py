@@ -0,0 +1,83 @@
+"""
+Source loader tests for TSS Converter
+Tests streaming snapshots match snapshots of fully loaded worksheets
+"""
+
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+
+import openpyxl
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from common.sheet_snapshot import SheetSnapshot
+from common.source_loader import open_source_workbook
+
+
+class TestSourceWorkbook(unittest.TestCase):
+    """Test lazily streamed source workbooks"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.source_file = self.temp_dir / "source.xlsx"
+        
+        workbook = openpyxl.Workbook()
+        worksheet = workbook.active
+        worksheet.title = "F-Product"
+        worksheet["A1"] = "Product combination"
+        worksheet["B3"] = "  value  "
+        worksheet["C4"] = "#REF!"
+        worksheet["E7"] = 12.5
+        worksheet.merge_cells("B5:C6")
+        worksheet.row_dimensions[3].hidden = True
+        worksheet.column_dimensions["D"].hidden = True
+        workbook.create_sheet("Notes")["A1"] = "ignored"
+        workbook.save(str(self.source_file))
+        workbook.close()
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_snapshot_matches_full_load(self):
+        """Test streamed sheets read the same values, merges and hidden cells"""
+        full_wb = openpyxl.load_workbook(str(self.source_file))
+        expected = SheetSnapshot(full_wb["F-Product"])
+        
+        source_wb = open_source_workbook(self.source_file)
+        try:
+            snapshot = source_wb["F-Product"]
+            
+            self.assertEqual((snapshot.max_row, snapshot.max_column), (expected.max_row, expected.max_column))
+            for row in range(1, expected.max_row + 1):
+                self.assertEqual(snapshot.row_values(row), expected.row_values(row))
+            self.assertEqual(snapshot.error_value(4, 3), "#REF!")
+            self.assertEqual(snapshot.merged_anchor(6, 3), (5, 2))
+            self.assertEqual(snapshot.hidden_rows, expected.hidden_rows)
+            self.assertEqual(snapshot.hidden_columns, expected.hidden_columns)
+        finally:
+            source_wb.close()
+            full_wb.close()
+    
+    def test_sheets_load_lazily(self):
+        """Test sheets are only read on access and writes stay in the snapshot"""
+        source_wb = open_source_workbook(self.source_file)
+        try:
+            self.assertEqual(source_wb.sheetnames, ["F-Product", "Notes"])
+            self.assertEqual(source_wb.loaded_sheetnames, [])
+            
+            snapshot = source_wb["F-Product"]
+            self.assertIs(source_wb["F-Product"], snapshot)
+            self.assertEqual(source_wb.loaded_sheetnames, ["F-Product"])
+            self.assertIsNone(snapshot.worksheet)
+            
+            snapshot.set_value(2, 1, "filled")
+            self.assertEqual(source_wb["F-Product"].value(2, 1), "filled")
+        finally:
+            source_wb.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
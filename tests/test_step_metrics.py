@@ -0,0 +1,120 @@
+"""
+Step metrics tests for TSS Converter
+Tests per-step counters, thread attribution and the JSON-lines metrics file
+"""
+
+import unittest
+import json
+import tempfile
+import shutil
+import threading
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import openpyxl
+
+from common.sheet_snapshot import SheetSnapshot
+from common.step_metrics import (
+    measure_step, count_cells_read, count_cells_written, record_rows, append_metrics_file
+)
+
+
+class TestStepMetrics(unittest.TestCase):
+    """Test step measurement"""
+    
+    def test_counters_attributed_to_step(self):
+        """Counters reported inside a measured step end up in its metrics"""
+        with measure_step(3, "Pre-mapping Fill") as metrics:
+            count_cells_read(10)
+            count_cells_written(4)
+            count_cells_written(1)
+            record_rows(rows_in=7, rows_out=5)
+        
+        self.assertEqual(metrics.cells_read, 10)
+        self.assertEqual(metrics.cells_written, 5)
+        self.assertEqual((metrics.rows_in, metrics.rows_out), (7, 5))
+        self.assertTrue(metrics.success)
+        self.assertGreaterEqual(metrics.wall_time, 0)
+        self.assertGreaterEqual(metrics.cpu_time, 0)
+    
+    def test_counters_outside_step_are_ignored(self):
+        """Counting without a measured step is a no-op"""
+        count_cells_read(5)
+        record_rows(rows_in=1)
+        with measure_step(1, "Create Template") as metrics:
+            pass
+        self.assertEqual(metrics.cells_read, 0)
+        self.assertIsNone(metrics.rows_in)
+    
+    def test_failed_step(self):
+        """A step that raises is recorded as failed"""
+        with self.assertRaises(ValueError):
+            with measure_step(2, "Extract Data") as metrics:
+                raise ValueError("boom")
+        self.assertFalse(metrics.success)
+    
+    def test_concurrent_steps_counted_separately(self):
+        """Steps running on different threads do not share counters"""
+        results = {}
+        barrier = threading.Barrier(2)
+        
+        def run(step_num, cells):
+            with measure_step(step_num, f"Step {step_num}") as metrics:
+                barrier.wait(5)
+                count_cells_written(cells)
+                barrier.wait(5)
+            results[step_num] = metrics
+        
+        threads = [threading.Thread(target=run, args=(1, 3)), threading.Thread(target=run, args=(2, 8))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(results[1].cells_written, 3)
+        self.assertEqual(results[2].cells_written, 8)
+    
+    def test_trace_memory(self):
+        """tracemalloc peak is reported when requested"""
+        with measure_step(4, "Data Mapping", trace_memory=True) as metrics:
+            data = [str(i) for i in range(10000)]
+        self.assertGreater(metrics.traced_peak_kb, 0)
+        del data
+    
+    def test_snapshot_counts_cells(self):
+        """Sheet snapshots report scanned and written cells"""
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        ws["A1"] = "Header"
+        ws["B2"] = 5
+        
+        with measure_step(5, "Filter & Deduplicate") as metrics:
+            snapshot = SheetSnapshot(ws)
+            snapshot.set_value(3, 1, "new")
+        
+        self.assertEqual(metrics.cells_read, 2)
+        self.assertEqual(metrics.cells_written, 1)
+    
+    def test_append_metrics_file(self):
+        """Records are appended as JSON lines with the context fields"""
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            metrics_file = temp_dir / "metrics" / "steps.jsonl"
+            with measure_step(6, "Article Cross-Reference") as metrics:
+                count_cells_written(2)
+            
+            append_metrics_file(metrics_file, [metrics.to_dict()], {"session_id": "abc"})
+            append_metrics_file(metrics_file, [metrics.to_dict()], {"session_id": "def"})
+            
+            lines = [json.loads(line) for line in metrics_file.read_text(encoding='utf-8').splitlines()]
+            self.assertEqual([line["session_id"] for line in lines], ["abc", "def"])
+            self.assertEqual(lines[0]["step_num"], 6)
+            self.assertEqual(lines[0]["cells_written"], 2)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Synthetic workbook tests for TSS Converter
+Tests the generated workbook shape against the steps that read it
+"""
+
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import openpyxl
+
+from benchmarks.synthetic_workbook import SyntheticWorkbookSpec, generate_workbook
+from benchmarks.workbooks import count_requirement_rows
+from step2_data_extraction import DataExtractor
+from step3_pre_mapping_fill import PreMappingFiller
+from step4_data_mapping import DataMapper
+from step5_filter_deduplicate import DataFilter
+from step6_article_crossref import ArticleCrossReference
+
+
+class TestSyntheticWorkbook(unittest.TestCase):
+    """Test synthetic TSS workbook generation"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.spec = SyntheticWorkbookSpec(f_sheets=1, m_sheets=2, c_sheets=1, p_sheets=1, rows_per_sheet=40,
+                                          articles=4, hidden_rows_per_sheet=2, hidden_columns_per_sheet=2,
+                                          na_ratio=0.1, seed=7)
+        self.workbook = generate_workbook(self.temp_dir / "synthetic.xlsx", self.spec)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_sheets_and_row_counts(self):
+        """Every typed sheet holds rows_per_sheet requirement rows"""
+        counts = count_requirement_rows(self.workbook)
+        
+        self.assertEqual(list(counts), ["F-Finished product", "M-Textile", "M-Plastic and rubber",
+                                        "C-Zipper", "P- Inorganic Coating"])
+        self.assertEqual(sum(counts.values()), self.spec.total_rows)
+        self.assertEqual(SyntheticWorkbookSpec.for_total_rows(1001).total_rows, 1005)
+    
+    def test_hidden_rows_columns_and_merges(self):
+        """Hidden rows/columns and merged ranges are written as configured"""
+        ws = openpyxl.load_workbook(str(self.workbook))["M-Textile"]
+        
+        self.assertEqual(sum(1 for dim in ws.row_dimensions.values() if dim.hidden), 2)
+        self.assertEqual(sum(1 for dim in ws.column_dimensions.values() if dim.hidden), 2)
+        merged = {str(cell_range) for cell_range in ws.merged_cells.ranges}
+        self.assertIn("E1:Q1", merged)
+        self.assertIn("L16:L18", merged)
+    
+    def test_generation_is_deterministic(self):
+        """The same spec produces the same cell values"""
+        again = generate_workbook(self.temp_dir / "again.xlsx", self.spec)
+        first = openpyxl.load_workbook(str(self.workbook), read_only=True)
+        second = openpyxl.load_workbook(str(again), read_only=True)
+        for name in first.sheetnames:
+            self.assertEqual(list(first[name].values), list(second[name].values))
+    
+    def test_steps_process_generated_workbook(self):
+        """Articles are extracted, every row is mapped and SD duplicates are removed"""
+        source_wb = openpyxl.load_workbook(str(self.workbook))
+        
+        articles_ws = openpyxl.Workbook().active
+        self.assertEqual(DataExtractor(str(self.temp_dir)).extract_m_textile_data(articles_ws, source_wb), 4)
+        
+        sheets, cells = PreMappingFiller(str(self.temp_dir)).fill_workbook(source_wb)
+        self.assertEqual(sheets, 4)  # F sheets have no fill columns
+        self.assertGreater(cells, 0)
+        
+        target_ws = openpyxl.Workbook().active
+        next_row = DataMapper(str(self.temp_dir)).map_workbook(source_wb, target_ws)
+        self.assertEqual(next_row - 11, self.spec.total_rows)
+        
+        stats = DataFilter(str(self.temp_dir)).filter_worksheet(target_ws)
+        self.assertGreater(stats['na_removed'], 0)
+        self.assertGreater(stats['sd_removed'], 0)
+    
+    def test_row_streams_match_worksheet_steps(self):
+        """Steps 4-6 on row streams leave the same rows as the worksheet steps"""
+        source_wb = openpyxl.load_workbook(str(self.workbook))
+        articles_ws = openpyxl.Workbook().active
+        DataExtractor(str(self.temp_dir)).extract_m_textile_data(articles_ws, source_wb)
+        PreMappingFiller(str(self.temp_dir)).fill_workbook(source_wb)
+        
+        target_ws = openpyxl.Workbook().active
+        for cell in articles_ws[1]:
+            target_ws.cell(1, cell.column, cell.value)
+        mapper = DataMapper(str(self.temp_dir))
+        mapper.map_workbook(source_wb, target_ws)
+        filter_dedup = DataFilter(str(self.temp_dir))
+        crossref = ArticleCrossReference(str(self.temp_dir))
+        article_headers = crossref.find_article_headers(target_ws)
+        self.assertEqual(len(article_headers), 4)
+        
+        blocks = mapper.find_row_blocks(source_wb)
+        plan = filter_dedup.plan_rows(mapper.iter_row_blocks(source_wb, blocks))
+        filtered = filter_dedup.filter_rows(mapper.iter_row_blocks(source_wb, blocks), plan)
+        streamed = [tuple(row) for row in crossref.crossref_rows(filtered, article_headers)]
+        
+        stats = filter_dedup.filter_worksheet(target_ws)
+        crossref.crossref_worksheet(target_ws)
+        expected = list(target_ws.iter_rows(min_row=11, max_row=target_ws.max_row, values_only=True))
+        
+        self.assertEqual(plan.rows_out, stats['final_rows'] - 10)
+        self.assertEqual(len(streamed), len(expected))
+        self.assertTrue(any("X" in row for row in streamed))
+        for streamed_row, expected_row in zip(streamed, expected):
+            width = max(len(streamed_row), len(expected_row))
+            self.assertEqual(streamed_row + (None,) * (width - len(streamed_row)),
+                             expected_row + (None,) * (width - len(expected_row)))
+
+
+if __name__ == '__main__':
+    unittest.main()
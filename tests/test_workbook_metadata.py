@@ -0,0 +1,116 @@
+"""
+Workbook metadata cache tests for TSS Converter
+Tests that validators answer from cached sheet metadata instead of reopening files
+"""
+
+import os
+import unittest
+import tempfile
+import shutil
+from pathlib import Path
+from unittest.mock import patch
+
+import sys
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import openpyxl
+
+from common.workbook_metadata import WorkbookMetadataCache, get_metadata_cache, populate_workbook_metadata
+from common.validation import ExcelStructureValidator, validate_step5_input
+from common.exceptions import ValidationError
+
+
+class TestWorkbookMetadataCache(unittest.TestCase):
+    """Test metadata caching per file version"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.file = self.temp_dir / "book.xlsx"
+        self.wb = openpyxl.Workbook()
+        ws = self.wb.active
+        ws.title = "Data"
+        ws["B2"] = "Requirement source"
+        for row in range(4, 10):
+            ws.cell(row, 1, f"Row {row}")
+        ws.cell(12, 10, "  ")
+        self.wb.create_sheet("Notes")
+        self.wb.save(str(self.file))
+        self.cache = WorkbookMetadataCache()
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_metadata_read_once_per_version(self):
+        """Test repeated lookups are hits and a rewritten file is read again"""
+        metadata = self.cache.get(self.file)
+        self.assertIs(self.cache.get(self.file), metadata)
+        self.assertEqual(metadata.sheetnames, ["Data", "Notes"])
+        self.assertEqual((metadata.sheet().max_row, metadata.sheet().max_column), (12, 10))
+        
+        self.wb["Notes"]["A1"] = "changed"
+        self.wb.save(str(self.file))
+        os.utime(self.file, ns=(1, 1))
+        
+        self.assertIsNot(self.cache.get(self.file), metadata)
+        self.assertEqual(self.cache.get_stats(), {"entries": 1, "hits": 1, "misses": 2})
+    
+    def test_headers_and_data_rows(self):
+        """Test header search and data row counting match the validators' rules"""
+        sheet, data_rows = self.cache.data_rows(self.file, "Data", start_row=4)
+        
+        self.assertEqual(data_rows, 6)
+        self.assertEqual(sheet.find_header("requirement", 10), {"row": 2, "column": 2, "value": "Requirement source"})
+        self.assertIsNone(sheet.find_header("requirement", 1))
+    
+    def test_populated_metadata_matches_file(self):
+        """Test metadata recorded from the saved workbook equals metadata read from the file"""
+        populated = self.cache.populate(self.file, self.wb)
+        read = WorkbookMetadataCache().get(self.file)
+        
+        self.assertEqual(populated.sheetnames, read.sheetnames)
+        self.assertEqual(populated.sheet("Data").header_rows, read.sheet("Data").header_rows)
+        self.assertEqual(populated.sheet("Data").max_row, read.sheet("Data").max_row)
+        self.assertEqual(populated.sheet("Data").data_rows(4), 6)
+        self.assertEqual(self.cache.get_stats()["hits"], 0)
+        self.assertIs(self.cache.get(self.file), populated)
+
+
+class TestCachedValidation(unittest.TestCase):
+    """Test step input validation reuses the metadata of the written file"""
+    
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        get_metadata_cache().invalidate()
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_step_output_validated_without_reopening(self):
+        """Test a populated step output passes validation without openpyxl loads"""
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        for row in range(1, 20):
+            for col in range(1, 11):
+                ws.cell(row, col, f"{row}-{col}")
+        output_file = self.temp_dir / "step4.xlsx"
+        wb.save(str(output_file))
+        populate_workbook_metadata(output_file, wb)
+        
+        with patch("common.workbook_metadata.openpyxl.load_workbook") as load:
+            self.assertTrue(validate_step5_input(output_file))
+            ExcelStructureValidator.validate_headers_exist(output_file, ["5-3"])
+        load.assert_not_called()
+    
+    def test_missing_columns_still_rejected(self):
+        """Test validation failures are reported from cached metadata"""
+        wb = openpyxl.Workbook()
+        wb.active["C5"] = "too narrow"
+        output_file = self.temp_dir / "narrow.xlsx"
+        wb.save(str(output_file))
+        
+        with self.assertRaises(ValidationError):
+            validate_step5_input(output_file)
+
+
+if __name__ == '__main__':
+    unittest.main()
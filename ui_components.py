@@ -157,7 +157,7 @@ def render_file_upload_area() -> Optional[tuple[bytes, str]]:
     
     if uploaded_file is not None:
         # Validate file size
-        file_size_mb = len(uploaded_file.getvalue()) / (1024 * 1024)
+        file_size_mb = uploaded_file.size / (1024 * 1024)
         if file_size_mb > STREAMLIT_CONFIG['max_file_size_mb']:
             render_error_message(
                 f"File too large! Maximum size: {STREAMLIT_CONFIG['max_file_size_mb']}MB"